@@ -9,6 +9,11 @@ import os
 from dotenv import load_dotenv
 from openai import OpenAI
 
+try:
+    from ..utils.asignacion import asignacion_optima
+except ImportError:
+    from utils.asignacion import asignacion_optima
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -80,6 +85,9 @@ class ConciliadorIA:
             # Parsear respuesta
             items_conciliados = self._parse_ai_response(response)
             
+            # Un comprobante no puede quedar en más de un movimiento
+            items_conciliados = self.resolver_comprobantes_repetidos(items_conciliados)
+            
             logger.info(f"Conciliación completada. {len(items_conciliados)} items procesados")
             return items_conciliados
             
@@ -200,6 +208,41 @@ IMPORTANTE: Responde ÚNICAMENTE con el JSON válido, sin texto adicional.
             logger.error(f"Error procesando respuesta de la IA: {e}")
             return []
     
+    def resolver_comprobantes_repetidos(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        La IA puede asignar el mismo comprobante a varios movimientos. Entre los
+        items conciliados o parciales se busca el emparejamiento uno a uno de
+        confianza total máxima; los que se quedan sin su comprobante pasan a
+        "pendiente".
+        """
+        comprobantes: Dict[str, int] = {}
+        candidatos = []
+        for i, item in enumerate(items):
+            numero = str(item.get('numero_comprobante') or '').strip()
+            if numero and item.get('estado') in ('conciliado', 'parcial'):
+                j = comprobantes.setdefault(numero, len(comprobantes))
+                # Confianza 0 o ausente: igual es candidato, con el menor peso
+                candidatos.append((i, j, max(float(item.get('confianza') or 0), 1e-6)))
+        
+        if len(candidatos) == len(comprobantes):
+            return items
+        
+        asignados = {i for i, _, _ in asignacion_optima(candidatos)}
+        repetidos = 0
+        for i, _, _ in candidatos:
+            if i not in asignados:
+                item = items[i]
+                item['explicacion'] = (
+                    f"Comprobante {item.get('numero_comprobante')} asignado a otro movimiento con mayor confianza"
+                )
+                item['numero_comprobante'] = None
+                item['cliente_comprobante'] = None
+                item['estado'] = 'pendiente'
+                item['confianza'] = 0.0
+                repetidos += 1
+        logger.warning(f"⚠️ {repetidos} movimientos reclamaban un comprobante ya asignado; quedan pendientes")
+        return items
+    
     def validate_conciliacion_results(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Valida y resume los resultados de la conciliación"""
         try:
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
@@ -22,21 +22,28 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# APP
-app = FastAPI(title="Conciliador IA", version="1.0.0")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# HEALTH CHECKS
-@app.get("/health")
-async def health_check():
+# KILL SWITCH: los routers se montan una sola vez en API_PREFIX y las llamadas
+# con el prefijo legacy (/api/...) se reescriben a ese prefijo
+API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
+API_PREFIX_LEGACY = os.getenv("API_PREFIX_LEGACY", "/api")  # ← acepta llamadas sin /v1
+
+# (módulo en routers/, sub-prefijo). Cada módulo se importa una única vez.
+ROUTERS = [
+    ("upload", ""),
+    ("conciliacion", ""),
+    ("compras", ""),
+    ("arca_xubio", ""),
+    ("carga_informacion", ""),
+    ("carga_clientes", ""),
+    ("carga_documentos", ""),
+    ("entrenamiento", "/entrenamiento"),
+]
+
+# HEALTH CHECKS / DEBUG (se registran en create_app)
+sistema = APIRouter()
+
+@sistema.get("/health")
+async def health_check(request: Request):
     """Health check completo del sistema"""
     from datetime import datetime
     
@@ -45,11 +52,11 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "services": {},
         "routers": {},
-        "routers_loaded": routers_loaded
+        "routers_loaded": request.app.state.routers_loaded
     }
     
     # Verificar routers cargados
-    for route in app.routes:
+    for route in request.app.routes:
         if hasattr(route, "path"):
             path = str(route.path)
             if "/entrenamiento" in path:
@@ -75,23 +82,23 @@ async def health_check():
     
     return health_status
 
-@app.get("/api/v1/health")
-async def health_v1():
-    return await health_check()
+@sistema.get("/api/v1/health")
+async def health_v1(request: Request):
+    return await health_check(request)
 
-@app.get("/api/health")
-async def health_legacy():
-    return await health_check()
+@sistema.get("/api/health")
+async def health_legacy(request: Request):
+    return await health_check(request)
 
-@app.get("/")
+@sistema.get("/")
 async def root():
     return {"message": "Conciliador IA funcionando", "status": "ok"}
 
-@app.get("/debug/routes")
-async def debug_routes():
+@sistema.get("/debug/routes")
+async def debug_routes(request: Request):
     """Lista todas las rutas registradas"""
     routes = []
-    for route in app.routes:
+    for route in request.app.routes:
         if hasattr(route, "methods") and hasattr(route, "path"):
             routes.append({
                 "path": str(route.path),
@@ -109,7 +116,7 @@ async def debug_routes():
     }
 
 # DIAGNÓSTICO COMPLETO
-@app.get("/debug/filesystem")
+@sistema.get("/debug/filesystem")
 async def debug_filesystem():
     """Ver estructura de archivos"""
     try:
@@ -144,7 +151,7 @@ async def debug_filesystem():
     except Exception as e:
         return {"error": str(e), "traceback": str(e)}
 
-@app.get("/debug/import-test")
+@sistema.get("/debug/import-test")
 async def debug_import_test():
     """Probar imports uno por uno"""
     results = {
@@ -200,136 +207,91 @@ async def debug_import_test():
     
     return results
 
-# KILL SWITCH: Montar routers con dos prefijos (/api/v1 y /api)
-API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
-API_PREFIX_LEGACY = os.getenv("API_PREFIX_LEGACY", "/api")  # ← acepta llamadas sin /v1
+class AliasPrefijoLegacy:
+    """
+    Middleware ASGI: reescribe /api/... a /api/v1/... antes del ruteo, así los
+    routers se montan una sola vez y el frontend viejo sigue funcionando.
+    """
 
-print("🚀 CARGANDO ROUTERS CON KILL SWITCH...")
-routers_loaded = 0
+    def __init__(self, app, prefijo: str, prefijo_legacy: str):
+        self.app = app
+        self.prefijo = prefijo.rstrip("/")
+        self.prefijo_legacy = prefijo_legacy.rstrip("/")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and self.prefijo_legacy and self.prefijo_legacy != self.prefijo:
+            path = scope["path"]
+            es_actual = path == self.prefijo or path.startswith(self.prefijo + "/")
+            if not es_actual and (path == self.prefijo_legacy or path.startswith(self.prefijo_legacy + "/")):
+                nuevo_path = self.prefijo + path[len(self.prefijo_legacy):]
+                scope = dict(scope, path=nuevo_path, raw_path=nuevo_path.encode("utf-8"))
+        await self.app(scope, receive, send)
+
+
+def mount_all(app: FastAPI, prefix: str) -> int:
+    """Importa cada router una vez y lo monta bajo `prefix`. Devuelve cuántos se montaron."""
+    import importlib
 
-def mount_all(prefix: str):
-    """Monta todos los routers con un prefijo específico"""
-    global routers_loaded
-    
     # Agregar el directorio conciliador_ia al path
-    import sys
     conciliador_path = os.path.join(os.getcwd(), "conciliador_ia")
     if conciliador_path not in sys.path:
         sys.path.insert(0, conciliador_path)
-    
-    try:
-        # Cargar upload router
-        print(f"  🔄 Cargando upload router en {prefix}...")
-        from routers import upload
-        app.include_router(upload.router, prefix=prefix)
-        print(f"  ✅ Upload router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando upload router en {prefix}: {e}")
-
-    try:
-        # Cargar conciliacion router
-        print(f"  🔄 Cargando conciliacion router en {prefix}...")
-        from routers import conciliacion
-        app.include_router(conciliacion.router, prefix=prefix)
-        print(f"  ✅ Conciliacion router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando conciliacion router en {prefix}: {e}")
 
-    try:
-        # Cargar compras router
-        print(f"  🔄 Cargando compras router en {prefix}...")
-        from routers import compras
-        app.include_router(compras.router, prefix=prefix)
-        print(f"  ✅ Compras router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando compras router en {prefix}: {e}")
+    montados = 0
+    for nombre, sub_prefijo in ROUTERS:
+        try:
+            print(f"  🔄 Cargando {nombre} router en {prefix}{sub_prefijo}...")
+            modulo = importlib.import_module(f"routers.{nombre}")
+            app.include_router(modulo.router, prefix=f"{prefix}{sub_prefijo}")
+            print(f"  ✅ {nombre.capitalize()} router cargado en {prefix}{sub_prefijo}")
+            montados += 1
+        except Exception as e:
+            print(f"  ❌ Error cargando {nombre} router en {prefix}: {e}")
+    return montados
 
-    try:
-        # Cargar arca_xubio router
-        print(f"  🔄 Cargando arca_xubio router en {prefix}...")
-        from routers import arca_xubio
-        app.include_router(arca_xubio.router, prefix=prefix)
-        print(f"  ✅ Arca_xubio router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando arca_xubio router en {prefix}: {e}")
 
-    try:
-        # Cargar carga_informacion router
-        print(f"  🔄 Cargando carga_informacion router en {prefix}...")
-        from routers import carga_informacion
-        app.include_router(carga_informacion.router, prefix=prefix)
-        print(f"  ✅ Carga_informacion router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando carga_informacion router en {prefix}: {e}")
+def create_app() -> FastAPI:
+    """App factory: monta cada router una sola vez; los servicios pesados se crean en el primer request"""
+    app = FastAPI(title="Conciliador IA", version="1.0.0")
 
-    try:
-        # Cargar carga_clientes router
-        print(f"  🔄 Cargando carga_clientes router en {prefix}...")
-        from routers import carga_clientes
-        app.include_router(carga_clientes.router, prefix=prefix)
-        print(f"  ✅ Carga_clientes router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando carga_clientes router en {prefix}: {e}")
+    # CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(AliasPrefijoLegacy, prefijo=API_PREFIX, prefijo_legacy=API_PREFIX_LEGACY)
 
-    try:
-        # Cargar carga_documentos router
-        print(f"  🔄 Cargando carga_documentos router en {prefix}...")
-        from routers import carga_documentos
-        app.include_router(carga_documentos.router, prefix=prefix)
-        print(f"  ✅ Carga_documentos router cargado en {prefix}")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando carga_documentos router en {prefix}: {e}")
+    app.include_router(sistema)
 
-    try:
-        # Cargar entrenamiento router
-        print(f"  🔄 Cargando entrenamiento router en {prefix}...")
-        from routers import entrenamiento
-        # Agregar el prefijo completo aquí
-        app.include_router(
-            entrenamiento.router, 
-            prefix=f"{prefix}/entrenamiento",  # ← Prefijo completo
-            tags=["entrenamiento"]
-        )
-        print(f"  ✅ Entrenamiento router cargado en {prefix}/entrenamiento")
-        routers_loaded += 1
-    except Exception as e:
-        print(f"  ❌ Error cargando entrenamiento router: {e}")
+    print(f"📦 Montando routers en {API_PREFIX} (alias {API_PREFIX_LEGACY})...")
+    app.state.routers_loaded = mount_all(app, API_PREFIX)
+    print(f"📊 Total de routers montados: {app.state.routers_loaded}")
 
-# Montar routers en ambos prefijos
-print(f"📦 Montando routers en {API_PREFIX}...")
-mount_all(API_PREFIX)
+    # STARTUP
+    @app.on_event("startup")
+    async def startup():
+        """Startup mínimo"""
+        print("🚀 CONCILIADOR IA INICIADO")
+        print(f"📁 Directorio: {os.getcwd()}")
+        print(f"📊 Routers montados: {app.state.routers_loaded}")
+        print(f"🔗 Prefijos activos: {API_PREFIX}, {API_PREFIX_LEGACY}")
 
-print(f"📦 Montando routers en {API_PREFIX_LEGACY}...")
-mount_all(API_PREFIX_LEGACY)  # ← **acepta /api/...** (sin /v1)
+        # Crear directorios
+        try:
+            os.makedirs("data/uploads", exist_ok=True)
+            os.makedirs("data/salida", exist_ok=True)
+            os.makedirs("data/entrada", exist_ok=True)
+            print("✅ Directorios creados")
+        except Exception as e:
+            print(f"❌ Error creando directorios: {e}")
 
-print(f"📊 Total de routers montados: {routers_loaded}")
+    return app
 
-# Endpoints temporales eliminados - los routers ya están cargados correctamente
 
-# STARTUP
-@app.on_event("startup")
-async def startup():
-    """Startup mínimo"""
-    print("🚀 CONCILIADOR IA INICIADO")
-    print(f"📁 Directorio: {os.getcwd()}")
-    print(f"📊 Routers montados: {routers_loaded}")
-    print(f"🔗 Prefijos activos: {API_PREFIX}, {API_PREFIX_LEGACY}")
-    
-    # Crear directorios
-    try:
-        os.makedirs("data/uploads", exist_ok=True)
-        os.makedirs("data/salida", exist_ok=True)
-        os.makedirs("data/entrada", exist_ok=True)
-        print("✅ Directorios creados")
-    except Exception as e:
-        print(f"❌ Error creando directorios: {e}")
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
@@ -5,6 +5,8 @@ class ConciliacionRequest(BaseModel):
     extracto_path: str
     comprobantes_path: str
     empresa_id: Optional[str] = None
+    # Concilia también los movimientos ya conciliados en corridas anteriores
+    conciliar_todo: bool = False
 
 class ErrorResponse(BaseModel):
     success: bool = False
@@ -29,8 +31,11 @@ class ConciliacionResponse(BaseModel):
     movimientos_conciliados: int
     movimientos_pendientes: int
     movimientos_parciales: int
+    # Movimientos que ya estaban conciliados en una corrida anterior de la empresa
+    movimientos_omitidos: int = 0
     items: List[ConciliacionItem]
     tiempo_procesamiento: float
+    metadata: Optional[Dict[str, Any]] = None
 
 class ConversionResponse(BaseModel):
     conversion_status: str
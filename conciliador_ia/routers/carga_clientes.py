@@ -14,20 +14,22 @@ try:
     from ..services.carga_info.loader import CargaArchivos, ENTRADA_DIR, SALIDA_DIR
     from ..services.transformador_archivos import TransformadorArchivos
     from ..models.schemas import ClienteImportResponse, ClienteImportJob
+    from ..utils.lazy_service import ServicioPerezoso
 except ImportError:
     # Fallback para imports directos
     from services.cliente_processor import ClienteProcessor
     from services.carga_info.loader import CargaArchivos, ENTRADA_DIR, SALIDA_DIR
     from services.transformador_archivos import TransformadorArchivos
     from models.schemas import ClienteImportResponse, ClienteImportJob
+    from utils.lazy_service import ServicioPerezoso
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["carga-clientes"])
 
-# Inicializar servicios
-processor = ClienteProcessor()
-loader = CargaArchivos()
-transformador = TransformadorArchivos()
+# Servicios: se construyen en el primer request, no al importar el router
+processor = ServicioPerezoso(ClienteProcessor)
+loader = ServicioPerezoso(CargaArchivos)
+transformador = ServicioPerezoso(TransformadorArchivos)
 
 # Almacenamiento temporal de jobs (en producción usar Redis o base de datos)
 jobs: Dict[str, ClienteImportJob] = {}
@@ -88,18 +90,15 @@ async def importar_clientes(
         archivos_guardados = {}
         
         # Guardar archivo portal
-        content = await archivo_portal.read()
-        archivos_guardados["portal"] = loader.save_uploaded_file(content, archivo_portal.filename, ENTRADA_DIR)
+        archivos_guardados["portal"] = await loader.save_upload(archivo_portal, ENTRADA_DIR)
         
         # Guardar archivo Xubio
-        content = await archivo_xubio.read()
-        archivos_guardados["xubio"] = loader.save_uploaded_file(content, archivo_xubio.filename, ENTRADA_DIR)
+        archivos_guardados["xubio"] = await loader.save_upload(archivo_xubio, ENTRADA_DIR)
         
         # Guardar archivo cliente si existe
         if archivo_cliente:
             logger.info(f"💾 Guardando 3er archivo: {archivo_cliente.filename}")
-            content = await archivo_cliente.read()
-            archivos_guardados["cliente"] = loader.save_uploaded_file(content, archivo_cliente.filename, ENTRADA_DIR)
+            archivos_guardados["cliente"] = await loader.save_upload(archivo_cliente, ENTRADA_DIR)
             logger.info(f"✅ 3er archivo guardado en: {archivos_guardados['cliente']}")
         else:
             logger.warning("⚠️ No se proporcionó archivo cliente")
@@ -301,17 +300,14 @@ async def validar_archivos(
         archivos_guardados = {}
         
         # Guardar archivo portal
-        content = await archivo_portal.read()
-        archivos_guardados["portal"] = loader.save_uploaded_file(content, archivo_portal.filename, ENTRADA_DIR)
+        archivos_guardados["portal"] = await loader.save_upload(archivo_portal, ENTRADA_DIR)
         
         # Guardar archivo Xubio
-        content = await archivo_xubio.read()
-        archivos_guardados["xubio"] = loader.save_uploaded_file(content, archivo_xubio.filename, ENTRADA_DIR)
+        archivos_guardados["xubio"] = await loader.save_upload(archivo_xubio, ENTRADA_DIR)
         
         # Guardar archivo cliente si existe
         if archivo_cliente:
-            content = await archivo_cliente.read()
-            archivos_guardados["cliente"] = loader.save_uploaded_file(content, archivo_cliente.filename, ENTRADA_DIR)
+            archivos_guardados["cliente"] = await loader.save_upload(archivo_cliente, ENTRADA_DIR)
         
         # Validar archivos
         resultado_validacion = {}
@@ -452,8 +448,7 @@ async def analizar_contexto_archivo(
         logger.info(f"🔍 ANÁLISIS RÁPIDO - Archivo: {archivo_cliente.filename}")
         
         # Guardar archivo temporalmente
-        content = await archivo_cliente.read()
-        archivo_guardado = loader.save_uploaded_file(content, archivo_cliente.filename, ENTRADA_DIR)
+        archivo_guardado = await loader.save_upload(archivo_cliente, ENTRADA_DIR)
         
         # Cargar DataFrame con límite de filas para evitar colgadas
         df_cliente = loader._read_any_table(archivo_guardado)
@@ -524,13 +519,9 @@ async def transformar_archivo_cliente(
     try:
         logger.info(f"🔄 TRANSFORMACIÓN - Cliente: {archivo_cliente.filename}, Portal: {archivo_portal.filename}")
         
-        # Leer archivos
-        content_cliente = await archivo_cliente.read()
-        content_portal = await archivo_portal.read()
-        
         # Guardar archivos temporales
-        archivo_cliente_guardado = loader.save_uploaded_file(content_cliente, archivo_cliente.filename, ENTRADA_DIR)
-        archivo_portal_guardado = loader.save_uploaded_file(content_portal, archivo_portal.filename, ENTRADA_DIR)
+        archivo_cliente_guardado = await loader.save_upload(archivo_cliente, ENTRADA_DIR)
+        archivo_portal_guardado = await loader.save_upload(archivo_portal, ENTRADA_DIR)
         
         # Leer DataFrames
         df_cliente = loader._read_any_table(archivo_cliente_guardado)
@@ -10,17 +10,19 @@ try:
     from ..services.carga_info.loader import CargaArchivos, ENTRADA_DIR
     from ..services.carga_info.processor import process
     from ..services.carga_info.exporter import ExportadorVentas, SALIDA_DIR
+    from ..utils.lazy_service import ServicioPerezoso
 except ImportError:
     from services.carga_info.loader import CargaArchivos, ENTRADA_DIR
     from services.carga_info.processor import process
     from services.carga_info.exporter import ExportadorVentas, SALIDA_DIR
+    from utils.lazy_service import ServicioPerezoso
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/carga-informacion", tags=["carga-informacion"])
 
-loader = CargaArchivos()
-exporter = ExportadorVentas()
+loader = ServicioPerezoso(CargaArchivos)
+exporter = ServicioPerezoso(ExportadorVentas)
 
 
 @router.post("/upload")
@@ -34,26 +36,21 @@ async def upload_archivos(
     try:
         saved = {}
         # Guardar con claves tipadas para facilitar el frontend
-        content = await ventas_excel.read()
-        saved["ventas_excel_path"] = loader.save_uploaded_file(content, ventas_excel.filename, ENTRADA_DIR)
+        saved["ventas_excel_path"] = await loader.save_upload(ventas_excel, ENTRADA_DIR)
 
         if tabla_comprobantes is not None:
-            content = await tabla_comprobantes.read()
-            saved["tabla_comprobantes_path"] = loader.save_uploaded_file(content, tabla_comprobantes.filename, ENTRADA_DIR)
+            saved["tabla_comprobantes_path"] = await loader.save_upload(tabla_comprobantes, ENTRADA_DIR)
         else:
             saved["tabla_comprobantes_path"] = ""
 
         if portal_iva_csv is not None:
-            content = await portal_iva_csv.read()
-            saved["portal_iva_csv_path"] = loader.save_uploaded_file(content, portal_iva_csv.filename, ENTRADA_DIR)
+            saved["portal_iva_csv_path"] = await loader.save_upload(portal_iva_csv, ENTRADA_DIR)
 
         if modelo_importacion is not None:
-            content = await modelo_importacion.read()
-            saved["modelo_importacion_path"] = loader.save_uploaded_file(content, modelo_importacion.filename, ENTRADA_DIR)
+            saved["modelo_importacion_path"] = await loader.save_upload(modelo_importacion, ENTRADA_DIR)
 
         if modelo_doble_alicuota is not None:
-            content = await modelo_doble_alicuota.read()
-            saved["modelo_doble_alicuota_path"] = loader.save_uploaded_file(content, modelo_doble_alicuota.filename, ENTRADA_DIR)
+            saved["modelo_doble_alicuota_path"] = await loader.save_upload(modelo_doble_alicuota, ENTRADA_DIR)
 
         return {"status": "ok", "saved": saved}
     except Exception as e:
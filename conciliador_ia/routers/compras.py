@@ -9,10 +9,35 @@ import json
 from datetime import datetime
 import tempfile
 import shutil
+import bisect
+from functools import lru_cache
+
+try:
+    from ..services.extractor import MOTOR_EXTRACCION
+    from ..services.extractor_coordenadas import ExtractorCoordenadas
+    from ..utils.asignacion import asignacion_optima
+    from ..utils.pagos_multiples import conciliar_pagos_multiples
+    from ..utils.proveedores import IndiceProveedores, normalizar_proveedor, similitud_nombres, SIMILITUD_MINIMA_PROVEEDOR
+except ImportError:
+    from services.extractor import MOTOR_EXTRACCION
+    from services.extractor_coordenadas import ExtractorCoordenadas
+    from utils.asignacion import asignacion_optima
+    from utils.pagos_multiples import conciliar_pagos_multiples
+    from utils.proveedores import IndiceProveedores, normalizar_proveedor, similitud_nombres, SIMILITUD_MINIMA_PROVEEDOR
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+# Palabras clave que indican pagos a proveedores
+PROVEEDOR_KEYWORDS = ['transferencia', 'pago', 'proveedor', 'factura', 'compra']
+
+# Palabras clave que indican impuestos/comisiones (excluir)
+EXCLUSION_KEYWORDS = ['impuesto', 'iva', 'iibb', 'ganancias', 'comisión', 'retención',
+                      'percepción', 'afip', 'arba', 'agip', 'interés', 'costo financiero']
+
+# Proveedor de las compras leídas del extracto, donde el nombre real no se conoce
+PROVEEDOR_PLACEHOLDER = "Proveedor"
+
 router = APIRouter(prefix="/compras", tags=["Conciliación de Compras"])
 
 @router.post("/upload")
@@ -156,31 +181,23 @@ def extraer_datos_extracto_compras(pdf_path: str) -> List[Dict[str, Any]]:
     
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    # Procesar texto para extraer compras
-                    lines = text.split('\n')
-                    for line in lines:
-                        # Filtrar solo transferencias y pagos a proveedores
-                        # Excluir impuestos, comisiones, retenciones, etc.
-                        line_lower = line.lower()
-                        
-                        # Palabras clave que indican pagos a proveedores
-                        proveedor_keywords = ['transferencia', 'pago', 'proveedor', 'factura', 'compra']
-                        
-                        # Palabras clave que indican impuestos/comisiones (excluir)
-                        exclusion_keywords = ['impuesto', 'iva', 'iibb', 'ganancias', 'comisión', 'retención', 
-                                            'percepción', 'afip', 'arba', 'agip', 'interés', 'costo financiero']
-                        
-                        # Verificar si es un pago a proveedor y no un impuesto/comisión
-                        is_proveedor = any(keyword in line_lower for keyword in proveedor_keywords)
-                        is_exclusion = any(keyword in line_lower for keyword in exclusion_keywords)
-                        
-                        if is_proveedor and not is_exclusion and any(char.isdigit() for char in line):
-                            compra = parsear_linea_compra(line)
-                            if compra:
-                                compras.append(compra)
+            # Con EXTRACTOR_MOTOR=coordenadas, si el PDF tiene forma de tabla, columnas por coordenadas de palabras
+            compras_tabla = extraer_compras_por_coordenadas(pdf) if MOTOR_EXTRACCION == "coordenadas" else None
+            if compras_tabla is not None:
+                compras = compras_tabla
+            else:
+                for page in pdf.pages:
+                    text = page.extract_text()
+                    if text:
+                        # Procesar texto para extraer compras
+                        lines = text.split('\n')
+                        for line in lines:
+                            # Filtrar solo transferencias y pagos a proveedores
+                            # Excluir impuestos, comisiones, retenciones, etc.
+                            if es_pago_a_proveedor(line) and any(char.isdigit() for char in line):
+                                compra = parsear_linea_compra(line)
+                                if compra:
+                                    compras.append(compra)
         
         # Si no se encontraron compras con el método anterior, crear datos de ejemplo
         if not compras:
@@ -357,6 +374,46 @@ def cargar_libro_compras(excel_path: str) -> List[Dict[str, Any]]:
             }
         ]
 
+def es_pago_a_proveedor(texto: str) -> bool:
+    """Pago a proveedor y no impuesto/comisión"""
+    texto_lower = texto.lower()
+    is_proveedor = any(keyword in texto_lower for keyword in PROVEEDOR_KEYWORDS)
+    is_exclusion = any(keyword in texto_lower for keyword in EXCLUSION_KEYWORDS)
+    return is_proveedor and not is_exclusion
+
+def extraer_compras_por_coordenadas(pdf) -> Optional[List[Dict[str, Any]]]:
+    """
+    Compras a partir de las columnas del extracto (ver ExtractorCoordenadas).
+    Devuelve None si el PDF no tiene forma de tabla.
+    """
+    motor = ExtractorCoordenadas()
+    muestra = [page.extract_words() for page in pdf.pages[:motor.paginas_muestra]]
+    modelo = motor.aprender_modelo(muestra)
+    if modelo is None:
+        return None
+    
+    compras = []
+    for i, page in enumerate(pdf.pages):
+        palabras = muestra[i] if i < len(muestra) else page.extract_words()
+        for fila in motor.filas(palabras, modelo):
+            if not es_pago_a_proveedor(fila.descripcion):
+                continue
+            # Una compra es una salida: débito, o importe negativo en extractos de una sola columna
+            monto = fila.montos.get("debito")
+            if not monto and (fila.montos.get("importe") or 0) < 0:
+                monto = fila.montos["importe"]
+            if not monto:
+                continue
+            compras.append({
+                "fecha": fila.fecha,
+                "monto": abs(monto),
+                "proveedor": PROVEEDOR_PLACEHOLDER,
+                "concepto": fila.descripcion,
+                "numero_factura": "",
+                "cuit": ""
+            })
+    return compras
+
 def parsear_linea_compra(linea: str) -> Optional[Dict[str, Any]]:
     """
     Parsea una línea de texto para extraer información de compra
@@ -378,7 +435,7 @@ def parsear_linea_compra(linea: str) -> Optional[Dict[str, Any]]:
             return {
                 "fecha": fecha_match.group(1),
                 "monto": float(monto_match.group(1).replace(',', '')),
-                "proveedor": "Proveedor",  # Placeholder
+                "proveedor": PROVEEDOR_PLACEHOLDER,
                 "concepto": linea.strip(),
                 "numero_factura": "",
                 "cuit": ""
@@ -399,15 +456,46 @@ def conciliar_compras(extracto_data: List[Dict], libro_data: List[Dict]) -> Dict
     parciales = 0
     items = []
     
-    for compra_extracto in extracto_data:
-        mejor_coincidencia = None
-        mejor_score = 0
+    # Cada factura del libro se asigna a un solo pago: emparejamiento de
+    # score total máximo entre los pares que al menos son "parcial", en lugar
+    # del mejor match por pago (que dejaba una factura en varios pagos)
+    candidatos = []
+    for (i, j), similitud in _pares_candidatos(extracto_data, libro_data).items():
+        score = calcular_score_coincidencia(extracto_data[i], libro_data[j], similitud)
+        if score >= 0.5:
+            candidatos.append((i, j, score))
+    asignacion = {i: (j, score) for i, j, score in asignacion_optima(candidatos)}
+    
+    # Pagos sin factura propia: ¿cancelan varias facturas libres del mismo proveedor?
+    sin_pareja = [i for i in range(len(extracto_data)) if i not in asignacion]
+    asignadas = {j for j, _ in asignacion.values()}
+    libres = [j for j in range(len(libro_data)) if j not in asignadas]
+    multiples = conciliar_pagos_multiples(
+        [_pago_para_combinar(extracto_data[i]) for i in sin_pareja],
+        [_pago_para_combinar(libro_data[j]) for j in libres]
+    )
+    multiples = {sin_pareja[k]: (combinacion, [libro_data[libres[j]] for j in combinacion.indices])
+                 for k, combinacion in multiples.items()}
+    
+    for i, compra_extracto in enumerate(extracto_data):
+        if i in multiples:
+            combinacion, facturas = multiples[i]
+            conciliadas += 1
+            items.append({
+                "fecha_compra": compra_extracto.get("fecha", ""),
+                "concepto_compra": compra_extracto.get("concepto", ""),
+                "monto_compra": compra_extracto.get("monto", 0),
+                "proveedor_compra": compra_extracto.get("proveedor", ""),
+                "numero_factura": ", ".join(str(f.get("numero_factura", "")) for f in facturas),
+                "proveedor_libro": facturas[0].get("proveedor", ""),
+                "estado": "conciliado",
+                "explicacion": f"Pago de {len(facturas)} facturas del mismo proveedor (diferencia {combinacion.diferencia:+.2f})",
+                "confianza": 0.9
+            })
+            continue
         
-        for compra_libro in libro_data:
-            score = calcular_score_coincidencia(compra_extracto, compra_libro)
-            if score > mejor_score:
-                mejor_score = score
-                mejor_coincidencia = compra_libro
+        j, mejor_score = asignacion.get(i, (None, 0))
+        mejor_coincidencia = libro_data[j] if j is not None else None
         
         # Clasificar según el score
         if mejor_score >= 0.8:
@@ -441,9 +529,80 @@ def conciliar_compras(extracto_data: List[Dict], libro_data: List[Dict]) -> Dict
         "items": items
     }
 
-def calcular_score_coincidencia(compra_extracto: Dict, compra_libro: Dict) -> float:
+def _pares_candidatos(extracto_data: List[Dict], libro_data: List[Dict]) -> Dict[tuple, float]:
+    """
+    Pares (pago, factura) que pueden llegar a "parcial" (score >= 0.5), con
+    la similitud de proveedor de cada uno. Ningún componente del score pasa
+    de 0.4, así que hacen falta dos: o el proveedor se parece (índice de
+    trigramas, todos los pares a la vez) o el monto está a 5% y la fecha a
+    5 días (ventana por día y monto). El resto de los N x M ni se mira.
+    """
+    indice = IndiceProveedores([str(c.get("proveedor") or "") for c in libro_data])
+    pares = indice.similitudes([str(c.get("proveedor") or "") for c in extracto_data])
+    
+    por_dia: Dict[int, List[tuple]] = {}
+    for j, compra_libro in enumerate(libro_data):
+        fecha, monto = parsear_fecha_compra(compra_libro.get("fecha", "")), _monto_compra(compra_libro)
+        if fecha and monto > 0:
+            por_dia.setdefault(fecha.toordinal(), []).append((monto, j))
+    for facturas in por_dia.values():
+        facturas.sort()
+    
+    for i, compra_extracto in enumerate(extracto_data):
+        fecha, monto = parsear_fecha_compra(compra_extracto.get("fecha", "")), _monto_compra(compra_extracto)
+        if not fecha or monto <= 0:
+            continue
+        for dia in range(fecha.toordinal() - 5, fecha.toordinal() + 6):
+            facturas = por_dia.get(dia)
+            if not facturas:
+                continue
+            desde = bisect.bisect_left(facturas, (monto * 0.95 * (1 - 1e-9),))
+            hasta = bisect.bisect_right(facturas, (monto / 0.95 * (1 + 1e-9), len(libro_data)))
+            for _, j in facturas[desde:hasta]:
+                pares.setdefault((i, j), 0.0)
+    return pares
+
+def _monto_compra(compra: Dict) -> float:
+    try:
+        return float(compra.get("monto", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+@lru_cache(maxsize=65536)
+def parsear_fecha_compra(fecha_str) -> Optional[datetime]:
+    """Intenta parsear una fecha en diferentes formatos (cacheado: las fechas se repiten mucho)"""
+    if not fecha_str:
+        return None
+    for formato in ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(str(fecha_str), formato)
+        except ValueError:
+            continue
+    return None
+
+def _pago_para_combinar(compra: Dict) -> Dict[str, Any]:
+    """
+    Importe, fecha y contraparte para conciliar_pagos_multiples: el CUIT o, si
+    no hay, el proveedor normalizado. El placeholder queda sin contraparte
+    (no se combina con nada).
+    """
+    cuit = "".join(ch for ch in str(compra.get("cuit") or "") if ch.isdigit())
+    proveedor = str(compra.get("proveedor") or "")
+    if proveedor.strip() == PROVEEDOR_PLACEHOLDER:
+        proveedor = ""
+    return {
+        "importe": _monto_compra(compra),
+        "fecha": parsear_fecha_compra(str(compra.get("fecha", ""))),
+        "contraparte": cuit or normalizar_proveedor(proveedor)
+    }
+
+def calcular_score_coincidencia(compra_extracto: Dict, compra_libro: Dict,
+                                similitud_proveedor: Optional[float] = None) -> float:
     """
     Calcula el score de coincidencia entre dos compras
+    
+    `similitud_proveedor` es la similitud de trigramas ya calculada por
+    IndiceProveedores para todos los pares; si no viene se calcula acá.
     """
     score = 0.0
     
@@ -464,23 +623,8 @@ def calcular_score_coincidencia(compra_extracto: Dict, compra_libro: Dict) -> fl
     
     if fecha_extracto and fecha_libro:
         try:
-            from datetime import datetime
-            
-            def parsear_fecha(fecha_str):
-                """Intenta parsear una fecha en diferentes formatos"""
-                if not fecha_str:
-                    return None
-                
-                formatos = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y", "%Y/%m/%d"]
-                for formato in formatos:
-                    try:
-                        return datetime.strptime(str(fecha_str), formato)
-                    except:
-                        continue
-                return None
-            
-            fecha1 = parsear_fecha(fecha_extracto)
-            fecha2 = parsear_fecha(fecha_libro)
+            fecha1 = parsear_fecha_compra(fecha_extracto)
+            fecha2 = parsear_fecha_compra(fecha_libro)
             
             if fecha1 and fecha2:
                 diferencia_dias = abs((fecha1 - fecha2).days)
@@ -495,15 +639,12 @@ def calcular_score_coincidencia(compra_extracto: Dict, compra_libro: Dict) -> fl
             logger.warning(f"Error comparando fechas: {e}")
             pass
     
-    # Coincidencia de proveedor (30% del score)
-    proveedor_extracto = compra_extracto.get("proveedor", "").lower()
-    proveedor_libro = compra_libro.get("proveedor", "").lower()
-    
-    if proveedor_extracto and proveedor_libro:
-        if proveedor_extracto == proveedor_libro:
-            score += 0.3
-        elif any(palabra in proveedor_libro for palabra in proveedor_extracto.split()):
-            score += 0.15
+    # Coincidencia de proveedor (30% del score), proporcional a la similitud de trigramas
+    if similitud_proveedor is None:
+        similitud_proveedor = similitud_nombres(compra_extracto.get("proveedor") or "",
+                                                compra_libro.get("proveedor") or "")
+    if similitud_proveedor >= SIMILITUD_MINIMA_PROVEEDOR:
+        score += 0.3 * similitud_proveedor
     
     return min(score, 1.0)
 
@@ -5,15 +5,15 @@ from typing import Optional
 import os
 from pathlib import Path
 
-from services.matchmaker import MatchmakerService
+from services.matchmaker import MatchmakerService, obtener_matchmaker_service
 from models.schemas import ConciliacionRequest, ConciliacionResponse, ErrorResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/conciliacion", tags=["conciliacion"])
 
 def get_matchmaker_service():
-    """Dependency para obtener MatchmakerService"""
-    return MatchmakerService()
+    """Dependency para obtener MatchmakerService (una instancia compartida por proceso)"""
+    return obtener_matchmaker_service()
 
 @router.post("/procesar", response_model=ConciliacionResponse)
 async def procesar_conciliacion(
@@ -56,7 +56,8 @@ async def procesar_conciliacion(
         response = matchmaker.procesar_conciliacion(
             extracto_path=request.extracto_path,
             comprobantes_path=request.comprobantes_path,
-            empresa_id=request.empresa_id
+            empresa_id=request.empresa_id,
+            conciliar_todo=request.conciliar_todo
         )
         
         logger.info(f"Conciliación completada exitosamente")
@@ -74,6 +75,25 @@ async def procesar_conciliacion(
             detail=f"Error interno del servidor: {str(e)}"
         )
 
+@router.delete("/registro/{empresa_id}")
+async def olvidar_conciliaciones(
+    empresa_id: str,
+    matchmaker: MatchmakerService = Depends(get_matchmaker_service)
+):
+    """
+    Borra lo ya conciliado de la empresa: la próxima conciliación vuelve a
+    considerar todos sus movimientos y comprobantes
+    """
+    if matchmaker.registro is None:
+        return {"success": True, "message": "La conciliación incremental está desactivada"}
+    try:
+        matchmaker.registro.olvidar(empresa_id)
+        logger.info(f"📒 Registro de conciliaciones borrado para empresa: {empresa_id}")
+        return {"success": True, "message": f"Registro de conciliaciones de {empresa_id} borrado"}
+    except Exception as e:
+        logger.error(f"Error borrando el registro de conciliaciones: {e}")
+        raise HTTPException(status_code=500, detail=f"Error borrando el registro: {str(e)}")
+
 @router.get("/status")
 async def get_conciliacion_status():
     """
@@ -163,7 +183,7 @@ async def test_conciliacion():
         df_comprobantes = pd.DataFrame(comprobantes_data)
         
         # Probar conciliación
-        matchmaker = MatchmakerService()
+        matchmaker = obtener_matchmaker_service()
         items_conciliados = matchmaker.conciliador.conciliar_movimientos(
             df_movimientos, df_comprobantes, "test_empresa"
         )
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
 from fastapi.responses import JSONResponse
 import logging
 import os
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import uuid
@@ -9,11 +10,16 @@ from datetime import datetime
 
 from services.patron_manager import PatronManager
 from services.extractor_simple import ExtractorSimple
+from services.clasificador_layout import huella_pdf
 
 logger = logging.getLogger(__name__)
-router = APIRouter(tags=["entrenamiento"])
 
-# Verificación de servicios al inicio
+patron_manager = None
+extractor_simple = None
+SERVICIOS_DISPONIBLES: Dict[str, bool] = {}
+_servicios_lock = threading.Lock()
+
+# Verificación de servicios (se ejecuta en el primer request, ver asegurar_servicios)
 def verificar_servicios():
     """Verifica disponibilidad de servicios críticos"""
     estado = {
@@ -46,9 +52,16 @@ def verificar_servicios():
     
     return estado
 
-# Ejecutar verificación
-SERVICIOS_DISPONIBLES = verificar_servicios()
-logger.info(f"Estado de servicios: {SERVICIOS_DISPONIBLES}")
+def asegurar_servicios():
+    """Dependency del router: inicializa los servicios una sola vez, en el primer request"""
+    global SERVICIOS_DISPONIBLES
+    if not SERVICIOS_DISPONIBLES:
+        with _servicios_lock:
+            if not SERVICIOS_DISPONIBLES:
+                SERVICIOS_DISPONIBLES = verificar_servicios()
+                logger.info(f"Estado de servicios: {SERVICIOS_DISPONIBLES}")
+
+router = APIRouter(tags=["entrenamiento"], dependencies=[Depends(asegurar_servicios)])
 
 @router.get("/bancos")
 async def listar_bancos_entrenados():
@@ -179,6 +192,16 @@ async def entrenar_extracto(
                 # Actualizar banco existente
                 patron_manager.actualizar_precision(banco_id, precision_estimada, True)
             
+            # Ejemplo para el clasificador de layout (el archivo queda en data/extractos_ejemplo)
+            try:
+                patron_manager.agregar_ejemplo(banco_id, {
+                    "banco": banco or banco_nombre,
+                    "archivo": archivo_path,
+                    "huella": huella_pdf(archivo_path)
+                })
+            except Exception as e:
+                logger.warning(f"No se pudo guardar la huella del extracto: {e}")
+            
             return {
                 "success": True,
                 "message": "Extracto procesado exitosamente",
@@ -31,6 +31,11 @@ except Exception:
             f"ContabilidadValidator deshabilitado temporalmente: {e}"
         )
 
+try:
+    from conciliador_ia.utils.upload_sink import guardar_upload_en_disco, UploadTooLargeError  # type: ignore
+except Exception:
+    from utils.upload_sink import guardar_upload_en_disco, UploadTooLargeError  # type: ignore
+
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/upload", tags=["upload"])
 
@@ -155,9 +160,13 @@ async def procesar_csv_arca(file: UploadFile = File(...)):
 async def procesar_archivos_inmediato(
     extracto: UploadFile = File(...),
     comprobantes: UploadFile = File(...),
-    empresa_id: str = Form(...)
+    empresa_id: str = Form(...),
+    conciliar_todo: bool = Form(False)
 ):
-    """Procesa ambos archivos inmediatamente sin guardar a disco"""
+    """
+    Procesa ambos archivos inmediatamente sin guardar a disco. Con
+    `conciliar_todo` se concilian también los movimientos ya conciliados antes.
+    """
     try:
         logger.info(f"Procesamiento inmediato iniciado para empresa: {empresa_id}")
         
@@ -181,29 +190,31 @@ async def procesar_archivos_inmediato(
         if not any(comprobantes.filename.lower().endswith(ext) for ext in valid_comprobantes_extensions):
             return {"status": "error", "message": "Los comprobantes deben ser Excel (.xlsx, .xls) o CSV"}
         
-        # Validar tamaño de archivos (máximo 50MB cada uno)
+        # Validar tamaño de archivos (máximo 50MB cada uno) mientras se copian a disco
         max_size = 50 * 1024 * 1024  # 50MB
-        extracto_content = await extracto.read()
-        comprobantes_content = await comprobantes.read()
-        
-        if len(extracto_content) > max_size:
-            return {"status": "error", "message": "El extracto es demasiado grande. Máximo 50MB permitido."}
-        
-        if len(comprobantes_content) > max_size:
-            return {"status": "error", "message": "Los comprobantes son demasiado grandes. Máximo 50MB permitido."}
         
         # Crear archivos temporales únicos
         import tempfile
         import os
         
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_extracto:
-            temp_extracto.write(extracto_content)
             temp_extracto_path = temp_extracto.name
             
         with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_comprobantes:
-            temp_comprobantes.write(comprobantes_content)
             temp_comprobantes_path = temp_comprobantes.name
         
+        try:
+            await guardar_upload_en_disco(extracto, temp_extracto_path, max_bytes=max_size)
+        except UploadTooLargeError:
+            os.unlink(temp_comprobantes_path)
+            return {"status": "error", "message": "El extracto es demasiado grande. Máximo 50MB permitido."}
+        
+        try:
+            await guardar_upload_en_disco(comprobantes, temp_comprobantes_path, max_bytes=max_size)
+        except UploadTooLargeError:
+            os.unlink(temp_extracto_path)
+            return {"status": "error", "message": "Los comprobantes son demasiado grandes. Máximo 50MB permitido."}
+        
         try:
             # Procesar CSV si es necesario
             if comprobantes.filename.lower().endswith('.csv') and arca_processor is not None:
@@ -226,14 +237,15 @@ async def procesar_archivos_inmediato(
                 comprobantes_path_final = temp_comprobantes_path
             
             # Procesar con los archivos temporales
-            from services.matchmaker import MatchmakerService
-            matchmaker = MatchmakerService()
+            from services.matchmaker import obtener_matchmaker_service
+            matchmaker = obtener_matchmaker_service()
             
             logger.info("Iniciando procesamiento de conciliación...")
             response = matchmaker.procesar_conciliacion(
                 extracto_path=temp_extracto_path,
                 comprobantes_path=comprobantes_path_final,
-                empresa_id=empresa_id
+                empresa_id=empresa_id,
+                conciliar_todo=conciliar_todo
             )
             
             logger.info("Procesamiento inmediato completado exitosamente")
@@ -359,15 +371,15 @@ async def test_extraction(
                         })
             
             # Test con nuestro extractor
-            from services.extractor import PDFExtractor
-            extractor = PDFExtractor()
-            df = extractor.extract_from_pdf(temp_file_path)
+            from services.extractor import ContextoExtraccion, obtener_extractor
+            contexto = ContextoExtraccion(pdf_path=temp_file_path)
+            df = obtener_extractor().extract_from_pdf(temp_file_path, contexto)
             
             extraction_results = {
                 'movements_found': len(df),
                 'columns': list(df.columns) if not df.empty else [],
                 'movements': df.to_dict('records') if not df.empty else [],
-                'header_info': getattr(extractor, 'header_info', '')[:500]
+                'header_info': contexto.header_info[:500]
             }
             
             return {
@@ -444,26 +456,26 @@ async def debug_processing(
         try:
             # Paso 1: Extraer datos del extracto
             logger.info("🔍 DEBUG: Paso 1 - Extrayendo datos del extracto")
-            from services.extractor import PDFExtractor
+            from services.extractor import ContextoExtraccion, obtener_extractor
             
-            extractor = PDFExtractor()
-            df_movimientos = extractor.extract_from_pdf(temp_extracto_path)
+            contexto = ContextoExtraccion(pdf_path=temp_extracto_path)
+            df_movimientos = obtener_extractor().extract_from_pdf(temp_extracto_path, contexto)
             
             debug_info["processing_steps"].append({
                 "step": "extracto_extraction",
                 "movements_found": len(df_movimientos),
                 "columns": list(df_movimientos.columns) if not df_movimientos.empty else [],
                 "sample_movements": df_movimientos.head(3).to_dict('records') if not df_movimientos.empty else [],
-                "header_info": getattr(extractor, 'header_info', '')[:500]
+                "header_info": contexto.header_info[:500]
             })
             
             logger.info(f"🔍 DEBUG: Extracto - {len(df_movimientos)} movimientos encontrados")
             
             # Paso 2: Cargar comprobantes
             logger.info("🔍 DEBUG: Paso 2 - Cargando comprobantes")
-            from services.matchmaker import MatchmakerService
+            from services.matchmaker import obtener_matchmaker_service
             
-            matchmaker = MatchmakerService()
+            matchmaker = obtener_matchmaker_service()
             df_comprobantes = matchmaker._cargar_datos_comprobantes(temp_comprobantes_path)
             
             debug_info["processing_steps"].append({
@@ -475,12 +487,14 @@ async def debug_processing(
             
             logger.info(f"🔍 DEBUG: Comprobantes - {len(df_comprobantes)} registros encontrados")
             
-            # Paso 3: Procesar conciliación
+            # Paso 3: Procesar conciliación (completa y sin tocar el registro de lo ya conciliado)
             logger.info("🔍 DEBUG: Paso 3 - Procesando conciliación")
             response = matchmaker.procesar_conciliacion(
                 extracto_path=temp_extracto_path,
                 comprobantes_path=temp_comprobantes_path,
-                empresa_id=empresa_id
+                empresa_id=empresa_id,
+                conciliar_todo=True,
+                registrar=False
             )
             
             debug_info["processing_steps"].append({
@@ -6,6 +6,11 @@ import logging
 from typing import Dict, List, Optional, Tuple, Any
 import os
 
+try:
+    from ..utils.cuit import es_cuit_valido, limpiar_cuit, sugerir_reparaciones
+except ImportError:
+    from utils.cuit import es_cuit_valido, limpiar_cuit, sugerir_reparaciones
+
 logger = logging.getLogger(__name__)
 
 class ARCAXubioService:
@@ -31,9 +36,14 @@ class ARCAXubioService:
         if pd.isna(cuit):
             return "11111111111"  # CUIT genérico para Consumidor Final
         
-        cuit_str = str(cuit)
-        # Eliminar guiones y espacios
-        cuit_clean = re.sub(r'[^0-9]', '', cuit_str)
+        # Eliminar guiones y espacios (y el ".0" de una columna numérica)
+        cuit_clean = limpiar_cuit(cuit)
+        
+        # Un CUIT inválido no se corrige solo: las reparaciones posibles se
+        # informan para que alguien las confirme
+        sugerencias = [] if es_cuit_valido(cuit_clean) else sugerir_reparaciones(cuit_clean)
+        if len(cuit_clean) == 11 and sugerencias:
+            self.logger.warning(f"⚠️ CUIT con dígito verificador incorrecto: {cuit_clean} (¿{', '.join(sugerencias)}?)")
         
         # Validar longitud
         if len(cuit_clean) < 11:
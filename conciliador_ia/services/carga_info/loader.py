@@ -7,6 +7,11 @@ import csv
 import logging
 from typing import Optional, Dict, Any
 
+try:
+    from ...utils.upload_sink import guardar_upload_en_disco
+except ImportError:
+    from utils.upload_sink import guardar_upload_en_disco
+
 logger = logging.getLogger(__name__)
 
 # En Railway es más seguro /tmp
@@ -41,6 +46,12 @@ class CargaArchivos:
         logger.info(f"Archivo guardado: {full_path}")
         return str(full_path)
 
+    async def save_upload(self, upload, target_dir: Path, max_bytes: Optional[int] = None) -> str:
+        """Guarda un UploadFile con nombre seguro copiándolo a disco por bloques"""
+        safe_name = upload.filename.replace("..", "").replace("/", "_").replace(" ", "_")
+        resultado = await guardar_upload_en_disco(upload, target_dir / safe_name, max_bytes=max_bytes)
+        return resultado.path
+
     def load_inputs(
         self,
         ventas_excel_path: str,
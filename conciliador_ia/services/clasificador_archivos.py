@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    from ..utils.bancos import normalizar_texto
+except ImportError:
+    from utils.bancos import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+# Confianza (patrones encontrados / mínimo de la firma) desde la que una firma
+# decide el tipo sin consultar a la IA
+CONFIANZA_MINIMA_CLASIFICADOR = float(os.getenv("CONFIANZA_MINIMA_CLASIFICADOR", "1.0"))
+MAX_CACHE_CLASIFICACIONES = 512
+
+
+@dataclass(frozen=True)
+class FirmaColumnas:
+    """
+    Patrones de encabezado que identifican un tipo de archivo: basta con que
+    `minimo` patrones aparezcan en alguna columna. Con `por_columna` cuenta
+    en cuántas columnas aparece el (único) patrón ("Unnamed: 0", "Unnamed: 1"...).
+    """
+    tipo: str
+    patrones: Tuple[str, ...]
+    minimo: int
+    por_columna: bool = False
+
+
+# En orden de prioridad: a igual confianza gana la primera. IIBB va antes por
+# ser la más específica (y se confirma mirando el contenido); Portal AFIP al
+# final por ser la más genérica.
+FIRMAS_ARCHIVO: Tuple[FirmaColumnas, ...] = (
+    FirmaColumnas("ARCHIVO_IIBB", ("descripcion", "descipcion", "razon social", "provincia", "localidad"), 3),
+    # Encabezados UTF-8 leídos como Latin-1
+    FirmaColumnas("ARCHIVO_IIBB", ("descripciã³n", "razã³n social", "provincia", "localidad"), 3),
+    FirmaColumnas("ARCHIVO_IIBB", ("unnamed",), 2, por_columna=True),
+    # Mixto: columnas del Portal AFIP con contenido IIBB
+    FirmaColumnas("ARCHIVO_IIBB", ("tipo doc. comprador", "numero de documento", "denominacion comprador"), 2),
+    FirmaColumnas("XUBIO_CLIENTES", ("cuit", "nombre", "razonsocial"), 2),
+    FirmaColumnas("PORTAL_AFIP", ("tipo doc. comprador", "numero de documento", "denominacion comprador"), 2),
+)
+
+
+@dataclass
+class ClasificacionArchivo:
+    """
+    Veredicto de un encabezado: confianza de cada tipo y los tipos que
+    superan el umbral, en orden de prioridad. Lo que diga la IA (si se la
+    consultó) queda guardado junto, así tampoco se repite.
+    """
+    huella: str
+    confianzas: Dict[str, float]
+    candidatos: Tuple[str, ...]
+    tipo_ia: Optional[str] = None
+    confianza_ia: float = 0.0
+
+
+def huella_encabezado(columnas: Iterable) -> str:
+    """Huella de los nombres de columna (en orden, sin distinguir mayúsculas)"""
+    texto = "\n".join(str(c).lower() for c in columnas)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+class ClasificadorArchivos:
+    """
+    Tipo de archivo por sus columnas, con los patrones de todas las firmas
+    compilados en una sola expresión regular: el encabezado entero
+    (normalizado) se recorre una vez y de ahí salen las confianzas de todos
+    los tipos, en lugar de probar cada firma con `in` sobre cada columna.
+
+    Los veredictos se cachean por huella del encabezado: el mismo formato de
+    archivo subido otra vez no se vuelve a clasificar.
+    """
+
+    def __init__(self, firmas: Iterable[FirmaColumnas] = FIRMAS_ARCHIVO,
+                 confianza_minima: float = CONFIANZA_MINIMA_CLASIFICADOR):
+        self.firmas = tuple(firmas)
+        self.confianza_minima = confianza_minima
+        self.tipos: List[str] = list(dict.fromkeys(f.tipo for f in self.firmas))
+        self._patrones = [frozenset(normalizar_texto(p) for p in f.patrones) for f in self.firmas]
+        patrones = sorted({p for patrones in self._patrones for p in patrones}, key=len, reverse=True)
+        # Dentro de un lookahead las coincidencias se pueden solapar; en cada
+        # posición gana el patrón más largo, que arrastra a los que contiene
+        self._regex = re.compile("(?=(" + "|".join(re.escape(p) for p in patrones) + "))")
+        self._contenidos: Dict[str, FrozenSet[str]] = {p: frozenset(q for q in patrones if q in p) for p in patrones}
+        self._cache: "OrderedDict[str, ClasificacionArchivo]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def confianzas(self, columnas: Iterable) -> Dict[str, float]:
+        """Confianza de cada tipo: la de su mejor firma, patrones encontrados / mínimo (tope 1)"""
+        # Un separador que ningún patrón contiene: no hay coincidencias entre dos columnas
+        texto = normalizar_texto("\n".join(str(c) for c in columnas))
+        coincidencias = [m.group(1) for m in self._regex.finditer(texto)]
+        presentes = frozenset().union(*(self._contenidos[p] for p in set(coincidencias)))
+        confianzas = dict.fromkeys(self.tipos, 0.0)
+        for firma, patrones in zip(self.firmas, self._patrones):
+            if firma.por_columna:
+                encontrados = sum(len(patrones & self._contenidos[p]) for p in coincidencias)
+            else:
+                encontrados = len(patrones & presentes)
+            if encontrados:
+                confianzas[firma.tipo] = max(confianzas[firma.tipo], min(1.0, encontrados / firma.minimo))
+        return confianzas
+
+    def clasificar(self, columnas: Iterable) -> ClasificacionArchivo:
+        """Veredicto del encabezado, del cache si ya se vio uno igual"""
+        columnas = list(columnas)
+        huella = huella_encabezado(columnas)
+        with self._lock:
+            if huella in self._cache:
+                self._cache.move_to_end(huella)
+                return self._cache[huella]
+
+        confianzas = self.confianzas(columnas)
+        candidatos = tuple(t for t in self.tipos if confianzas[t] >= self.confianza_minima)
+        clasificacion = ClasificacionArchivo(huella=huella, confianzas=confianzas, candidatos=candidatos)
+        logger.debug("📋 Encabezado %s: %s", huella, confianzas)
+
+        with self._lock:
+            clasificacion = self._cache.setdefault(huella, clasificacion)
+            if len(self._cache) > MAX_CACHE_CLASIFICACIONES:
+                self._cache.popitem(last=False)
+        return clasificacion
+
+
+# Clasificador de los tipos que maneja TransformadorArchivos, construido una sola vez al importar
+CLASIFICADOR_ARCHIVOS = ClasificadorArchivos()
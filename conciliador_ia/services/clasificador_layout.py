@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pdfplumber
+
+try:
+    from .patron_manager import PatronManager
+except ImportError:
+    from services.patron_manager import PatronManager
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada grupo de rasgos en la huella
+PESOS_HUELLA = {
+    "pagina": 1.0,
+    "fuente": 1.0,
+    "productor": 2.0,
+    "creador": 1.0,
+    "token": 0.5,
+}
+LINEAS_ENCABEZADO = 6
+# Diferencia de similitud con el segundo banco a partir de la cual no se penaliza la confianza
+MARGEN_CONFIANZA_PLENA = 0.15
+# Por debajo de esta similitud con el centroide ganador, o con menos bancos
+# entrenados que BANCOS_MINIMOS_LAYOUT (sin segundo con el que comparar), la
+# confianza es 0: un banco nuevo con la misma hoja y fuentes no se confunde
+SIMILITUD_MINIMA_LAYOUT = float(os.getenv("SIMILITUD_MINIMA_LAYOUT", "0.85"))
+BANCOS_MINIMOS_LAYOUT = int(os.getenv("BANCOS_MINIMOS_LAYOUT", "2"))
+
+_PATRON_SUBCONJUNTO_FUENTE = re.compile(r'^[A-Z]{6}\+')
+_PATRON_TOKEN = re.compile(r'[^\W_]+')
+
+
+@dataclass
+class PrediccionLayout:
+    """Banco más parecido según la huella del PDF y confianza en [0, 1]"""
+    banco: Optional[str]
+    confianza: float
+    similitudes: Dict[str, float] = field(default_factory=dict)
+
+
+def huella_pdf(pdf_path: str) -> Dict[str, float]:
+    """
+    Huella de la estructura de un PDF, sin leer los movimientos: tamaño de
+    página, fuentes de la primera página, productor/creador de los metadatos
+    y los tokens de las primeras líneas.
+
+    Los tokens se guardan hasheados (y con los dígitos normalizados), así la
+    huella se puede persistir en bancos.json sin nombres, CUITs ni números
+    de cuenta del cliente.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        metadatos = pdf.metadata or {}
+        if not pdf.pages:
+            return {}
+        pagina = pdf.pages[0]
+        fuentes = {_PATRON_SUBCONJUNTO_FUENTE.sub("", c.get("fontname", "")) for c in pagina.chars}
+        texto = pagina.extract_text() or ""
+        return construir_huella(
+            ancho=pagina.width,
+            alto=pagina.height,
+            fuentes=fuentes,
+            productor=metadatos.get("Producer", ""),
+            creador=metadatos.get("Creator", ""),
+            lineas=texto.splitlines()[:LINEAS_ENCABEZADO],
+        )
+
+
+def construir_huella(ancho: float, alto: float, fuentes: Iterable[str],
+                     productor: str = "", creador: str = "",
+                     lineas: Iterable[str] = ()) -> Dict[str, float]:
+    """Huella a partir de los rasgos ya leídos (separado de la lectura del PDF)"""
+    huella: Dict[str, float] = {}
+    # Redondeo a 5 pt: el mismo formato de hoja puede variar en décimas
+    huella[f"pagina:{round(ancho / 5) * 5}x{round(alto / 5) * 5}"] = PESOS_HUELLA["pagina"]
+    for fuente in fuentes:
+        if fuente:
+            huella[f"fuente:{fuente.lower()}"] = PESOS_HUELLA["fuente"]
+    if productor:
+        huella[f"productor:{_normalizar_metadato(productor)}"] = PESOS_HUELLA["productor"]
+    if creador:
+        huella[f"creador:{_normalizar_metadato(creador)}"] = PESOS_HUELLA["creador"]
+    for linea in lineas:
+        for token in _PATRON_TOKEN.findall(linea.lower()):
+            token = re.sub(r'\d', '0', token)
+            clave = f"token:{hashlib.sha1(token.encode('utf-8')).hexdigest()[:10]}"
+            huella[clave] = PESOS_HUELLA["token"]
+    return huella
+
+
+def _normalizar_metadato(valor: str) -> str:
+    # Sin números de versión: "iText 5.5.13" y "iText 5.5.10" son el mismo generador
+    return re.sub(r'[\d.]+', '', str(valor).lower()).strip()
+
+
+def _norma(vector: Dict[str, float]) -> float:
+    return math.sqrt(sum(v * v for v in vector.values()))
+
+
+class ClasificadorLayout:
+    """
+    Clasificador de banco por centroide de huellas (similitud coseno).
+
+    Cada banco queda representado por el promedio de las huellas normalizadas
+    de sus ejemplos; predecir es un producto escalar disperso por banco, sin
+    red ni IA. La confianza es la similitud con el banco ganador, penalizada
+    cuando el segundo queda a menos de MARGEN_CONFIANZA_PLENA, y 0 si esa
+    similitud no llega a `similitud_minima` o hay menos de `bancos_minimos`
+    bancos entrenados.
+    """
+
+    def __init__(self, similitud_minima: float = SIMILITUD_MINIMA_LAYOUT, bancos_minimos: int = BANCOS_MINIMOS_LAYOUT):
+        self.centroides: Dict[str, Dict[str, float]] = {}
+        self.ejemplos_por_banco: Dict[str, int] = {}
+        self.similitud_minima = similitud_minima
+        self.bancos_minimos = bancos_minimos
+
+    def entrenar(self, ejemplos: Iterable[Tuple[str, Dict[str, float]]]) -> "ClasificadorLayout":
+        sumas: Dict[str, Dict[str, float]] = {}
+        for banco, huella in ejemplos:
+            norma = _norma(huella)
+            if not banco or not norma:
+                continue
+            suma = sumas.setdefault(banco, {})
+            for rasgo, valor in huella.items():
+                suma[rasgo] = suma.get(rasgo, 0.0) + valor / norma
+            self.ejemplos_por_banco[banco] = self.ejemplos_por_banco.get(banco, 0) + 1
+
+        for banco, suma in sumas.items():
+            norma = _norma(suma)
+            self.centroides[banco] = {rasgo: valor / norma for rasgo, valor in suma.items()}
+        return self
+
+    def predecir(self, huella: Dict[str, float]) -> PrediccionLayout:
+        norma = _norma(huella)
+        if not self.centroides or not norma:
+            return PrediccionLayout(banco=None, confianza=0.0)
+
+        similitudes = {
+            banco: sum(valor * centroide.get(rasgo, 0.0) for rasgo, valor in huella.items()) / norma
+            for banco, centroide in self.centroides.items()
+        }
+        ordenados = sorted(similitudes.items(), key=lambda item: item[1], reverse=True)
+        banco, mejor = ordenados[0]
+        segunda = ordenados[1][1] if len(ordenados) > 1 else 0.0
+        confianza = mejor * min(1.0, (mejor - segunda) / MARGEN_CONFIANZA_PLENA)
+        if mejor < self.similitud_minima or len(self.centroides) < self.bancos_minimos:
+            confianza = 0.0
+        return PrediccionLayout(
+            banco=banco if mejor > 0 else None,
+            confianza=round(max(confianza, 0.0), 3),
+            similitudes={b: round(s, 3) for b, s in ordenados},
+        )
+
+    def predecir_pdf(self, pdf_path: str) -> PrediccionLayout:
+        return self.predecir(huella_pdf(pdf_path))
+
+
+def ejemplos_desde_patron_manager(patron_manager: PatronManager) -> List[Tuple[str, Dict[str, float]]]:
+    """
+    Ejemplos (banco, huella) guardados con `PatronManager.agregar_ejemplo`.
+    Si un ejemplo no trae la huella pero su archivo sigue en
+    data/extractos_ejemplo, se calcula desde el PDF.
+    """
+    ejemplos = []
+    bancos = patron_manager.cargar_bancos().get("bancos_entrenados", {})
+    for banco_id, datos in bancos.items():
+        if not datos.get("activo", True):
+            continue
+        for ejemplo in datos.get("ejemplos_entrenamiento", []):
+            if not isinstance(ejemplo, dict):
+                continue
+            banco = ejemplo.get("banco") or datos.get("nombre", banco_id)
+            huella = ejemplo.get("huella")
+            if not huella and ejemplo.get("archivo") and Path(ejemplo["archivo"]).exists():
+                try:
+                    huella = huella_pdf(ejemplo["archivo"])
+                except Exception as e:
+                    logger.warning(f"No se pudo calcular la huella de {ejemplo['archivo']}: {e}")
+            if huella:
+                ejemplos.append((banco, huella))
+    return ejemplos
+
+
+# Clasificador entrenado, reconstruido solo cuando cambia bancos.json
+_clasificador: Optional[ClasificadorLayout] = None
+_clasificador_version: Optional[float] = None
+_clasificador_lock = threading.Lock()
+
+
+def obtener_clasificador(patron_manager: Optional[PatronManager] = None) -> ClasificadorLayout:
+    """Clasificador entrenado con los ejemplos actuales de PatronManager (cacheado)"""
+    global _clasificador, _clasificador_version
+    patron_manager = patron_manager or PatronManager()
+    try:
+        version = patron_manager.bancos_file.stat().st_mtime
+    except OSError:
+        version = None
+
+    with _clasificador_lock:
+        if _clasificador is None or version != _clasificador_version:
+            ejemplos = ejemplos_desde_patron_manager(patron_manager)
+            _clasificador = ClasificadorLayout().entrenar(ejemplos)
+            _clasificador_version = version
+            logger.info(f"Clasificador de layout entrenado: {len(ejemplos)} ejemplos, {len(_clasificador.centroides)} bancos")
+        return _clasificador
@@ -10,6 +10,13 @@ from datetime import datetime
 import uuid
 import os
 
+try:
+    from ..utils.log_sampling import LoggerMuestreado, ResumenEtapa
+    from ..utils.cuit import es_cuit_valido, formatear_cuit, sugerir_reparaciones
+except ImportError:
+    from utils.log_sampling import LoggerMuestreado, ResumenEtapa
+    from utils.cuit import es_cuit_valido, formatear_cuit, sugerir_reparaciones
+
 logger = logging.getLogger(__name__)
 
 def s(x):
@@ -192,12 +199,12 @@ class ClienteProcessor:
         if len(cuit_limpio) != 11:
             return False, cuit
         
-        # Formatear con guiones XX-XXXXXXXX-X
-        cuit_formateado = f"{cuit_limpio[:2]}-{cuit_limpio[2:10]}-{cuit_limpio[10:]}"
+        # Prefijo y dígito verificador (módulo 11)
+        if not es_cuit_valido(cuit_limpio):
+            return False, cuit
         
-        # Validar checksum básico (implementación simplificada)
-        # En producción, implementar validación completa de CUIT
-        return True, cuit_formateado
+        # Formatear con guiones XX-XXXXXXXX-X
+        return True, formatear_cuit(cuit_limpio)
     
     def mapear_tipo_documento(self, codigo: str) -> Optional[str]:
         """Mapea código AFIP a tipo de documento"""
@@ -331,6 +338,10 @@ class ClienteProcessor:
             nuevos_clientes = []
             errores = []
             
+            # Logs por fila muestreados + un resumen al final (archivos de 60k filas)
+            log_fila = LoggerMuestreado(logger, primeros=5, cada=1000)
+            resumen = ResumenEtapa(logger, "detectar_nuevos_clientes")
+            
             # Normalizar maestros
             xubio_identificadores = set()
             xubio_nombres = set()
@@ -364,7 +375,7 @@ class ClienteProcessor:
                     
                     # DEBUG: Verificar qué columnas se encontraron
                     fila_num = idx[0] if isinstance(idx, tuple) else idx
-                    logger.info(f"Fila {fila_num + 1}: tipo_doc_col='{tipo_doc_col}', numero_doc_col='{numero_doc_col}', nombre_col='{nombre_col}'")
+                    log_fila.debug("Fila %s: tipo_doc_col='%s', numero_doc_col='%s', nombre_col='%s'", fila_num + 1, tipo_doc_col, numero_doc_col, nombre_col)
                     
                     # MOSTRAR COLUMNAS DISPONIBLES EN PRIMERA FILA
                     if fila_num == 0:
@@ -380,6 +391,7 @@ class ClienteProcessor:
                     #     tipo_doc_col = 'Tipo Doc. Comprador'
                     
                     if not all([tipo_doc_col, numero_doc_col, nombre_col]):
+                        resumen.contar("columnas_faltantes")
                         errores.append({
                             'origen_fila': safe_join("Portal fila ", fila_num + 1),
                             'tipo_error': 'Columnas faltantes',
@@ -396,7 +408,7 @@ class ClienteProcessor:
                     # Mapear tipo de documento
                     tipo_documento = self.mapear_tipo_documento(tipo_doc_codigo)
                     if not tipo_documento:
-                        logger.warning(f"Fila {fila_num + 1}: Código de documento no reconocido: '{tipo_doc_codigo}'")
+                        resumen.contar("tipo_doc_no_reconocido", ejemplo=tipo_doc_codigo)
                         errores.append({
                             'origen_fila': safe_join("Portal fila ", fila_num + 1),
                             'tipo_error': 'Tipo de documento no reconocido',
@@ -404,22 +416,26 @@ class ClienteProcessor:
                             'valor_original': tipo_doc_codigo
                         })
                         continue
-                    else:
-                        logger.info(f"Fila {fila_num + 1}: Conversión exitosa '{tipo_doc_codigo}' → '{tipo_documento}'")
                     
                     # Validar y formatear documento
                     if tipo_documento == "DNI":
                         valido, numero_formateado = self.validar_y_formatear_dni(numero_doc)
-                        logger.info(f"Fila {fila_num + 1}: Validación DNI '{numero_doc}' → '{numero_formateado}' (válido: {valido})")
                     else:  # CUIT
                         valido, numero_formateado = self.validar_y_formatear_cuit(numero_doc)
-                        logger.info(f"Fila {fila_num + 1}: Validación CUIT '{numero_doc}' → '{numero_formateado}' (válido: {valido})")
+                    log_fila.debug("Fila %s: Validación %s '%s' → '%s' (válido: %s)", fila_num + 1, tipo_documento, numero_doc, numero_formateado, valido)
                 
                     if not valido:
+                        resumen.contar("documento_invalido", ejemplo=numero_doc)
+                        detalle = 'Longitud o formato incorrecto'
+                        if tipo_documento == "CUIT" and len(self.normalizar_identificador(numero_doc)) == 11:
+                            sugerencias = sugerir_reparaciones(numero_doc)
+                            detalle = 'Dígito verificador o prefijo incorrecto'
+                            if sugerencias:
+                                detalle += safe_join('. ¿Quiso decir ', ' o '.join(formatear_cuit(s) for s in sugerencias), '?')
                         errores.append({
                             'origen_fila': safe_join("Portal fila ", fila_num + 1),
                             'tipo_error': safe_join(tipo_documento, ' inválido'),
-                            'detalle': 'Longitud o formato incorrecto',
+                            'detalle': detalle,
                             'valor_original': numero_doc
                         })
                         continue
@@ -428,59 +444,48 @@ class ClienteProcessor:
                     identificador_normalizado = self.normalizar_identificador(numero_doc)
                     nombre_normalizado = self.normalizar_texto(nombre)
                     
-                    logger.info(f"Fila {fila_num + 1}: Cliente '{nombre}' (Doc: {numero_formateado}) - Normalizado: '{identificador_normalizado}'")
-                    
                     if identificador_normalizado in xubio_identificadores:
-                        logger.info(f"Fila {fila_num + 1}: Cliente ya existe en Xubio - Saltando")
+                        resumen.contar("existente_en_xubio")
                         continue  # Cliente ya existe en Xubio
-                    else:
-                        logger.info(f"Fila {fila_num + 1}: Cliente NUEVO detectado - Procesando")
                     
                     # Buscar provincia - PRIMERO intentar por documento en Xubio
                     provincia = self._obtener_provincia_por_documento(numero_formateado, df_xubio)
-                    if provincia:
-                        logger.info(f"Fila {fila_num + 1}: Provincia desde Xubio: {provincia}")
+                    fuente_provincia = "xubio"
                 
                     # Si no se encuentra, usar método anterior como fallback
                     if not provincia:
                         provincia = self._buscar_provincia(row, df_portal.columns, df_cliente)
-                        if provincia:
-                            logger.info(f"Fila {fila_num + 1}: Provincia desde datos del portal: {provincia}")
+                        fuente_provincia = "portal"
                     
                     # Si aún no se encuentra, intentar por prefijo CUIT o DNI
                     if not provincia and tipo_documento == "CUIT":
                         provincia = self.obtener_provincia_por_cuit(numero_formateado)
-                        if provincia:
-                            logger.info(f"Fila {fila_num + 1}: Provincia determinada por prefijo CUIT: {provincia}")
+                        fuente_provincia = "prefijo_cuit"
                     
                     if not provincia and tipo_documento == "DNI":
                         # Primero intentar por datos históricos
                         if df_cliente is not None:
                             provincia = self.obtener_provincia_por_dni(numero_formateado, df_cliente)
-                            if provincia:
-                                logger.info(f"Fila {fila_num + 1}: Provincia determinada por DNI en datos históricos: {provincia}")
+                            fuente_provincia = "historico_dni"
                         
                         # Si no se encontró, intentar por rangos de DNI (códigos postales)
                         if not provincia:
                             provincia = self.obtener_localidad_por_dni(numero_formateado)
-                            if provincia:
-                                logger.info(f"Fila {fila_num + 1}: Provincia determinada por rango DNI: {provincia}")
+                            fuente_provincia = "rango_dni"
                     
                     # Si aún no se encuentra, marcar como sin provincia
                     if not provincia:
                         provincia = ""  # Sin provincia
-                        logger.warning(f"Fila {fila_num + 1}: No se pudo determinar provincia")
+                        fuente_provincia = "sin_provincia"
+                    resumen.contar(f"provincia_{fuente_provincia}")
                     
                     # Determinar condición IVA
                     condicion_iva = self.determinar_condicion_iva(tipo_documento, numero_formateado)
-                    logger.info(f"Fila {fila_num + 1}: Condición IVA determinada: {condicion_iva}")
                 
                     # Determinar localidad
                     localidad = ""
                     if tipo_documento == "DNI":
                         localidad = self.obtener_localidad_por_dni(numero_formateado)
-                        if localidad:
-                            logger.info(f"Fila {fila_num + 1}: Localidad determinada por DNI: {localidad}")
                     
                     # Crear cliente nuevo
                     nuevo_cliente = {
@@ -494,9 +499,11 @@ class ClienteProcessor:
                     }
                     
                     nuevos_clientes.append(nuevo_cliente)
-                    logger.info(f"Fila {fila_num + 1}: ✅ CLIENTE CREADO: {nombre} ({tipo_documento}: {numero_formateado}) - {provincia}")
+                    resumen.contar("nuevo", ejemplo=nombre)
+                    log_fila.info("Fila %s: ✅ CLIENTE CREADO: %s (%s: %s) - %s", fila_num + 1, nombre, tipo_documento, numero_formateado, provincia)
                 
                 except Exception as e:
+                    resumen.contar("error_procesamiento", ejemplo=str(e))
                     errores.append({
                         'origen_fila': safe_join("Portal fila ", fila_num + 1),
                         'tipo_error': 'Error de procesamiento',
@@ -506,6 +513,9 @@ class ClienteProcessor:
         
             # Eliminar duplicados por identificador
             clientes_unicos = self._eliminar_duplicados(nuevos_clientes)
+            resumen.contar("filas_portal", cantidad=len(df_portal))
+            resumen.contar("nuevos_unicos", cantidad=len(clientes_unicos))
+            resumen.emitir()
             
             return clientes_unicos, errores
             
@@ -1,11 +1,53 @@
+import numpy as np
 import pandas as pd
 import logging
+import os
 import re
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from .cliente_processor import ClienteProcessor
 
 logger = logging.getLogger(__name__)
 
+# Filas (desde el principio) que mira _analizar_campos_complejos para elegir el parser de cada columna
+FILAS_MUESTRA_CAMPOS = int(os.getenv("FILAS_MUESTRA_CAMPOS_COMPLEJOS", "200"))
+
+# Los mismos casos que los parsers por valor, compilados una vez para las versiones por Series
+PATRON_PARTES_GUION = re.compile(r'^([^-]*)-([^-]*)(?:-([^-]*))?')  # hasta los dos primeros guiones
+PATRON_NO_DIGITO = re.compile(r'[^\d]')
+PATRON_ALICUOTA = re.compile(r'^\d+(\.\d+)?$')
+PATRON_MONTO_IVA = re.compile(r'^\d{1,3}(?:,\d{3})*(?:\.\d{2})?$')
+
+# Palabras del nombre de columna que sugieren cada parser. Si sugiere los dos
+# y la muestra no desempata, gana el primero: cuit_documento acepta menos formatos
+PALABRAS_CAMPO_COMPLEJO = {
+    'cuit_documento': ['cuit', 'dni', 'documento'],
+    'numero_factura': ['factura', 'comprobante', 'numero'],
+}
+PARTES_CAMPO_COMPLEJO = {
+    'numero_factura': ['tipo_comprobante', 'punto_venta', 'numero'],
+    'cuit_documento': ['tipo_documento', 'numero_documento', 'provincia', 'condicion_iva'],
+}
+
+
+def _registros_por_caso(serie: pd.Series, casos: List[Tuple[np.ndarray, pd.DataFrame]],
+                        texto: pd.Series) -> pd.Series:
+    """
+    Series de dicts como la de `serie.apply(parser)`: cada fila toma el
+    registro de su caso (máscaras disjuntas, `partes` con las filas de la
+    máscara en orden) y las que no cumplen ninguno {'valor_original', 'exito': False}
+    """
+    valores = np.empty(len(serie), dtype=object)
+    pendientes = np.ones(len(serie), dtype=bool)
+    for mascara, partes in casos:
+        if mascara.any():
+            partes = partes.assign(exito=True)
+            valores[mascara] = partes.to_dict('records')
+            pendientes &= ~mascara
+    if pendientes.any():
+        valores[pendientes] = [{'valor_original': v, 'exito': False} for v in texto.to_numpy()[pendientes]]
+    return pd.Series(valores, index=serie.index, dtype=object)
+
+
 class ClienteProcessorInteligente(ClienteProcessor):
     """Extensión del ClienteProcessor existente con funcionalidad inteligente"""
     
@@ -18,6 +60,24 @@ class ClienteProcessorInteligente(ClienteProcessor):
             'iva_alicuotas': self._parse_iva_alicuotas,
             'numero_factura': self._parse_numero_factura
         }
+        # Las mismas, para una columna entera de una vez (ver parsear_columna)
+        self.parsers_series: Dict[str, Callable[[pd.Series], pd.Series]] = {
+            'numero_comprobante': self._parse_numero_comprobante_serie,
+            'cuit_documento': self._parse_cuit_documento_serie,
+            'iva_alicuotas': self._parse_iva_alicuotas_serie,
+            'numero_factura': self._parse_numero_factura_serie
+        }
+    
+    def parsear_columna(self, serie: pd.Series, tipo: str) -> pd.Series:
+        """
+        Aplica el parser inteligente `tipo` a toda la columna: el mismo
+        resultado que `serie.apply(self.parsers_inteligentes[tipo])`, con la
+        versión por Series si existe
+        """
+        parser_serie = self.parsers_series.get(tipo)
+        if parser_serie is not None:
+            return parser_serie(serie)
+        return serie.apply(self.parsers_inteligentes[tipo])
     
     def validar_tipo_archivo(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Valida el tipo de archivo y muestra el proceso que sigue"""
@@ -139,31 +199,36 @@ class ClienteProcessorInteligente(ClienteProcessor):
         return coincidencias >= 3
     
     def _analizar_campos_complejos(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Analiza campos que pueden ser parseados en múltiples partes"""
+        """
+        Analiza campos que pueden ser parseados en múltiples partes.
+        
+        El nombre de la columna propone los parsers; si propone más de uno
+        ("Numero de Documento") decide el que mejor parsea una muestra de las
+        primeras FILAS_MUESTRA_CAMPOS filas, nunca la columna entera.
+        """
         campos_complejos = {}
         
         for col in df.columns:
-            col_lower = col.lower()
+            col_lower = str(col).lower()
+            tipos = [tipo for tipo, palabras in PALABRAS_CAMPO_COMPLEJO.items()
+                     if any(keyword in col_lower for keyword in palabras)]
+            if not tipos:
+                continue
             
-            # Detectar campo de número de factura
-            if any(keyword in col_lower for keyword in ['factura', 'comprobante', 'numero']):
-                muestra_valores = df[col].dropna().head(3).tolist()
-                campos_complejos[col] = {
-                    'tipo': 'numero_factura',
-                    'muestra_valores': muestra_valores,
-                    'necesita_parsing': True,
-                    'partes_extraibles': ['tipo_comprobante', 'punto_venta', 'numero']
+            muestra = df[col].head(FILAS_MUESTRA_CAMPOS).dropna()
+            tipo = tipos[0]
+            if len(tipos) > 1 and len(muestra):
+                aciertos = {
+                    t: sum(r['exito'] for r in self.parsers_series[t](muestra)) for t in tipos
                 }
+                tipo = max(tipos, key=lambda t: aciertos[t])
             
-            # Detectar campo de CUIT/DNI
-            elif any(keyword in col_lower for keyword in ['cuit', 'dni', 'documento']):
-                muestra_valores = df[col].dropna().head(3).tolist()
-                campos_complejos[col] = {
-                    'tipo': 'cuit_documento',
-                    'muestra_valores': muestra_valores,
-                    'necesita_parsing': True,
-                    'partes_extraibles': ['tipo_documento', 'numero_documento', 'provincia', 'condicion_iva']
-                }
+            campos_complejos[col] = {
+                'tipo': tipo,
+                'muestra_valores': muestra.head(3).tolist(),
+                'necesita_parsing': True,
+                'partes_extraibles': PARTES_CAMPO_COMPLEJO[tipo]
+            }
         
         return campos_complejos
     
@@ -240,7 +305,7 @@ class ClienteProcessorInteligente(ClienteProcessor):
                 return {
                     'tipo_documento': 'DNI',
                     'numero_documento': numero_limpio,
-                    'provincia': self._determinar_provincia_por_dni(numero_limpio),
+                    'provincia': self.obtener_localidad_por_dni(numero_limpio),
                     'condicion_iva': 'CF',
                     'exito': True
                 }
@@ -248,8 +313,8 @@ class ClienteProcessorInteligente(ClienteProcessor):
                 return {
                     'tipo_documento': 'CUIT',
                     'numero_documento': numero_limpio,
-                    'provincia': self._determinar_provincia_por_cuit(numero_limpio),
-                    'condicion_iva': self._determinar_condicion_iva_cuit(numero_limpio),
+                    'provincia': self.obtener_provincia_por_cuit(numero_limpio),
+                    'condicion_iva': self.determinar_condicion_iva('CUIT', numero_limpio),
                     'exito': True
                 }
             
@@ -319,3 +384,109 @@ class ClienteProcessorInteligente(ClienteProcessor):
         except Exception as e:
             logger.warning(f"Error parseando IVA '{valor}': {e}")
             return {'valor_original': valor, 'exito': False}
+    
+    def _parse_numero_factura_serie(self, serie: pd.Series) -> pd.Series:
+        """_parse_numero_factura para una columna entera"""
+        texto = serie.astype(str).str.strip()
+        partes = texto.str.extract(PATRON_PARTES_GUION)
+        con_dos_guiones = partes[2].notna().to_numpy()
+        con_un_guion = partes[0].notna().to_numpy() & ~con_dos_guiones
+        solo_numero = (texto.str.isdigit() & (texto.str.len() >= 8)).to_numpy()
+        
+        caso_1 = partes[con_dos_guiones]
+        caso_2 = partes[con_un_guion]
+        numero_3 = texto[solo_numero].str.zfill(8)
+        return _registros_por_caso(serie, [
+            # Caso 1: "F-0001-00001234"
+            (con_dos_guiones, pd.DataFrame({
+                'tipo_comprobante': caso_1[0],
+                'punto_venta': caso_1[1].str.zfill(4),
+                'numero': caso_1[2].str.zfill(8),
+                'numero_completo': texto[con_dos_guiones],
+            })),
+            # Caso 2: "0001-00001234"
+            (con_un_guion, pd.DataFrame({
+                'tipo_comprobante': 'F',
+                'punto_venta': caso_2[0].str.zfill(4),
+                'numero': caso_2[1].str.zfill(8),
+                'numero_completo': texto[con_un_guion],
+            })),
+            # Caso 3: Solo número
+            (solo_numero, pd.DataFrame({
+                'tipo_comprobante': 'F',
+                'punto_venta': '0001',
+                'numero': numero_3,
+                'numero_completo': '0001-' + numero_3,
+            })),
+        ], texto)
+    
+    def _parse_cuit_documento_serie(self, serie: pd.Series) -> pd.Series:
+        """_parse_cuit_documento para una columna entera"""
+        texto = serie.astype(str).str.strip()
+        numero = texto.str.replace(PATRON_NO_DIGITO, '', regex=True)
+        largo = numero.str.len()
+        es_dni = (largo == 8).to_numpy()
+        es_cuit = (largo == 11).to_numpy()
+        
+        dni = numero[es_dni]
+        cuit = numero[es_cuit]
+        return _registros_por_caso(serie, [
+            (es_dni, pd.DataFrame({
+                'tipo_documento': 'DNI',
+                'numero_documento': dni,
+                'provincia': dni.str[:2].map(self.cp_rangos_dni).fillna(''),
+                'condicion_iva': 'CF',
+            })),
+            (es_cuit, pd.DataFrame({
+                'tipo_documento': 'CUIT',
+                'numero_documento': cuit,
+                'provincia': cuit.str[:2].map(self.prefijos_provincia).fillna(''),
+                # Como determinar_condicion_iva para un CUIT
+                'condicion_iva': pd.Series('MT', index=cuit.index).mask(cuit.str[:2].isin(['20', '23', '24']), 'RI'),
+            })),
+        ], texto)
+    
+    def _parse_numero_comprobante_serie(self, serie: pd.Series) -> pd.Series:
+        """_parse_numero_comprobante para una columna entera"""
+        texto = serie.astype(str).str.strip()
+        partes = texto.str.extract(PATRON_PARTES_GUION)
+        # Con dos guiones o más no hay caso que aplique
+        con_un_guion = (partes[0].notna() & partes[2].isna()).to_numpy()
+        solo_numero = (texto.str.isdigit() & (texto.str.len() >= 8)).to_numpy()
+        
+        caso_1 = partes[con_un_guion]
+        numero_2 = texto[solo_numero].str.zfill(8)
+        return _registros_por_caso(serie, [
+            (con_un_guion, pd.DataFrame({
+                'punto_venta': caso_1[0].str.zfill(4),
+                'numero': caso_1[1].str.zfill(8),
+                'numero_completo': texto[con_un_guion],
+            })),
+            (solo_numero, pd.DataFrame({
+                'punto_venta': '0001',
+                'numero': numero_2,
+                'numero_completo': '0001-' + numero_2,
+            })),
+        ], texto)
+    
+    def _parse_iva_alicuotas_serie(self, serie: pd.Series) -> pd.Series:
+        """_parse_iva_alicuotas para una columna entera"""
+        texto = serie.astype(str).str.strip()
+        es_alicuota = texto.str.match(PATRON_ALICUOTA).to_numpy(dtype=bool)
+        es_monto = texto.str.match(PATRON_MONTO_IVA).to_numpy(dtype=bool) & ~es_alicuota
+        
+        # astype(float) convierte cada texto con float(), igual que el parser por valor
+        monto_iva = texto[es_monto].str.replace(',', '', regex=False).astype(float)
+        alicuota = 21
+        return _registros_por_caso(serie, [
+            (es_alicuota, pd.DataFrame({
+                'alicuota': texto[es_alicuota].astype(float),
+                'monto_iva': None,
+                'neto_gravado': None,
+            })),
+            (es_monto, pd.DataFrame({
+                'alicuota': alicuota,
+                'monto_iva': monto_iva,
+                'neto_gravado': monto_iva / (alicuota / 100),
+            })),
+        ], texto)
@@ -1,53 +1,325 @@
 import pdfplumber
 import pandas as pd
 import re
-from typing import List, Dict, Any, Optional
+import os
+import itertools
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Iterator
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import logging
 from pathlib import Path
 import traceback
+import threading
+from dataclasses import dataclass, field
+
+try:
+    from ..utils.log_sampling import LoggerMuestreado, ResumenEtapa
+    from ..utils.bancos import AUTOMATA_BANCOS
+    from .extractor_coordenadas import ExtractorCoordenadas, ModeloColumnas, FilaTabla
+    from .supervisor_extraccion import SupervisorExtraccion, obtener_supervisor
+except ImportError:
+    from utils.log_sampling import LoggerMuestreado, ResumenEtapa
+    from utils.bancos import AUTOMATA_BANCOS
+    from services.extractor_coordenadas import ExtractorCoordenadas, ModeloColumnas, FilaTabla
+    from services.supervisor_extraccion import SupervisorExtraccion, obtener_supervisor
 
 logger = logging.getLogger(__name__)
 
+# Desde cuántas páginas conviene repartir la extracción entre procesos
+# (abrir el PDF en cada worker cuesta; con pocos páginas gana el modo serial)
+PAGINAS_MINIMAS_PARALELO = int(os.getenv("EXTRACTOR_PAGINAS_MINIMAS_PARALELO", "40"))
+MAX_WORKERS_EXTRACCION = int(os.getenv("EXTRACTOR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+# "regex": líneas de extract_text() contra la cascada de patrones; "coordenadas": columnas por posición de palabras
+MOTOR_EXTRACCION = os.getenv("EXTRACTOR_MOTOR", "regex")
+
+
+# Formatos probados en cascada por _parse_date (el orden define la prioridad)
+FORMATOS_FECHA = [
+    '%d/%m/%Y',
+    '%d/%m/%y',
+    '%d-%m-%Y',
+    '%d-%m-%y',
+    '%d.%m.%Y',
+    '%d.%m.%y',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%Y.%m.%d',
+    '%m/%d/%Y',
+    '%m-%d-%Y',
+    '%m.%d.%Y'
+]
+
+# Tokens de fecha tal como los capturan los patrones de _parse_line
+PATRON_TOKEN_FECHA = re.compile(r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}|\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})\b')
+
+# Patrones universales para extractos bancarios argentinos (compilados una vez por proceso;
+# el orden define la prioridad en _parse_line)
+PATRONES_LINEA = [re.compile(p) for p in [
+    # Patrón BBVA específico con ORIGEN: FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO SALDO
+    r'(\d{1,2}/\d{1,2})\s+([A-Z]?\s*\d*)\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón BBVA sin ORIGEN: FECHA CONCEPTO DÉBITO CRÉDITO SALDO
+    r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón BBVA con ORIGEN pero sin saldo: FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO
+    r'(\d{1,2}/\d{1,2})\s+([A-Z]?\s*\d*)\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón BBVA sin ORIGEN ni saldo: FECHA CONCEPTO DÉBITO CRÉDITO
+    r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón estándar: FECHA CONCEPTO IMPORTE SALDO
+    r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón sin saldo: FECHA CONCEPTO IMPORTE
+    r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón con formato DD/MM/YYYY
+    r'(\d{2}/\d{2}/\d{4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón con formato DD-MM-YYYY
+    r'(\d{2}-\d{2}-\d{4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón con formato DD.MM.YYYY
+    r'(\d{2}\.\d{2}\.\d{4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón más flexible para cualquier banco
+    r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón con espacios múltiples
+    r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+    
+    # Patrón para formatos con coma decimal
+    r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
+]]
+PATRON_ORIGEN = re.compile(r'^[A-Z]?\s*\d*$')
+PATRON_ESPACIOS = re.compile(r'\s+')
+PATRON_NO_IMPORTE = re.compile(r'[^\d.-]')
+
+
+def _parse_date_cascada(date_str: str) -> Optional[datetime]:
+    for fmt in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class FormatoFechas:
+    """
+    Formato de fecha de un documento, inferido de una muestra de sus fechas.
+    
+    Cada formato candidato se prueba sobre la muestra y gana el que parsea
+    más tokens (a igualdad, el primero de FORMATOS_FECHA). Así un extracto
+    con "12/25/2024" queda como mes/día aunque "03/04/2024" sea ambiguo.
+    Después cada fecha se parsea con un único `strptime`; solo las que no
+    encajan vuelven a la cascada completa.
+    """
+    
+    def __init__(self, formato: Optional[str] = None):
+        self.formato = formato
+        self.aciertos = 0
+        self.cascada = 0
+    
+    @classmethod
+    def inferir(cls, tokens: List[str], minimo_aciertos: float = 0.8) -> "FormatoFechas":
+        tokens = [t.strip() for t in tokens if t and t.strip()]
+        if not tokens:
+            return cls()
+        mejor, mejor_aciertos = None, 0
+        for fmt in FORMATOS_FECHA:
+            aciertos = 0
+            for token in tokens:
+                try:
+                    datetime.strptime(token, fmt)
+                    aciertos += 1
+                except ValueError:
+                    pass
+            if aciertos > mejor_aciertos:
+                mejor, mejor_aciertos = fmt, aciertos
+        if mejor_aciertos < minimo_aciertos * len(tokens):
+            return cls()
+        return cls(mejor)
+    
+    def parse(self, date_str: str) -> Optional[datetime]:
+        date_str = date_str.strip()
+        if self.formato:
+            try:
+                fecha = datetime.strptime(date_str, self.formato)
+                self.aciertos += 1
+                return fecha
+            except ValueError:
+                pass
+        self.cascada += 1
+        return _parse_date_cascada(date_str)
+    
+    def parse_serie(self, tokens: pd.Series) -> pd.Series:
+        """Versión en bloque: `pd.to_datetime` con el formato inferido y cascada para los que fallan"""
+        tokens = tokens.astype(str).str.strip()
+        if self.formato:
+            fechas = pd.to_datetime(tokens, format=self.formato, errors='coerce')
+        else:
+            fechas = pd.Series(pd.NaT, index=tokens.index)
+        faltantes = fechas.isna()
+        if faltantes.any():
+            fechas[faltantes] = pd.to_datetime(tokens[faltantes].map(_parse_date_cascada), errors='coerce')
+        return fechas
+
+
+def _rangos_paginas(total_paginas: int, partes: int) -> List[Tuple[int, int]]:
+    """Divide [0, total_paginas) en hasta `partes` rangos contiguos [inicio, fin)"""
+    partes = max(1, min(partes, total_paginas))
+    base, resto = divmod(total_paginas, partes)
+    rangos = []
+    inicio = 0
+    for i in range(partes):
+        fin = inicio + base + (1 if i < resto else 0)
+        rangos.append((inicio, fin))
+        inicio = fin
+    return rangos
+
+
+def _extraer_rango_paginas(pdf_path: str, inicio: int, fin: int,
+                           formato_fecha: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Worker del modo paralelo: abre el PDF por su cuenta y procesa las páginas
+    [inicio, fin). Devuelve los movimientos y los conteos para el resumen.
+    """
+    extractor = PDFExtractor()
+    resumen = ResumenEtapa(logger, f"paginas_{inicio + 1}_{fin}", nivel=logging.DEBUG)
+    log_movimiento = LoggerMuestreado(logger, primeros=0, cada=500)
+    with pdfplumber.open(pdf_path) as pdf:
+        fechas = FormatoFechas(formato_fecha)
+        movimientos = list(extractor._iter_paginas(pdf, inicio, fin, resumen, log_movimiento, fechas))
+    return movimientos, dict(resumen.conteos)
+
+
+# Páginas del principio de las que se toma la muestra de fechas del documento
+PAGINAS_MUESTRA_FECHAS = 3
+
+
+@dataclass
+class ResultadoPagina:
+    """
+    Lo que el worker del supervisor devuelve de una página. Las fechas de los
+    movimientos salen de la cascada y su texto viaja en `fechas_texto`: el
+    formato del documento se infiere en el padre (con las muestras de las
+    primeras páginas) y con él se vuelven a parsear.
+    """
+    movimientos: List[Dict[str, Any]]
+    fechas_texto: List[str]
+    conteos: Dict[str, int]
+    muestra_fechas: List[str] = field(default_factory=list)
+    header: str = ""
+
+
+def _extraer_pagina_supervisada(page, page_num: int) -> ResultadoPagina:
+    """Worker del supervisor: una página entera con un solo extract_text (corre en el proceso hijo)"""
+    resumen = ResumenEtapa(logger, f"pagina_{page_num}", nivel=logging.DEBUG)
+    resumen.contar("paginas")
+    texto = page.extract_text() or ""
+    fechas_texto: List[str] = []
+    movimientos = PDFExtractor(supervisor=False)._movimientos_de_texto(
+        texto, page_num, resumen, LoggerMuestreado(logger, primeros=0, cada=500), fechas_texto=fechas_texto
+    )
+    return ResultadoPagina(
+        movimientos=movimientos,
+        fechas_texto=fechas_texto,
+        conteos=dict(resumen.conteos),
+        muestra_fechas=PATRON_TOKEN_FECHA.findall(texto) if page_num <= PAGINAS_MUESTRA_FECHAS else [],
+        header=texto[:1000] if page_num == 1 else "",
+    )
+
+
+@dataclass
+class MuestraCoordenadas:
+    """Página de la muestra del motor por coordenadas leída en el hijo del supervisor"""
+    palabras: List[Dict[str, Any]]
+    muestra_fechas: List[str] = field(default_factory=list)
+    header: str = ""
+
+
+def _muestra_pagina_coordenadas(page, page_num: int) -> MuestraCoordenadas:
+    """Worker del supervisor: palabras de una página de la muestra, con el header y las fechas de muestra"""
+    texto = page.extract_text() or ""
+    return MuestraCoordenadas(
+        palabras=page.extract_words(),
+        muestra_fechas=PATRON_TOKEN_FECHA.findall(texto) if page_num <= PAGINAS_MUESTRA_FECHAS else [],
+        header=texto[:1000] if page_num == 1 else "",
+    )
+
+
+def _filas_pagina_coordenadas(page, page_num: int, modelo: ModeloColumnas) -> List[FilaTabla]:
+    """Worker del supervisor: filas de una página con el modelo de columnas ya aprendido"""
+    return list(ExtractorCoordenadas().filas(page.extract_words(), modelo))
+
+
+def _formato_fechas_de_textos(textos: List[str], muestras: int = 30) -> FormatoFechas:
+    """Toma las primeras `muestras` fechas de los textos y elige su formato"""
+    return _formato_fechas_de_tokens((PATRON_TOKEN_FECHA.findall(texto or "") for texto in textos), muestras)
+
+
+def _formato_fechas_de_tokens(tokens_por_pagina: Iterable[List[str]], muestras: int = 30) -> FormatoFechas:
+    """Igual que `_formato_fechas_de_textos` con las fechas ya encontradas en cada texto"""
+    tokens = []
+    for tokens_pagina in tokens_por_pagina:
+        tokens.extend(tokens_pagina)
+        if len(tokens) >= muestras:
+            break
+    fechas = FormatoFechas.inferir(tokens[:muestras])
+    logger.info(f"📅 Formato de fecha inferido: {fechas.formato or 'cascada'} ({len(tokens[:muestras])} muestras)")
+    return fechas
+
+
+@dataclass
+class ContextoExtraccion:
+    """
+    Estado de la extracción de un documento. Vive lo que dura el request; el
+    PDFExtractor no guarda nada por documento, así una sola instancia atiende
+    extracciones concurrentes.
+    """
+    pdf_path: str
+    header_info: str = ""
+    movimientos: List[Dict[str, Any]] = field(default_factory=list)
+    banco_detectado: Optional[str] = None
+    # Páginas que el supervisor omitió: {"pagina": n, "motivo": ...}
+    paginas_omitidas: List[Dict[str, Any]] = field(default_factory=list)
+
+
 class PDFExtractor:
-    """Clase para extraer datos de extractos bancarios en PDF"""
+    """
+    Clase para extraer datos de extractos bancarios en PDF.
+    
+    La configuración se fija en el constructor y no cambia después; el estado
+    de cada documento va en un ContextoExtraccion. Usar `obtener_extractor()`
+    para compartir una instancia por proceso.
+    """
     
-    def __init__(self):
-        self.movimientos = []
+    def __init__(self, paginas_minimas_paralelo: Optional[int] = None, max_workers: Optional[int] = None,
+                 motor: Optional[str] = None, supervisor=None):
+        self.paginas_minimas_paralelo = paginas_minimas_paralelo or PAGINAS_MINIMAS_PARALELO
+        self.max_workers = max_workers or MAX_WORKERS_EXTRACCION
+        self.motor = motor or MOTOR_EXTRACCION
+        # Supervisor de presupuestos por página y documento (False: sin supervisar)
+        self.supervisor: Optional[SupervisorExtraccion] = (
+            None if supervisor is False else supervisor or obtener_supervisor()
+        )
     
-    def extract_from_pdf(self, pdf_path: str) -> pd.DataFrame:
-        """Extrae datos de un PDF de extracto bancario"""
+    def extract_from_pdf(self, pdf_path: str, contexto: Optional[ContextoExtraccion] = None) -> pd.DataFrame:
+        """
+        Extrae datos de un PDF de extracto bancario. Si se pasa `contexto`, ahí
+        quedan el header, los movimientos y el banco detectado del documento.
+        """
+        contexto = contexto or ContextoExtraccion(pdf_path=str(pdf_path))
         try:
             logger.info(f"Iniciando extracción de PDF: {pdf_path}")
             
-            # Guardar información del header para detección de banco
-            with pdfplumber.open(pdf_path) as pdf:
-                logger.info(f"PDF abierto. Total de páginas: {len(pdf.pages)}")
-                
-                # Extraer header de la primera página
-                if pdf.pages:
-                    first_page = pdf.pages[0]
-                    header_text = first_page.extract_text()
-                    if header_text:
-                        self.header_info = header_text[:1000]  # Primeros 1000 caracteres
-                        logger.info(f"Header extraído: {self.header_info[:200]}...")
-                    else:
-                        logger.warning("No se pudo extraer texto del header")
-                
-                # Procesar todas las páginas
-                for page_num, page in enumerate(pdf.pages):
-                    logger.info(f"Procesando página {page_num + 1}")
-                    page_text = page.extract_text()
-                    if page_text:
-                        logger.info(f"Texto extraído de página {page_num + 1}: {len(page_text)} caracteres")
-                        logger.info(f"Primeras 500 caracteres: {page_text[:500]}")
-                    else:
-                        logger.warning(f"No se pudo extraer texto de la página {page_num + 1}")
-                    self._process_page(page, page_num + 1)
+            # El header (para detectar el banco) se lee en la misma pasada
+            contexto.movimientos = list(self.iter_movimientos(pdf_path, contexto))
             
             # Crear DataFrame
-            if self.movimientos:
-                df = pd.DataFrame(self.movimientos)
+            if contexto.movimientos:
+                df = pd.DataFrame(contexto.movimientos)
                 logger.info(f"DataFrame creado con {len(df)} movimientos")
                 logger.info(f"Columnas: {list(df.columns)}")
                 logger.info(f"Primeros 3 movimientos:")
@@ -55,8 +327,8 @@ class PDFExtractor:
                     logger.info(f"  {i+1}. {mov}")
                 
                 # Detectar banco
-                banco_detectado = self._detectar_banco(df)
-                logger.info(f"Banco detectado: {banco_detectado}")
+                contexto.banco_detectado = self._detectar_banco(df, contexto.header_info)
+                logger.info(f"Banco detectado: {contexto.banco_detectado}")
                 
                 return df
             else:
@@ -68,52 +340,391 @@ class PDFExtractor:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise
     
-    def _process_page(self, page, page_num: int):
-        """Procesa una página del PDF y extrae movimientos"""
+    def iter_movimientos(self, pdf_path: str, contexto: Optional[ContextoExtraccion] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Genera los movimientos del PDF página por página, en orden. Si se pasa
+        `contexto`, ahí queda el header del documento.
+        
+        Todo el estado del parseo es local al generador (la instancia no
+        guarda nada por documento), así la misma instancia puede atender varias
+        extracciones a la vez y la memoria no crece con el largo del extracto.
+        """
+        resumen = ResumenEtapa(logger, "extraccion_pdf")
         try:
-            text = page.extract_text()
-            if not text:
-                logger.warning(f"No se pudo extraer texto de la página {page_num}")
+            with pdfplumber.open(pdf_path) as pdf:
+                total_paginas = len(pdf.pages)
+                logger.info(f"PDF abierto. Total de páginas: {total_paginas}")
+            paralelo = self.max_workers > 1 and total_paginas >= self.paginas_minimas_paralelo
+            
+            # Supervisado: en todos los modos las páginas se parsean en procesos
+            # hijo con presupuesto de tiempo y memoria
+            if self.supervisor is not None:
+                if self.motor == "coordenadas":
+                    movimientos = self._iter_paginas_por_coordenadas_supervisadas(str(pdf_path), resumen, contexto)
+                    if movimientos is not None:
+                        yield from movimientos
+                        return
+                if paralelo:
+                    yield from self._iter_paginas_supervisadas_en_paralelo(str(pdf_path), total_paginas, resumen, contexto)
+                else:
+                    yield from self._iter_paginas_supervisadas(str(pdf_path), resumen, contexto)
                 return
             
-            logger.info(f"Texto extraído de página {page_num}: {len(text)} caracteres")
-            logger.info(f"Primeras 500 caracteres: {text[:500]}")
+            with pdfplumber.open(pdf_path) as pdf:
+                if contexto is not None:
+                    contexto.header_info = self._leer_header(pdf.pages[0].extract_text() if pdf.pages else "")
+                
+                # Un único formato de fecha para todo el documento
+                fechas = self._inferir_formato_fechas(pdf)
+                
+                # Motor por coordenadas: si el documento tiene forma de tabla no hace falta la cascada de regex
+                if self.motor == "coordenadas":
+                    movimientos = self._iter_paginas_por_coordenadas(pdf, resumen, fechas)
+                    if movimientos is not None:
+                        yield from movimientos
+                        return
+                
+                # Un solo resumen al final en lugar de logs por línea
+                if not paralelo:
+                    log_movimiento = LoggerMuestreado(logger, primeros=3, cada=500)
+                    yield from self._iter_paginas(pdf, 0, total_paginas, resumen, log_movimiento, fechas)
+            
+            if paralelo:
+                yield from self._iter_paginas_en_paralelo(str(pdf_path), total_paginas, resumen, fechas)
+        finally:
+            resumen.emitir()
+    
+    def to_frames(self, pdf_path: str, chunk_size: int = 5000) -> Iterator[pd.DataFrame]:
+        """Igual que `iter_movimientos` pero agrupado en DataFrames de hasta `chunk_size` filas"""
+        lote = []
+        for movimiento in self.iter_movimientos(pdf_path):
+            lote.append(movimiento)
+            if len(lote) >= chunk_size:
+                yield pd.DataFrame(lote)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote)
+    
+    def _leer_header(self, header_text: Optional[str]) -> str:
+        """Primeros 1000 caracteres del texto de la primera página (para detectar el banco)"""
+        if not header_text:
+            logger.warning("No se pudo extraer texto del header")
+            return ""
+        logger.info(f"Header extraído: {header_text[:200]}...")
+        return header_text[:1000]
+    
+    def _inferir_formato_fechas(self, pdf, muestras: int = 30, max_paginas: int = PAGINAS_MUESTRA_FECHAS) -> FormatoFechas:
+        """Toma las primeras `muestras` fechas del documento y elige su formato"""
+        return _formato_fechas_de_textos((page.extract_text() for page in pdf.pages[:max_paginas]), muestras)
+    
+    def _iter_paginas(self, pdf, inicio: int, fin: int,
+                      resumen: ResumenEtapa, log_movimiento: LoggerMuestreado,
+                      fechas: Optional[FormatoFechas] = None) -> Iterator[Dict[str, Any]]:
+        """Genera en orden los movimientos de las páginas [inicio, fin) de un PDF ya abierto"""
+        for page_num in range(inicio, fin):
+            page = pdf.pages[page_num]
+            yield from self._movimientos_de_pagina(page, page_num + 1, resumen, log_movimiento, fechas)
+            # Liberar el caché de objetos de la página (documentos de cientos de páginas)
+            if hasattr(page, "flush_cache"):
+                page.flush_cache()
+    
+    def _iter_paginas_supervisadas(self, pdf_path: str, resumen: ResumenEtapa,
+                                   contexto: Optional[ContextoExtraccion] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Modo serial bajo SupervisorExtraccion: el parseo corre en un proceso
+        hijo y una página que se pasa de tiempo o de memoria se omite (queda
+        en el resumen como `paginas_omitidas`) en lugar de colgar la extracción.
+        
+        Header, muestra de fechas y movimientos salen de la misma pasada (un
+        solo hijo por documento).
+        """
+        paginas = self.supervisor.iter_paginas(pdf_path, _extraer_pagina_supervisada)
+        yield from self._entregar_paginas_supervisadas(paginas, resumen, contexto)
+    
+    def _iter_paginas_supervisadas_en_paralelo(self, pdf_path: str, total_paginas: int, resumen: ResumenEtapa,
+                                               contexto: Optional[ContextoExtraccion] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Modo paralelo bajo el supervisor: un rango contiguo de páginas por
+        worker, cada uno con su propio hijo supervisado (los rangos arrancan
+        juntos, así el presupuesto de documento de cada uno es el del
+        documento). Las páginas se entregan en orden como en el modo serial.
+        """
+        rangos = _rangos_paginas(total_paginas, self.max_workers)
+        logger.info(f"⚡ Extracción paralela supervisada: {total_paginas} páginas en {len(rangos)} rangos")
+        
+        def rango(inicio: int, fin: int) -> list:
+            return list(self.supervisor.iter_paginas(pdf_path, _extraer_pagina_supervisada, inicio=inicio, fin=fin))
+        
+        pool = ThreadPoolExecutor(max_workers=len(rangos))
+        try:
+            futuros = [pool.submit(rango, inicio, fin) for inicio, fin in rangos]
+            paginas = itertools.chain.from_iterable(futuro.result() for futuro in futuros)
+            yield from self._entregar_paginas_supervisadas(paginas, resumen, contexto)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def _entregar_paginas_supervisadas(self, paginas: Iterable, resumen: ResumenEtapa,
+                                       contexto: Optional[ContextoExtraccion] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Movimientos de las PaginaSupervisada (en orden) de _extraer_pagina_supervisada:
+        las primeras páginas se retienen hasta inferir el formato de fecha y
+        recién ahí se entregan.
+        """
+        retenidas = []
+        fechas: Optional[FormatoFechas] = None
+        for pagina in paginas:
+            if pagina.numero == 1 and contexto is not None:
+                contexto.header_info = self._leer_header(None if pagina.omitida else pagina.resultado.header)
+            if fechas is None:
+                retenidas.append(pagina)
+                if pagina.numero < PAGINAS_MUESTRA_FECHAS:
+                    continue
+                fechas = _formato_fechas_de_tokens(p.resultado.muestra_fechas for p in retenidas if not p.omitida)
+                for retenida in retenidas:
+                    yield from self._movimientos_supervisados(retenida, resumen, fechas, contexto)
+                continue
+            yield from self._movimientos_supervisados(pagina, resumen, fechas, contexto)
+        
+        # Documento más corto que la muestra
+        if fechas is None:
+            fechas = _formato_fechas_de_tokens(p.resultado.muestra_fechas for p in retenidas if not p.omitida)
+            for retenida in retenidas:
+                yield from self._movimientos_supervisados(retenida, resumen, fechas, contexto)
+    
+    def _registrar_pagina_omitida(self, pagina, resumen: ResumenEtapa,
+                                  contexto: Optional[ContextoExtraccion] = None) -> None:
+        """Una página que el supervisor omitió queda en el resumen y en `contexto.paginas_omitidas`"""
+        omitida = {"pagina": pagina.numero, **pagina.omitida}
+        resumen.contar("paginas_omitidas", ejemplo=omitida)
+        if contexto is not None:
+            contexto.paginas_omitidas.append(omitida)
+    
+    def _movimientos_supervisados(self, pagina, resumen: ResumenEtapa, fechas: FormatoFechas,
+                                  contexto: Optional[ContextoExtraccion] = None) -> List[Dict[str, Any]]:
+        """Movimientos de una página del supervisor, con las fechas en el formato del documento"""
+        if pagina.omitida:
+            self._registrar_pagina_omitida(pagina, resumen, contexto)
+            return []
+        resultado: ResultadoPagina = pagina.resultado
+        for evento, cantidad in resultado.conteos.items():
+            resumen.contar(evento, cantidad=cantidad)
+        # En el hijo se parsearon con la cascada (que acepta las mismas fechas):
+        # solo puede cambiar cómo se lee una ambigua como 03/04/2024
+        if fechas.formato:
+            for movimiento, fecha_texto in zip(resultado.movimientos, resultado.fechas_texto):
+                movimiento['fecha'] = fechas.parse(fecha_texto) or movimiento['fecha']
+        return resultado.movimientos
+    
+    def _iter_paginas_en_paralelo(self, pdf_path: str, total_paginas: int, resumen: ResumenEtapa,
+                                  fechas: Optional[FormatoFechas] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Reparte las páginas en rangos contiguos entre un pool de procesos; cada
+        worker abre el archivo por su cuenta y los resultados se entregan en
+        orden de página. Si el pool no se puede usar, cae al modo serial.
+        """
+        rangos = _rangos_paginas(total_paginas, self.max_workers * 2)
+        logger.info(f"⚡ Extracción paralela: {total_paginas} páginas en {len(rangos)} rangos, {self.max_workers} procesos")
+        pool = None
+        try:
+            pool = ProcessPoolExecutor(max_workers=min(self.max_workers, len(rangos)))
+            formato_fecha = fechas.formato if fechas else None
+            futuros = [pool.submit(_extraer_rango_paginas, pdf_path, inicio, fin, formato_fecha) for inicio, fin in rangos]
+            # Esperar el primer rango antes de entregar nada: si el pool no
+            # arranca (entornos sin fork, límites de procesos) se puede caer al
+            # modo serial sin haber entregado movimientos duplicados
+            resultados = iter(futuros)
+            primero = next(resultados).result()
+        except Exception as e:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            logger.warning(f"⚠️ Extracción paralela no disponible ({e}), procesando en serie")
+            with pdfplumber.open(pdf_path) as pdf:
+                yield from self._iter_paginas(pdf, 0, total_paginas, resumen, LoggerMuestreado(logger, primeros=3, cada=500), fechas)
+            return
+        
+        try:
+            for movimientos, conteos in itertools.chain([primero], (futuro.result() for futuro in resultados)):
+                for evento, cantidad in conteos.items():
+                    resumen.contar(evento, cantidad=cantidad)
+                yield from movimientos
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def _iter_paginas_por_coordenadas(self, pdf, resumen: ResumenEtapa,
+                                      fechas: Optional[FormatoFechas] = None) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        Movimientos por coordenadas de palabras (ver ExtractorCoordenadas). El
+        modelo de columnas se aprende de las primeras páginas y se reusa en
+        todas; cada página llama a `extract_words()` una sola vez. Devuelve
+        None si el documento no tiene forma de tabla (se usa el motor regex).
+        """
+        motor = ExtractorCoordenadas()
+        muestra = [page.extract_words() for page in pdf.pages[:motor.paginas_muestra]]
+        modelo = motor.aprender_modelo(muestra)
+        if modelo is None:
+            logger.info("📐 Sin columnas reconocibles, se usa el motor regex")
+            return None
+        logger.info(f"📐 Columnas de montos: {[(c.rol, round(c.x1)) for c in modelo.montos]}, decimal '{modelo.separador_decimal}'")
+        return self._movimientos_por_coordenadas(pdf, motor, modelo, muestra, resumen, fechas)
+    
+    def _movimientos_por_coordenadas(self, pdf, motor: ExtractorCoordenadas, modelo: ModeloColumnas,
+                                     muestra: List[List[Dict[str, Any]]], resumen: ResumenEtapa,
+                                     fechas: Optional[FormatoFechas] = None) -> Iterator[Dict[str, Any]]:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            resumen.contar("paginas")
+            palabras = muestra[page_num - 1] if page_num <= len(muestra) else page.extract_words()
+            yield from self._movimientos_de_filas(motor.filas(palabras, modelo), page_num, resumen, fechas)
+            if hasattr(page, "flush_cache"):
+                page.flush_cache()
+    
+    def _iter_paginas_por_coordenadas_supervisadas(self, pdf_path: str, resumen: ResumenEtapa,
+                                                   contexto: Optional[ContextoExtraccion] = None
+                                                   ) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        Motor por coordenadas bajo el supervisor: la muestra (palabras, header
+        y fechas) y después las filas de cada página salen de hijos con
+        presupuesto. Devuelve None si el documento no tiene forma de tabla.
+        """
+        motor = ExtractorCoordenadas()
+        muestra = list(self.supervisor.iter_paginas(pdf_path, _muestra_pagina_coordenadas, fin=motor.paginas_muestra))
+        if contexto is not None:
+            contexto.header_info = self._leer_header(
+                muestra[0].resultado.header if muestra and not muestra[0].omitida else None
+            )
+        modelo = motor.aprender_modelo([[] if p.omitida else p.resultado.palabras for p in muestra])
+        if modelo is None:
+            logger.info("📐 Sin columnas reconocibles, se usa el motor regex")
+            return None
+        logger.info(f"📐 Columnas de montos: {[(c.rol, round(c.x1)) for c in modelo.montos]}, decimal '{modelo.separador_decimal}'")
+        fechas = _formato_fechas_de_tokens(p.resultado.muestra_fechas for p in muestra if not p.omitida)
+        return self._movimientos_por_coordenadas_supervisados(pdf_path, motor, modelo, muestra, resumen, fechas, contexto)
+    
+    def _movimientos_por_coordenadas_supervisados(self, pdf_path: str, motor: ExtractorCoordenadas,
+                                                  modelo: ModeloColumnas, muestra: list, resumen: ResumenEtapa,
+                                                  fechas: FormatoFechas,
+                                                  contexto: Optional[ContextoExtraccion] = None) -> Iterator[Dict[str, Any]]:
+        paginas = iter(muestra)
+        # La muestra ya cubrió el documento si tiene menos páginas que ella
+        if len(muestra) == motor.paginas_muestra:
+            paginas = itertools.chain(paginas, self.supervisor.iter_paginas(
+                pdf_path, _filas_pagina_coordenadas, args=(modelo,), inicio=len(muestra)
+            ))
+        for pagina in paginas:
+            if pagina.omitida:
+                self._registrar_pagina_omitida(pagina, resumen, contexto)
+                continue
+            resumen.contar("paginas")
+            if isinstance(pagina.resultado, MuestraCoordenadas):
+                filas = motor.filas(pagina.resultado.palabras, modelo)
+            else:
+                filas = pagina.resultado
+            yield from self._movimientos_de_filas(filas, pagina.numero, resumen, fechas)
+    
+    def _movimientos_de_filas(self, filas: Iterable[FilaTabla], page_num: int, resumen: ResumenEtapa,
+                              fechas: Optional[FormatoFechas] = None) -> Iterator[Dict[str, Any]]:
+        for fila in filas:
+            movimiento = self._movimiento_de_fila(fila, page_num, fechas)
+            if movimiento:
+                resumen.contar("movimientos")
+                yield movimiento
+            else:
+                resumen.contar("filas_descartadas", ejemplo=fila.descripcion[:80])
+    
+    def _movimiento_de_fila(self, fila: FilaTabla, page_num: int,
+                            fechas: Optional[FormatoFechas] = None) -> Optional[Dict[str, Any]]:
+        """Mismo formato de movimiento que `_parse_line`, a partir de una fila por columnas"""
+        fecha = fechas.parse(fila.fecha) if fechas else self._parse_date(fila.fecha)
+        if not fecha:
+            return None
+        
+        debito = fila.montos.get("debito")
+        credito = fila.montos.get("credito")
+        if debito:
+            importe, tipo = abs(debito), "débito"
+        elif credito:
+            importe, tipo = abs(credito), "crédito"
+        elif fila.montos.get("importe"):
+            importe = fila.montos["importe"]
+            tipo = "crédito" if importe > 0 else "débito"
+            importe = abs(importe)
+        else:
+            return None
+        
+        return {
+            'fecha': fecha,
+            'concepto': PATRON_ESPACIOS.sub(' ', fila.descripcion).strip(),
+            'importe': importe,
+            'tipo': tipo,
+            'origen': "",
+            'pagina': page_num
+        }
+    
+    def _movimientos_de_pagina(self, page, page_num: int, resumen: ResumenEtapa,
+                               log_movimiento: Optional[LoggerMuestreado] = None,
+                               fechas: Optional[FormatoFechas] = None) -> List[Dict[str, Any]]:
+        """Parsea una página del PDF y devuelve sus movimientos (sin estado compartido)"""
+        try:
+            resumen.contar("paginas")
+            text = page.extract_text()
+        except Exception as e:
+            logger.error(f"Error procesando página {page_num}: {e}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return []
+        return self._movimientos_de_texto(text, page_num, resumen, log_movimiento, fechas)
+    
+    def _movimientos_de_texto(self, text: Optional[str], page_num: int, resumen: ResumenEtapa,
+                              log_movimiento: Optional[LoggerMuestreado] = None,
+                              fechas: Optional[FormatoFechas] = None,
+                              fechas_texto: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Movimientos del texto de una página. Con `fechas_texto`, ahí se agrega
+        el texto de la fecha de cada movimiento (en el mismo orden).
+        """
+        log_movimiento = log_movimiento or LoggerMuestreado(logger, primeros=3, cada=500)
+        movimientos = []
+        try:
+            if not text:
+                resumen.contar("paginas_sin_texto", ejemplo=page_num)
+                return movimientos
             
             lines = text.split('\n')
-            logger.info(f"Total de líneas en página {page_num}: {len(lines)}")
             
-            # Mostrar las primeras 20 líneas para debug
-            logger.info(f"Primeras 20 líneas de la página {page_num}:")
-            for i, line in enumerate(lines[:20]):
-                if line.strip():  # Solo mostrar líneas no vacías
-                    logger.info(f"  Línea {i+1}: '{line.strip()}'")
+            # Volcado de las primeras líneas solo en DEBUG
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Página {page_num}: {len(text)} caracteres, {len(lines)} líneas")
+                for i, line in enumerate(lines[:20]):
+                    if line.strip():
+                        logger.debug(f"  Línea {i+1}: '{line.strip()}'")
             
-            movimientos_encontrados = 0
             for i, line in enumerate(lines):
                 if line.strip():  # Solo procesar líneas no vacías
-                    movimiento = self._parse_line(line, page_num)
+                    resumen.contar("lineas")
+                    movimiento = self._parse_line(line, page_num, fechas, fechas_texto)
                     if movimiento:
-                        self.movimientos.append(movimiento)
-                        movimientos_encontrados += 1
-                        logger.info(f"✅ Movimiento {movimientos_encontrados} encontrado en línea {i+1}: {movimiento}")
+                        movimientos.append(movimiento)
+                        resumen.contar("movimientos")
+                        log_movimiento.info("✅ Movimiento encontrado en página %s línea %s: %s", page_num, i + 1, movimiento)
                     else:
-                        # Log líneas que no coinciden con patrones (solo las primeras 10)
-                        if i < 10:
-                            logger.debug(f"❌ Línea {i+1} no coincide con patrones: '{line.strip()}'")
+                        resumen.contar("lineas_sin_patron", ejemplo=line.strip()[:80])
             
-            logger.info(f"Total movimientos encontrados en página {page_num}: {movimientos_encontrados}")
+            log_movimiento.debug("Total movimientos encontrados en página %s: %s", page_num, len(movimientos))
             
         except Exception as e:
             logger.error(f"Error procesando página {page_num}: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
+        return movimientos
     
-    def _parse_line(self, line: str, page_num: int) -> Optional[Dict[str, Any]]:
+    def _parse_line(self, line: str, page_num: int,
+                    fechas: Optional[FormatoFechas] = None,
+                    fechas_texto: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Parsea una línea de texto para extraer información de movimiento
         
         Args:
             line: Línea de texto del PDF
             page_num: Número de página
+            fechas: Formato de fecha inferido del documento (opcional)
+            fechas_texto: Si se pasa, ahí se agrega el texto de la fecha del movimiento
             
         Returns:
             Diccionario con datos del movimiento o None si no es válido
@@ -124,49 +735,11 @@ class PDFExtractor:
             return None
         
         # Log para debugging
-        logger.debug(f"Procesando línea: {line}")
+        logger.debug("Procesando línea: %s", line)
         
-        # Patrones universales para extractos bancarios argentinos
-        patterns = [
-            # Patrón BBVA específico con ORIGEN: FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO SALDO
-            r'(\d{1,2}/\d{1,2})\s+([A-Z]?\s*\d*)\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón BBVA sin ORIGEN: FECHA CONCEPTO DÉBITO CRÉDITO SALDO
-            r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón BBVA con ORIGEN pero sin saldo: FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO
-            r'(\d{1,2}/\d{1,2})\s+([A-Z]?\s*\d*)\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón BBVA sin ORIGEN ni saldo: FECHA CONCEPTO DÉBITO CRÉDITO
-            r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón estándar: FECHA CONCEPTO IMPORTE SALDO
-            r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón sin saldo: FECHA CONCEPTO IMPORTE
-            r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón con formato DD/MM/YYYY
-            r'(\d{2}/\d{2}/\d{4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón con formato DD-MM-YYYY
-            r'(\d{2}-\d{2}-\d{4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón con formato DD.MM.YYYY
-            r'(\d{2}\.\d{2}\.\d{4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón más flexible para cualquier banco
-            r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón con espacios múltiples
-            r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            
-            # Patrón para formatos con coma decimal
-            r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\s+(.+?)\s+([-]?\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-        ]
         
-        for pattern in patterns:
-            match = re.search(pattern, line)
+        for pattern in PATRONES_LINEA:
+            match = pattern.search(line)
             if match:
                 try:
                     fecha_str = match.group(1)
@@ -180,7 +753,7 @@ class PDFExtractor:
                         
                     elif len(match.groups()) >= 5:  # Patrón con ORIGEN sin SALDO o sin ORIGEN con SALDO
                         # Verificar si el segundo grupo es ORIGEN o CONCEPTO
-                        if re.match(r'^[A-Z]?\s*\d*$', match.group(2).strip()):  # Es ORIGEN
+                        if PATRON_ORIGEN.match(match.group(2).strip()):  # Es ORIGEN
                             origen = match.group(2).strip()
                             concepto = match.group(3).strip()
                             debito_str = match.group(4)
@@ -204,13 +777,13 @@ class PDFExtractor:
                         credito_str = match.group(3)
                     
                     # Limpiar concepto de caracteres extraños
-                    concepto = re.sub(r'\s+', ' ', concepto)  # Múltiples espacios a uno
+                    concepto = PATRON_ESPACIOS.sub(' ', concepto)  # Múltiples espacios a uno
                     concepto = concepto.strip()
                     
                     # Parsear fecha
-                    fecha = self._parse_date(fecha_str)
+                    fecha = fechas.parse(fecha_str) if fechas else self._parse_date(fecha_str)
                     if not fecha:
-                        logger.debug(f"Fecha no válida: {fecha_str}")
+                        logger.debug("Fecha no válida: %s", fecha_str)
                         continue
                     
                     # Manejar diferentes formatos de importe según el patrón
@@ -232,7 +805,7 @@ class PDFExtractor:
                         importe_str = credito_str if credito_str else debito_str
                         importe = self._parse_amount(importe_str)
                         if importe is None:
-                            logger.debug(f"Importe no válido: {importe_str}")
+                            logger.debug("Importe no válido: %s", importe_str)
                             continue
                         tipo = "crédito" if importe > 0 else "débito"
                         importe = abs(importe)
@@ -247,49 +820,31 @@ class PDFExtractor:
                         'pagina': page_num
                     }
                     
-                    logger.debug(f"Movimiento extraído: {movimiento}")
+                    logger.debug("Movimiento extraído: %s", movimiento)
+                    if fechas_texto is not None:
+                        fechas_texto.append(fecha_str)
                     return movimiento
                     
                 except Exception as e:
-                    logger.debug(f"Error parseando línea: {line} - {e}")
+                    logger.debug("Error parseando línea: %s - %s", line, e)
                     continue
         
         return None
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parsea una fecha en diferentes formatos"""
-        date_formats = [
-            '%d/%m/%Y',
-            '%d/%m/%y',
-            '%d-%m-%Y',
-            '%d-%m-%y',
-            '%d.%m.%Y',
-            '%d.%m.%y',
-            '%Y-%m-%d',
-            '%Y/%m/%d',
-            '%Y.%m.%d',
-            '%m/%d/%Y',
-            '%m-%d-%Y',
-            '%m.%d.%Y'
-        ]
+        fecha = _parse_date_cascada(date_str.strip())
+        if fecha:
+            return fecha
         
-        # Limpiar la fecha
-        date_str = date_str.strip()
-        
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        
-        logger.debug(f"No se pudo parsear la fecha: {date_str}")
+        logger.debug("No se pudo parsear la fecha: %s", date_str)
         return None
     
     def _parse_amount(self, amount_str: str) -> Optional[float]:
         """Parsea un importe monetario"""
         try:
             # Remover espacios y caracteres no numéricos excepto . y -
-            clean_amount = re.sub(r'[^\d.-]', '', amount_str)
+            clean_amount = PATRON_NO_IMPORTE.sub('', amount_str)
             
             # Convertir a float
             amount = float(clean_amount)
@@ -328,7 +883,7 @@ class PDFExtractor:
             return ""
         
         # Remover caracteres especiales y espacios extra
-        concepto = re.sub(r'\s+', ' ', concepto)
+        concepto = PATRON_ESPACIOS.sub(' ', concepto)
         concepto = concepto.strip()
         
         # Limitar longitud
@@ -337,8 +892,10 @@ class PDFExtractor:
         
         return concepto
     
-    def get_extraction_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Obtiene un resumen de la extracción"""
+    def get_extraction_summary(self, df: pd.DataFrame, header_info: str = "",
+                               paginas_omitidas: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Obtiene un resumen de la extracción (con las páginas que el supervisor omitió, si hubo)"""
+        paginas_omitidas = list(paginas_omitidas or [])
         if df.empty:
             return {
                 'total_movimientos': 0,
@@ -346,7 +903,8 @@ class PDFExtractor:
                 'total_debitos': 0,
                 'rango_fechas': None,
                 'importe_promedio': 0,
-                'banco_detectado': None
+                'banco_detectado': None,
+                'paginas_omitidas': paginas_omitidas
             }
         
         creditos = df[df['tipo'] == 'crédito']
@@ -363,63 +921,34 @@ class PDFExtractor:
             'importe_promedio': df['importe'].mean(),
             'importe_total_creditos': creditos['importe'].sum() if not creditos.empty else 0,
             'importe_total_debitos': debitos['importe'].sum() if not debitos.empty else 0,
-            'banco_detectado': self._detectar_banco(df)
+            'banco_detectado': self._detectar_banco(df, header_info),
+            'paginas_omitidas': paginas_omitidas
         }
     
-    def _detectar_banco(self, df: pd.DataFrame) -> str:
+    def _detectar_banco(self, df: pd.DataFrame, header_info: str = "") -> str:
         """Detecta el banco basado en el header y conceptos"""
         try:
-            # Primero buscar en el header
-            if hasattr(self, 'header_info') and self.header_info:
-                header_text = self.header_info.lower()
-                logger.info(f"Buscando banco en header: {header_text[:200]}...")
-                
-                # Bancos argentinos conocidos
-                bancos_conocidos = {
-                    'BBVA': ['bbva', 'banco bilbao vizcaya', 'banco bbva argentina'],
-                    'Santander': ['santander', 'banco santander argentina'],
-                    'Macro': ['macro', 'banco macro'],
-                    'Nación': ['nacion', 'banco nacion', 'banco de la nacion argentina'],
-                    'Galicia': ['galicia', 'banco galicia'],
-                    'HSBC': ['hsbc', 'banco hsbc argentina'],
-                    'Itaú': ['itau', 'banco itau argentina'],
-                    'Banco Ciudad': ['ciudad', 'banco ciudad'],
-                    'Banco Provincia': ['provincia', 'banco provincia'],
-                    'Banco Comafi': ['comafi', 'banco comafi'],
-                    'Banco Industrial': ['industrial', 'banco industrial'],
-                    'Banco Supervielle': ['supervielle', 'banco supervielle'],
-                    'Banco Credicoop': ['credicoop', 'banco credicoop'],
-                    'Banco Patagonia': ['patagonia', 'banco patagonia'],
-                    'Banco Comafi': ['comafi', 'banco comafi'],
-                    'Banco Piano': ['piano', 'banco piano'],
-                    'Banco de Córdoba': ['cordoba', 'banco de cordoba'],
-                    'Banco de Santa Fe': ['santa fe', 'banco de santa fe'],
-                    'Banco de Tucumán': ['tucuman', 'banco de tucuman'],
-                    'MercadoPago': ['mercadopago', 'mercadopago argentina'],
-                    'Ualá': ['uala', 'uala argentina'],
-                    'Naranja X': ['naranja x', 'naranja'],
-                    'Personal Pay': ['personal pay', 'personal'],
-                    'MODO': ['modo', 'modo argentina']
-                }
-                
-                for banco, keywords in bancos_conocidos.items():
-                    if any(keyword in header_text for keyword in keywords):
-                        logger.info(f"Banco detectado en header: {banco}")
-                        return banco
+            # Primero buscar en el header (una pasada del autómata de palabras clave)
+            if header_info:
+                logger.info(f"Buscando banco en header: {header_info[:200].lower()}...")
+                deteccion = AUTOMATA_BANCOS.detectar(header_info)
+                if deteccion.banco:
+                    logger.info(f"Banco detectado en header: {deteccion.banco} (confianza: {deteccion.confianza:.2f}, menciones: {deteccion.menciones})")
+                    return deteccion.banco
             
             # Si no se detectó en el header, buscar en los conceptos
             if not df.empty and 'concepto' in df.columns:
-                conceptos = df['concepto'].astype(str).str.lower().str.cat(sep=' ')
-                logger.info(f"Buscando banco en conceptos: {conceptos[:200]}...")
+                conceptos = df['concepto'].astype(str).str.cat(sep=' ')
+                logger.info(f"Buscando banco en conceptos: {conceptos[:200].lower()}...")
                 
-                for banco, keywords in bancos_conocidos.items():
-                    if any(keyword in conceptos for keyword in keywords):
-                        logger.info(f"Banco detectado en conceptos: {banco}")
-                        return banco
+                deteccion = AUTOMATA_BANCOS.detectar(conceptos)
+                if deteccion.banco:
+                    logger.info(f"Banco detectado en conceptos: {deteccion.banco} (confianza: {deteccion.confianza:.2f})")
+                    return deteccion.banco
             
             # Si no se detectó, intentar detectar por patrones comunes
-            if hasattr(self, 'header_info') and self.header_info:
-                header_text = self.header_info.lower()
+            if header_info:
+                header_text = header_info.lower()
                 
                 # Patrones específicos
                 if 'smart it solutions' in header_text:
@@ -439,4 +968,19 @@ class PDFExtractor:
             
         except Exception as e:
             logger.error(f"Error detectando banco: {e}")
-            return "Error en detección" 
\ No newline at end of file
+            return "Error en detección" 
+
+
+# Instancia compartida por proceso (ver obtener_extractor)
+_extractor: Optional[PDFExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def obtener_extractor() -> PDFExtractor:
+    """PDFExtractor único del proceso: sin estado por documento, se comparte entre requests"""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = PDFExtractor()
+    return _extractor
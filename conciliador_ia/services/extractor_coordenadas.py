@@ -0,0 +1,206 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from ..utils.bancos import normalizar_texto
+except ImportError:
+    from utils.bancos import normalizar_texto
+
+# Una palabra que es una fecha completa o un monto con decimales
+PATRON_PALABRA_FECHA = re.compile(r'^(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}|\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})$')
+PATRON_PALABRA_MONTO = re.compile(r'^\(?-?\$?-?\d{1,3}(?:([.,])\d{3})*[.,]\d{2}-?\)?$|^\(?-?\$?-?\d+[.,]\d{2}-?\)?$')
+
+# Títulos de columna que fijan el rol de una columna de montos
+ENCABEZADOS_MONTOS = {
+    "debito": ["debito", "debitos", "debe"],
+    "credito": ["credito", "creditos", "haber"],
+    "saldo": ["saldo"],
+    "importe": ["importe", "monto"],
+}
+
+
+@dataclass
+class ColumnaMontos:
+    """Columna de montos: alineada a la derecha, se identifica por su borde derecho"""
+    rol: str
+    x1: float
+
+
+@dataclass
+class ModeloColumnas:
+    """Columnas del documento, aprendidas de las primeras páginas y reusadas en todas"""
+    montos: List[ColumnaMontos]
+    x_fecha_max: float
+    separador_decimal: str = ","
+    tolerancia: float = 12.0
+
+    def columna_de(self, palabra: Dict[str, Any]) -> Optional[ColumnaMontos]:
+        mejor = min(self.montos, key=lambda c: abs(c.x1 - palabra["x1"]))
+        return mejor if abs(mejor.x1 - palabra["x1"]) <= self.tolerancia else None
+
+    def parsear_importe(self, texto: str) -> Optional[float]:
+        negativo = '-' in texto or (texto.startswith('(') and texto.endswith(')'))
+        miles = '.' if self.separador_decimal == ',' else ','
+        numero = re.sub(r'[^\d.,]', '', texto).replace(miles, '').replace(self.separador_decimal, '.')
+        try:
+            valor = float(numero)
+        except ValueError:
+            return None
+        return -valor if negativo else valor
+
+
+@dataclass
+class FilaTabla:
+    """Fila de movimiento ya separada en columnas"""
+    fecha: str
+    descripcion: str
+    montos: Dict[str, float] = field(default_factory=dict)
+
+
+class ExtractorCoordenadas:
+    """
+    Extracción de tablas de extractos por coordenadas de palabras.
+
+    En lugar de adivinar con regex qué número de la línea de `extract_text()`
+    es el débito y cuál el saldo, se usa `extract_words()` (una vez por
+    página): las filas salen de agrupar palabras por `top` y las columnas de
+    montos de agrupar los bordes derechos de los números de las filas con
+    fecha. El modelo de columnas se aprende una vez por documento y vale para
+    todas sus páginas, así una celda vacía (movimiento sin débito) no corre
+    los montos de lugar como pasa con el texto plano.
+    """
+
+    def __init__(self, tolerancia_fila: float = 3.0, tolerancia_columna: float = 12.0,
+                 paginas_muestra: int = 3, filas_minimas: int = 3):
+        self.tolerancia_fila = tolerancia_fila
+        self.tolerancia_columna = tolerancia_columna
+        self.paginas_muestra = paginas_muestra
+        self.filas_minimas = filas_minimas
+
+    def agrupar_filas(self, palabras: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        filas: List[List[Dict[str, Any]]] = []
+        for palabra in sorted(palabras, key=lambda p: (p["top"], p["x0"])):
+            if filas and palabra["top"] - filas[-1][0]["top"] <= self.tolerancia_fila:
+                filas[-1].append(palabra)
+            else:
+                filas.append([palabra])
+        return [sorted(fila, key=lambda p: p["x0"]) for fila in filas]
+
+    def aprender_modelo(self, paginas_palabras: List[List[Dict[str, Any]]]) -> Optional[ModeloColumnas]:
+        """
+        Modelo de columnas a partir de las palabras de las primeras páginas.
+        Devuelve None si no hay suficientes filas con fecha y montos (el
+        documento no tiene forma de tabla y conviene el parseo por texto).
+        """
+        bordes: List[float] = []
+        x_fechas: List[float] = []
+        separadores: Counter = Counter()
+        encabezados: List[Tuple[str, float]] = []
+        filas_con_fecha = 0
+
+        for palabras in paginas_palabras[:self.paginas_muestra]:
+            for fila in self.agrupar_filas(palabras):
+                if not PATRON_PALABRA_FECHA.match(fila[0]["text"]):
+                    encabezados.extend(self._encabezados(fila))
+                    continue
+                montos = [p for p in fila[1:] if PATRON_PALABRA_MONTO.match(p["text"])]
+                if not montos:
+                    continue
+                filas_con_fecha += 1
+                x_fechas.append(fila[0]["x1"])
+                for palabra in montos:
+                    bordes.append(palabra["x1"])
+                    separadores[re.sub(r'[^\d.,]', '', palabra["text"])[-3]] += 1
+
+        if filas_con_fecha < self.filas_minimas:
+            return None
+
+        # Columnas: bordes derechos que se repiten en al menos un 20% de las filas,
+        # o que tienen un título de columna encima (columnas poco usadas)
+        columnas = []
+        for grupo in self._agrupar_1d(bordes):
+            x1 = sum(grupo) / len(grupo)
+            con_titulo = any(abs(x_titulo - x1) <= 2 * self.tolerancia_columna for _, x_titulo in encabezados)
+            if len(grupo) >= max(2, 0.2 * filas_con_fecha) or con_titulo:
+                columnas.append(x1)
+        if not columnas:
+            return None
+
+        return ModeloColumnas(
+            montos=self._asignar_roles(columnas, encabezados),
+            x_fecha_max=max(x_fechas),
+            separador_decimal="." if separadores["."] > separadores[","] else ",",
+            tolerancia=self.tolerancia_columna,
+        )
+
+    def filas(self, palabras: List[Dict[str, Any]], modelo: ModeloColumnas) -> Iterator[FilaTabla]:
+        """Filas de movimientos de una página; las líneas sin fecha ni montos continúan la descripción anterior"""
+        anterior: Optional[FilaTabla] = None
+        for fila in self.agrupar_filas(palabras):
+            primera = fila[0]
+            tiene_fecha = bool(PATRON_PALABRA_FECHA.match(primera["text"])) and primera["x1"] <= modelo.x_fecha_max + self.tolerancia_columna
+            resto = fila[1:] if tiene_fecha else fila
+
+            montos: Dict[str, float] = {}
+            descripcion = []
+            for palabra in resto:
+                columna = modelo.columna_de(palabra) if PATRON_PALABRA_MONTO.match(palabra["text"]) else None
+                valor = modelo.parsear_importe(palabra["text"]) if columna else None
+                if columna and valor is not None and columna.rol not in montos:
+                    montos[columna.rol] = valor
+                else:
+                    descripcion.append(palabra["text"])
+
+            if tiene_fecha and montos:
+                if anterior:
+                    yield anterior
+                anterior = FilaTabla(fecha=primera["text"], descripcion=" ".join(descripcion), montos=montos)
+            elif anterior and not tiene_fecha and not montos and descripcion:
+                anterior.descripcion = f"{anterior.descripcion} {' '.join(descripcion)}".strip()
+            elif anterior:
+                # Cualquier otra fila (totales, encabezados) cierra el movimiento en curso
+                yield anterior
+                anterior = None
+        if anterior:
+            yield anterior
+
+    def _encabezados(self, fila: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        encontrados = []
+        for palabra in fila:
+            texto = normalizar_texto(palabra["text"]).strip(".:")
+            for rol, titulos in ENCABEZADOS_MONTOS.items():
+                if texto in titulos:
+                    encontrados.append((rol, palabra["x1"]))
+        return encontrados
+
+    def _asignar_roles(self, columnas: List[float], encabezados: List[Tuple[str, float]]) -> List[ColumnaMontos]:
+        columnas = sorted(columnas)
+        # Con títulos: cada columna toma el título más cercano a su borde derecho
+        if encabezados:
+            asignadas = []
+            for x1 in columnas:
+                rol, x_titulo = min(encabezados, key=lambda e: abs(e[1] - x1))
+                if abs(x_titulo - x1) <= 5 * self.tolerancia_columna:
+                    asignadas.append(ColumnaMontos(rol=rol, x1=x1))
+            if len({c.rol for c in asignadas}) == len(asignadas) and any(c.rol != "saldo" for c in asignadas):
+                return asignadas
+
+        # Sin títulos: por posición, de derecha a izquierda saldo, crédito, débito
+        if len(columnas) == 1:
+            roles = ["importe"]
+        elif len(columnas) == 2:
+            roles = ["importe", "saldo"]
+        else:
+            roles = ["ignorar"] * (len(columnas) - 3) + ["debito", "credito", "saldo"]
+        return [ColumnaMontos(rol=rol, x1=x1) for rol, x1 in zip(roles, columnas) if rol != "ignorar"]
+
+    def _agrupar_1d(self, valores: List[float]) -> List[List[float]]:
+        grupos: List[List[float]] = []
+        for valor in sorted(valores):
+            if grupos and valor - grupos[-1][-1] <= self.tolerancia_columna:
+                grupos[-1].append(valor)
+            else:
+                grupos.append([valor])
+        return grupos
@@ -4,8 +4,12 @@ import json
 import logging
 import re
 import base64
+import hashlib
 import io
-from typing import Dict, Any, Optional, List
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import os
 from openai import OpenAI
@@ -19,13 +23,190 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
+try:
+    from ..utils.montos import parsear_montos
+    from ..utils.bancos import AutomataPalabrasClave, DeteccionBanco
+    from .clasificador_layout import PrediccionLayout, obtener_clasificador
+    from .plantillas_banco import obtener_plantilla
+    from .patron_manager import PatronManager
+    from .supervisor_extraccion import obtener_supervisor
+    from ..utils.log_sampling import ResumenEtapa
+except ImportError:
+    from utils.montos import parsear_montos
+    from utils.bancos import AutomataPalabrasClave, DeteccionBanco
+    from services.clasificador_layout import PrediccionLayout, obtener_clasificador
+    from services.plantillas_banco import obtener_plantilla
+    from services.patron_manager import PatronManager
+    from services.supervisor_extraccion import obtener_supervisor
+    from utils.log_sampling import ResumenEtapa
+
 logger = logging.getLogger(__name__)
 
+# Palabras clave más comunes de bancos (el orden desempata)
+BANCOS_KEYWORDS = {
+    "Santander": ["santander"],
+    "BBVA": ["bbva"],
+    "Banco Galicia": ["galicia"],
+    "Banco Provincia": ["provincia"],
+    "Banco Macro": ["macro"],
+    "Banco Nación": ["nacion"],
+    "Banco Credicoop": ["credicoop"],
+    "HSBC": ["hsbc"],
+    "Itaú": ["itau"],
+    "Banco Supervielle": ["supervielle"],
+    "Chase Bank": ["chase"],
+    "Wells Fargo": ["wells fargo"],
+    "Bank of America": ["bank of america"],
+    "Citibank": ["citibank"],
+    "MercadoPago": ["mercadopago"],
+    "Ualá": ["uala"],
+    "Brubank": ["brubank"],
+    "Reba": ["reba"],
+}
+AUTOMATA_BANCOS_KEYWORDS = AutomataPalabrasClave(BANCOS_KEYWORDS)
+
+# Palabras clave que también son palabras comunes ("Provincia de Buenos Aires",
+# "Nación"): para omitir la IA solo cuentan dentro de "banco X", "banco de (la) X"
+PALABRAS_BANCO_AMBIGUAS = {"provincia", "nacion"}
+AUTOMATA_BANCOS_SIN_IA = AutomataPalabrasClave({
+    banco: [
+        frase
+        for palabra in palabras
+        for frase in ([f"banco {palabra}", f"banco de {palabra}", f"banco de la {palabra}"]
+                      if palabra in PALABRAS_BANCO_AMBIGUAS else [palabra])
+    ]
+    for banco, palabras in BANCOS_KEYWORDS.items()
+})
+
+# Con esta confianza (o más) en las palabras clave no se consulta a la IA por el banco
+CONFIANZA_BANCO_SIN_IA = float(os.getenv("CONFIANZA_BANCO_SIN_IA", "0.75"))
+# Líneas de la primera página (el encabezado, hasta el primer movimiento) en las que
+# se buscan esas palabras clave: más abajo están las contrapartes ("Transferencia a Banco Nación")
+LINEAS_ENCABEZADO_BANCO = int(os.getenv("LINEAS_ENCABEZADO_BANCO", "10"))
+_PATRON_LINEA_MOVIMIENTO = re.compile(r'^\s*\d{1,2}[/.-]\d{1,2}')
+# Ídem para el clasificador de layout entrenado con los ejemplos de PatronManager
+CONFIANZA_LAYOUT_SIN_IA = float(os.getenv("CONFIANZA_LAYOUT_SIN_IA", "0.6"))
+# Precisión guardada a partir de la cual se usa la plantilla compilada del banco en lugar de la IA
+PRECISION_MINIMA_PLANTILLA = float(os.getenv("PRECISION_MINIMA_PLANTILLA", "0.9"))
+
+# Render para detección de logo: solo la franja superior de la página, ya al ancho final
+LOGO_FRANJA_SUPERIOR = float(os.getenv("LOGO_FRANJA_SUPERIOR", "0.2"))  # fracción del alto
+LOGO_ANCHO_PX = int(os.getenv("LOGO_ANCHO_PX", "768"))
+LOGO_CALIDAD_JPEG = int(os.getenv("LOGO_CALIDAD_JPEG", "70"))
+MAX_CACHE_LOGOS = 64
+
+# Imágenes ya renderizadas, por hash del contenido del PDF y parámetros del render
+_cache_logos: "OrderedDict[tuple, str]" = OrderedDict()
+_cache_logos_lock = threading.Lock()
+
+# Texto de cada página (None si el supervisor la omitió) y páginas omitidas por
+# hash del PDF: la detección de banco y la extracción comparten un solo proceso
+# hijo por documento
+MAX_CACHE_TEXTOS_SUPERVISADOS = 16
+_cache_textos: "OrderedDict[str, Tuple[List[Optional[str]], List[Dict[str, Any]]]]" = OrderedDict()
+_cache_textos_lock = threading.Lock()
+
+
+# Extracción por ventanas: presupuesto de caracteres por llamada, solapamiento entre
+# ventanas consecutivas, cuántas llamadas a la IA se hacen a la vez y tope de
+# ventanas por documento (las que sobran se descartan con un warning)
+PRESUPUESTO_VENTANA_IA = int(os.getenv("PRESUPUESTO_VENTANA_IA", "12000"))
+PRESUPUESTO_VENTANA_SIMPLE = int(os.getenv("PRESUPUESTO_VENTANA_SIMPLE", "2000"))
+SOLAPAMIENTO_VENTANA = int(os.getenv("SOLAPAMIENTO_VENTANA", "400"))
+MAX_VENTANAS_CONCURRENTES = int(os.getenv("MAX_VENTANAS_CONCURRENTES", "4"))
+MAX_VENTANAS = int(os.getenv("MAX_VENTANAS", "60"))
+
+
+def dividir_en_ventanas(paginas: List[str], presupuesto: int, solapamiento: int = SOLAPAMIENTO_VENTANA) -> List[str]:
+    """
+    Agrupa las páginas en ventanas de hasta `presupuesto` caracteres, cortando
+    en límites de página (y de línea si una página sola no entra). Cada ventana
+    repite al principio las últimas líneas de la anterior (hasta `solapamiento`
+    caracteres) para no perder un movimiento partido entre páginas.
+    """
+    # Unidades que nunca se cortan: páginas enteras, o líneas de las páginas que no entran
+    unidades: List[str] = []
+    for pagina in paginas:
+        if len(pagina) + 1 <= presupuesto:
+            unidades.append(pagina + "\n")
+        else:
+            unidades.extend(linea + "\n" for linea in pagina.split("\n"))
+
+    ventanas: List[str] = []
+    actual = ""
+    for unidad in unidades:
+        if actual and len(actual) + len(unidad) > presupuesto:
+            ventanas.append(actual)
+            actual = _cola_por_lineas(actual, min(solapamiento, presupuesto - len(unidad)))
+        actual += unidad[:presupuesto]
+    if actual.strip():
+        ventanas.append(actual)
+    return ventanas
+
+
+def _cola_por_lineas(texto: str, maximo: int) -> str:
+    """Últimas líneas completas de `texto` que entran en `maximo` caracteres"""
+    if maximo <= 0:
+        return ""
+    cola = texto[-maximo:]
+    if len(cola) < len(texto):
+        corte = cola.find("\n")
+        cola = cola[corte + 1:] if corte >= 0 else ""
+    return cola
+
+
+def clave_movimiento(movimiento: Dict[str, Any]) -> tuple:
+    """(fecha, importe, hash de la descripción) para reconocer el mismo movimiento en dos ventanas"""
+    descripcion = re.sub(r'\s+', ' ', str(movimiento.get("descripcion", ""))).strip().lower()
+    try:
+        importe = round(float(movimiento.get("importe", 0)), 2)
+    except (TypeError, ValueError):
+        importe = movimiento.get("importe")
+    return (
+        str(movimiento.get("fecha", "")),
+        importe,
+        hashlib.sha1(descripcion.encode("utf-8")).hexdigest()[:12],
+    )
+
+
+def unir_movimientos_ventanas(movimientos_por_ventana: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Une los movimientos de ventanas consecutivas descartando los del solapamiento.
+
+    Solo se descuentan repeticiones contra la ventana inmediatamente anterior
+    (la única con la que se comparte texto): si una clave aparece 2 veces en la
+    ventana y 1 en la anterior, se agrega 1. Dos movimientos idénticos dentro de
+    una misma ventana (p. ej. dos comisiones iguales el mismo día) se conservan.
+    """
+    unidos: List[Dict[str, Any]] = []
+    anteriores: Counter = Counter()
+    for movimientos in movimientos_por_ventana:
+        actuales = Counter(clave_movimiento(m) for m in movimientos)
+        a_descartar = {clave: min(cantidad, anteriores[clave]) for clave, cantidad in actuales.items()}
+        for movimiento in movimientos:
+            clave = clave_movimiento(movimiento)
+            if a_descartar.get(clave):
+                a_descartar[clave] -= 1
+                continue
+            unidos.append(movimiento)
+        anteriores = actuales
+    return unidos
+
+
+def _hash_archivo(path: str) -> str:
+    """SHA-256 del contenido del archivo (no depende del nombre ni de la ruta temporal)"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
 class ExtractorInteligente:
     """Extractor de extractos bancarios usando IA con fallback a patrones entrenados"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, patron_manager: Optional[PatronManager] = None):
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.patron_manager = patron_manager
         if not self.api_key:
             raise ValueError("Se requiere OPENAI_API_KEY")
         
@@ -37,22 +218,35 @@ class ExtractorInteligente:
     
     def extraer_datos(self, archivo_path: str, banco: Optional[str] = None) -> Dict[str, Any]:
         """
-        Extrae datos de un extracto bancario usando IA con fallback a patrones
+        Extrae datos de un extracto bancario usando IA con fallback a patrones.
+        Las páginas que el supervisor omitió quedan en debug_info["paginas_omitidas"].
         """
+        resultado = self._extraer_datos(archivo_path, banco)
+        resultado.setdefault("debug_info", {})["paginas_omitidas"] = self._paginas_omitidas(archivo_path)
+        return resultado
+    
+    def _extraer_datos(self, archivo_path: str, banco: Optional[str] = None) -> Dict[str, Any]:
         try:
             # 1. Detectar banco si no se especifica
             banco_detectado = self._detectar_banco(archivo_path, banco)
             logger.info(f"Banco detectado: {banco_detectado}")
             
-            # 2. Extraer texto del PDF
-            texto = self._extraer_texto_pdf(archivo_path)
+            # 1b. Plantilla compilada del banco entrenado, si su precisión lo justifica (sin IA)
+            resultado_plantilla = self._extraer_con_plantilla(archivo_path, banco_detectado)
+            if resultado_plantilla:
+                logger.info("✅ Extracción con plantilla del banco exitosa")
+                return resultado_plantilla
+            
+            # 2. Extraer texto del PDF (por página, para poder partirlo en ventanas)
+            paginas = self._extraer_paginas_pdf(archivo_path)
+            texto = "".join(pagina + "\n" for pagina in paginas)
             logger.info(f"Texto extraído: {len(texto)} caracteres")
             
             # DEPURACIÓN: Mostrar muestra del texto
             logger.info(f"Muestra del texto: {texto[:500]}...")
             
             # 3. Intentar extracción con IA
-            resultado_ia = self._extraer_con_ia(texto, banco_detectado)
+            resultado_ia = self._extraer_por_ventanas(paginas, banco_detectado, self._extraer_con_ia, PRESUPUESTO_VENTANA_IA)
             logger.info(f"Resultado IA: {resultado_ia.get('total_movimientos', 0) if resultado_ia else 'None'} movimientos")
             
             # DEPURACIÓN: Validar resultado antes del fallback
@@ -62,7 +256,7 @@ class ExtractorInteligente:
             
             # 4. Si IA falla, intentar con prompt simplificado
             logger.warning("❌ IA falló, intentando con prompt simplificado")
-            resultado_simple = self._extraer_con_prompt_simple(texto, banco_detectado)
+            resultado_simple = self._extraer_por_ventanas(paginas, banco_detectado, self._extraer_con_prompt_simple, PRESUPUESTO_VENTANA_SIMPLE)
             
             if resultado_simple and self._validar_resultado(resultado_simple):
                 logger.info("✅ Extracción con prompt simple exitosa")
@@ -98,6 +292,141 @@ class ExtractorInteligente:
                 "error": str(e)
             }
     
+    def _obtener_patron_manager(self) -> Optional[PatronManager]:
+        if getattr(self, "patron_manager", None) is None:
+            try:
+                self.patron_manager = PatronManager()
+            except Exception as e:
+                logger.warning(f"PatronManager no disponible: {e}")
+                return None
+        return self.patron_manager
+    
+    def _extraer_con_plantilla(self, archivo_path: str, banco: str) -> Optional[Dict[str, Any]]:
+        """
+        Extrae con la plantilla compilada de un banco entrenado cuando su
+        precisión guardada alcanza PRECISION_MINIMA_PLANTILLA. El resultado se
+        valida y se registra con `actualizar_precision`; si no pasa la
+        validación se devuelve None y sigue el flujo con IA.
+        """
+        try:
+            patron_manager = self._obtener_patron_manager()
+            if not patron_manager:
+                return None
+            
+            banco_id = banco.lower().replace(" ", "_")
+            banco_data = patron_manager.obtener_banco(banco_id)
+            if not banco_data:
+                banco_id = patron_manager.buscar_banco_por_nombre(banco)
+                banco_data = patron_manager.obtener_banco(banco_id) if banco_id else None
+            if not banco_data or not banco_data.get("activo", True):
+                return None
+            
+            precision = banco_data.get("estadisticas", {}).get("precision", 0.0)
+            if precision < PRECISION_MINIMA_PLANTILLA:
+                return None
+            
+            plantilla = obtener_plantilla(banco_id, banco_data)
+            if not plantilla:
+                return None
+            
+            movimientos = plantilla.parsear_pdf(archivo_path)
+            resultado = {
+                "banco": banco,
+                "banco_id": banco_id,
+                "metodo": "plantilla",
+                "movimientos": movimientos,
+                "total_movimientos": len(movimientos),
+                "precision_estimada": precision if movimientos else 0.0
+            }
+            
+            exitoso = self._validar_resultado_con_totales(resultado)
+            patron_manager.actualizar_precision(banco_id, resultado["precision_estimada"], exitoso)
+            if not exitoso:
+                logger.warning(f"Plantilla de {banco_id} sin movimientos válidos, se sigue con IA")
+                return None
+            return resultado
+            
+        except Exception as e:
+            logger.error(f"Error extrayendo con plantilla: {e}")
+            return None
+    
+    def _extraer_por_ventanas(self, paginas: List[str], banco: str, extractor, presupuesto: int,
+                              max_ventanas: int = MAX_VENTANAS) -> Optional[Dict[str, Any]]:
+        """
+        Corre `extractor` (_extraer_con_ia o _extraer_con_prompt_simple) sobre
+        ventanas de páginas de hasta `presupuesto` caracteres, en paralelo, y une
+        los movimientos sacando los repetidos en los solapamientos. Si el texto
+        entra en una sola ventana es una llamada normal.
+        
+        Se procesan como mucho `max_ventanas`. Una ventana que falla se
+        reintenta una vez; si vuelve a fallar el resultado es un error (no se
+        devuelve un conjunto incompleto de movimientos) y sigue el fallback.
+        """
+        ventanas = dividir_en_ventanas(paginas, presupuesto)
+        if len(ventanas) <= 1:
+            return extractor(ventanas[0] if ventanas else "", banco)
+        
+        descartadas = max(len(ventanas) - max_ventanas, 0)
+        if descartadas:
+            logger.warning(f"⚠️ {len(ventanas)} ventanas superan el máximo de {max_ventanas}: se descartan las últimas {descartadas}")
+            ventanas = ventanas[:max_ventanas]
+        
+        def correcto(resultado) -> bool:
+            return bool(resultado) and "error" not in resultado
+        
+        logger.info(f"Texto dividido en {len(ventanas)} ventanas de hasta {presupuesto} caracteres")
+        with ThreadPoolExecutor(max_workers=min(MAX_VENTANAS_CONCURRENTES, len(ventanas))) as pool:
+            resultados = list(pool.map(lambda ventana: extractor(ventana, banco), ventanas))
+            fallidas = [i for i, r in enumerate(resultados) if not correcto(r)]
+            if fallidas:
+                logger.warning(f"{len(fallidas)} de {len(ventanas)} ventanas fallaron, se reintentan")
+                for i, resultado in zip(fallidas, pool.map(lambda i: extractor(ventanas[i], banco), fallidas)):
+                    resultados[i] = resultado
+        
+        reintentadas = len(fallidas)
+        fallidas = sum(1 for r in resultados if not correcto(r))
+        debug_info = {
+            "ventanas": len(ventanas),
+            "ventanas_descartadas": descartadas,
+            "ventanas_reintentadas": reintentadas,
+            "ventanas_fallidas": fallidas,
+        }
+        if fallidas:
+            logger.warning(f"❌ {fallidas} de {len(ventanas)} ventanas fallaron después del reintento")
+            return {
+                "banco": banco,
+                "banco_id": banco.lower().replace(" ", "_"),
+                "metodo": "ventanas_incompletas",
+                "movimientos": [],
+                "total_movimientos": 0,
+                "precision_estimada": 0.0,
+                "error": f"{fallidas} de {len(ventanas)} ventanas fallaron",
+                "debug_info": debug_info
+            }
+        movimientos_por_ventana = [r.get("movimientos", []) for r in resultados]
+        movimientos = unir_movimientos_ventanas(movimientos_por_ventana)
+        repetidos = sum(len(m) for m in movimientos_por_ventana) - len(movimientos)
+        
+        # Cantidad indicada en el resumen: la ventana que lo contiene la reporta
+        cantidades = [
+            r.get("resumen_detectado", {}).get("cantidad_movimientos_indicada")
+            for r in resultados if isinstance(r.get("resumen_detectado"), dict)
+        ]
+        cantidades = [c for c in cantidades if isinstance(c, (int, float)) and c > 0]
+        
+        # Con ventanas descartadas la precisión baja en proporción a lo que no se leyó
+        base = resultados[0]
+        return {
+            "banco": banco,
+            "banco_id": banco.lower().replace(" ", "_"),
+            "metodo": f"{base.get('metodo')}_ventanas",
+            "movimientos": movimientos,
+            "total_movimientos": len(movimientos),
+            "precision_estimada": round(base.get("precision_estimada", 0.0) * len(ventanas) / (len(ventanas) + descartadas), 3) if movimientos else 0.0,
+            "resumen_detectado": {"cantidad_movimientos_indicada": max(cantidades)} if cantidades else {},
+            "debug_info": {**debug_info, "repetidos_en_solapamiento": repetidos}
+        }
+    
     def _extraer_con_ia(self, texto: str, banco: str) -> Dict[str, Any]:
         """Extrae datos usando IA con prompt mejorado"""
         try:
@@ -105,8 +434,8 @@ class ExtractorInteligente:
             prompt = f"""
 Analiza este extracto de {banco} y extrae SOLO las transacciones individuales.
 
-EXTRACTO COMPLETO:
-{texto[:12000]}
+EXTRACTO (puede ser solo una parte; extrae las transacciones de este texto):
+{texto[:PRESUPUESTO_VENTANA_IA]}
 
 PROCESO CRÍTICO:
 1. BUSCA EL RESUMEN/TOTALES PRIMERO:
@@ -185,6 +514,7 @@ IMPORTANTE:
                 "movimientos": movimientos_limpios,
                 "total_movimientos": len(movimientos_limpios),
                 "precision_estimada": 0.95 if movimientos_limpios else 0.0,
+                "resumen_detectado": datos.get("resumen_detectado") or {},
                 "debug_info": {
                     "respuesta_bruta": respuesta_texto[:200],
                     "movimientos_originales": len(movimientos)
@@ -201,7 +531,7 @@ IMPORTANTE:
             prompt = f"""
 Encuentra SOLO las transacciones individuales en este texto (NO incluir saldos o totales):
 
-{texto[:2000]}
+{texto[:PRESUPUESTO_VENTANA_SIMPLE]}
 
 Lista cada transacción como: FECHA|DESCRIPCION|MONTO
 
@@ -464,6 +794,18 @@ IMPORTANTE:
             return banco
         
         try:
+            # 0. Palabras clave en el encabezado: con confianza alta no hace falta la IA
+            deteccion = self._detectar_banco_por_palabras_clave(archivo_path)
+            if deteccion.banco and deteccion.confianza >= CONFIANZA_BANCO_SIN_IA:
+                logger.info(f"Banco detectado por palabras clave: {deteccion.banco} (confianza: {deteccion.confianza:.2f}), se omite la IA")
+                return deteccion.banco
+            
+            # 0b. Huella de layout (tamaño de página, fuentes, productor, encabezado) contra los ejemplos entrenados
+            prediccion = self._detectar_banco_por_layout(archivo_path)
+            if prediccion.banco and prediccion.confianza >= CONFIANZA_LAYOUT_SIN_IA:
+                logger.info(f"Banco detectado por layout: {prediccion.banco} (confianza: {prediccion.confianza:.2f}), se omite la IA")
+                return prediccion.banco
+            
             # 1. Intentar detección por texto con IA
             banco_texto = self._detectar_banco_por_texto(archivo_path)
             if banco_texto and banco_texto != "Banco no identificado":
@@ -537,8 +879,12 @@ EJEMPLOS DE RESPUESTA:
     def _detectar_banco_por_logo(self, archivo_path: str) -> str:
         """Detecta banco analizando logo/imagen del PDF"""
         try:
-            # Usar PyMuPDF para mejor calidad de imagen
-            logo_image = self._pdf_pagina_a_imagen(archivo_path, pagina=0)
+            # Solo la franja superior de la primera página, donde están los logos
+            logo_image = self._franja_superior_a_imagen(archivo_path, pagina=0)
+            mime = "image/jpeg"
+            if not logo_image:
+                logo_image = self._pdf_pagina_a_imagen(archivo_path, pagina=0)
+                mime = "image/png"
             if not logo_image:
                 return "Banco no identificado"
             
@@ -555,7 +901,7 @@ EJEMPLOS DE RESPUESTA:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/png;base64,{logo_image}"
+                                    "url": f"data:{mime};base64,{logo_image}"
                                 }
                             }
                         ]
@@ -573,38 +919,44 @@ EJEMPLOS DE RESPUESTA:
             logger.error(f"Error detectando banco por logo: {e}")
             return "Banco no identificado"
     
+    def _detectar_banco_por_palabras_clave(self, archivo_path: str, lineas: int = LINEAS_ENCABEZADO_BANCO) -> DeteccionBanco:
+        """
+        Una pasada del autómata de palabras clave sobre el encabezado: las
+        primeras `lineas` de la primera página, cortando en el primer movimiento
+        (una línea que empieza con fecha)
+        """
+        try:
+            texto = self._extraer_texto_pdf(archivo_path, max_paginas=1)
+            encabezado = []
+            for linea in texto.splitlines()[:lineas]:
+                if _PATRON_LINEA_MOVIMIENTO.match(linea):
+                    break
+                encabezado.append(linea)
+            return AUTOMATA_BANCOS_SIN_IA.detectar("\n".join(encabezado))
+        except Exception as e:
+            logger.error(f"Error en detección por palabras clave: {e}")
+            return DeteccionBanco(banco=None, confianza=0.0)
+    
+    def _detectar_banco_por_layout(self, archivo_path: str) -> PrediccionLayout:
+        """Clasificador local por huella del PDF (sin red)"""
+        try:
+            return obtener_clasificador().predecir_pdf(archivo_path)
+        except Exception as e:
+            logger.error(f"Error en detección por layout: {e}")
+            return PrediccionLayout(banco=None, confianza=0.0)
+    
     def _detectar_banco_basico(self, archivo_path: str) -> str:
         """Detección básica por palabras clave (fallback)"""
         try:
             texto = self._extraer_texto_pdf(archivo_path)
-            texto_lower = texto.lower()
-            
-            # Palabras clave más comunes de bancos
-            bancos_keywords = {
-                "santander": "Santander",
-                "bbva": "BBVA", 
-                "galicia": "Banco Galicia",
-                "provincia": "Banco Provincia",
-                "macro": "Banco Macro",
-                "nacion": "Banco Nación",
-                "credicoop": "Banco Credicoop",
-                "hsbc": "HSBC",
-                "itau": "Itaú",
-                "supervielle": "Banco Supervielle",
-                "chase": "Chase Bank",
-                "wells fargo": "Wells Fargo",
-                "bank of america": "Bank of America",
-                "citibank": "Citibank",
-                "mercadopago": "MercadoPago",
-                "uala": "Ualá",
-                "brubank": "Brubank",
-                "reba": "Reba",
-                "banco": "Banco"  # Genérico
-            }
             
-            for palabra, nombre in bancos_keywords.items():
-                if palabra in texto_lower:
-                    return nombre
+            # El primero de BANCOS_KEYWORDS que aparece, no el más mencionado
+            banco = AUTOMATA_BANCOS_KEYWORDS.primera(texto)
+            if banco:
+                return banco
+            
+            if "banco" in texto.lower():
+                return "Banco"  # Genérico
             
             return "Banco no identificado"
             
@@ -647,6 +999,54 @@ EJEMPLOS DE RESPUESTA:
             logger.error(f"Error convirtiendo PDF a imagen: {e}")
             return None
     
+    def _franja_superior_a_imagen(self, pdf_path: str, pagina: int = 0,
+                                  franja: Optional[float] = None,
+                                  ancho_px: Optional[int] = None,
+                                  calidad: Optional[int] = None) -> Optional[str]:
+        """
+        Renderiza solo la franja superior de una página (donde suelen estar los
+        logos) directamente al ancho final y la devuelve como JPEG en base64.
+        
+        A diferencia de `_pdf_pagina_a_imagen` no renderiza la página entera al 2x
+        para después achicarla con PIL. El resultado se cachea por hash del
+        contenido del PDF, así el mismo extracto subido dos veces no se vuelve a
+        renderizar.
+        """
+        if not PYMUPDF_AVAILABLE:
+            return None
+        
+        franja = franja if franja is not None else LOGO_FRANJA_SUPERIOR
+        ancho_px = ancho_px or LOGO_ANCHO_PX
+        calidad = calidad or LOGO_CALIDAD_JPEG
+        
+        try:
+            clave = (_hash_archivo(pdf_path), pagina, franja, ancho_px, calidad)
+            with _cache_logos_lock:
+                if clave in _cache_logos:
+                    _cache_logos.move_to_end(clave)
+                    return _cache_logos[clave]
+            
+            with fitz.open(pdf_path) as doc:
+                page = doc[pagina]
+                rect = page.rect
+                clip = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * franja)
+                escala = ancho_px / rect.width
+                pix = page.get_pixmap(matrix=fitz.Matrix(escala, escala), clip=clip, alpha=False)
+                jpeg = pix.tobytes("jpg", jpg_quality=calidad)
+            
+            imagen_base64 = base64.b64encode(jpeg).decode('utf-8')
+            logger.info(f"Franja superior renderizada: {pix.width}x{pix.height} px, {len(jpeg)} bytes")
+            
+            with _cache_logos_lock:
+                _cache_logos[clave] = imagen_base64
+                if len(_cache_logos) > MAX_CACHE_LOGOS:
+                    _cache_logos.popitem(last=False)
+            return imagen_base64
+            
+        except Exception as e:
+            logger.error(f"Error renderizando franja superior: {e}")
+            return None
+    
     def _extraer_logo_pdf(self, pdf_path: str) -> Optional[str]:
         """Extrae logo/imagen del PDF para análisis con IA"""
         try:
@@ -688,12 +1088,71 @@ EJEMPLOS DE RESPUESTA:
             logger.error(f"Error extrayendo logo: {e}")
             return None
     
-    def _extraer_texto_pdf(self, pdf_path: str) -> str:
-        """Extrae texto de un archivo PDF"""
+    def _textos_supervisados(self, pdf_path: str, max_paginas: Optional[int] = None) -> List[str]:
+        """
+        Texto de cada página vía SupervisorExtraccion; las páginas que se pasan
+        del presupuesto se omiten. Se lee el documento entero una vez y las
+        siguientes llamadas (con o sin `max_paginas`) salen del cache.
+        """
+        textos, _ = self._leer_textos_supervisados(pdf_path)
+        return [texto for texto in textos[:max_paginas] if texto is not None]
+    
+    def _leer_textos_supervisados(self, pdf_path: str) -> Tuple[List[Optional[str]], List[Dict[str, Any]]]:
+        """Textos por página (None las omitidas) y páginas omitidas, desde el cache o leyendo el PDF"""
+        clave = _hash_archivo(pdf_path)
+        with _cache_textos_lock:
+            leido = _cache_textos.get(clave)
+            if leido is not None:
+                _cache_textos.move_to_end(clave)
+                return leido
+        textos, omitidas = [], []
+        with ResumenEtapa(logger, "texto_pdf") as resumen:
+            for pagina in obtener_supervisor().iter_paginas(pdf_path):
+                if pagina.omitida:
+                    omitidas.append({"pagina": pagina.numero, **pagina.omitida})
+                    resumen.contar("paginas_omitidas", ejemplo=omitidas[-1])
+                else:
+                    resumen.contar("paginas")
+                textos.append(None if pagina.omitida else pagina.resultado)
+        with _cache_textos_lock:
+            _cache_textos[clave] = (textos, omitidas)
+            if len(_cache_textos) > MAX_CACHE_TEXTOS_SUPERVISADOS:
+                _cache_textos.popitem(last=False)
+        return textos, omitidas
+    
+    def _paginas_omitidas(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """Páginas que el supervisor omitió al leer el PDF (vacío sin supervisor o si no se leyó)"""
+        if obtener_supervisor() is None:
+            return []
+        try:
+            clave = _hash_archivo(pdf_path)
+        except OSError:
+            return []
+        with _cache_textos_lock:
+            leido = _cache_textos.get(clave)
+        return list(leido[1]) if leido is not None else []
+    
+    def _extraer_paginas_pdf(self, pdf_path: str) -> List[str]:
+        """Texto de cada página del PDF (las páginas sin texto se omiten)"""
         try:
+            if obtener_supervisor() is not None:
+                return [texto for texto in self._textos_supervisados(pdf_path) if texto]
+            with pdfplumber.open(pdf_path) as pdf:
+                return [texto for texto in (page.extract_text() for page in pdf.pages) if texto]
+        except Exception as e:
+            logger.error(f"Error extrayendo texto del PDF: {e}")
+            raise
+    
+    def _extraer_texto_pdf(self, pdf_path: str, max_paginas: Optional[int] = None) -> str:
+        """Extrae texto de un archivo PDF (opcionalmente solo las primeras `max_paginas`)"""
+        try:
+            if obtener_supervisor() is not None:
+                texto_completo = "".join(texto + "\n" for texto in self._textos_supervisados(pdf_path, max_paginas) if texto)
+                logger.info(f"Texto extraído: {len(texto_completo)} caracteres")
+                return texto_completo
             with pdfplumber.open(pdf_path) as pdf:
                 texto_completo = ""
-                for page in pdf.pages:
+                for page in pdf.pages[:max_paginas]:
                     texto_pagina = page.extract_text()
                     if texto_pagina:
                         texto_completo += texto_pagina + "\n"
@@ -770,7 +1229,13 @@ EJEMPLOS DE RESPUESTA:
         """Valida y limpia los movimientos extraídos"""
         movimientos_validos = []
         
-        for mov in movimientos:
+        # Montos de todos los movimientos en una sola pasada: la IA a veces
+        # los devuelve como texto ("1.234,56", "-$ 12,50"). Lo que no es un
+        # dict (la IA también devuelve strings o listas sueltas) se descarta acá
+        movimientos = [mov for mov in movimientos if isinstance(mov, dict)]
+        importes = parsear_montos(pd.Series([mov.get("importe") for mov in movimientos], dtype=object)).tolist()
+        
+        for mov, importe in zip(movimientos, importes):
             try:
                 # Validar campos requeridos
                 if not all(key in mov for key in ["fecha", "descripcion", "importe"]):
@@ -782,16 +1247,12 @@ EJEMPLOS DE RESPUESTA:
                     continue
                 
                 # Validar monto
-                try:
-                    monto = float(mov["importe"])
-                    if monto == 0:
-                        continue
-                    
-                    # EXCLUIR MONTOS MUY GRANDES (probablemente saldos)
-                    if monto > 1000000:  # Más de 1 millón
-                        continue
-                        
-                except:
+                monto = importe
+                if pd.isna(monto) or monto == 0:
+                    continue
+                
+                # EXCLUIR MONTOS MUY GRANDES (probablemente saldos)
+                if monto > 1000000:  # Más de 1 millón
                     continue
                 
                 # Validar descripción
@@ -2,10 +2,17 @@ import pdfplumber
 import pandas as pd
 import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from openai import OpenAI
 import os
 
+try:
+    from ..utils.log_sampling import ResumenEtapa
+    from .supervisor_extraccion import obtener_supervisor
+except ImportError:
+    from utils.log_sampling import ResumenEtapa
+    from services.supervisor_extraccion import obtener_supervisor
+
 logger = logging.getLogger(__name__)
 
 class ExtractorSimple:
@@ -19,9 +26,10 @@ class ExtractorSimple:
         """Extrae datos del PDF y los convierte a formato Excel"""
         try:
             # 1. Extraer texto del PDF
-            texto = self._extraer_texto_pdf(archivo_path)
+            omitidas: List[Dict[str, Any]] = []
+            texto = self._extraer_texto_pdf(archivo_path, omitidas)
             if not texto:
-                return {"error": "No se pudo extraer texto del PDF"}
+                return {"error": "No se pudo extraer texto del PDF", "debug_info": {"paginas_omitidas": omitidas}}
             
             # 2. Usar IA para convertir a tabla
             tabla_data = self._convertir_a_tabla(texto)
@@ -38,16 +46,34 @@ class ExtractorSimple:
                 "total_movimientos": len(df),
                 "movimientos": df.to_dict('records'),
                 "totales": totales,
-                "metodo": "ia_simple"
+                "metodo": "ia_simple",
+                "debug_info": {"paginas_omitidas": omitidas}
             }
             
         except Exception as e:
             logger.error(f"Error en extracción simple: {e}")
             return {"error": str(e)}
     
-    def _extraer_texto_pdf(self, archivo_path: str) -> str:
-        """Extrae texto del PDF"""
+    def _extraer_texto_pdf(self, archivo_path: str, paginas_omitidas: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Extrae texto del PDF (con presupuesto de tiempo y memoria por página si
+        hay supervisor); las páginas omitidas se agregan a `paginas_omitidas`
+        """
         try:
+            supervisor = obtener_supervisor()
+            if supervisor is not None:
+                with ResumenEtapa(logger, "texto_pdf_simple") as resumen:
+                    texto = ""
+                    for pagina in supervisor.iter_paginas(archivo_path):
+                        if pagina.omitida:
+                            omitida = {"pagina": pagina.numero, **pagina.omitida}
+                            resumen.contar("paginas_omitidas", ejemplo=omitida)
+                            if paginas_omitidas is not None:
+                                paginas_omitidas.append(omitida)
+                        else:
+                            resumen.contar("paginas")
+                            texto += pagina.resultado
+                    return texto
             with pdfplumber.open(archivo_path) as pdf:
                 texto = ""
                 for pagina in pdf.pages:
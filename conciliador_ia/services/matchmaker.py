@@ -1,27 +1,62 @@
 import pandas as pd
 import logging
-from typing import Dict, Any, Optional, Tuple
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import time
 from pathlib import Path
 
-from services.extractor import PDFExtractor
+from services.extractor import PDFExtractor, ContextoExtraccion, obtener_extractor
 from agents.conciliador import ConciliadorIA
 from models.schemas import ConciliacionItem, ConciliacionResponse
+from utils.tracing import Tracer, span, debug_activo
+from utils.bancos import normalizar_texto
+from utils.pagos_multiples import conciliar_pagos_multiples
+from services.registro_conciliaciones import (
+    RegistroConciliaciones, clave_movimiento, huellas_movimientos, obtener_registro_conciliaciones,
+)
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class ContextoConciliacion:
+    """Estado de una conciliación (un request): lo que antes quedaba en la instancia del servicio"""
+    empresa_id: Optional[str] = None
+    extracto: Optional[ContextoExtraccion] = None
+    extracto_info: Dict[str, Any] = field(default_factory=dict)
+    # Huellas de los movimientos que van a conciliarse y cantidad omitida por ya conciliada
+    huellas: List[tuple] = field(default_factory=list)
+    movimientos_omitidos: int = 0
+    # conciliar_todo: no se omite lo ya conciliado; registrar=False: el resultado no queda en el registro
+    conciliar_todo: bool = False
+    registrar: bool = True
+
+
 class MatchmakerService:
-    """Servicio que coordina la extracción y conciliación de datos"""
+    """
+    Servicio que coordina la extracción y conciliación de datos.
     
-    def __init__(self):
-        self.extractor = PDFExtractor()
-        self.conciliador = ConciliadorIA()
+    No guarda estado por request (va en ContextoConciliacion): una instancia
+    por proceso, vía `obtener_matchmaker_service()`, reusa el extractor y el
+    cliente de OpenAI entre requests concurrentes.
+    """
+    
+    def __init__(self, extractor: Optional[PDFExtractor] = None, conciliador: Optional[ConciliadorIA] = None,
+                 registro=None):
+        self.extractor = extractor or obtener_extractor()
+        self.conciliador = conciliador or ConciliadorIA()
+        # Lo ya conciliado por empresa; registro=False concilia siempre todo
+        self.registro: Optional[RegistroConciliaciones] = (
+            None if registro is False else registro or obtener_registro_conciliaciones()
+        )
     
     def procesar_conciliacion(self, 
                             extracto_path: str, 
                             comprobantes_path: str,
-                            empresa_id: Optional[str] = None) -> ConciliacionResponse:
+                            empresa_id: Optional[str] = None,
+                            conciliar_todo: bool = False,
+                            registrar: bool = True) -> ConciliacionResponse:
         """
         Procesa la conciliación completa desde archivos hasta resultado final
         
@@ -29,48 +64,23 @@ class MatchmakerService:
             extracto_path: Ruta al archivo PDF del extracto
             comprobantes_path: Ruta al archivo Excel/CSV de comprobantes
             empresa_id: ID de la empresa (opcional)
+            conciliar_todo: Concilia también lo ya conciliado en corridas anteriores
+            registrar: Guarda lo conciliado en el registro (False en las corridas de debug)
             
         Returns:
             Respuesta de conciliación estructurada
         """
         start_time = time.time()
+        tracer = Tracer("procesar_conciliacion", empresa_id=empresa_id)
         
         try:
-            logger.info(f"Iniciando procesamiento de conciliación")
-            logger.info(f"Extracto: {extracto_path}")
-            logger.info(f"Comprobantes: {comprobantes_path}")
-            
-            # Paso 1: Extraer datos del PDF
-            df_movimientos = self._extraer_datos_extracto(extracto_path)
-            logger.info(f"Movimientos extraídos: {len(df_movimientos)} registros")
-            logger.info(f"Columnas de movimientos: {list(df_movimientos.columns)}")
-            
-            # Paso 2: Cargar datos de comprobantes
-            df_comprobantes = self._cargar_datos_comprobantes(comprobantes_path)
-            logger.info(f"Comprobantes cargados: {len(df_comprobantes)} registros")
-            logger.info(f"Columnas de comprobantes: {list(df_comprobantes.columns)}")
-            
-            # Verificar que hay datos para procesar
-            if df_movimientos.empty:
-                logger.warning("No hay movimientos bancarios para procesar")
-                return self._generar_respuesta_vacia(tiempo_procesamiento=time.time() - start_time)
+            with tracer:
+                contexto = ContextoConciliacion(empresa_id=empresa_id, conciliar_todo=conciliar_todo, registrar=registrar)
+                response = self._procesar_etapas(extracto_path, comprobantes_path, contexto, start_time)
             
-            if df_comprobantes.empty:
-                logger.warning("No hay comprobantes para procesar")
-                return self._generar_respuesta_vacia(tiempo_procesamiento=time.time() - start_time)
-            
-            # Paso 3: Realizar conciliación con IA
-            items_conciliados = self._realizar_conciliacion_ia(
-                df_movimientos, df_comprobantes, empresa_id
-            )
-            
-            # Paso 4: Generar respuesta estructurada con análisis detallado
-            tiempo_procesamiento = time.time() - start_time
-            response = self._generar_respuesta_conciliacion(
-                items_conciliados, tiempo_procesamiento, df_movimientos, df_comprobantes
-            )
-            
-            logger.info(f"Procesamiento completado en {tiempo_procesamiento:.2f} segundos")
+            # En modo debug se devuelve el árbol de tiempos por etapa
+            if debug_activo():
+                response.metadata = {"spans": tracer.to_dict()}
             return response
             
         except Exception as e:
@@ -78,21 +88,171 @@ class MatchmakerService:
             tiempo_procesamiento = time.time() - start_time
             raise
     
-    def _generar_respuesta_vacia(self, tiempo_procesamiento: float) -> ConciliacionResponse:
+    def _procesar_etapas(self,
+                         extracto_path: str,
+                         comprobantes_path: str,
+                         contexto: ContextoConciliacion,
+                         start_time: float) -> ConciliacionResponse:
+        """Ejecuta las etapas de la conciliación registrando un span por etapa"""
+        logger.info(f"Iniciando procesamiento de conciliación")
+        logger.info(f"Extracto: {extracto_path}")
+        logger.info(f"Comprobantes: {comprobantes_path}")
+        empresa_id = contexto.empresa_id
+        
+        # Paso 1: Extraer datos del PDF
+        with span("extraccion") as etapa:
+            df_movimientos = self._extraer_datos_extracto(extracto_path, contexto)
+            etapa.rows = len(df_movimientos)
+        logger.info(f"Movimientos extraídos: {len(df_movimientos)} registros")
+        logger.info(f"Columnas de movimientos: {list(df_movimientos.columns)}")
+        
+        # Paso 2: Cargar datos de comprobantes
+        with span("carga_comprobantes") as etapa:
+            df_comprobantes = self._cargar_datos_comprobantes(comprobantes_path)
+            etapa.rows = len(df_comprobantes)
+        logger.info(f"Comprobantes cargados: {len(df_comprobantes)} registros")
+        logger.info(f"Columnas de comprobantes: {list(df_comprobantes.columns)}")
+        
+        # Verificar que hay datos para procesar
+        if df_movimientos.empty:
+            logger.warning("No hay movimientos bancarios para procesar")
+            return self._generar_respuesta_vacia(tiempo_procesamiento=time.time() - start_time)
+        
+        if df_comprobantes.empty:
+            logger.warning("No hay comprobantes para procesar")
+            return self._generar_respuesta_vacia(tiempo_procesamiento=time.time() - start_time)
+        
+        # Solo los movimientos nuevos de la empresa, contra los comprobantes libres
+        with span("conciliacion_incremental") as etapa:
+            df_movimientos, df_comprobantes = self._omitir_ya_conciliados(df_movimientos, df_comprobantes, contexto)
+            etapa.rows = len(df_movimientos)
+        if df_movimientos.empty:
+            logger.info(f"Todos los movimientos ({contexto.movimientos_omitidos}) ya estaban conciliados")
+            return self._generar_respuesta_vacia(
+                tiempo_procesamiento=time.time() - start_time,
+                movimientos_omitidos=contexto.movimientos_omitidos
+            )
+        
+        # Paso 3: Realizar conciliación con IA
+        items_conciliados = self._realizar_conciliacion_ia(
+            df_movimientos, df_comprobantes, empresa_id
+        )
+        self._registrar_conciliados(items_conciliados, df_movimientos, contexto)
+        
+        # Paso 4: Generar respuesta estructurada con análisis detallado
+        with span("generar_respuesta") as etapa:
+            tiempo_procesamiento = time.time() - start_time
+            response = self._generar_respuesta_conciliacion(
+                items_conciliados, tiempo_procesamiento, df_movimientos, df_comprobantes, contexto
+            )
+            etapa.rows = len(response.items)
+        
+        logger.info(f"Procesamiento completado en {tiempo_procesamiento:.2f} segundos")
+        return response
+    
+    def _generar_respuesta_vacia(self, tiempo_procesamiento: float,
+                                 movimientos_omitidos: int = 0) -> ConciliacionResponse:
         """Genera una respuesta vacía cuando no hay datos para procesar"""
         return ConciliacionResponse(
             success=True,
-            message="No hay datos para conciliar",
+            message="No hay movimientos nuevos para conciliar" if movimientos_omitidos else "No hay datos para conciliar",
             total_movimientos=0,
             movimientos_conciliados=0,
             movimientos_pendientes=0,
             movimientos_parciales=0,
+            movimientos_omitidos=movimientos_omitidos,
             items=[],
             tiempo_procesamiento=tiempo_procesamiento
         )
     
-    def _extraer_datos_extracto(self, extracto_path: str) -> pd.DataFrame:
-        """Extrae datos del extracto PDF"""
+    def _omitir_ya_conciliados(self, df_movimientos: pd.DataFrame, df_comprobantes: pd.DataFrame,
+                               contexto: ContextoConciliacion) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Saca los movimientos que la empresa ya concilió en una corrida anterior
+        (por huella: fecha, importe y concepto normalizado) y los comprobantes
+        ya consumidos. Las huellas de los que quedan van a `contexto`. Con
+        `contexto.conciliar_todo` no se omite nada (solo se calculan las huellas).
+        """
+        if self.registro is None or not contexto.empresa_id or (contexto.conciliar_todo and not contexto.registrar):
+            return df_movimientos, df_comprobantes
+        
+        try:
+            fechas = pd.to_datetime(df_movimientos['fecha'], errors='coerce')
+            huellas = huellas_movimientos(zip(
+                [None if pd.isna(f) else f.to_pydatetime() for f in fechas],
+                df_movimientos['importe'].fillna(0).tolist(),
+                df_movimientos['concepto'].tolist()
+            ))
+            if contexto.conciliar_todo:
+                contexto.huellas = huellas
+                logger.info(f"📒 Conciliación completa pedida: no se omiten movimientos ya conciliados")
+                return df_movimientos, df_comprobantes
+            conciliadas = self.registro.huellas_conciliadas(contexto.empresa_id, huellas)
+            consumidos = self.registro.comprobantes_consumidos(contexto.empresa_id)
+        except Exception as e:
+            # El registro es una optimización: si no se puede consultar, se concilia todo
+            logger.warning(f"⚠️ No se pudo consultar el registro de conciliaciones, se concilia todo: {e}")
+            return df_movimientos, df_comprobantes
+        
+        nuevos = [h not in conciliadas for h in huellas]
+        contexto.huellas = [h for h, nuevo in zip(huellas, nuevos) if nuevo]
+        contexto.movimientos_omitidos = len(huellas) - len(contexto.huellas)
+        df_movimientos = df_movimientos[nuevos].reset_index(drop=True)
+        
+        if consumidos and 'numero_comprobante' in df_comprobantes.columns:
+            df_comprobantes = df_comprobantes[
+                ~df_comprobantes['numero_comprobante'].astype(str).str.strip().isin(consumidos)
+            ].reset_index(drop=True)
+        
+        if contexto.movimientos_omitidos:
+            logger.info(f"📒 {contexto.movimientos_omitidos} movimientos ya conciliados omitidos, "
+                        f"{len(df_movimientos)} nuevos; {len(consumidos)} comprobantes ya consumidos")
+        return df_movimientos, df_comprobantes
+    
+    def _registrar_conciliados(self, items: list, df_movimientos: pd.DataFrame,
+                               contexto: ContextoConciliacion) -> None:
+        """
+        Guarda en el registro los items conciliados. Cada item se ubica en su
+        movimiento por huella; si la IA reescribió el concepto, por fecha e
+        importe cuando hay un solo movimiento así. Los que no se ubican quedan
+        para la próxima corrida.
+        """
+        if self.registro is None or not contexto.registrar or not contexto.empresa_id or not contexto.huellas:
+            return
+        
+        libres: Dict[tuple, List[tuple]] = {}
+        for huella in contexto.huellas:
+            libres.setdefault(huella[:3], []).append(huella)
+        por_fecha_importe: Dict[tuple, List[tuple]] = {}
+        for huella in contexto.huellas:
+            por_fecha_importe.setdefault(huella[:2], []).append(huella)
+        
+        conciliados = []
+        for item in items:
+            if item.get('estado') != 'conciliado':
+                continue
+            fecha = pd.to_datetime(item.get('fecha_movimiento'), errors='coerce')
+            clave = clave_movimiento(None if pd.isna(fecha) else fecha.to_pydatetime(),
+                                     item.get('monto_movimiento'), item.get('concepto_movimiento'))
+            candidatas = libres.get(clave) or []
+            if not candidatas:
+                mismas = [h for h in por_fecha_importe.get(clave[:2], []) if h in libres.get(h[:3], [])]
+                candidatas = mismas if len(mismas) == 1 else []
+            if candidatas:
+                huella = candidatas[0]
+                libres[huella[:3]].remove(huella)
+                conciliados.append((huella, item.get('numero_comprobante')))
+        
+        try:
+            self.registro.registrar(contexto.empresa_id, conciliados)
+        except Exception as e:
+            # El registro es una optimización: si falla, la próxima corrida concilia todo
+            logger.warning(f"No se pudo actualizar el registro de conciliaciones: {e}")
+    
+    def _extraer_datos_extracto(self, extracto_path: str,
+                                contexto: Optional[ContextoConciliacion] = None) -> pd.DataFrame:
+        """Extrae datos del extracto PDF (el header y el resumen quedan en `contexto`)"""
+        contexto = contexto or ContextoConciliacion()
         try:
             logger.info("Extrayendo datos del extracto PDF")
             
@@ -110,18 +270,21 @@ class MatchmakerService:
                 logger.info(f"Usando archivo en uploads: {extracto_path}")
             
             # Extraer datos del PDF
-            df_movimientos = self.extractor.extract_from_pdf(extracto_path)
+            contexto.extracto = ContextoExtraccion(pdf_path=extracto_path)
+            df_movimientos = self.extractor.extract_from_pdf(extracto_path, contexto.extracto)
             
             if df_movimientos.empty:
                 logger.warning("No se encontraron movimientos en el extracto")
                 return df_movimientos
             
             # Obtener información del banco y fechas
-            extracto_info = self.extractor.get_extraction_summary(df_movimientos)
+            extracto_info = self.extractor.get_extraction_summary(
+                df_movimientos, contexto.extracto.header_info, contexto.extracto.paginas_omitidas
+            )
             logger.info(f"Información del extracto: {extracto_info}")
             
             # Guardar información del extracto para el análisis
-            self.extracto_info = extracto_info
+            contexto.extracto_info = extracto_info
             
             return df_movimientos
             
@@ -395,15 +558,28 @@ class MatchmakerService:
             logger.info("Iniciando conciliación con IA")
             
             # Preparar datos para la IA
-            df_movimientos_clean = self._preparar_movimientos_para_ia(df_movimientos)
-            df_comprobantes_clean = self._preparar_comprobantes_para_ia(df_comprobantes)
+            with span("normalizacion") as etapa:
+                df_movimientos_clean = self._preparar_movimientos_para_ia(df_movimientos)
+                df_comprobantes_clean = self._preparar_comprobantes_para_ia(df_comprobantes)
+                etapa.rows = len(df_movimientos_clean) + len(df_comprobantes_clean)
             
             # Realizar conciliación
-            items_conciliados = self.conciliador.conciliar_movimientos(
-                df_movimientos_clean, 
-                df_comprobantes_clean, 
-                empresa_id
-            )
+            with span("conciliacion_ia") as etapa:
+                items_conciliados = self.conciliador.conciliar_movimientos(
+                    df_movimientos_clean, 
+                    df_comprobantes_clean, 
+                    empresa_id
+                )
+                etapa.rows = len(items_conciliados)
+            
+            # Movimientos que pagan varios comprobantes a la vez
+            with span("pagos_multiples") as etapa:
+                try:
+                    items_conciliados = self._conciliar_pagos_multiples(items_conciliados, df_comprobantes_clean)
+                except Exception as e:
+                    # Es un paso extra sobre lo que concilió la IA: si falla, queda ese resultado
+                    logger.warning(f"⚠️ No se pudieron buscar pagos múltiples: {e}")
+                etapa.rows = len(items_conciliados)
             
             # Validar resultados
             summary = self.conciliador.get_conciliacion_summary(items_conciliados)
@@ -415,6 +591,60 @@ class MatchmakerService:
             logger.error(f"Error en conciliación IA: {e}")
             raise
     
+    def _conciliar_pagos_multiples(self, items: list, df_comprobantes: pd.DataFrame) -> list:
+        """
+        Los items pendientes cuyo concepto nombra a un cliente se prueban contra
+        combinaciones de comprobantes libres de ese cliente (ver
+        conciliar_pagos_multiples): una transferencia que paga varias facturas.
+        """
+        if not items or df_comprobantes.empty or not {'cliente', 'monto', 'fecha'} <= set(df_comprobantes.columns):
+            return items
+        
+        usados = {str(item.get('numero_comprobante') or '') for item in items if item.get('estado') in ('conciliado', 'parcial')}
+        # Montos vacíos o no numéricos no entran en ninguna combinación
+        montos = pd.to_numeric(df_comprobantes['monto'], errors='coerce')
+        df_comprobantes = df_comprobantes.assign(monto=montos)[montos.abs() < float('inf')]
+        libres = [c for c in df_comprobantes.to_dict('records') if str(c.get('numero_comprobante', '')) not in usados]
+        clientes = sorted(
+            {normalizar_texto(str(c['cliente'])).strip() for c in libres} - {'', 'cliente no especificado'},
+            key=len, reverse=True
+        )
+        clientes = [c for c in clientes if len(c) >= 4]
+        importes = pd.to_numeric(pd.Series([item.get('monto_movimiento') for item in items], dtype=object), errors='coerce')
+        pendientes = [
+            k for k, item in enumerate(items) if item.get('estado') == 'pendiente' and abs(importes[k]) < float('inf')
+        ]
+        if not pendientes or not clientes:
+            return items
+        
+        def a_fecha(valor):
+            fecha = pd.to_datetime(valor, errors='coerce')
+            return None if pd.isna(fecha) else fecha.to_pydatetime().replace(tzinfo=None)
+        
+        pagos = []
+        for k in pendientes:
+            concepto = normalizar_texto(str(items[k].get('concepto_movimiento', '')))
+            pagos.append({
+                'importe': float(importes[k]),
+                'fecha': a_fecha(items[k].get('fecha_movimiento')),
+                'contraparte': next((c for c in clientes if c in concepto), None)
+            })
+        facturas = [
+            {'importe': c['monto'], 'fecha': a_fecha(c['fecha']), 'contraparte': normalizar_texto(str(c['cliente'])).strip()}
+            for c in libres
+        ]
+        
+        for k, combinacion in conciliar_pagos_multiples(pagos, facturas).items():
+            comprobantes = [libres[j] for j in combinacion.indices]
+            item = items[pendientes[k]]
+            item['numero_comprobante'] = ", ".join(str(c.get('numero_comprobante', '')) for c in comprobantes)
+            item['cliente_comprobante'] = str(comprobantes[0]['cliente'])
+            item['estado'] = 'conciliado'
+            item['explicacion'] = f"Pago de {len(comprobantes)} comprobantes del mismo cliente (diferencia {combinacion.diferencia:+.2f})"
+            item['confianza'] = 0.9
+            logger.info(f"🧩 Pago múltiple: {item['concepto_movimiento']} -> {item['numero_comprobante']}")
+        return items
+    
     def _preparar_movimientos_para_ia(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepara los movimientos para enviar a la IA"""
         try:
@@ -478,7 +708,8 @@ class MatchmakerService:
                                       items_conciliados: list, 
                                       tiempo_procesamiento: float,
                                       df_movimientos: pd.DataFrame,
-                                      df_comprobantes: pd.DataFrame) -> ConciliacionResponse:
+                                      df_comprobantes: pd.DataFrame,
+                                      contexto: Optional[ContextoConciliacion] = None) -> ConciliacionResponse:
         """Genera la respuesta estructurada de conciliación con análisis detallado"""
         try:
             # Convertir items a esquemas Pydantic
@@ -502,7 +733,11 @@ class MatchmakerService:
             movimientos_parciales = sum(1 for item in items_schemas if item.estado == 'parcial')
             
             # Generar análisis detallado de datos
-            analisis_datos = self._generar_analisis_datos(df_movimientos, df_comprobantes, items_schemas)
+            with span("analisis"):
+                analisis_datos = self._generar_analisis_datos(
+                    df_movimientos, df_comprobantes, items_schemas,
+                    contexto.extracto_info if contexto else None
+                )
             
             return ConciliacionResponse(
                 success=True,
@@ -511,6 +746,7 @@ class MatchmakerService:
                 movimientos_conciliados=movimientos_conciliados,
                 movimientos_pendientes=movimientos_pendientes,
                 movimientos_parciales=movimientos_parciales,
+                movimientos_omitidos=contexto.movimientos_omitidos if contexto else 0,
                 items=items_schemas,
                 tiempo_procesamiento=round(tiempo_procesamiento, 2),
                 analisis_datos=analisis_datos
@@ -523,8 +759,10 @@ class MatchmakerService:
     def _generar_analisis_datos(self, 
                                df_movimientos: pd.DataFrame, 
                                df_comprobantes: pd.DataFrame,
-                               items_conciliados: list) -> Dict[str, Any]:
+                               items_conciliados: list,
+                               extracto_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Genera análisis detallado de los datos procesados"""
+        extracto_info = extracto_info or {}
         try:
             # Análisis del extracto
             extracto_analysis = {}
@@ -535,9 +773,9 @@ class MatchmakerService:
                     "fechaInicio": df_movimientos['fecha'].min().strftime('%Y-%m-%d') if 'fecha' in df_movimientos.columns else None,
                     "fechaFin": df_movimientos['fecha'].max().strftime('%Y-%m-%d') if 'fecha' in df_movimientos.columns else None,
                     "montoTotal": float(df_movimientos['importe'].sum()) if 'importe' in df_movimientos.columns else None,
-                    "bancoDetectado": getattr(self, 'extracto_info', {}).get('banco_detectado', 'No identificado'),
-                    "totalCreditos": getattr(self, 'extracto_info', {}).get('total_creditos', 0),
-                    "totalDebitos": getattr(self, 'extracto_info', {}).get('total_debitos', 0)
+                    "bancoDetectado": extracto_info.get('banco_detectado', 'No identificado'),
+                    "totalCreditos": extracto_info.get('total_creditos', 0),
+                    "totalDebitos": extracto_info.get('total_debitos', 0)
                 }
             
             # Análisis de comprobantes
@@ -638,4 +876,19 @@ class MatchmakerService:
                 "coincidenciasEncontradas": 0,
                 "posiblesRazones": ["Error al analizar los datos"],
                 "recomendaciones": ["Contactar soporte técnico"]
-            } 
\ No newline at end of file
+            } 
+
+
+# Instancia compartida por proceso (ver obtener_matchmaker_service)
+_matchmaker: Optional[MatchmakerService] = None
+_matchmaker_lock = threading.Lock()
+
+
+def obtener_matchmaker_service() -> MatchmakerService:
+    """MatchmakerService único del proceso (el extractor y el cliente de OpenAI se crean una vez)"""
+    global _matchmaker
+    if _matchmaker is None:
+        with _matchmaker_lock:
+            if _matchmaker is None:
+                _matchmaker = MatchmakerService()
+    return _matchmaker
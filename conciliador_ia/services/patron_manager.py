@@ -72,18 +72,20 @@ class PatronManager:
         """Guarda o actualiza un banco específico"""
         bancos = self.cargar_bancos()
         
-        # Estructura estándar para un banco
+        # Estructura estándar para un banco; las estadísticas pueden venir planas
+        # (alta de un banco) o anidadas (banco ya guardado que se vuelve a guardar)
+        estadisticas = datos.get("estadisticas", {})
         banco_data = {
             "id": banco_id,
             "nombre": datos.get("nombre", banco_id.upper()),
             "patrones": datos.get("patrones", {}),
             "configuracion": datos.get("configuracion", {}),
             "estadisticas": {
-                "precision": datos.get("precision", 0.0),
-                "total_entrenamientos": datos.get("total_entrenamientos", 0),
+                "precision": datos.get("precision", estadisticas.get("precision", 0.0)),
+                "total_entrenamientos": datos.get("total_entrenamientos", estadisticas.get("total_entrenamientos", 0)),
                 "ultima_actualizacion": datetime.now().isoformat(),
-                "casos_exitosos": datos.get("casos_exitosos", 0),
-                "casos_fallidos": datos.get("casos_fallidos", 0)
+                "casos_exitosos": datos.get("casos_exitosos", estadisticas.get("casos_exitosos", 0)),
+                "casos_fallidos": datos.get("casos_fallidos", estadisticas.get("casos_fallidos", 0))
             },
             "ejemplos_entrenamiento": datos.get("ejemplos_entrenamiento", []),
             "activo": datos.get("activo", True)
@@ -97,6 +99,22 @@ class PatronManager:
         self.guardar_bancos(bancos)
         logger.info(f"Banco {banco_id} guardado exitosamente")
     
+    def agregar_ejemplo(self, banco_id: str, ejemplo: Dict[str, Any], max_ejemplos: int = 50) -> bool:
+        """Agrega un ejemplo de entrenamiento (archivo, huella de layout) a un banco existente"""
+        bancos = self.cargar_bancos()
+        banco = bancos.get("bancos_entrenados", {}).get(banco_id)
+        if not banco:
+            logger.warning(f"Banco {banco_id} no encontrado para agregar ejemplo")
+            return False
+
+        ejemplos = banco.setdefault("ejemplos_entrenamiento", [])
+        ejemplos.append({**ejemplo, "fecha": datetime.now().isoformat()})
+        # Solo los más recientes
+        del ejemplos[:-max_ejemplos]
+
+        self.guardar_bancos(bancos)
+        return True
+
     def _actualizar_estadisticas_globales(self, bancos: Dict[str, Any]):
         """Actualiza las estadísticas globales"""
         bancos_entrenados = bancos.get("bancos_entrenados", {})
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# Palabras que marcan filas que no son movimientos (saldos, totales)
+EXCLUIR_POR_DEFECTO = ['saldo', 'total', 'resumen', 'subtotal', 'balance', 'acumulado']
+TOLERANCIA_Y_POR_DEFECTO = 3.0
+
+
+@dataclass
+class PlantillaCompilada:
+    """
+    Parser de un banco armado a partir de sus `patrones` y `configuracion`
+    guardados en PatronManager:
+
+        patrones = {
+            "columnas": {"fecha": [x0, x1], "descripcion": [x0, x1],
+                         "importe": [x0, x1]  # o "debito"/"credito"
+                         },
+            "lineas": [r"(?P<fecha>...) (?P<descripcion>...) (?P<importe>...)"],
+            "excluir": ["saldo", "total"]
+        }
+        configuracion = {"formato_fecha": "%d/%m/%Y", "separador_decimal": ",",
+                         "tolerancia_y": 3}
+
+    Las regex y los rangos de columnas se compilan una vez; después cada página
+    se resuelve con `extract_words` y una asignación de palabras por coordenada,
+    sin la cascada genérica de patrones ni llamadas a la IA.
+    """
+    banco_id: str
+    columnas: List[Tuple[str, float, float]] = field(default_factory=list)
+    lineas: List[Pattern] = field(default_factory=list)
+    excluir: Optional[Pattern] = None
+    formato_fecha: Optional[str] = None
+    separador_decimal: str = ","
+    tolerancia_y: float = TOLERANCIA_Y_POR_DEFECTO
+
+    def parsear_pdf(self, pdf_path: str) -> List[Dict[str, Any]]:
+        movimientos = []
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                movimientos.extend(self.parsear_palabras(page.extract_words()))
+        return movimientos
+
+    def parsear_palabras(self, palabras: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Movimientos de una página a partir de sus palabras (dicts de `extract_words`)"""
+        movimientos = []
+        for fila in self._agrupar_filas(palabras):
+            texto = " ".join(p["text"] for p in fila)
+            if self.excluir and self.excluir.search(texto.lower()):
+                continue
+            campos = self._campos_por_columnas(fila) if self.columnas else None
+            movimiento = self._movimiento(campos) if campos else None
+            if movimiento is None:
+                movimiento = self._movimiento_por_lineas(texto)
+            if movimiento:
+                movimientos.append(movimiento)
+        return movimientos
+
+    def _agrupar_filas(self, palabras: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        filas: List[List[Dict[str, Any]]] = []
+        for palabra in sorted(palabras, key=lambda p: (p["top"], p["x0"])):
+            if filas and palabra["top"] - filas[-1][0]["top"] <= self.tolerancia_y:
+                filas[-1].append(palabra)
+            else:
+                filas.append([palabra])
+        return [sorted(fila, key=lambda p: p["x0"]) for fila in filas]
+
+    def _campos_por_columnas(self, fila: List[Dict[str, Any]]) -> Dict[str, str]:
+        campos: Dict[str, List[str]] = {}
+        for palabra in fila:
+            centro = (palabra["x0"] + palabra["x1"]) / 2
+            for nombre, x0, x1 in self.columnas:
+                if x0 <= centro <= x1:
+                    campos.setdefault(nombre, []).append(palabra["text"])
+                    break
+        return {nombre: " ".join(textos) for nombre, textos in campos.items()}
+
+    def _movimiento_por_lineas(self, texto: str) -> Optional[Dict[str, Any]]:
+        for patron in self.lineas:
+            match = patron.search(texto)
+            if match:
+                movimiento = self._movimiento({k: v for k, v in match.groupdict().items() if v})
+                if movimiento:
+                    return movimiento
+        return None
+
+    def _movimiento(self, campos: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        fecha = self.parsear_fecha(campos.get("fecha", ""))
+        if not fecha:
+            return None
+
+        if "importe" in campos:
+            importe = self.parsear_importe(campos["importe"])
+        else:
+            credito = self.parsear_importe(campos.get("credito", ""))
+            debito = self.parsear_importe(campos.get("debito", ""))
+            if credito is None and debito is None:
+                return None
+            importe = (credito or 0.0) - abs(debito or 0.0)
+        if importe is None or importe == 0:
+            return None
+
+        return {
+            "fecha": fecha.strftime('%Y-%m-%d'),
+            "descripcion": re.sub(r'\s+', ' ', campos.get("descripcion", "")).strip() or "Transacción",
+            "importe": importe,
+            "tipo": "ingreso" if importe > 0 else "egreso"
+        }
+
+    def parsear_fecha(self, texto: str) -> Optional[datetime]:
+        texto = texto.strip()
+        if not texto or not self.formato_fecha:
+            return None
+        try:
+            return datetime.strptime(texto, self.formato_fecha)
+        except ValueError:
+            return None
+
+    def parsear_importe(self, texto: str) -> Optional[float]:
+        limpio = re.sub(r'[^\d,.\-()]', '', texto or "")
+        if not re.search(r'\d', limpio):
+            return None
+        negativo = '-' in limpio or (limpio.startswith('(') and limpio.endswith(')'))
+        miles = '.' if self.separador_decimal == ',' else ','
+        numero = re.sub(r'[\-()]', '', limpio).replace(miles, '').replace(self.separador_decimal, '.')
+        try:
+            valor = float(numero)
+        except ValueError:
+            return None
+        return -valor if negativo else valor
+
+
+def compilar_plantilla(banco_id: str, banco_data: Dict[str, Any]) -> Optional[PlantillaCompilada]:
+    """
+    Compila los patrones guardados de un banco. Devuelve None si el banco no
+    tiene columnas ni regex de línea, o si alguno de sus patrones es inválido.
+    """
+    patrones = banco_data.get("patrones") or {}
+    configuracion = banco_data.get("configuracion") or {}
+
+    columnas = []
+    for nombre, rango in (patrones.get("columnas") or {}).items():
+        try:
+            x0, x1 = float(rango[0]), float(rango[1])
+        except (TypeError, ValueError, IndexError):
+            logger.warning(f"Plantilla {banco_id}: rango inválido para la columna {nombre}: {rango}")
+            return None
+        columnas.append((nombre, min(x0, x1), max(x0, x1)))
+    columnas.sort(key=lambda c: c[1])
+
+    try:
+        lineas = [re.compile(patron) for patron in patrones.get("lineas") or []]
+    except re.error as e:
+        logger.warning(f"Plantilla {banco_id}: regex de línea inválida: {e}")
+        return None
+
+    if not columnas and not lineas:
+        return None
+
+    excluir = patrones.get("excluir", EXCLUIR_POR_DEFECTO)
+    return PlantillaCompilada(
+        banco_id=banco_id,
+        columnas=columnas,
+        lineas=lineas,
+        excluir=re.compile("|".join(re.escape(p.lower()) for p in excluir)) if excluir else None,
+        formato_fecha=configuracion.get("formato_fecha", "%d/%m/%Y"),
+        separador_decimal=configuracion.get("separador_decimal", ","),
+        tolerancia_y=float(configuracion.get("tolerancia_y", TOLERANCIA_Y_POR_DEFECTO)),
+    )
+
+
+# Plantillas compiladas por banco, invalidadas cuando cambian sus patrones
+_plantillas: Dict[str, Tuple[str, Optional[PlantillaCompilada]]] = {}
+_plantillas_lock = threading.Lock()
+
+
+def obtener_plantilla(banco_id: str, banco_data: Dict[str, Any]) -> Optional[PlantillaCompilada]:
+    """Plantilla compilada del banco (cacheada por hash de patrones y configuración)"""
+    version = hashlib.sha1(json.dumps(
+        [banco_data.get("patrones"), banco_data.get("configuracion")], sort_keys=True, default=str
+    ).encode("utf-8")).hexdigest()
+    with _plantillas_lock:
+        cacheada = _plantillas.get(banco_id)
+        if cacheada and cacheada[0] == version:
+            return cacheada[1]
+        plantilla = compilar_plantilla(banco_id, banco_data)
+        _plantillas[banco_id] = (version, plantilla)
+        return plantilla
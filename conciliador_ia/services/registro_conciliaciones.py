@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    from ..utils.bancos import normalizar_texto
+except ImportError:
+    from utils.bancos import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+# Conciliación incremental: movimientos ya conciliados por empresa (0 la desactiva)
+CONCILIACION_INCREMENTAL = os.getenv("CONCILIACION_INCREMENTAL", "1") != "0"
+# Relativa al paquete (no al directorio desde el que se arranca el proceso)
+REGISTRO_CONCILIACIONES_DB = str(
+    Path(__file__).resolve().parent.parent / os.getenv("REGISTRO_CONCILIACIONES_DB", "data/conciliaciones.sqlite3")
+)
+
+# Huella de un movimiento: (fecha ISO, importe en centavos, hash del concepto normalizado, ocurrencia)
+Huella = Tuple[str, int, str, int]
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS movimientos_conciliados (
+    empresa_id TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    importe_centavos INTEGER NOT NULL,
+    concepto_hash TEXT NOT NULL,
+    ocurrencia INTEGER NOT NULL,
+    numero_comprobante TEXT,
+    conciliado_en TEXT NOT NULL,
+    PRIMARY KEY (empresa_id, fecha, importe_centavos, concepto_hash, ocurrencia)
+);
+CREATE TABLE IF NOT EXISTS comprobantes_consumidos (
+    empresa_id TEXT NOT NULL,
+    numero_comprobante TEXT NOT NULL,
+    conciliado_en TEXT NOT NULL,
+    PRIMARY KEY (empresa_id, numero_comprobante)
+);
+"""
+
+
+def _fecha_iso(fecha: Union[str, date, datetime, None]) -> str:
+    if isinstance(fecha, datetime):
+        return fecha.date().isoformat()
+    if isinstance(fecha, date):
+        return fecha.isoformat()
+    return str(fecha or "")[:10]
+
+
+def hash_concepto(concepto: Any) -> str:
+    """Hash corto del concepto sin tildes, mayúsculas ni espacios repetidos"""
+    normalizado = " ".join(normalizar_texto(str(concepto or "")).split())
+    return hashlib.sha1(normalizado.encode("utf-8")).hexdigest()[:16]
+
+
+def clave_movimiento(fecha: Union[str, date, datetime, None], importe: Any, concepto: Any) -> Tuple[str, int, str]:
+    """(fecha, centavos, hash del concepto): la huella sin la ocurrencia"""
+    return _fecha_iso(fecha), round(float(importe or 0) * 100), hash_concepto(concepto)
+
+
+def huellas_movimientos(movimientos: Iterable[Tuple[Any, Any, Any]]) -> List[Huella]:
+    """
+    Huella de cada (fecha, importe, concepto), en orden.
+
+    Dos movimientos idénticos del mismo día (dos comisiones iguales) se
+    distinguen por la ocurrencia: el segundo no queda omitido porque el
+    primero ya se concilió.
+    """
+    vistas: Counter = Counter()
+    huellas = []
+    for fecha, importe, concepto in movimientos:
+        clave = clave_movimiento(fecha, importe, concepto)
+        huellas.append(clave + (vistas[clave],))
+        vistas[clave] += 1
+    return huellas
+
+
+def separar_numeros_comprobante(numero: Any) -> List[str]:
+    """Los items de pagos múltiples llevan varios comprobantes separados por coma"""
+    return [n.strip() for n in str(numero or "").split(",") if n.strip() and n.strip().lower() != "nan"]
+
+
+class RegistroConciliaciones:
+    """
+    Registro en SQLite de lo ya conciliado por empresa: huellas de los
+    movimientos conciliados y números de comprobante consumidos.
+
+    Un extracto que se solapa con uno anterior solo manda a conciliar (y a la
+    IA) los movimientos nuevos, contra los comprobantes que siguen libres.
+    Cada operación abre su propia conexión, así la instancia se comparte
+    entre threads.
+    """
+
+    def __init__(self, db_path: str = REGISTRO_CONCILIACIONES_DB):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._conectar()) as conexion:
+            conexion.executescript(_ESQUEMA)
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.db_path, timeout=30)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        return conexion
+
+    def huellas_conciliadas(self, empresa_id: str, huellas: List[Huella]) -> Set[Huella]:
+        """Las `huellas` que ya figuran como conciliadas para la empresa"""
+        if not huellas:
+            return set()
+        fechas = sorted({h[0] for h in huellas})
+        with closing(self._conectar()) as conexion:
+            filas = conexion.execute(
+                "SELECT fecha, importe_centavos, concepto_hash, ocurrencia FROM movimientos_conciliados "
+                f"WHERE empresa_id = ? AND fecha IN ({','.join('?' * len(fechas))})",
+                [empresa_id, *fechas],
+            ).fetchall()
+        return set(huellas) & {tuple(f) for f in filas}
+
+    def comprobantes_consumidos(self, empresa_id: str) -> Set[str]:
+        with closing(self._conectar()) as conexion:
+            filas = conexion.execute(
+                "SELECT numero_comprobante FROM comprobantes_consumidos WHERE empresa_id = ?", (empresa_id,)
+            ).fetchall()
+        return {f[0] for f in filas}
+
+    def registrar(self, empresa_id: str, conciliados: List[Tuple[Huella, Optional[str]]]) -> int:
+        """
+        Guarda los movimientos conciliados (huella, número de comprobante) y
+        marca sus comprobantes como consumidos. Devuelve cuántos son nuevos.
+        """
+        if not conciliados:
+            return 0
+        ahora = datetime.now().isoformat(timespec="seconds")
+        movimientos = [(empresa_id, *huella, numero, ahora) for huella, numero in conciliados]
+        comprobantes = {
+            (empresa_id, n, ahora) for _, numero in conciliados for n in separar_numeros_comprobante(numero)
+        }
+        with closing(self._conectar()) as conexion, conexion:
+            antes = conexion.total_changes
+            conexion.executemany(
+                "INSERT OR IGNORE INTO movimientos_conciliados VALUES (?, ?, ?, ?, ?, ?, ?)", movimientos
+            )
+            nuevos = conexion.total_changes - antes
+            conexion.executemany("INSERT OR IGNORE INTO comprobantes_consumidos VALUES (?, ?, ?)", comprobantes)
+        logger.info(f"📒 Registro de conciliaciones ({empresa_id}): {nuevos} movimientos nuevos, "
+                    f"{len(comprobantes)} comprobantes consumidos")
+        return nuevos
+
+    def olvidar(self, empresa_id: str) -> None:
+        """Borra lo registrado de una empresa (la próxima conciliación empieza de cero)"""
+        with closing(self._conectar()) as conexion, conexion:
+            conexion.execute("DELETE FROM movimientos_conciliados WHERE empresa_id = ?", (empresa_id,))
+            conexion.execute("DELETE FROM comprobantes_consumidos WHERE empresa_id = ?", (empresa_id,))
+
+
+# Instancia compartida por proceso (ver obtener_registro_conciliaciones)
+_registro: Optional[RegistroConciliaciones] = None
+_registro_lock = threading.Lock()
+
+
+def obtener_registro_conciliaciones() -> Optional[RegistroConciliaciones]:
+    """
+    RegistroConciliaciones único del proceso, o None si la conciliación
+    incremental está desactivada o la base no se puede abrir (se concilia todo)
+    """
+    global _registro
+    if not CONCILIACION_INCREMENTAL:
+        return None
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                try:
+                    _registro = RegistroConciliaciones()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"⚠️ Sin registro de conciliaciones ({REGISTRO_CONCILIACIONES_DB}): {e}")
+                    return None
+    return _registro
@@ -0,0 +1,215 @@
+import logging
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# Presupuestos por defecto (segundos y MB)
+PRESUPUESTO_PAGINA_S = float(os.getenv("EXTRACCION_PRESUPUESTO_PAGINA_S", "15"))
+PRESUPUESTO_DOCUMENTO_S = float(os.getenv("EXTRACCION_PRESUPUESTO_DOCUMENTO_S", "180"))
+RSS_MAXIMO_MB = float(os.getenv("EXTRACCION_RSS_MAXIMO_MB", "1536"))
+# Opt-in: cada documento pasa a costar el arranque de un proceso hijo
+EXTRACCION_SUPERVISADA = os.getenv("EXTRACCION_SUPERVISADA", "0") not in ("0", "false", "False")
+
+# Cada cuánto el supervisor mira el reloj y la memoria del proceso hijo
+INTERVALO_CONTROL_S = 0.05
+
+_TAMANO_PAGINA_MEMORIA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Módulos que el forkserver importa una sola vez: cada hijo sale de ahí ya con
+# pdfplumber y los workers del extractor cargados (si no se pueden importar, se ignoran)
+_PRECARGA_FORKSERVER = [__name__, __name__.rsplit(".", 1)[0] + ".extractor"]
+
+
+def texto_de_pagina(page, page_num: int) -> str:
+    """Función de página por defecto: el texto plano"""
+    return page.extract_text() or ""
+
+
+@dataclass
+class PaginaSupervisada:
+    """Resultado de una página: `resultado` si se procesó, `omitida` con el motivo si no"""
+    numero: int
+    resultado: Any = None
+    omitida: Optional[Dict[str, Any]] = None
+
+
+def _trabajador(conexion, pdf_path: str, inicio: int, fin: Optional[int],
+                funcion: Callable, args: Tuple) -> None:
+    """Proceso hijo: procesa las páginas [inicio, fin) avisando antes de empezar cada una"""
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            total = len(pdf.pages)
+            conexion.send(("total", total))
+            for indice in range(inicio, min(fin, total) if fin is not None else total):
+                conexion.send(("inicio", indice))
+                page = pdf.pages[indice]
+                try:
+                    conexion.send(("pagina", indice, funcion(page, indice + 1, *args)))
+                except Exception as e:
+                    conexion.send(("error", indice, repr(e)))
+                if hasattr(page, "flush_cache"):
+                    page.flush_cache()
+        conexion.send(("fin",))
+    except Exception as e:
+        conexion.send(("error_documento", repr(e)))
+    finally:
+        conexion.close()
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """RSS de un proceso en MB (Linux, /proc); None si no se puede medir"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _TAMANO_PAGINA_MEMORIA / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SupervisorExtraccion:
+    """
+    Corre el parseo de páginas de un PDF en un proceso hijo con presupuestos.
+
+    - Por página: si una página tarda más de `presupuesto_pagina_s`, o el
+      hijo supera `rss_maximo_mb` mientras la procesa, se mata el hijo, la
+      página queda omitida y se relanza un hijo desde la página siguiente.
+    - Por documento: pasado `presupuesto_documento_s` se corta y las páginas
+      que faltan quedan omitidas.
+    - Si el hijo muere (segfault de una librería nativa, OOM killer) la
+      página en curso queda omitida y se sigue igual.
+
+    Los tiempos son del trabajo del hijo: lo que tarda el que consume el
+    generador entre una página y la siguiente no cuenta para el presupuesto.
+
+    `funcion(page, numero_pagina, *args)` corre en el hijo: tiene que ser una
+    función de módulo (picklable) y su resultado también. Los hijos salen de
+    un forkserver (o spawn), nunca de un fork del proceso del servidor, que
+    tiene threads y conexiones abiertas.
+    """
+
+    def __init__(self, presupuesto_pagina_s: Optional[float] = None,
+                 presupuesto_documento_s: Optional[float] = None,
+                 rss_maximo_mb: Optional[float] = None):
+        self.presupuesto_pagina_s = presupuesto_pagina_s or PRESUPUESTO_PAGINA_S
+        self.presupuesto_documento_s = presupuesto_documento_s or PRESUPUESTO_DOCUMENTO_S
+        self.rss_maximo_mb = rss_maximo_mb or RSS_MAXIMO_MB
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._contexto = multiprocessing.get_context("forkserver")
+            self._contexto.set_forkserver_preload(_PRECARGA_FORKSERVER)
+        else:
+            self._contexto = multiprocessing.get_context("spawn")
+
+    def iter_paginas(self, pdf_path: str, funcion: Callable = texto_de_pagina, args: Tuple = (),
+                     fin: Optional[int] = None, inicio: int = 0) -> Iterator[PaginaSupervisada]:
+        """Genera en orden una PaginaSupervisada por cada página de [inicio, fin)"""
+        inicio_documento = time.monotonic()
+        # Tiempo que el generador pasó suspendido en un yield (lo usa el consumidor)
+        pausado = 0.0
+        siguiente = inicio
+        total: Optional[int] = None
+
+        while total is None or siguiente < (min(fin, total) if fin is not None else total):
+            receptor, emisor = self._contexto.Pipe(duplex=False)
+            proceso = self._contexto.Process(
+                target=_trabajador, args=(emisor, str(pdf_path), siguiente, fin, funcion, args), daemon=True
+            )
+            proceso.start()
+            emisor.close()
+
+            pagina_actual: Optional[int] = None
+            inicio_pagina = time.monotonic()
+            rss_pico = 0.0
+            motivo = None
+            try:
+                while True:
+                    ahora = time.monotonic()
+                    if ahora - inicio_documento - pausado > self.presupuesto_documento_s:
+                        motivo = "presupuesto_documento"
+                        break
+                    if pagina_actual is not None and ahora - inicio_pagina > self.presupuesto_pagina_s:
+                        motivo = "presupuesto_pagina"
+                        break
+                    rss = _rss_mb(proceso.pid)
+                    if rss is not None:
+                        rss_pico = max(rss_pico, rss)
+                        if rss > self.rss_maximo_mb:
+                            motivo = "memoria"
+                            break
+
+                    if not receptor.poll(INTERVALO_CONTROL_S):
+                        if not proceso.is_alive() and not receptor.poll():
+                            motivo = "proceso_terminado"
+                            break
+                        continue
+                    try:
+                        mensaje = receptor.recv()
+                    except EOFError:
+                        motivo = "proceso_terminado"
+                        break
+
+                    tipo = mensaje[0]
+                    if tipo == "total":
+                        total = mensaje[1]
+                    elif tipo == "inicio":
+                        pagina_actual, inicio_pagina, rss_pico = mensaje[1], time.monotonic(), 0.0
+                    elif tipo in ("pagina", "error"):
+                        siguiente, pagina_actual = mensaje[1] + 1, None
+                        pausa = time.monotonic()
+                        if tipo == "pagina":
+                            yield PaginaSupervisada(numero=mensaje[1] + 1, resultado=mensaje[2])
+                        else:
+                            yield PaginaSupervisada(numero=mensaje[1] + 1, omitida={"motivo": "error", "detalle": mensaje[2]})
+                        pausado += time.monotonic() - pausa
+                    elif tipo == "error_documento":
+                        raise ValueError(f"No se pudo abrir el PDF {pdf_path}: {mensaje[1]}")
+                    elif tipo == "fin":
+                        return
+            finally:
+                if proceso.is_alive():
+                    proceso.kill()
+                proceso.join(timeout=5)
+                receptor.close()
+
+            if total is None:
+                raise TimeoutError(f"El PDF {pdf_path} no se pudo abrir dentro del presupuesto ({motivo})")
+
+            ultima = min(fin, total) if fin is not None else total
+            if motivo == "presupuesto_documento":
+                logger.warning(f"⏱️ Presupuesto del documento agotado: se omiten las páginas {siguiente + 1}-{ultima}")
+                for indice in range(siguiente, ultima):
+                    yield PaginaSupervisada(numero=indice + 1, omitida={"motivo": motivo})
+                return
+
+            if siguiente >= ultima:
+                return
+            if pagina_actual is None:
+                # Cortado entre páginas: se culpa a la siguiente, así cada relanzamiento avanza
+                pagina_actual = siguiente
+            omitida = {
+                "motivo": motivo,
+                "segundos": round(time.monotonic() - inicio_pagina, 2),
+                "rss_mb": round(rss_pico, 1),
+            }
+            logger.warning(f"⚠️ Página {pagina_actual + 1} omitida: {omitida}")
+            siguiente = pagina_actual + 1
+            pausa = time.monotonic()
+            yield PaginaSupervisada(numero=pagina_actual + 1, omitida=omitida)
+            pausado += time.monotonic() - pausa
+
+
+_supervisor: Optional[SupervisorExtraccion] = None
+
+
+def obtener_supervisor() -> Optional[SupervisorExtraccion]:
+    """Supervisor con los presupuestos del entorno, o None si no se activó EXTRACCION_SUPERVISADA"""
+    global _supervisor
+    if not EXTRACCION_SUPERVISADA:
+        return None
+    if _supervisor is None:
+        _supervisor = SupervisorExtraccion()
+    return _supervisor
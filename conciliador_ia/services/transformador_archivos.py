@@ -1,7 +1,9 @@
 import pandas as pd
 import logging
+import os
 import re
-from typing import Dict, List, Tuple, Optional, Any
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Any, Union
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -12,6 +14,112 @@ try:
 except ImportError:
     ClienteProcessorInteligente = None
 
+try:
+    from .clasificador_archivos import CLASIFICADOR_ARCHIVOS
+except ImportError:
+    from services.clasificador_archivos import CLASIFICADOR_ARCHIVOS
+
+try:
+    from ..utils.log_sampling import ResumenEtapa
+    from ..utils.cuit import cuit_de_dni, cuit_placeholder
+except ImportError:
+    from utils.log_sampling import ResumenEtapa
+    from utils.cuit import cuit_de_dni, cuit_placeholder
+
+# Documento de los registros sin número: 20-12345678-6 (con su dígito verificador)
+CUIT_SIN_DOCUMENTO = '20123456786'
+
+# Tipos de validar_tipo_archivo (IA) -> tipos del transformador
+MAPEO_TIPOS_IA = {
+    'portal_afip': 'PORTAL_AFIP',
+    'xubio_maestro': 'XUBIO_CLIENTES',
+    'facturas_sin_documento': 'ARCHIVO_IIBB',
+    'formato_mixto': 'ARCHIVO_IIBB',
+    'desconocido': 'DESCONOCIDO'
+}
+CONFIANZA_MINIMA_IA = 0.7
+
+# Filas por lote de transformar_archivo_iibb_por_lotes
+FILAS_POR_LOTE_IIBB = int(os.getenv("TRANSFORMADOR_FILAS_POR_LOTE", "5000"))
+
+
+@dataclass
+class IndiceAFIP:
+    """
+    Datos del receptor por número de comprobante del archivo AFIP, armado una
+    vez: cada búsqueda son tres consultas a diccionarios en lugar de recorrer
+    el archivo entero por factura.
+
+    Para cada clave se guarda la primera fila (en orden del archivo) que la
+    cumple, así `buscar` devuelve la misma fila que el recorrido fila por fila
+    con sus tres estrategias (exacto, sin ceros, terminación).
+    """
+    receptores: List[Dict[str, str]] = field(default_factory=list)
+    exactos: Dict[str, int] = field(default_factory=dict)
+    sin_ceros: Dict[str, int] = field(default_factory=dict)
+    sufijos: Dict[str, int] = field(default_factory=dict)
+    
+    def agregar(self, numero_afip: str, receptor: Dict[str, str]) -> None:
+        fila = len(self.receptores)
+        self.receptores.append(receptor)
+        self.exactos.setdefault(numero_afip, fila)
+        try:
+            self.sin_ceros.setdefault(str(int(numero_afip)) if numero_afip.isdigit() else numero_afip, fila)
+        except ValueError:
+            # Como en la búsqueda original: la fila no sigue con la estrategia de terminación
+            return
+        for desde in range(len(numero_afip) - 2):
+            self.sufijos.setdefault(numero_afip[desde:], fila)
+    
+    def buscar(self, numero_factura: str) -> Dict[str, Any]:
+        if not numero_factura:
+            return {}
+        numero_final = numero_para_afip(numero_factura)
+        filas = [self.exactos.get(numero_final), self.sin_ceros.get(numero_final)]
+        if len(numero_final) >= 3:
+            filas.append(self.sufijos.get(numero_final))
+        filas = [f for f in filas if f is not None]
+        if filas:
+            return self.receptores[min(filas)]
+        # Si no encuentra match, devolver datos por defecto para que no falle
+        return {
+            'tipo_doc_afip': '80',  # CUIT por defecto
+            'numero_doc_afip': numero_final,  # Usar el número parseado
+            'denominacion_afip': 'Cliente sin denominación'
+        }
+
+
+def numero_para_afip(numero_factura: str) -> str:
+    """Número de comprobante como figura en AFIP ("B 00003-00000371" -> 371)"""
+    if '-' in numero_factura:
+        # Para formato "B 00003-00000371", tomar solo la parte después del guión
+        numero_factura_solo = numero_factura.split('-')[-1]
+        # Quitar ceros a la izquierda para obtener el número real
+        return str(int(numero_factura_solo)) if numero_factura_solo.isdigit() else numero_factura_solo
+    return numero_factura
+
+
+@dataclass
+class ProgresoTransformacion:
+    """Avance de transformar_archivo_iibb_por_lotes, informado al terminar cada lote"""
+    lote: int
+    filas_leidas: int
+    filas_escritas: int
+
+# Número de factura en descripciones IIBB: 4 formatos en orden de prioridad.
+# Cada alternativa arranca con `.*?` anclada al inicio, así una alternativa solo
+# se prueba si la anterior no aparece en ningún lugar del texto (misma semántica
+# que aplicar los patrones uno tras otro con re.search).
+PATRON_FACTURA_IIBB = re.compile(
+    r'^(?:'
+    r'.*?(?P<completo1>(?P<letra1>[A-Z])\s+(?P<pv1>\d{5})-(?P<num1>\d{8}))'  # "B 00003-00000371"
+    r'|.*?(?P<completo2>(?P<pv2>\d{5})-(?P<num2>\d{8}))'                     # "00003-00000371"
+    r'|.*?(?P<pv3>\d{5})(?P<num3>\d{8})'                                     # "0000300000371"
+    r'|.*?(?P<completo4>(?P<pv4>\d{5})-(?P<num4>\d{3,8}))'                   # "00003-371"
+    r')',
+    re.DOTALL
+)
+
 class TransformadorArchivos:
     """
     Clase para detectar automáticamente el tipo de archivo y transformarlo
@@ -95,139 +203,77 @@ class TransformadorArchivos:
     
     def detectar_tipo_archivo(self, df: pd.DataFrame) -> str:
         """
-        Detecta automáticamente el tipo de archivo usando IA contextual
+        Detecta automáticamente el tipo de archivo por sus columnas
+        (CLASIFICADOR_ARCHIVOS, cacheado por huella del encabezado). La IA
+        contextual solo se consulta si ninguna firma llega a la confianza mínima.
         """
-        # Usar IA si está disponible
-        if self.ia_processor:
-            try:
-                resultado_ia = self.ia_processor.validar_tipo_archivo(df)
-                tipo_detectado = resultado_ia.get('tipo_archivo_detectado', 'desconocido')
-                confianza = resultado_ia.get('confianza', 0.0)
-                
-                logger.info(f"🤖 IA detectó: {tipo_detectado} (confianza: {confianza:.2f})")
-                
-                # Mapear tipos de IA a tipos del transformador
-                mapeo_tipos = {
-                    'portal_afip': 'PORTAL_AFIP',
-                    'xubio_maestro': 'XUBIO_CLIENTES',
-                    'facturas_sin_documento': 'ARCHIVO_IIBB',
-                    'formato_mixto': 'ARCHIVO_IIBB',
-                    'desconocido': 'DESCONOCIDO'
-                }
-                
-                tipo_mapeado = mapeo_tipos.get(tipo_detectado, 'DESCONOCIDO')
-                
-                # Si la IA tiene alta confianza, usar su resultado
-                if confianza >= 0.7:
-                    return tipo_mapeado
-                
-                logger.warning(f"⚠️ IA con baja confianza ({confianza:.2f}), usando detección tradicional")
-                
-            except Exception as e:
-                logger.warning(f"⚠️ Error en IA, usando detección tradicional: {e}")
-        
-        # Fallback a detección tradicional
-        columnas = [col.lower() for col in df.columns]
+        clasificacion = CLASIFICADOR_ARCHIVOS.clasificar(df.columns)
         
-        # PRIORIDAD 1: Detectar archivo IIBB (cualquier nombre) - MÁS ESPECÍFICO
-        if self._es_archivo_iibb(df, columnas):
-            return "ARCHIVO_IIBB"
+        # Tipos con firma suficiente, en orden de prioridad; IIBB además tiene que tener facturas
+        for tipo in clasificacion.candidatos:
+            if tipo == "ARCHIVO_IIBB" and not self._tiene_facturas_iibb(df):
+                continue
+            logger.info(f"📋 Columnas de {tipo} (confianza: {clasificacion.confianzas[tipo]:.2f})")
+            return tipo
         
-        # PRIORIDAD 2: Detectar archivo Xubio Clientes
-        if self._es_archivo_xubio_clientes(df, columnas):
-            return "XUBIO_CLIENTES"
-        
-        # PRIORIDAD 3: Detectar archivo Portal AFIP estándar - MÁS GENÉRICO
-        if self._es_archivo_portal_afip(df, columnas):
-            return "PORTAL_AFIP"
-        
-        return "DESCONOCIDO"
-    
-    def _es_archivo_iibb(self, df: pd.DataFrame, columnas: List[str]) -> bool:
-        """
-        Detecta si es un archivo IIBB (cualquier nombre, 4 formatos distintos)
-        """
-        # FORMATO 1: Columnas estándar (incluyendo errores de tipeo)
-        columnas_requeridas_1 = ["descripción", "descipción", "razón social", "provincia", "localidad"]
-        columnas_encontradas_1 = [col for col in columnas_requeridas_1 if any(col in col_name for col_name in columnas)]
-        
-        # FORMATO 2: Columnas con "Unnamed" (archivos malformados)
-        columnas_unnamed = [col for col in df.columns if "unnamed" in col.lower()]
-        
-        # FORMATO 3: Columnas alternativas
-        columnas_requeridas_3 = ["descripcion", "razon social", "provincia", "localidad"]
-        columnas_encontradas_3 = [col for col in columnas_requeridas_3 if any(col in col_name for col_name in columnas)]
-        
-        # FORMATO 4: Columnas con acentos diferentes
-        columnas_requeridas_4 = ["descripciã³n", "razã³n social", "provincia", "localidad"]
-        columnas_encontradas_4 = [col for col in columnas_requeridas_4 if any(col in col_name for col_name in columnas)]
-        
-        # FORMATO 5: Archivo mixto (tiene columnas Portal AFIP pero también contenido IIBB)
-        columnas_portal_afip = ["tipo doc. comprador", "numero de documento", "denominación comprador"]
-        columnas_portal_encontradas = [col for col in columnas_portal_afip if any(col in col_name for col_name in columnas)]
-        
-        # Verificar si cumple alguno de los 5 formatos
-        formatos_validos = [
-            len(columnas_encontradas_1) >= 3,  # Formato 1
-            len(columnas_unnamed) >= 2,        # Formato 2 (Unnamed)
-            len(columnas_encontradas_3) >= 3,  # Formato 3
-            len(columnas_encontradas_4) >= 3,  # Formato 4
-            len(columnas_portal_encontradas) >= 2  # Formato 5 (mixto)
-        ]
-        
-        if any(formatos_validos):
-            # Verificar contenido de facturas en cualquier columna
-            patrones_factura = ["factura", "crédito", "venta", "0000", "00003-", "00004-", "00005-"]
-            
-            # Buscar en todas las columnas que podrían contener descripciones
-            columnas_descripcion = []
-            for col in df.columns:
-                col_lower = col.lower()
-                if any(palabra in col_lower for palabra in ["descrip", "concepto", "detalle", "observ", "denominación", "denominacion"]):
-                    columnas_descripcion.append(col)
-            
-            # Si no encuentra columnas de descripción, buscar en columnas "Unnamed"
-            if not columnas_descripcion and columnas_unnamed:
-                columnas_descripcion = columnas_unnamed[:2]  # Tomar las primeras 2
-            
-            # Si no encuentra columnas de descripción, buscar en TODAS las columnas
-            if not columnas_descripcion:
-                columnas_descripcion = list(df.columns)[:3]  # Tomar las primeras 3 columnas
-            
-            # Verificar contenido
-            for col_desc in columnas_descripcion:
+        # Usar IA si está disponible
+        if self.ia_processor:
+            if clasificacion.tipo_ia is None:
                 try:
-                    muestra = df[col_desc].head(10).astype(str)
-                    coincidencias = sum(1 for valor in muestra if any(patron in valor.lower() for patron in patrones_factura))
-                    
-                    if coincidencias >= 2:  # Reducido a 2 de 10 muestras para ser más flexible
-                        logger.info(f"✅ Archivo IIBB detectado en columna: {col_desc} ({coincidencias}/10 coincidencias)")
-                        return True
+                    resultado_ia = self.ia_processor.validar_tipo_archivo(df)
+                    tipo_detectado = resultado_ia.get('tipo_archivo_detectado', 'desconocido')
+                    confianza = resultado_ia.get('confianza', 0.0)
+                    logger.info(f"🤖 IA detectó: {tipo_detectado} (confianza: {confianza:.2f})")
+                    # El tipo de la IA sale solo de las columnas: vale para toda la huella
+                    clasificacion.confianza_ia = confianza
+                    clasificacion.tipo_ia = MAPEO_TIPOS_IA.get(tipo_detectado, 'DESCONOCIDO')
                 except Exception as e:
-                    logger.warning(f"Error verificando columna {col_desc}: {e}")
-                    continue
+                    logger.warning(f"⚠️ Error en IA: {e}")
+            
+            # Si la IA tiene alta confianza, usar su resultado
+            if clasificacion.tipo_ia is not None and clasificacion.confianza_ia >= CONFIANZA_MINIMA_IA:
+                return clasificacion.tipo_ia
+            logger.warning(f"⚠️ IA con baja confianza ({clasificacion.confianza_ia:.2f})")
         
-        return False
+        return "DESCONOCIDO"
     
-    def _es_archivo_portal_afip(self, df: pd.DataFrame, columnas: List[str]) -> bool:
+    def _tiene_facturas_iibb(self, df: pd.DataFrame) -> bool:
         """
-        Detecta si es un archivo Portal AFIP estándar
+        Confirma un archivo IIBB por el contenido: facturas en las primeras
+        filas de alguna columna de descripción
         """
-        # Verificar columnas características del Portal AFIP
-        columnas_requeridas = ["tipo doc. comprador", "numero de documento", "denominación comprador"]
-        columnas_encontradas = [col for col in columnas_requeridas if any(col in col_name for col_name in columnas)]
+        patrones_factura = ["factura", "crédito", "venta", "0000", "00003-", "00004-", "00005-"]
         
-        return len(columnas_encontradas) >= 2
-    
-    def _es_archivo_xubio_clientes(self, df: pd.DataFrame, columnas: List[str]) -> bool:
-        """
-        Detecta si es un archivo Xubio Clientes
-        """
-        # Verificar columnas características de Xubio
-        columnas_requeridas = ["cuit", "nombre", "razonsocial"]
-        columnas_encontradas = [col for col in columnas_requeridas if any(col in col_name for col_name in columnas)]
+        # Buscar en todas las columnas que podrían contener descripciones
+        columnas_descripcion = []
+        for col in df.columns:
+            col_lower = str(col).lower()
+            if any(palabra in col_lower for palabra in ["descrip", "concepto", "detalle", "observ", "denominación", "denominacion"]):
+                columnas_descripcion.append(col)
+        
+        # Si no encuentra columnas de descripción, buscar en columnas "Unnamed"
+        columnas_unnamed = [col for col in df.columns if "unnamed" in str(col).lower()]
+        if not columnas_descripcion and columnas_unnamed:
+            columnas_descripcion = columnas_unnamed[:2]  # Tomar las primeras 2
+        
+        # Si no encuentra columnas de descripción, buscar en TODAS las columnas
+        if not columnas_descripcion:
+            columnas_descripcion = list(df.columns)[:3]  # Tomar las primeras 3 columnas
+        
+        # Verificar contenido
+        for col_desc in columnas_descripcion:
+            try:
+                muestra = df[col_desc].head(10).astype(str)
+                coincidencias = sum(1 for valor in muestra if any(patron in valor.lower() for patron in patrones_factura))
+                
+                if coincidencias >= 2:  # Reducido a 2 de 10 muestras para ser más flexible
+                    logger.info(f"✅ Archivo IIBB detectado en columna: {col_desc} ({coincidencias}/10 coincidencias)")
+                    return True
+            except Exception as e:
+                logger.warning(f"Error verificando columna {col_desc}: {e}")
+                continue
         
-        return len(columnas_encontradas) >= 2
+        return False
     
     def transformar_archivo_iibb(
         self, 
@@ -274,6 +320,64 @@ class TransformadorArchivos:
             log_transformacion.append(f"❌ Error en transformación: {str(e)}")
             raise
     
+    def transformar_archivo_iibb_por_lotes(
+        self,
+        origen: Union[str, Path, pd.DataFrame],
+        destino: Union[str, Path],
+        df_afip: Optional[pd.DataFrame] = None,
+        filas_por_lote: int = FILAS_POR_LOTE_IIBB,
+        progreso: Optional[Callable[[ProgresoTransformacion], None]] = None
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Igual que transformar_archivo_iibb pero de a `filas_por_lote` filas:
+        cada lote pasa por el parseo, la búsqueda en AFIP (contra un índice
+        armado una sola vez) y el formato final, y se escribe directo en
+        `destino` (.csv o .xlsx). Ningún DataFrame intermedio vive más que su
+        lote, así la memoria no crece con el tamaño del archivo.
+        
+        `origen` es un CSV, un Excel o un DataFrame ya cargado. `progreso`, si
+        se pasa, recibe un ProgresoTransformacion al terminar cada lote.
+        """
+        log_transformacion = []
+        estadisticas = {"registros_parseados": 0, "registros_finales": 0, "lotes": 0}
+        
+        indice = None
+        if df_afip is not None:
+            log_transformacion.append("🔍 Armando índice de facturas AFIP...")
+            indice = self.construir_indice_afip(df_afip)
+        if indice is None:
+            log_transformacion.append("⚠️ Sin índice AFIP - Usando datos del cliente")
+        
+        try:
+            with _EscritorLotes(destino) as escritor:
+                for lote in _leer_lotes(origen, filas_por_lote):
+                    df_lote = self._parsear_descripcion_iibb(lote)
+                    if indice is not None:
+                        df_lote = self._buscar_facturas_afip(df_lote, indice=indice)
+                    df_lote = self._generar_formato_final_simple(df_lote)
+                    escritor.escribir(df_lote)
+                    
+                    estadisticas["lotes"] += 1
+                    estadisticas["registros_parseados"] += len(lote)
+                    estadisticas["registros_finales"] += len(df_lote)
+                    if progreso:
+                        progreso(ProgresoTransformacion(
+                            lote=estadisticas["lotes"],
+                            filas_leidas=estadisticas["registros_parseados"],
+                            filas_escritas=estadisticas["registros_finales"]
+                        ))
+            
+            log_transformacion.append(
+                f"✅ Formato final generado por lotes: {estadisticas['registros_finales']} registros válidos "
+                f"de {estadisticas['registros_parseados']} en {estadisticas['lotes']} lotes -> {destino}"
+            )
+            return log_transformacion, estadisticas
+            
+        except Exception as e:
+            logger.error(f"Error en transformar_archivo_iibb_por_lotes: {e}")
+            log_transformacion.append(f"❌ Error en transformación: {str(e)}")
+            raise
+    
     def _parsear_descripcion_iibb(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Parsea la columna descripción para extraer número de factura (4 formatos distintos)
@@ -302,48 +406,18 @@ class TransformadorArchivos:
         
         logger.info(f"📝 Parseando columna: {col_descripcion}")
         
-        # Función para extraer número de factura (más patrones)
-        def extraer_numero_factura(descripcion: str) -> str:
-            if pd.isna(descripcion):
-                return ""
-            
-            descripcion_str = str(descripcion)
-            
-            # PATRÓN 1: "B 00003-00000371" o "A 00003-00001818"
-            patron1 = r'[A-Z]\s+\d{5}-\d{8}'
-            match1 = re.search(patron1, descripcion_str)
-            if match1:
-                return match1.group()
-            
-            # PATRÓN 2: Solo números "00003-00000371"
-            patron2 = r'\d{5}-\d{8}'
-            match2 = re.search(patron2, descripcion_str)
-            if match2:
-                return match2.group()
-            
-            # PATRÓN 3: "00003-00000371" sin guión inicial
-            patron3 = r'\d{5}\d{8}'
-            match3 = re.search(patron3, descripcion_str)
-            if match3:
-                numero = match3.group()
-                return f"{numero[:5]}-{numero[5:]}"
-            
-            # PATRÓN 4: Números más cortos "00003-371"
-            patron4 = r'\d{5}-\d{3,8}'
-            match4 = re.search(patron4, descripcion_str)
-            if match4:
-                return match4.group()
-            
-            return ""
-        
-        # Aplicar extracción
-        df_copy['numero_factura_extraido'] = df_copy[col_descripcion].apply(extraer_numero_factura)
+        # Extraer número de factura de toda la columna en una sola pasada
+        partes = self._extraer_partes_factura_iibb(df_copy[col_descripcion])
+        df_copy['numero_factura_extraido'] = partes['numero_factura_extraido']
+        df_copy['letra_factura_extraida'] = partes['letra']
+        df_copy['punto_venta_extraido'] = partes['punto_venta']
+        df_copy['numero_comprobante_extraido'] = partes['numero']
         
         # AGREGAR COLUMNAS BÁSICAS PARA EL CLIENTEPROCESSOR
         df_copy['Tipo Doc. Comprador'] = '80'  # Valor por defecto para CUIT
         # Usar el número de factura extraído como base para el documento
         df_copy['Numero de Documento'] = df_copy['numero_factura_extraido'].apply(
-            lambda x: self._generar_cuit_valido(x) if x else '20123456789'
+            lambda x: self._generar_cuit_valido(x) if x else CUIT_SIN_DOCUMENTO
         )
         df_copy['denominación comprador'] = df_copy.get('Razón social', 'Cliente sin nombre')
         
@@ -358,95 +432,89 @@ class TransformadorArchivos:
         
         return df_copy
     
-    def _buscar_facturas_afip(self, df_gh: pd.DataFrame, df_afip: pd.DataFrame) -> pd.DataFrame:
+    def _extraer_partes_factura_iibb(self, descripciones: pd.Series) -> pd.DataFrame:
         """
-        Busca las facturas extraídas en los datos AFIP
+        Aplica PATRON_FACTURA_IIBB a toda la serie y unifica las alternativas en
+        número de factura, letra, punto de venta y número (vacío si no hay match)
+        """
+        grupos = descripciones.astype(str).str.extract(PATRON_FACTURA_IIBB)
+        
+        # El formato 3 no trae guión: se normaliza a "PPPPP-NNNNNNNN"
+        completo3 = grupos['pv3'] + '-' + grupos['num3']
+        
+        return pd.DataFrame({
+            'numero_factura_extraido': grupos['completo1']
+                .fillna(grupos['completo2'])
+                .fillna(completo3)
+                .fillna(grupos['completo4'])
+                .fillna(''),
+            'letra': grupos['letra1'].fillna(''),
+            'punto_venta': grupos['pv1']
+                .fillna(grupos['pv2'])
+                .fillna(grupos['pv3'])
+                .fillna(grupos['pv4'])
+                .fillna(''),
+            'numero': grupos['num1']
+                .fillna(grupos['num2'])
+                .fillna(grupos['num3'])
+                .fillna(grupos['num4'])
+                .fillna(''),
+        }, index=descripciones.index)
+    
+    def construir_indice_afip(self, df_afip: pd.DataFrame) -> Optional[IndiceAFIP]:
+        """
+        Índice de los receptores del archivo AFIP por número de comprobante
+        (None si faltan columnas)
         """
-        df_resultado = df_gh.copy()
-        
         # Encontrar columnas relevantes en AFIP (usar patrones exactos)
         try:
             col_numero_desde = [col for col in df_afip.columns if "nãºmero desde" in col.lower() or "número desde" in col.lower()][0]
         except IndexError:
             logger.error("No se encontró columna 'número desde' en archivo AFIP")
-            return df_resultado
+            return None
             
         try:
             col_tipo_doc = [col for col in df_afip.columns if "tipo doc. receptor" in col.lower()][0]
         except IndexError:
             logger.error("No se encontró columna 'tipo doc. receptor' en archivo AFIP")
-            return df_resultado
+            return None
             
         try:
             col_numero_doc = [col for col in df_afip.columns if "nro. doc. receptor" in col.lower()][0]
         except IndexError:
             logger.error("No se encontró columna 'nro. doc. receptor' en archivo AFIP")
-            return df_resultado
+            return None
             
         try:
             col_denominacion = [col for col in df_afip.columns if "denominaciã³n receptor" in col.lower() or "denominación receptor" in col.lower()][0]
         except IndexError:
             logger.error("No se encontró columna 'denominación receptor' en archivo AFIP")
-            return df_resultado
+            return None
+        
+        indice = IndiceAFIP()
+        columnas = [df_afip[c].astype(str).str.strip() for c in (col_numero_desde, col_tipo_doc, col_numero_doc, col_denominacion)]
+        for numero_afip, tipo_doc, numero_doc, denominacion in zip(*columnas):
+            indice.agregar(numero_afip, {
+                'tipo_doc_afip': tipo_doc,
+                'numero_doc_afip': numero_doc,
+                'denominacion_afip': denominacion
+            })
+        logger.info(f"📇 Índice AFIP: {len(indice.receptores)} comprobantes")
+        return indice
+    
+    def _buscar_facturas_afip(self, df_gh: pd.DataFrame, df_afip: Optional[pd.DataFrame] = None,
+                              indice: Optional[IndiceAFIP] = None) -> pd.DataFrame:
+        """
+        Busca las facturas extraídas en los datos AFIP (con `indice` ya armado,
+        o se arma desde `df_afip`)
+        """
+        df_resultado = df_gh.copy()
         
-        # Función para buscar en AFIP (más robusta)
-        def buscar_en_afip(numero_factura: str) -> Dict[str, Any]:
-            if not numero_factura:
-                return {}
-            
-            # Extraer el número de factura (después del guión) sin ceros a la izquierda
-            if '-' in numero_factura:
-                # Para formato "B 00003-00000371", tomar solo la parte después del guión
-                numero_factura_solo = numero_factura.split('-')[-1]
-                # Quitar ceros a la izquierda para obtener el número real
-                numero_final = str(int(numero_factura_solo)) if numero_factura_solo.isdigit() else numero_factura_solo
-            else:
-                numero_final = numero_factura
-            
-            logger.debug(f"🔍 Buscando factura: {numero_factura} -> {numero_final}")
-            
-            # Buscar en AFIP con múltiples estrategias
-            for _, row in df_afip.iterrows():
-                numero_afip = str(row[col_numero_desde]).strip()
-                
-                # Estrategia 1: Match exacto
-                if numero_afip == numero_final:
-                    logger.debug(f"✅ Match exacto encontrado: {numero_afip}")
-                    return {
-                        'tipo_doc_afip': str(row[col_tipo_doc]).strip(),
-                        'numero_doc_afip': str(row[col_numero_doc]).strip(),
-                        'denominacion_afip': str(row[col_denominacion]).strip()
-                    }
-                
-                # Estrategia 2: Match sin ceros a la izquierda
-                try:
-                    numero_afip_sin_ceros = str(int(numero_afip)) if numero_afip.isdigit() else numero_afip
-                    if numero_afip_sin_ceros == numero_final:
-                        logger.debug(f"✅ Match sin ceros encontrado: {numero_afip} -> {numero_afip_sin_ceros}")
-                        return {
-                            'tipo_doc_afip': str(row[col_tipo_doc]).strip(),
-                            'numero_doc_afip': str(row[col_numero_doc]).strip(),
-                            'denominacion_afip': str(row[col_denominacion]).strip()
-                        }
-                except ValueError:
-                    continue
-                
-                # Estrategia 3: Match parcial (últimos dígitos)
-                if len(numero_final) >= 3 and numero_afip.endswith(numero_final):
-                    logger.debug(f"✅ Match parcial encontrado: {numero_afip} termina en {numero_final}")
-                    return {
-                        'tipo_doc_afip': str(row[col_tipo_doc]).strip(),
-                        'numero_doc_afip': str(row[col_numero_doc]).strip(),
-                        'denominacion_afip': str(row[col_denominacion]).strip()
-                    }
-            
-            # Si no encuentra match, devolver datos por defecto para que no falle
-            logger.debug(f"⚠️ No se encontró match para {numero_factura}, usando datos por defecto")
-            return {
-                'tipo_doc_afip': '80',  # CUIT por defecto
-                'numero_doc_afip': numero_final,  # Usar el número parseado
-                'denominacion_afip': 'Cliente sin denominación'
-            }
+        if indice is None:
+            indice = self.construir_indice_afip(df_afip)
+            if indice is None:
+                return df_resultado
+        buscar_en_afip = indice.buscar
         
         # Aplicar búsqueda
         resultados_afip = df_resultado['numero_factura_extraido'].apply(buscar_en_afip)
@@ -476,8 +544,10 @@ class TransformadorArchivos:
         """
         Genera el formato final que espera ClienteProcessor
         """
-        logger.info(f"🔍 DEBUG - DataFrame recibido: {len(df)} registros")
-        logger.info(f"🔍 DEBUG - Columnas disponibles: {list(df.columns)}")
+        resumen = ResumenEtapa(logger, "generar_formato_final")
+        resumen.contar("recibidos", cantidad=len(df))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Columnas disponibles: %s", list(df.columns))
         
         # CORRECCIÓN: Copiar el DataFrame original en lugar de crear uno vacío
         df_final = df.copy()
@@ -495,17 +565,12 @@ class TransformadorArchivos:
             logger.warning("⚠️ Columna 'numero_doc_afip' no encontrada, usando valores vacíos")
             df_final['Numero de Documento'] = ''
         else:
-            logger.info(f"🔍 DEBUG - Columna 'numero_doc_afip' encontrada, valores no nulos: {df['numero_doc_afip'].notna().sum()}")
-            logger.info(f"🔍 DEBUG - Ejemplo numero_doc_afip: {df['numero_doc_afip'].iloc[0] if len(df) > 0 else 'N/A'}")
             df_final['Numero de Documento'] = df['numero_doc_afip']
         
         if 'denominacion_afip' not in df.columns:
             logger.warning("⚠️ Columna 'denominacion_afip' no encontrada, usando Razón social")
-            logger.info(f"🔍 DEBUG - Usando 'Razón social', valores no nulos: {df['Razón social'].notna().sum() if 'Razón social' in df.columns else 0}")
             df_final['denominación comprador'] = df['Razón social'] if 'Razón social' in df.columns else 'Cliente sin nombre'
         else:
-            logger.info(f"🔍 DEBUG - Columna 'denominacion_afip' encontrada, valores no nulos: {df['denominacion_afip'].notna().sum()}")
-            logger.info(f"🔍 DEBUG - Ejemplo denominacion_afip: {df['denominacion_afip'].iloc[0] if len(df) > 0 else 'N/A'}")
             df_final['denominación comprador'] = df['denominacion_afip'].fillna(
                 df['Razón social'] if 'Razón social' in df.columns else 'Cliente sin nombre'
             )
@@ -516,69 +581,40 @@ class TransformadorArchivos:
         
         # Filtrar solo registros válidos (solo si hay datos)
         if len(df_final) > 0:
-            logger.info(f"🔍 DEBUG - Antes del filtro: {len(df_final)} registros")
-            
-            # Verificar tipos de datos
-            logger.info(f"🔍 DEBUG - Tipo de 'Numero de Documento': {type(df_final['Numero de Documento'].iloc[0]) if len(df_final) > 0 else 'N/A'}")
-            logger.info(f"🔍 DEBUG - Tipo de 'denominación comprador': {type(df_final['denominación comprador'].iloc[0]) if len(df_final) > 0 else 'N/A'}")
-            
-            # Verificar valores específicos
-            logger.info(f"🔍 DEBUG - Numero de Documento no vacío: {(df_final['Numero de Documento'].str.len() > 0).sum()}")
-            logger.info(f"🔍 DEBUG - denominación comprador no vacío: {(df_final['denominación comprador'].str.len() > 0).sum()}")
-            
-            # Mostrar algunos ejemplos de datos
-            if len(df_final) > 0:
-                logger.info(f"🔍 DEBUG - Ejemplo Numero de Documento: '{df_final['Numero de Documento'].iloc[0]}'")
-                logger.info(f"🔍 DEBUG - Ejemplo denominación comprador: '{df_final['denominación comprador'].iloc[0]}'")
-                
-                # Mostrar más ejemplos
-                for i in range(min(3, len(df_final))):
-                    logger.info(f"🔍 DEBUG - Registro {i+1}: Doc='{df_final['Numero de Documento'].iloc[i]}', Nombre='{df_final['denominación comprador'].iloc[i]}'")
-            
-            # Aplicar filtro paso a paso
-            logger.info("🔍 DEBUG - Aplicando filtro paso a paso...")
-            
-            # Filtro 1: Numero de Documento no vacío
             filtro_doc = df_final['Numero de Documento'].str.len() > 0
-            logger.info(f"🔍 DEBUG - Filtro Numero de Documento: {filtro_doc.sum()} registros pasan")
-            
-            # Filtro 2: denominación comprador no vacío
             filtro_nombre = df_final['denominación comprador'].str.len() > 0
-            logger.info(f"🔍 DEBUG - Filtro denominación comprador: {filtro_nombre.sum()} registros pasan")
-            
-            # Filtro combinado
             filtro_combinado = filtro_doc & filtro_nombre
-            logger.info(f"🔍 DEBUG - Filtro combinado: {filtro_combinado.sum()} registros pasan")
             
-            df_final = df_final[filtro_combinado]
+            resumen.contar("sin_documento", cantidad=int((~filtro_doc).sum()))
+            resumen.contar("sin_denominacion", cantidad=int((~filtro_nombre).sum()))
+            if logger.isEnabledFor(logging.DEBUG):
+                for i in range(min(3, len(df_final))):
+                    logger.debug(
+                        "🔍 Registro %d: Doc='%s', Nombre='%s'",
+                        i + 1, df_final['Numero de Documento'].iloc[i], df_final['denominación comprador'].iloc[i]
+                    )
             
-            logger.info(f"🔍 DEBUG - Después del filtro: {len(df_final)} registros")
+            df_final = df_final[filtro_combinado]
         
+        resumen.contar("validos", cantidad=len(df_final))
+        resumen.emitir()
         return df_final
     
     def _generar_cuit_valido(self, numero_factura: str) -> str:
         """
-        Genera un CUIT válido de 11 dígitos basado en el número de factura
+        Genera un CUIT válido de 11 dígitos (prefijo y dígito verificador)
+        basado en el número de factura: siempre el mismo para la misma factura
         """
         if not numero_factura:
-            return '20123456789'
+            return CUIT_SIN_DOCUMENTO
         
         # Limpiar el número de factura
         numero_limpio = numero_factura.replace('B ', '').replace('A ', '').replace('-', '')
         
-        # Tomar los últimos dígitos y asegurar que tenga 11 dígitos
-        if len(numero_limpio) >= 11:
-            # Tomar los últimos 11 dígitos
-            cuit = numero_limpio[-11:]
-        else:
-            # Rellenar con ceros a la izquierda
-            cuit = numero_limpio.zfill(11)
-        
-        # Asegurar que empiece con 20, 23, 24, 25, 26, 27, 30, 33, 34 (prefijos válidos de CUIT)
-        if not cuit.startswith(('20', '23', '24', '25', '26', '27', '30', '33', '34')):
-            cuit = '20' + cuit[2:]  # Cambiar a prefijo 20
-        
-        return cuit
+        # Los últimos 8 dígitos como DNI con prefijo 20; sin dígitos, uno derivado del texto
+        if any(c.isdigit() for c in numero_limpio):
+            return cuit_de_dni(numero_limpio)
+        return cuit_placeholder(numero_limpio)
     
     def _generar_formato_final_simple(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -596,11 +632,11 @@ class TransformadorArchivos:
             if 'numero_factura_extraido' in df_final.columns:
                 df_final['Numero de Documento'] = df_final.apply(
                     lambda row: row['numero_doc_afip'] if row['numero_doc_afip'] and str(row['numero_doc_afip']).strip() else 
-                               (self._generar_cuit_valido(row['numero_factura_extraido']) if row['numero_factura_extraido'] else '20123456789'),
+                               (self._generar_cuit_valido(row['numero_factura_extraido']) if row['numero_factura_extraido'] else CUIT_SIN_DOCUMENTO),
                     axis=1
                 )
             else:
-                df_final['Numero de Documento'] = df_final['numero_doc_afip'].fillna('20123456789')
+                df_final['Numero de Documento'] = df_final['numero_doc_afip'].fillna(CUIT_SIN_DOCUMENTO)
             df_final['denominación comprador'] = df_final['denominacion_afip'].fillna('Cliente sin denominación')
         else:
             # Usar datos del cliente como fallback
@@ -608,10 +644,10 @@ class TransformadorArchivos:
             # Usar número de factura parseado como documento si no hay CUIT
             if 'numero_factura_extraido' in df_final.columns:
                 df_final['Numero de Documento'] = df_final['numero_factura_extraido'].apply(
-                    lambda x: self._generar_cuit_valido(x) if x else '20123456789'
+                    lambda x: self._generar_cuit_valido(x) if x else CUIT_SIN_DOCUMENTO
                 )
             else:
-                df_final['Numero de Documento'] = df_final.get('CUIT', '20123456789')
+                df_final['Numero de Documento'] = df_final.get('CUIT', CUIT_SIN_DOCUMENTO)
             df_final['denominación comprador'] = df_final.get('Razón social', 'Cliente sin nombre')
         
         # Asegurar que las columnas tengan los nombres exactos que espera ClienteProcessor
@@ -645,30 +681,18 @@ class TransformadorArchivos:
             logger.info("🤖 Aplicando parsers inteligentes de IA...")
             df_procesado = df.copy()
             
-            # Analizar campos complejos con IA
-            resultado_ia = self.ia_processor.validar_tipo_archivo(df)
-            campos_complejos = resultado_ia.get('campos_complejos', {})
+            # Analizar campos complejos con IA (el tipo ya lo resolvió detectar_tipo_archivo)
+            campos_complejos = self.ia_processor._analizar_campos_complejos(df)
             
             for col, info_campo in campos_complejos.items():
                 if info_campo.get('necesita_parsing', False):
                     tipo_campo = info_campo.get('tipo', '')
                     logger.info(f"🔧 Procesando campo complejo: {col} (tipo: {tipo_campo})")
                     
-                    # Aplicar parser inteligente según el tipo
-                    if tipo_campo == 'numero_factura' and 'numero_factura' in self.ia_processor.parsers_inteligentes:
-                        df_procesado[f'{col}_parsed'] = df_procesado[col].apply(
-                            lambda x: self.ia_processor.parsers_inteligentes['numero_factura'](x)
-                        )
-                    
-                    elif tipo_campo == 'cuit_documento' and 'cuit_documento' in self.ia_processor.parsers_inteligentes:
-                        df_procesado[f'{col}_parsed'] = df_procesado[col].apply(
-                            lambda x: self.ia_processor.parsers_inteligentes['cuit_documento'](x)
-                        )
-                    
-                    elif tipo_campo == 'numero_comprobante' and 'numero_comprobante' in self.ia_processor.parsers_inteligentes:
-                        df_procesado[f'{col}_parsed'] = df_procesado[col].apply(
-                            lambda x: self.ia_processor.parsers_inteligentes['numero_comprobante'](x)
-                        )
+                    # Aplicar parser inteligente según el tipo (a toda la columna de una vez)
+                    if tipo_campo in ('numero_factura', 'cuit_documento', 'numero_comprobante') \
+                            and tipo_campo in self.ia_processor.parsers_inteligentes:
+                        df_procesado[f'{col}_parsed'] = self.ia_processor.parsear_columna(df_procesado[col], tipo_campo)
             
             logger.info("✅ Parsers inteligentes aplicados exitosamente")
             return df_procesado
@@ -676,3 +700,89 @@ class TransformadorArchivos:
         except Exception as e:
             logger.error(f"❌ Error aplicando parsers inteligentes: {e}")
             return df
+
+
+def _leer_lotes(origen: Union[str, Path, pd.DataFrame], filas_por_lote: int) -> Iterator[pd.DataFrame]:
+    """
+    Lotes de `filas_por_lote` filas de un DataFrame, un CSV (read_csv con
+    chunksize) o un .xlsx (openpyxl en modo solo lectura, fila por fila).
+    Un .xls no se puede leer por partes: se carga entero y se corta.
+    """
+    if isinstance(origen, pd.DataFrame):
+        for desde in range(0, len(origen), filas_por_lote):
+            yield origen.iloc[desde:desde + filas_por_lote]
+        return
+    
+    ruta = Path(origen)
+    extension = ruta.suffix.lower()
+    if extension in ('.csv', '.txt'):
+        yield from pd.read_csv(ruta, chunksize=filas_por_lote)
+    elif extension in ('.xlsx', '.xlsm'):
+        from openpyxl import load_workbook
+        
+        libro = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezado = next(filas, None)
+            if encabezado is None:
+                return
+            # Los mismos nombres que pone pandas a los encabezados vacíos
+            columnas = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(encabezado)]
+            lote = []
+            for fila in filas:
+                lote.append(fila)
+                if len(lote) == filas_por_lote:
+                    yield pd.DataFrame(lote, columns=columnas)
+                    lote = []
+            if lote:
+                yield pd.DataFrame(lote, columns=columnas)
+        finally:
+            libro.close()
+    else:
+        yield from _leer_lotes(pd.read_excel(ruta), filas_por_lote)
+
+
+class _EscritorLotes:
+    """Escribe lotes de un DataFrame en un .csv o en un .xlsx (xlsxwriter en modo de memoria constante)"""
+    
+    def __init__(self, destino: Union[str, Path]):
+        self.destino = Path(destino)
+        self.columnas: Optional[List[str]] = None
+        self._archivo = None
+        self._libro = None
+        self._hoja = None
+        self._fila = 0
+    
+    def __enter__(self) -> "_EscritorLotes":
+        self.destino.parent.mkdir(parents=True, exist_ok=True)
+        if self.destino.suffix.lower() == '.xlsx':
+            import xlsxwriter
+            
+            self._libro = xlsxwriter.Workbook(str(self.destino), {'constant_memory': True})
+            self._hoja = self._libro.add_worksheet()
+        else:
+            self._archivo = open(self.destino, 'w', encoding='utf-8', newline='')
+        return self
+    
+    def escribir(self, df: pd.DataFrame) -> None:
+        if self.columnas is None:
+            self.columnas = [str(c) for c in df.columns]
+            if self._hoja is not None:
+                self._hoja.write_row(0, 0, self.columnas)
+                self._fila = 1
+            else:
+                df.head(0).to_csv(self._archivo, index=False)
+        # Todos los lotes con las columnas del primero
+        df = df.reindex(columns=self.columnas)
+        if self._hoja is not None:
+            for fila in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+                self._hoja.write_row(self._fila, 0, fila)
+                self._fila += 1
+        else:
+            df.to_csv(self._archivo, index=False, header=False)
+    
+    def __exit__(self, *exc) -> None:
+        if self._libro is not None:
+            self._libro.close()
+        if self._archivo is not None:
+            self._archivo.close()
@@ -5,10 +5,18 @@ y hace la comparativa con IA
 """
 import pandas as pd
 import sys
+import logging
 sys.path.append('conciliador_ia')
 from difflib import SequenceMatcher
 import re
 
+try:
+    from ..utils.log_sampling import LoggerMuestreado, ResumenEtapa
+except ImportError:
+    from utils.log_sampling import LoggerMuestreado, ResumenEtapa
+
+logger = logging.getLogger(__name__)
+
 class TransformadorInteligente:
     def __init__(self):
         self.maestros_portal = None
@@ -92,6 +100,10 @@ class TransformadorInteligente:
         clientes_existentes = []
         errores = []
         
+        # Una línea por fila solo para las primeras filas y luego muestreada
+        log_fila = LoggerMuestreado(logger, primeros=5, cada=1000)
+        resumen = ResumenEtapa(logger, "transformar_tango_a_clientes")
+        
         for idx, row in df_tango.iterrows():
             nombre = row.get('Razón social', '')
             provincia = row.get('Provincia', '')
@@ -99,9 +111,10 @@ class TransformadorInteligente:
             
             if pd.isna(nombre) or nombre == '':
                 errores.append(f"Fila {idx+1}: Nombre vacío")
+                resumen.contar("nombre_vacio", ejemplo=idx + 1)
                 continue
             
-            print(f"   🔍 Buscando: {nombre}")
+            log_fila.debug("   🔍 Buscando: %s", nombre)
             
             # Buscar en Portal AFIP
             resultado_portal = None
@@ -128,7 +141,9 @@ class TransformadorInteligente:
                     'score_xubio': resultado_xubio.get('score', 0) if resultado_xubio else 0
                 }
                 clientes_existentes.append(cliente_info)
-                print(f"      ✅ Encontrado en {'Portal' if resultado_portal and resultado_portal['encontrado'] else 'Xubio'} (score: {max(resultado_portal.get('score', 0) if resultado_portal else 0, resultado_xubio.get('score', 0) if resultado_xubio else 0):.2f})")
+                origen = 'Portal' if resultado_portal and resultado_portal['encontrado'] else 'Xubio'
+                resumen.contar(f"existente_{origen.lower()}", ejemplo=nombre)
+                log_fila.info("      ✅ %s encontrado en %s (score: %.2f)", nombre, origen, max(cliente_info['score_portal'], cliente_info['score_xubio']))
             else:
                 # Cliente nuevo - crear con DNI falso para el procesador
                 dni_falso = f"{20000000 + idx:08d}"
@@ -145,8 +160,10 @@ class TransformadorInteligente:
                     'score_xubio': resultado_xubio.get('score', 0) if resultado_xubio else 0
                 }
                 clientes_nuevos.append(cliente_nuevo)
-                print(f"      🆕 CLIENTE NUEVO - No encontrado en maestros")
+                resumen.contar("nuevo", ejemplo=cliente_nuevo['nombre'])
+                log_fila.info("      🆕 CLIENTE NUEVO - %s no encontrado en maestros", cliente_nuevo['nombre'])
         
+        resumen.emitir()
         print(f"   ✅ Transformación completada: {len(clientes_nuevos)} nuevos, {len(clientes_existentes)} existentes, {len(errores)} errores")
         
         return pd.DataFrame(clientes_nuevos), clientes_existentes, errores
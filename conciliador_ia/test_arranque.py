@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test de servicios perezosos y benchmark de arranque en frío de la app
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.lazy_service import ServicioPerezoso
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+class ServicioCostoso:
+    construcciones = 0
+
+    def __init__(self, nombre: str = "servicio"):
+        ServicioCostoso.construcciones += 1
+        time.sleep(0.01)
+        self.nombre = nombre
+
+    def saludar(self) -> str:
+        return f"hola desde {self.nombre}"
+
+
+def test_servicio_perezoso_construye_en_primer_uso():
+    print("🧪 TESTING SERVICIO PEREZOSO")
+    ServicioCostoso.construcciones = 0
+    servicio = ServicioPerezoso(ServicioCostoso, "clientes")
+
+    assert not servicio.construido
+    assert ServicioCostoso.construcciones == 0
+
+    assert servicio.saludar() == "hola desde clientes"
+    assert servicio.nombre == "clientes"
+    assert servicio.construido
+    assert ServicioCostoso.construcciones == 1
+    assert servicio.obtener() is servicio.obtener()
+
+
+def test_servicio_perezoso_concurrente():
+    print("\n🧪 TESTING SERVICIO PEREZOSO CON 16 THREADS")
+    ServicioCostoso.construcciones = 0
+    servicio = ServicioPerezoso(ServicioCostoso)
+    instancias = []
+
+    def usar():
+        instancias.append(servicio.obtener())
+
+    threads = [threading.Thread(target=usar) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert ServicioCostoso.construcciones == 1
+    assert all(instancia is instancias[0] for instancia in instancias)
+
+
+def test_servicio_perezoso_atributo_inexistente():
+    print("\n🧪 TESTING ATRIBUTO INEXISTENTE")
+    servicio = ServicioPerezoso(ServicioCostoso)
+    try:
+        servicio.no_existe
+        assert False, "debería lanzar AttributeError"
+    except AttributeError:
+        pass
+
+
+def benchmark_arranque_app(repeticiones: int = 3):
+    """Mide tiempo de `import main` y RSS máximo en un proceso nuevo (arranque en frío)"""
+    print(f"\n⏱️ BENCHMARK ARRANQUE EN FRÍO ({repeticiones} repeticiones)")
+    codigo = (
+        "import json, resource, time\n"
+        "inicio = time.perf_counter()\n"
+        "import main\n"
+        "duracion = time.perf_counter() - inicio\n"
+        "rutas = sum(1 for r in main.app.routes if hasattr(r, 'methods'))\n"
+        "print(json.dumps({'duracion_s': duracion, 'rss_max_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+        "'routers': main.app.state.routers_loaded, 'rutas': rutas}))\n"
+    )
+    for i in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=DIRECTORIO, capture_output=True, text=True
+        )
+        if proceso.returncode != 0:
+            ultima_linea = (proceso.stderr.strip().splitlines() or ["?"])[-1]
+            print(f"   ⚠️ Benchmark omitido: {ultima_linea}")
+            return
+        medicion = json.loads(proceso.stdout.strip().splitlines()[-1])
+        print(
+            f"   #{i + 1}: {medicion['duracion_s']:.3f}s - RSS máx {medicion['rss_max_kb'] / 1024:.1f} MB - "
+            f"{medicion['routers']} routers, {medicion['rutas']} rutas"
+        )
+
+
+if __name__ == "__main__":
+    test_servicio_perezoso_construye_en_primer_uso()
+    test_servicio_perezoso_concurrente()
+    test_servicio_perezoso_atributo_inexistente()
+    benchmark_arranque_app()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test del emparejamiento óptimo uno a uno (contra fuerza bruta en casos chicos)
+y benchmark con 20k movimientos x 20k comprobantes y candidatos ralos
+"""
+
+import sys
+import os
+import time
+import random
+import itertools
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import asignacion
+from utils.asignacion import asignacion_optima, _hungaro_max
+
+
+def _fuerza_bruta(candidatos, filas: int, columnas: int) -> float:
+    """Mejor suma de scores probando todos los emparejamientos parciales"""
+    scores = {}
+    for f, c, s in candidatos:
+        scores[(f, c)] = max(s, scores.get((f, c), 0))
+    mejor = 0.0
+    for permutacion in itertools.permutations(range(columnas + filas), filas):
+        total = sum(scores.get((f, c), 0) for f, c in enumerate(permutacion) if c < columnas)
+        mejor = max(mejor, total)
+    return mejor
+
+
+def _casos_chicos(cantidad: int = 300, seed: int = 5):
+    rng = random.Random(seed)
+    for _ in range(cantidad):
+        filas, columnas = rng.randint(1, 5), rng.randint(1, 5)
+        candidatos = [
+            (f, c, round(rng.uniform(0.01, 1), 2))
+            for f in range(filas) for c in range(columnas) if rng.random() < 0.5
+        ]
+        yield candidatos, filas, columnas
+
+
+def _es_uno_a_uno(asignados) -> bool:
+    filas = [f for f, _, _ in asignados]
+    columnas = [c for _, c, _ in asignados]
+    return len(set(filas)) == len(filas) and len(set(columnas)) == len(columnas)
+
+
+def test_contra_fuerza_bruta():
+    print("🧪 TESTING ASIGNACIÓN ÓPTIMA CONTRA FUERZA BRUTA")
+    for candidatos, filas, columnas in _casos_chicos():
+        asignados = asignacion_optima(candidatos)
+        assert _es_uno_a_uno(asignados)
+        assert all((f, c, s) in candidatos for f, c, s in asignados)
+        assert abs(sum(s for _, _, s in asignados) - _fuerza_bruta(candidatos, filas, columnas)) < 1e-9
+
+
+def test_hungaro_sin_scipy_contra_fuerza_bruta():
+    print("\n🧪 TESTING HÚNGARO EN PYTHON PURO CONTRA FUERZA BRUTA")
+    for candidatos, filas, columnas in _casos_chicos(seed=9):
+        matriz = [[0.0] * columnas for _ in range(filas)]
+        for f, c, s in candidatos:
+            matriz[f][c] = s
+        pares = _hungaro_max(matriz)
+        total = sum(matriz[f][c] for f, c in pares)
+        assert len({f for f, _ in pares}) == len(pares) == len({c for _, c in pares})
+        assert abs(total - _fuerza_bruta(candidatos, filas, columnas)) < 1e-9
+
+
+def test_componente_grande_por_matriz_rala():
+    print("\n🧪 TESTING COMPONENTE GRANDE (MATRIZ RALA) == DENSA")
+    if not asignacion.SCIPY_AVAILABLE:
+        print("   scipy no disponible, se omite")
+        return
+    rng = random.Random(3)
+    candidatos = [(f, c, round(rng.uniform(0.01, 1), 3)) for f in range(60) for c in range(60) if rng.random() < 0.1]
+    denso = sum(s for _, _, s in asignacion_optima(candidatos))
+    limite = asignacion.MAX_CELDAS_DENSO
+    asignacion.MAX_CELDAS_DENSO = 0
+    try:
+        asignados = asignacion_optima(candidatos)
+    finally:
+        asignacion.MAX_CELDAS_DENSO = limite
+    assert _es_uno_a_uno(asignados)
+    assert abs(sum(s for _, _, s in asignados) - denso) < 1e-6
+
+
+def test_un_comprobante_no_se_asigna_dos_veces():
+    print("\n🧪 TESTING UN COMPROBANTE, DOS MOVIMIENTOS")
+    # El goloso por movimiento le daría el comprobante 0 a ambos
+    candidatos = [(0, 0, 0.9), (1, 0, 0.8), (1, 1, 0.75)]
+    assert asignacion_optima(candidatos) == [(0, 0, 0.9), (1, 1, 0.75)]
+    # Óptimo global, no goloso: 0.6 + 0.6 > 0.9
+    assert asignacion_optima([(0, 0, 0.9), (0, 1, 0.6), (1, 0, 0.6)]) == [(0, 1, 0.6), (1, 0, 0.6)]
+    assert asignacion_optima([(0, 0, 0.3)], score_minimo=0.5) == []
+
+
+def candidatos_ralos(n: int = 20_000, por_fila: int = 4, bloque: int = 8, seed: int = 1):
+    """
+    Candidatos como los de un extracto real: cada movimiento tiene su
+    comprobante y algunos de importe parecido (mismo bloque de importes)
+    """
+    rng = random.Random(seed)
+    permutacion = list(range(n))
+    rng.shuffle(permutacion)
+    candidatos = []
+    for f in range(n):
+        candidatos.append((f, permutacion[f], rng.uniform(0.8, 1.0)))
+        inicio = (f // bloque) * bloque
+        for otro in rng.sample(range(inicio, min(inicio + bloque, n)), min(por_fila - 1, bloque)):
+            candidatos.append((f, permutacion[otro], rng.uniform(0.3, 0.9)))
+    return candidatos
+
+
+def benchmark_20k(n: int = 20_000):
+    print(f"\n⏱️ BENCHMARK {n:,} x {n:,} CANDIDATOS RALOS (scipy: {asignacion.SCIPY_AVAILABLE})")
+    candidatos = candidatos_ralos(n)
+    inicio = time.perf_counter()
+    asignados = asignacion_optima(candidatos)
+    duracion = time.perf_counter() - inicio
+    assert _es_uno_a_uno(asignados)
+    print(f"   {len(candidatos):,} candidatos -> {len(asignados):,} pares en {duracion:.2f}s, "
+          f"score total {sum(s for _, _, s in asignados):,.1f}")
+
+
+if __name__ == "__main__":
+    test_contra_fuerza_bruta()
+    test_hungaro_sin_scipy_contra_fuerza_bruta()
+    test_componente_grande_por_matriz_rala()
+    test_un_comprobante_no_se_asigna_dos_veces()
+    benchmark_20k()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test del clasificador de tipo de archivo por firmas de columnas (una sola regex,
+veredicto cacheado por huella del encabezado) y benchmark contra las reglas
+de una firma por vez
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.clasificador_archivos import ClasificadorArchivos, huella_encabezado
+from utils.bancos import normalizar_texto
+
+COLUMNAS_POSIBLES = [
+    "Descripción", "Descipción", "Razón social", "Razon Social", "Provincia", "Localidad",
+    "Descripciã³n", "Razã³n social", "Unnamed: 0", "Unnamed: 1", "Unnamed: 2",
+    "Tipo Doc. Comprador", "Numero de Documento", "Denominación Comprador",
+    "CUIT", "Nombre", "RazonSocial", "Fecha", "Importe", "Alícuota", "Observaciones",
+]
+
+
+def tipos_por_reglas(columnas) -> list:
+    """Reglas anteriores (una firma por vez con `in`), sobre columnas sin tildes: referencia"""
+    columnas = [normalizar_texto(str(c)) for c in columnas]
+
+    def encontradas(patrones):
+        return sum(1 for p in patrones if any(p in c for c in columnas))
+
+    tipos = []
+    if (encontradas(["descripcion", "descipcion", "razon social", "provincia", "localidad"]) >= 3
+            or sum(1 for c in columnas if "unnamed" in c) >= 2
+            or encontradas(["descripcia3n", "raza3n social", "provincia", "localidad"]) >= 3
+            or encontradas(["tipo doc. comprador", "numero de documento", "denominacion comprador"]) >= 2):
+        tipos.append("ARCHIVO_IIBB")
+    if encontradas(["cuit", "nombre", "razonsocial"]) >= 2:
+        tipos.append("XUBIO_CLIENTES")
+    if encontradas(["tipo doc. comprador", "numero de documento", "denominacion comprador"]) >= 2:
+        tipos.append("PORTAL_AFIP")
+    return tipos
+
+
+def _encabezados(cantidad: int, rng: random.Random):
+    return [rng.sample(COLUMNAS_POSIBLES, rng.randint(1, 7)) for _ in range(cantidad)]
+
+
+def test_firmas_igual_a_reglas():
+    print("🧪 TESTING FIRMAS COMPILADAS == REGLAS UNA POR UNA")
+    clasificador = ClasificadorArchivos()
+    for columnas in _encabezados(3_000, random.Random(1)):
+        assert list(clasificador.clasificar(columnas).candidatos) == tipos_por_reglas(columnas), columnas
+
+    # Las columnas se comparan sin tildes ("Número" == "Numero")
+    clasificacion = clasificador.clasificar(["Tipo Doc. Comprador", "Número de Documento"])
+    assert clasificacion.candidatos == ("ARCHIVO_IIBB", "PORTAL_AFIP")
+    # Confianza parcial: 1 de los 2 patrones que pide Xubio
+    assert clasificador.clasificar(["CUIT", "Fecha"]).confianzas["XUBIO_CLIENTES"] == 0.5
+    # Un patrón partido entre dos columnas no cuenta
+    assert clasificador.clasificar(["cu", "it", "nombre"]).candidatos == ()
+
+
+def test_cache_por_huella():
+    print("\n🧪 TESTING CACHE POR HUELLA DEL ENCABEZADO")
+    clasificador = ClasificadorArchivos()
+    primera = clasificador.clasificar(["CUIT", "Nombre"])
+    assert clasificador.clasificar(["cuit", "NOMBRE"]) is primera
+    assert clasificador.clasificar(["Nombre", "CUIT"]) is not primera
+    assert huella_encabezado(["CUIT", "Nombre"]) != huella_encabezado(["CUITNombre"])
+    # Con un umbral más bajo alcanza con la mitad de la firma
+    assert ClasificadorArchivos(confianza_minima=0.5).clasificar(["CUIT", "Fecha"]).candidatos == ("XUBIO_CLIENTES",)
+
+
+class _IAFalsa:
+    """Cuenta las consultas y responde siempre lo mismo"""
+
+    def __init__(self, tipo="portal_afip", confianza=0.9):
+        self.consultas = 0
+        self.tipo, self.confianza = tipo, confianza
+
+    def validar_tipo_archivo(self, df):
+        self.consultas += 1
+        return {"tipo_archivo_detectado": self.tipo, "confianza": self.confianza}
+
+
+def test_ia_solo_sin_firma():
+    print("\n🧪 TESTING IA SOLO CUANDO NINGUNA FIRMA ALCANZA")
+    import pandas as pd
+    from services.transformador_archivos import TransformadorArchivos
+
+    transformador = TransformadorArchivos()
+    transformador.ia_processor = _IAFalsa()
+
+    iibb = pd.DataFrame({
+        "Descripción": ["Factura de venta B 00003-00000371", "Factura A 00003-00001818", "Otra"],
+        "Razón social": ["A", "B", "C"], "Provincia": ["X", "Y", "Z"],
+    })
+    assert transformador.detectar_tipo_archivo(iibb) == "ARCHIVO_IIBB"
+    # Columnas de IIBB sin facturas en el contenido: no es IIBB
+    sin_facturas = iibb.assign(**{"Descripción": ["Saldo", "Ajuste", "Otra"]})
+    assert transformador.detectar_tipo_archivo(pd.DataFrame({"CUIT": ["1"], "Nombre": ["A"]})) == "XUBIO_CLIENTES"
+    assert transformador.ia_processor.consultas == 0
+
+    # Sin firma: la IA decide, y una sola vez por encabezado
+    desconocido = pd.DataFrame({"Columna rara": [1, 2], "Otra": [3, 4]})
+    for _ in range(3):
+        assert transformador.detectar_tipo_archivo(desconocido) == "PORTAL_AFIP"
+    assert transformador.detectar_tipo_archivo(sin_facturas) == "PORTAL_AFIP"
+    assert transformador.ia_processor.consultas == 2
+
+    # IA con baja confianza: desconocido
+    transformador.ia_processor = _IAFalsa(confianza=0.3)
+    assert transformador.detectar_tipo_archivo(pd.DataFrame({"Sin": [1], "Firma": [2]})) == "DESCONOCIDO"
+
+
+def benchmark_encabezados(n: int = 20_000):
+    print(f"\n⏱️ BENCHMARK {n:,} ENCABEZADOS")
+    rng = random.Random(2)
+    distintos = _encabezados(n, rng)
+    # Lo habitual: pocos formatos de archivo que se repiten
+    repetidos = [rng.choice(distintos[:50]) for _ in range(n)]
+
+    inicio = time.perf_counter()
+    for columnas in distintos:
+        tipos_por_reglas(columnas)
+    reglas = time.perf_counter() - inicio
+
+    clasificador = ClasificadorArchivos()
+    inicio = time.perf_counter()
+    for columnas in distintos:
+        clasificador.confianzas(columnas)
+    firmas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for columnas in repetidos:
+        clasificador.clasificar(columnas)
+    cacheado = time.perf_counter() - inicio
+
+    print(f"   reglas una por una: {reglas / n * 1e6:.1f} µs/encabezado")
+    print(f"   regex de firmas:    {firmas / n * 1e6:.1f} µs/encabezado")
+    print(f"   con cache (50 formatos repetidos): {cacheado / n * 1e6:.1f} µs/encabezado")
+
+
+def benchmark_detectar_tipo(filas: int = 5_000, repeticiones: int = 50):
+    print(f"\n⏱️ BENCHMARK detectar_tipo_archivo ({filas:,} filas, {repeticiones} veces)")
+    import pandas as pd
+    from services.transformador_archivos import TransformadorArchivos
+
+    transformador = TransformadorArchivos()
+    if not transformador.ia_processor:
+        print("   ⚠️ Sin procesador de IA")
+        return
+    df = pd.DataFrame({
+        "Tipo Doc. Comprador": ["80"] * filas,
+        "Numero de Documento": ["20123456786"] * filas,
+        "Denominación Comprador": ["Cliente"] * filas,
+        "Número de comprobante": [f"B 00003-{i:08d}" for i in range(filas)],
+    })
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        transformador.ia_processor.validar_tipo_archivo(df)
+    ia = (time.perf_counter() - inicio) / repeticiones
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        transformador.detectar_tipo_archivo(df)
+    firmas = (time.perf_counter() - inicio) / repeticiones
+    print(f"   consultando primero a la IA: {ia * 1000:.2f} ms")
+    print(f"   firmas + cache: {firmas * 1000:.2f} ms ({ia / firmas:.0f}x)")
+
+
+if __name__ == "__main__":
+    test_firmas_igual_a_reglas()
+    test_cache_por_huella()
+    test_ia_solo_sin_firma()
+    benchmark_encabezados()
+    benchmark_detectar_tipo()
+
+    print("\n✅ Test completado!")
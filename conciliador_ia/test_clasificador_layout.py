@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark del clasificador de banco por huella de layout
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.clasificador_layout import (
+    ClasificadorLayout, construir_huella, huella_pdf, ejemplos_desde_patron_manager
+)
+from services.patron_manager import PatronManager
+
+PDF_EJEMPLO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Galicia 04.pdf")
+
+# Rasgos "de fábrica" de cada banco sintético
+LAYOUTS = {
+    "Banco Galicia": dict(ancho=595, alto=842, fuentes={"Arial", "Arial-Bold"}, productor="iText 5.5.13",
+                          encabezado=["Resumen de cuenta", "Banco Galicia", "Cuenta Corriente en Pesos"]),
+    "Santander": dict(ancho=612, alto=792, fuentes={"Helvetica", "SantanderText"}, productor="Crystal Reports",
+                      encabezado=["Santander", "Extracto de cuenta", "Caja de ahorro"]),
+    "Banco Macro": dict(ancho=595, alto=842, fuentes={"Calibri", "Calibri-Bold"}, productor="Microsoft Reporting Services",
+                        encabezado=["Macro", "Movimientos del período", "CBU"]),
+}
+
+
+def _huella_sintetica(banco: str, rng: random.Random):
+    layout = LAYOUTS[banco]
+    lineas = layout["encabezado"] + [f"Cliente {rng.randint(1, 10_000)}", f"CUIT 30-{rng.randint(10**7, 10**8 - 1)}-9"]
+    fuentes = set(layout["fuentes"])
+    if rng.random() < 0.3:
+        fuentes.add("Helvetica")
+    return construir_huella(
+        ancho=layout["ancho"] + rng.uniform(-1, 1),
+        alto=layout["alto"] + rng.uniform(-1, 1),
+        fuentes=fuentes,
+        productor=layout["productor"],
+        lineas=lineas,
+    )
+
+
+def _entrenado(rng: random.Random, por_banco: int = 5) -> ClasificadorLayout:
+    return ClasificadorLayout().entrenar(
+        (banco, _huella_sintetica(banco, rng)) for banco in LAYOUTS for _ in range(por_banco)
+    )
+
+
+def test_clasifica_layouts_conocidos():
+    print("🧪 TESTING CLASIFICACIÓN DE LAYOUTS CONOCIDOS")
+    rng = random.Random(1)
+    clasificador = _entrenado(rng)
+    for banco in LAYOUTS:
+        for _ in range(20):
+            prediccion = clasificador.predecir(_huella_sintetica(banco, rng))
+            assert prediccion.banco == banco, prediccion
+            assert prediccion.confianza >= 0.6, prediccion
+
+
+def test_layout_desconocido_baja_confianza():
+    print("\n🧪 TESTING LAYOUT DESCONOCIDO")
+    clasificador = _entrenado(random.Random(2))
+    desconocido = construir_huella(ancho=842, alto=595, fuentes={"Courier"}, productor="LibreOffice",
+                                   lineas=["Estado de cuenta", "Otra entidad"])
+    assert clasificador.predecir(desconocido).confianza < 0.2
+    # Misma hoja, fuente y generador que Galicia, pero otro banco: lejos del centroide
+    parecido = construir_huella(ancho=595, alto=842, fuentes={"Arial"}, productor="iText 7",
+                                lineas=["Banco Ciudad", "Resumen de cuenta"])
+    assert clasificador.predecir(parecido).confianza == 0.0
+    # Con un solo banco entrenado no hay segundo con el que comparar
+    rng = random.Random(2)
+    solo_galicia = ClasificadorLayout().entrenar(("Banco Galicia", _huella_sintetica("Banco Galicia", rng)) for _ in range(5))
+    assert solo_galicia.predecir(_huella_sintetica("Banco Galicia", rng)).confianza == 0.0
+    assert ClasificadorLayout(bancos_minimos=1).entrenar(
+        ("Banco Galicia", _huella_sintetica("Banco Galicia", rng)) for _ in range(5)
+    ).predecir(_huella_sintetica("Banco Galicia", rng)).confianza >= 0.6
+
+    assert ClasificadorLayout().predecir(desconocido).banco is None
+    assert clasificador.predecir({}).banco is None
+
+
+def test_huella_sin_datos_personales():
+    print("\n🧪 TESTING HUELLA SIN DATOS PERSONALES")
+    huella = construir_huella(ancho=595, alto=842, fuentes={"Arial"}, productor="iText 5.5.13",
+                              lineas=["CUIT 30-12345678-9 Juan Perez"])
+    texto = " ".join(huella)
+    assert "perez" not in texto and "12345678" not in texto
+    # Mismo productor con otra versión -> mismo rasgo
+    otra = construir_huella(ancho=595, alto=842, fuentes=set(), productor="iText 5.5.10")
+    assert "productor:itext" in huella and "productor:itext" in otra
+
+
+def test_entrena_desde_patron_manager():
+    print("\n🧪 TESTING ENTRENAMIENTO DESDE PatronManager")
+    rng = random.Random(3)
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            manager = PatronManager()
+            for banco in LAYOUTS:
+                banco_id = banco.lower().replace(" ", "_")
+                manager.guardar_banco(banco_id, {"nombre": banco})
+                for _ in range(3):
+                    assert manager.agregar_ejemplo(banco_id, {"banco": banco, "huella": _huella_sintetica(banco, rng)})
+            assert not manager.agregar_ejemplo("inexistente", {"huella": {}})
+
+            ejemplos = ejemplos_desde_patron_manager(manager)
+            assert len(ejemplos) == 9
+            clasificador = ClasificadorLayout().entrenar(ejemplos)
+            assert clasificador.predecir(_huella_sintetica("Santander", rng)).banco == "Santander"
+        finally:
+            os.chdir(directorio_original)
+
+
+def test_huella_pdf_real():
+    print("\n🧪 TESTING HUELLA DE UN PDF REAL")
+    huella = huella_pdf(PDF_EJEMPLO)
+    assert any(rasgo.startswith("pagina:") for rasgo in huella)
+    assert any(rasgo.startswith("token:") for rasgo in huella)
+
+
+def benchmark_clasificador(bancos: int = 50, consultas: int = 1_000):
+    print(f"\n⏱️ BENCHMARK CLASIFICADOR ({bancos} bancos, {consultas} consultas)")
+    rng = random.Random(42)
+    ejemplos = []
+    for b in range(bancos):
+        base = construir_huella(ancho=595, alto=842, fuentes={f"Fuente{b}", "Arial"}, productor=f"Generador {b}",
+                                lineas=[f"Banco {b} resumen de cuenta", f"sucursal {b}"])
+        ejemplos.extend((f"Banco {b}", base) for _ in range(5))
+    clasificador = ClasificadorLayout().entrenar(ejemplos)
+    huellas = [ejemplos[rng.randrange(len(ejemplos))][1] for _ in range(consultas)]
+
+    inicio = time.perf_counter()
+    for huella in huellas:
+        clasificador.predecir(huella)
+    t_prediccion = (time.perf_counter() - inicio) / consultas
+
+    inicio = time.perf_counter()
+    huella_pdf(PDF_EJEMPLO)
+    t_huella = time.perf_counter() - inicio
+
+    print(f"   Predicción: {t_prediccion * 1000:.3f} ms por documento")
+    print(f"   Huella de 'Galicia 04.pdf': {t_huella * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    test_clasifica_layouts_conocidos()
+    test_layout_desconocido_baja_confianza()
+    test_huella_sin_datos_personales()
+    test_entrena_desde_patron_manager()
+    test_huella_pdf_real()
+    benchmark_clasificador()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test de la conciliación incremental: un extracto que se solapa con el de la
+semana anterior solo manda a conciliar (y a la IA) los movimientos nuevos
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.registro_conciliaciones import RegistroConciliaciones, huellas_movimientos
+
+
+def test_registro_por_huella_y_empresa():
+    print("🧪 TESTING REGISTRO DE CONCILIACIONES")
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroConciliaciones(os.path.join(tmp, "registro.sqlite3"))
+        movimientos = [
+            (datetime(2024, 3, 1), 1500.0, "TRANSFERENCIA  Cliente Nación"),
+            (datetime(2024, 3, 1), -12.5, "COMISION"),
+            (datetime(2024, 3, 1), -12.5, "COMISION"),
+        ]
+        huellas = huellas_movimientos(movimientos)
+        # Dos comisiones idénticas del mismo día son dos movimientos distintos
+        assert len(set(huellas)) == 3
+        # El concepto se compara normalizado
+        assert huellas_movimientos([("2024-03-01", 1500, "transferencia cliente nacion")])[0] == huellas[0]
+
+        assert registro.registrar("empresa_a", [(huellas[0], "F-1, F-2"), (huellas[1], None)]) == 2
+        assert registro.registrar("empresa_a", [(huellas[0], "F-1, F-2")]) == 0
+        assert registro.huellas_conciliadas("empresa_a", huellas) == {huellas[0], huellas[1]}
+        assert registro.comprobantes_consumidos("empresa_a") == {"F-1", "F-2"}
+        # Otra empresa no ve lo de la primera
+        assert registro.huellas_conciliadas("empresa_b", huellas) == set()
+
+        registro.olvidar("empresa_a")
+        assert registro.huellas_conciliadas("empresa_a", huellas) == set()
+
+
+class _ConciliadorFalso:
+    """Concilia cada movimiento con el comprobante de igual monto y cuenta lo que recibe"""
+
+    def __init__(self):
+        self.recibidos = []
+        self.comprobantes = []
+
+    def conciliar_movimientos(self, df_movimientos, df_comprobantes, empresa_id=None):
+        self.recibidos.append(len(df_movimientos))
+        self.comprobantes.append(set(df_comprobantes["numero_comprobante"].astype(str)))
+        libres = df_comprobantes.to_dict("records")
+        items = []
+        for mov in df_movimientos.to_dict("records"):
+            comprobante = next((c for c in libres if abs(c["monto"] - mov["importe"]) < 0.01), None)
+            if comprobante:
+                libres.remove(comprobante)
+            items.append({
+                "fecha_movimiento": mov["fecha"].isoformat(),
+                "concepto_movimiento": mov["concepto"],
+                "monto_movimiento": mov["importe"],
+                "tipo_movimiento": mov["tipo"],
+                "numero_comprobante": comprobante["numero_comprobante"] if comprobante else None,
+                "cliente_comprobante": comprobante["cliente"] if comprobante else None,
+                "estado": "conciliado" if comprobante else "pendiente",
+            })
+        return items
+
+    def get_conciliacion_summary(self, items):
+        return {}
+
+
+class _ExtractorFalso:
+    def __init__(self, df):
+        self.df = df
+
+    def extract_from_pdf(self, pdf_path, contexto=None):
+        return self.df.copy()
+
+    def get_extraction_summary(self, df, header_info="", paginas_omitidas=None):
+        return {}
+
+
+class _RegistroRoto:
+    """Registro cuya base no se puede consultar"""
+
+    def huellas_conciliadas(self, empresa_id, huellas):
+        raise sqlite3.OperationalError("database is locked")
+
+    comprobantes_consumidos = registrar = huellas_conciliadas
+
+
+def _movimientos(pd, dias):
+    return pd.DataFrame([
+        {"fecha": f"2024-03-{dia:02d}", "concepto": f"TRANSFERENCIA CLIENTE {dia}", "importe": 1000.0 + dia, "tipo": "credito"}
+        for dia in dias
+    ])
+
+
+def test_segunda_corrida_solo_concilia_lo_nuevo():
+    print("\n🧪 TESTING SEGUNDA CORRIDA CON EXTRACTO SOLAPADO")
+    import pandas as pd
+    from services.matchmaker import MatchmakerService
+
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+        extracto = os.path.join(tmp, "extracto.pdf")
+        open(extracto, "wb").close()
+        comprobantes = os.path.join(tmp, "comprobantes.csv")
+        pd.DataFrame([
+            {"fecha": f"2024-03-{dia:02d}", "cliente": f"Cliente {dia}", "concepto": "Venta",
+             "monto": 1000.0 + dia, "numero_comprobante": f"F-{dia}"}
+            for dia in range(1, 15)
+        ]).to_csv(comprobantes, index=False)
+
+        registro = RegistroConciliaciones(os.path.join(tmp, "registro.sqlite3"))
+        conciliador = _ConciliadorFalso()
+
+        # Semana 1: días 1 a 7 y un movimiento del 20 que no tiene comprobante (queda pendiente)
+        semana_1 = _movimientos(pd, list(range(1, 8)) + [20])
+        servicio = MatchmakerService(_ExtractorFalso(semana_1), conciliador, registro)
+        respuesta = servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a")
+        assert respuesta.movimientos_omitidos == 0
+        assert conciliador.recibidos[-1] == 8
+
+        # Semana 2: se solapa con los días 5 a 7 y suma hasta el 14
+        semana_2 = _movimientos(pd, list(range(5, 15)) + [20])
+        servicio = MatchmakerService(_ExtractorFalso(semana_2), conciliador, registro)
+        respuesta = servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a")
+        assert respuesta.movimientos_omitidos == 3
+        # Solo los días 8 a 14 y el pendiente del 20 van a la IA
+        assert conciliador.recibidos[-1] == 8
+        assert "F-5" not in conciliador.comprobantes[-1]
+
+        # Sin empresa no hay registro: se concilia todo
+        respuesta = servicio.procesar_conciliacion(extracto, comprobantes)
+        assert respuesta.movimientos_omitidos == 0
+        assert conciliador.recibidos[-1] == len(semana_2)
+
+        # Reprocesar el mismo extracto: solo vuelve el pendiente
+        respuesta = servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a")
+        assert respuesta.movimientos_omitidos == 10
+        assert conciliador.recibidos[-1] == 1
+
+        # Corrida completa pedida (p. ej. tras corregir los comprobantes), sin registrar como en debug
+        respuesta = servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a",
+                                                   conciliar_todo=True, registrar=False)
+        assert respuesta.movimientos_omitidos == 0
+        assert conciliador.recibidos[-1] == len(semana_2)
+        assert servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a").movimientos_omitidos == 10
+
+        # Después de olvidar la empresa se concilia todo otra vez
+        registro.olvidar("empresa_a")
+        assert servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a").movimientos_omitidos == 0
+
+        # Registro que falla: no se cae la conciliación, se concilia todo
+        servicio = MatchmakerService(_ExtractorFalso(semana_2), conciliador, _RegistroRoto())
+        respuesta = servicio.procesar_conciliacion(extracto, comprobantes, empresa_id="empresa_a")
+        assert respuesta.movimientos_omitidos == 0
+        assert conciliador.recibidos[-1] == len(semana_2)
+
+
+def benchmark_consulta_registro(n: int = 50_000):
+    print(f"\n⏱️ BENCHMARK CONSULTA DE {n:,} HUELLAS")
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = RegistroConciliaciones(os.path.join(tmp, "registro.sqlite3"))
+        movimientos = [(datetime(2024, 1 + i % 12, 1 + i % 28), i * 1.5, f"MOV {i}") for i in range(n)]
+        huellas = huellas_movimientos(movimientos)
+        inicio = time.perf_counter()
+        registro.registrar("empresa_a", [(h, f"F-{i}") for i, h in enumerate(huellas[: n // 2])])
+        registrar = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        conciliadas = registro.huellas_conciliadas("empresa_a", huellas)
+        consulta = time.perf_counter() - inicio
+        assert len(conciliadas) == n // 2
+        print(f"   registrar {n // 2:,}: {registrar:.2f}s, consultar {n:,}: {consulta:.2f}s")
+
+
+if __name__ == "__main__":
+    test_registro_por_huella_y_empresa()
+    test_segunda_corrida_solo_concilia_lo_nuevo()
+    benchmark_consulta_registro()
+
+    print("\n✅ Test completado!")
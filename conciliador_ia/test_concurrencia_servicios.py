@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test de concurrencia de los servicios compartidos: una sola instancia de
+PDFExtractor / MatchmakerService atendiendo 16 extracciones en paralelo
+"""
+
+import sys
+import os
+import random
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.extractor import ContextoExtraccion, PDFExtractor, obtener_extractor
+
+BANCOS = ["BANCO GALICIA", "BANCO NACION", "BANCO SANTANDER", "BANCO MACRO"]
+HILOS = 16
+
+
+def generar_extracto(path: str, banco: str, etiqueta: str, lineas: int, seed: int):
+    """Extracto de una página con el banco en el header y una etiqueta propia en cada concepto"""
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((40, 40), f"{banco} - EXTRACTO DE CUENTA CORRIENTE", fontsize=9)
+    y = 60
+    for _ in range(lineas):
+        y += 16
+        fecha = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+        importe = f"{rng.randint(1, 999):,}.{rng.randint(0, 99):02d}"
+        page.insert_text((40, y), f"{fecha} PAGO {etiqueta} {importe} 1,000.00", fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def _documentos(tmp: str):
+    documentos = []
+    for i in range(HILOS):
+        path = os.path.join(tmp, f"extracto_{i}.pdf")
+        generar_extracto(path, BANCOS[i % len(BANCOS)], f"DOC{i:02d}", lineas=5 + i, seed=i)
+        documentos.append((path, BANCOS[i % len(BANCOS)], f"DOC{i:02d}", 5 + i))
+    return documentos
+
+
+def _en_paralelo(funcion, cantidad: int):
+    barrera = threading.Barrier(cantidad)
+    errores = []
+
+    def correr(indice: int):
+        try:
+            barrera.wait()
+            funcion(indice)
+        except Exception as e:
+            errores.append(e)
+
+    threads = [threading.Thread(target=correr, args=(i,)) for i in range(cantidad)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errores, errores
+
+
+def test_extractor_es_singleton_sin_estado():
+    print("🧪 TESTING EXTRACTOR ÚNICO Y SIN ESTADO POR DOCUMENTO")
+    assert obtener_extractor() is obtener_extractor()
+    assert not hasattr(PDFExtractor(), "movimientos")
+    assert not hasattr(PDFExtractor(), "header_info")
+
+
+def test_16_extracciones_en_paralelo():
+    print("\n🧪 TESTING 16 EXTRACCIONES EN PARALELO SOBRE UNA INSTANCIA")
+    extractor = PDFExtractor(max_workers=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        documentos = _documentos(tmp)
+        resultados = {}
+
+        def extraer(indice: int):
+            path = documentos[indice][0]
+            contexto = ContextoExtraccion(pdf_path=path)
+            df = extractor.extract_from_pdf(path, contexto)
+            resultados[indice] = (df, contexto)
+
+        _en_paralelo(extraer, HILOS)
+
+    assert len(resultados) == HILOS
+    for indice, (df, contexto) in resultados.items():
+        _, banco, etiqueta, lineas = documentos[indice]
+        assert len(df) == lineas
+        # "FECHA PAGO DOCnn IMPORTE SALDO" cae en el patrón de 4 grupos, que lee
+        # la etiqueta como origen: se busca en concepto + origen
+        assert (df["concepto"] + " " + df["origen"]).str.contains(etiqueta).all()
+        assert banco in contexto.header_info
+        assert len(contexto.movimientos) == lineas
+
+
+def test_matchmaker_compartido_no_mezcla_extractos():
+    print("\n🧪 TESTING MATCHMAKER COMPARTIDO NO MEZCLA EXTRACTOS")
+    from services.matchmaker import ContextoConciliacion, MatchmakerService
+
+    # La conciliación con IA (ni el registro de lo conciliado) no se usa en la etapa de extracción
+    matchmaker = MatchmakerService(extractor=PDFExtractor(max_workers=1), conciliador=object(), registro=False)
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+        documentos = _documentos(tmp)
+        contextos = {}
+
+        def extraer(indice: int):
+            contexto = ContextoConciliacion(empresa_id=f"empresa_{indice}")
+            matchmaker._extraer_datos_extracto(documentos[indice][0], contexto)
+            contextos[indice] = contexto
+
+        _en_paralelo(extraer, HILOS)
+
+    for indice, contexto in contextos.items():
+        _, banco, _, lineas = documentos[indice]
+        assert contexto.extracto.pdf_path == documentos[indice][0]
+        assert banco in contexto.extracto.header_info
+        assert contexto.extracto_info["total_movimientos"] == lineas
+    assert not hasattr(matchmaker, "extracto_info")
+
+
+if __name__ == "__main__":
+    test_extractor_es_singleton_sin_estado()
+    test_16_extracciones_en_paralelo()
+    test_matchmaker_compartido_no_mezcla_extractos()
+
+    print("\n✅ Test completado!")
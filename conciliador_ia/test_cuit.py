@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test del dígito verificador de CUIT (escalar y vectorizado), las
+sugerencias de reparación y los CUITs de relleno; benchmark con 1M de CUITs
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import cuit as modulo_cuit
+from utils.cuit import (
+    cuit_de_dni, cuit_placeholder, digito_verificador, es_cuit_valido, formatear_cuit,
+    sugerir_reparaciones, validar_cuits,
+)
+
+
+def _cuits_al_azar(cantidad: int, rng: random.Random):
+    """Mitad válidos, mitad con un dígito cambiado, algunos con otro largo o formato"""
+    cuits = []
+    for _ in range(cantidad):
+        cuit = cuit_de_dni(rng.randint(1_000_000, 99_999_999), rng.choice(["20", "27", "30", "33"]))
+        sorteo = rng.random()
+        if sorteo < 0.4:
+            posicion = rng.randrange(11)
+            cuit = cuit[:posicion] + str((int(cuit[posicion]) + rng.randint(1, 9)) % 10) + cuit[posicion + 1:]
+        elif sorteo < 0.5:
+            cuit = cuit[:rng.randint(7, 10)]
+        elif sorteo < 0.6:
+            cuit = formatear_cuit(cuit)
+        cuits.append(cuit)
+    return cuits
+
+
+def test_digito_verificador():
+    print("🧪 TESTING DÍGITO VERIFICADOR")
+    assert digito_verificador("2012345678") == 6
+    assert es_cuit_valido("20-12345678-6")
+    assert es_cuit_valido(20123456786)
+    assert es_cuit_valido("20123456786.0")
+    assert not es_cuit_valido("20123456789")
+    # Dígito correcto pero prefijo inexistente
+    assert not es_cuit_valido("1" + "0123456786")
+    assert not es_cuit_valido(None)
+    assert not es_cuit_valido(float("nan"))
+    # Verificador 10: AFIP pasa el número a prefijo 23
+    dni = next(d for d in range(10_000_000, 10_000_100) if digito_verificador(f"20{d}") == 10)
+    assert cuit_de_dni(dni).startswith("23") and es_cuit_valido(cuit_de_dni(dni))
+
+
+def test_vectorizado_igual_a_escalar():
+    print("\n🧪 TESTING VALIDACIÓN VECTORIZADA == ESCALAR")
+    cuits = _cuits_al_azar(5_000, random.Random(1)) + ["", None, "abc", "2012345678901"]
+    esperado = [es_cuit_valido(c) for c in cuits]
+    assert list(validar_cuits(cuits)) == esperado
+    if modulo_cuit.NUMPY_AVAILABLE:
+        digitos, largo_ok = modulo_cuit.cuits_a_digitos(cuits)
+        assert list(validar_cuits(digitos[largo_ok])) == [e for e, ok in zip(esperado, largo_ok) if ok]
+
+
+def test_sugerencias_de_reparacion():
+    print("\n🧪 TESTING SUGERENCIAS DE REPARACIÓN")
+    # Dos dígitos transpuestos
+    assert "20123456786" in sugerir_reparaciones("20123457686")
+    # Falta el dígito verificador
+    assert sugerir_reparaciones("2012345678") == ["20123456786"]
+    # Un DNI: falta el prefijo, varias opciones en orden fijo
+    assert sugerir_reparaciones("12.345.678") == ["20123456786", "27123456780", "23123456785", "24123456781"]
+    assert sugerir_reparaciones("20-12345678-6") == sugerir_reparaciones(20123456786.0) == ["20123456786"]
+    # Con otro dígito mal, el verificador recalculado da el CUIT válido de otra persona
+    assert sugerir_reparaciones("20123956786") == ["20123956789"]
+    assert sugerir_reparaciones("123") == []
+    # Todas las sugerencias son válidas y deterministas
+    rng = random.Random(2)
+    for cuit in _cuits_al_azar(2_000, rng):
+        sugerencias = sugerir_reparaciones(cuit)
+        assert all(es_cuit_valido(s) for s in sugerencias)
+        assert sugerencias == sugerir_reparaciones(cuit)
+
+
+def test_placeholders_deterministas():
+    print("\n🧪 TESTING CUITS DE RELLENO")
+    placeholders = [cuit_placeholder(f"B 00003-{i:08d}") for i in range(2_000)]
+    assert all(es_cuit_valido(c) for c in placeholders)
+    assert placeholders == [cuit_placeholder(f"B 00003-{i:08d}") for i in range(2_000)]
+    assert len(set(placeholders)) > 1_990
+    assert cuit_placeholder("x", prefijo="30").startswith("30")
+
+
+def test_validador_contable():
+    print("\n🧪 TESTING ContabilidadValidator")
+    from utils.validators import ContabilidadValidator
+
+    validador = ContabilidadValidator()
+    assert validador.validar_cuit("20-12345678-6") == "20123456786"
+    # Ninguna reparación se aplica sola: queda como vino; sin verificador, dummy
+    assert validador.validar_cuit("20123457686") == "20123457686"
+    assert validador.validar_cuit("20123956786") == "20123956786"
+    assert validador.validar_cuit("2012345678") == validador.generar_cuit_dummy("2012345678")
+    # Sin base, el dummy ya no es al azar
+    assert validador.generar_cuit_dummy("123") == validador.generar_cuit_dummy("123")
+    assert len(validador.generar_cuit_dummy("")) == 8
+
+
+def benchmark_1m():
+    print(f"\n⏱️ BENCHMARK 1.000.000 DE CUITS (numpy: {modulo_cuit.NUMPY_AVAILABLE})")
+    rng = random.Random(3)
+    base = _cuits_al_azar(10_000, rng)
+    cuits = base * 100
+
+    if modulo_cuit.NUMPY_AVAILABLE:
+        digitos, largo_ok = modulo_cuit.cuits_a_digitos(cuits)
+        inicio = time.perf_counter()
+        validos = validar_cuits(digitos)
+        duracion = time.perf_counter() - inicio
+        print(f"   matriz de dígitos: {duracion * 1000:.1f} ms ({len(cuits) / duracion / 1e6:.1f}M CUITs/s), "
+              f"{int((validos & largo_ok).sum()):,} válidos")
+
+    inicio = time.perf_counter()
+    validos = validar_cuits(cuits)
+    duracion = time.perf_counter() - inicio
+    print(f"   desde texto (limpieza incluida): {duracion:.2f}s ({len(cuits) / duracion / 1e6:.2f}M CUITs/s), "
+          f"{sum(validos):,} válidos")
+
+
+if __name__ == "__main__":
+    test_digito_verificador()
+    test_vectorizado_igual_a_escalar()
+    test_sugerencias_de_reparacion()
+    test_placeholders_deterministas()
+    test_validador_contable()
+    benchmark_1m()
+
+    print("\n✅ Test completado!")
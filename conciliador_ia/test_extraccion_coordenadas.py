@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark del motor de extracción por coordenadas de palabras contra
+el motor regex, sobre extractos sintéticos de varias columnas
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.extractor_coordenadas import ExtractorCoordenadas
+
+# Bordes derechos de las columnas de montos del extracto sintético
+X_DEBITO, X_CREDITO, X_SALDO = 380, 470, 560
+
+
+def _palabra(texto: str, top: float, x0: float = None, x1: float = None):
+    ancho = 5 * len(texto)
+    if x0 is None:
+        x0 = x1 - ancho
+    return {"text": texto, "x0": x0, "x1": x0 + ancho, "top": top, "bottom": top + 8}
+
+
+def _fila_palabras(top, fecha, concepto, debito="", credito="", saldo=""):
+    palabras = [_palabra(fecha, top, x0=40)] if fecha else []
+    x = 100
+    for parte in concepto.split():
+        palabras.append(_palabra(parte, top + 0.4, x0=x))
+        x += 5 * len(parte) + 4
+    for texto, borde in ((debito, X_DEBITO), (credito, X_CREDITO), (saldo, X_SALDO)):
+        if texto:
+            palabras.append(_palabra(texto, top, x1=borde))
+    return palabras
+
+
+def _pagina_palabras():
+    # Títulos alineados como las columnas
+    palabras = [_palabra("Fecha", 20, x0=40), _palabra("Concepto", 20, x0=100),
+                _palabra("Débito", 20, x1=X_DEBITO), _palabra("Crédito", 20, x1=X_CREDITO), _palabra("Saldo", 20, x1=X_SALDO)]
+    palabras += _fila_palabras(40, "01/03/2024", "TRANSFERENCIA RECIBIDA", credito="1.500,00", saldo="11.500,00")
+    palabras += _fila_palabras(58, "02/03/2024", "PAGO PROVEEDOR", debito="300,25", saldo="11.199,75")
+    palabras += _fila_palabras(70, "", "FACTURA A 0001-00001234")
+    palabras += _fila_palabras(88, "03/03/2024", "COMISION", debito="10,00", saldo="11.189,75")
+    palabras += _fila_palabras(106, "04/03/2024", "DEPOSITO", credito="200,00", saldo="11.389,75")
+    palabras += _fila_palabras(124, "", "TOTAL DEL PERIODO", debito="310,25", credito="1.700,00")
+    return palabras
+
+
+def test_modelo_de_columnas_con_titulos():
+    print("🧪 TESTING MODELO DE COLUMNAS (CON TÍTULOS)")
+    modelo = ExtractorCoordenadas().aprender_modelo([_pagina_palabras()])
+    assert [c.rol for c in modelo.montos] == ["debito", "credito", "saldo"]
+    assert modelo.separador_decimal == ","
+
+
+def test_modelo_sin_titulos_por_posicion():
+    print("\n🧪 TESTING MODELO DE COLUMNAS (SIN TÍTULOS)")
+    palabras = [p for p in _pagina_palabras() if p["top"] != 20]
+    modelo = ExtractorCoordenadas().aprender_modelo([palabras])
+    assert [c.rol for c in modelo.montos] == ["debito", "credito", "saldo"]
+
+
+def test_celdas_vacias_no_corren_montos():
+    print("\n🧪 TESTING CELDAS VACÍAS NO CORREN LOS MONTOS")
+    motor = ExtractorCoordenadas()
+    palabras = _pagina_palabras()
+    modelo = motor.aprender_modelo([palabras])
+    filas = list(motor.filas(palabras, modelo))
+    assert len(filas) == 4
+    assert filas[0].montos == {"credito": 1500.0, "saldo": 11500.0}
+    assert filas[1].montos == {"debito": 300.25, "saldo": 11199.75}
+    # Descripción de dos líneas
+    assert filas[1].descripcion == "PAGO PROVEEDOR FACTURA A 0001-00001234"
+    assert filas[2].descripcion == "COMISION"
+
+
+def test_documento_sin_tabla():
+    print("\n🧪 TESTING DOCUMENTO SIN FORMA DE TABLA")
+    palabras = [_palabra(t, 20 * i, x0=40) for i, t in enumerate(["Resumen", "de", "cuenta"])]
+    assert ExtractorCoordenadas().aprender_modelo([palabras]) is None
+
+
+class _PaginaPalabras:
+    def __init__(self, palabras):
+        self.palabras = palabras
+
+    def extract_words(self):
+        return self.palabras
+
+
+class _PdfPalabras:
+    def __init__(self, *paginas):
+        self.pages = [_PaginaPalabras(p) for p in paginas]
+
+
+def test_compras_solo_debitos():
+    print("\n🧪 TESTING COMPRAS POR COORDENADAS (SOLO SALIDAS)")
+    from routers.compras import extraer_compras_por_coordenadas
+
+    # "TRANSFERENCIA RECIBIDA" es un crédito: no es una compra aunque diga transferencia
+    compras = extraer_compras_por_coordenadas(_PdfPalabras(_pagina_palabras()))
+    assert [(c["concepto"], c["monto"]) for c in compras] == [("PAGO PROVEEDOR FACTURA A 0001-00001234", 300.25)]
+
+
+def generar_pdf_multicolumna(path: str, paginas: int = 20, filas: int = 35, seed: int = 11):
+    """
+    Extracto sintético con columnas Fecha | Concepto | Débito | Crédito | Saldo,
+    montos alineados a la derecha y algunas descripciones en dos líneas.
+    Devuelve los movimientos esperados (fecha, importe, tipo).
+    """
+    import fitz
+
+    rng = random.Random(seed)
+    conceptos = ["TRANSFERENCIA RECIBIDA", "PAGO PROVEEDOR", "DEBITO AUTOMATICO", "DEPOSITO EFECTIVO", "COMISION MANTENIMIENTO"]
+    doc = fitz.open()
+    esperados = []
+    saldo = 100_000.0
+
+    def derecha(page, texto, x_borde, y):
+        page.insert_text((x_borde - fitz.get_text_length(texto, fontsize=8), y), texto, fontsize=8)
+
+    def formato(valor):
+        return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+    for _ in range(paginas):
+        page = doc.new_page()
+        y = 50
+        page.insert_text((40, y), "Fecha", fontsize=8)
+        page.insert_text((100, y), "Concepto", fontsize=8)
+        derecha(page, "Débito", X_DEBITO, y)
+        derecha(page, "Crédito", X_CREDITO, y)
+        derecha(page, "Saldo", X_SALDO, y)
+        for _ in range(filas):
+            y += 18
+            fecha = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+            importe = round(rng.uniform(1, 99_999), 2)
+            es_debito = rng.random() < 0.5
+            saldo += -importe if es_debito else importe
+            page.insert_text((40, y), fecha, fontsize=8)
+            page.insert_text((100, y), rng.choice(conceptos), fontsize=8)
+            derecha(page, formato(importe), X_DEBITO if es_debito else X_CREDITO, y)
+            derecha(page, formato(saldo), X_SALDO, y)
+            if rng.random() < 0.2:
+                y += 10
+                page.insert_text((100, y), f"REF {rng.randint(10**6, 10**7)}", fontsize=8)
+            esperados.append((fecha, importe, "débito" if es_debito else "crédito"))
+    doc.save(path)
+    doc.close()
+    return esperados
+
+
+def _precision(movimientos, esperados) -> float:
+    obtenidos = {(m["fecha"].strftime("%d/%m/%Y"), round(m["importe"], 2), m["tipo"]) for m in movimientos}
+    return sum(1 for e in esperados if e in obtenidos) / len(esperados)
+
+
+def test_coordenadas_sobre_pdf_multicolumna():
+    print("\n🧪 TESTING COORDENADAS SOBRE PDF MULTICOLUMNA")
+    from services.extractor import PDFExtractor
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        esperados = generar_pdf_multicolumna(tmp.name, paginas=3)
+        movimientos = list(PDFExtractor(motor="coordenadas").iter_movimientos(tmp.name))
+    assert len(movimientos) == len(esperados)
+    assert _precision(movimientos, esperados) == 1.0
+
+
+def benchmark_motores(paginas: int = 100):
+    print(f"\n⏱️ BENCHMARK MOTORES ({paginas} páginas multicolumna)")
+    from services.extractor import PDFExtractor
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        esperados = generar_pdf_multicolumna(tmp.name, paginas=paginas)
+        for motor in ("regex", "coordenadas"):
+            extractor = PDFExtractor(motor=motor, max_workers=1)
+            inicio = time.perf_counter()
+            movimientos = list(extractor.iter_movimientos(tmp.name))
+            duracion = time.perf_counter() - inicio
+            print(f"   {motor:<12} {paginas / duracion:7.1f} páginas/s, "
+                  f"{len(movimientos)} movimientos, precisión {_precision(movimientos, esperados):.1%}")
+
+
+if __name__ == "__main__":
+    test_modelo_de_columnas_con_titulos()
+    test_modelo_sin_titulos_por_posicion()
+    test_celdas_vacias_no_corren_montos()
+    test_documento_sin_tabla()
+    test_compras_solo_debitos()
+    test_coordenadas_sobre_pdf_multicolumna()
+    benchmark_motores()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark de la extracción de PDF repartida por páginas entre procesos
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.extractor import PDFExtractor, _rangos_paginas
+
+
+def generar_pdf_sintetico(path: str, paginas: int = 300, lineas_por_pagina: int = 40, seed: int = 42) -> int:
+    """Genera con PyMuPDF un extracto sintético; devuelve la cantidad de movimientos escritos"""
+    import fitz
+
+    random.seed(seed)
+    conceptos = ["TRANSFERENCIA RECIBIDA", "PAGO PROVEEDOR", "DEBITO AUTOMATICO", "DEPOSITO EFECTIVO", "COMISION MANTENIMIENTO"]
+    doc = fitz.open()
+    movimientos = 0
+    for numero in range(paginas):
+        page = doc.new_page()
+        y = 50
+        page.insert_text((40, y), f"BANCO SINTETICO - EXTRACTO DE CUENTA - Hoja {numero + 1}", fontsize=9)
+        for _ in range(lineas_por_pagina):
+            y += 18
+            fecha = f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2024"
+            importe = f"{random.randint(1, 999):,}.{random.randint(0, 99):02d}"
+            saldo = f"{random.randint(1000, 999999):,}.{random.randint(0, 99):02d}"
+            page.insert_text((40, y), f"{fecha} {random.choice(conceptos)} {importe} {saldo}", fontsize=8)
+            movimientos += 1
+    doc.save(path)
+    doc.close()
+    return movimientos
+
+
+def test_rangos_paginas():
+    print("🧪 TESTING RANGOS DE PÁGINAS")
+    assert _rangos_paginas(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert _rangos_paginas(2, 8) == [(0, 1), (1, 2)]
+    rangos = _rangos_paginas(300, 8)
+    assert rangos[0][0] == 0 and rangos[-1][1] == 300
+    assert all(fin == siguiente for (_, fin), (siguiente, _) in zip(rangos, rangos[1:]))
+
+
+def test_paralelo_igual_a_serial():
+    print("\n🧪 TESTING PARALELO == SERIAL (mismo orden de páginas)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extracto_60.pdf")
+        generar_pdf_sintetico(path, paginas=60, lineas_por_pagina=10)
+
+        df_serial = PDFExtractor(max_workers=1).extract_from_pdf(path)
+        df_paralelo = PDFExtractor(paginas_minimas_paralelo=20, max_workers=3).extract_from_pdf(path)
+
+        assert len(df_serial) > 0
+        assert df_paralelo.to_dict("records") == df_serial.to_dict("records")
+        assert df_paralelo["pagina"].is_monotonic_increasing
+
+
+def test_umbral_mantiene_serial():
+    print("\n🧪 TESTING UMBRAL DE PÁGINAS (debajo queda serial)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extracto_5.pdf")
+        generar_pdf_sintetico(path, paginas=5, lineas_por_pagina=5)
+
+        extractor = PDFExtractor(paginas_minimas_paralelo=50, max_workers=4)
+        llamadas = []
+        extractor._iter_paginas_en_paralelo = lambda *args: llamadas.append(args) or iter(())
+        df = extractor.extract_from_pdf(path)
+
+        assert llamadas == []
+        assert len(df) > 0
+
+
+def benchmark_extraccion_paralela(paginas: int = 300):
+    print(f"\n⏱️ BENCHMARK EXTRACCIÓN ({paginas} páginas sintéticas)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"extracto_{paginas}.pdf")
+        escritos = generar_pdf_sintetico(path, paginas=paginas)
+
+        inicio = time.perf_counter()
+        df_serial = PDFExtractor(max_workers=1).extract_from_pdf(path)
+        t_serial = time.perf_counter() - inicio
+
+        workers = min(4, os.cpu_count() or 1)
+        inicio = time.perf_counter()
+        df_paralelo = PDFExtractor(paginas_minimas_paralelo=1, max_workers=workers).extract_from_pdf(path)
+        t_paralelo = time.perf_counter() - inicio
+
+        assert df_paralelo.to_dict("records") == df_serial.to_dict("records")
+        print(f"   Movimientos: {len(df_serial)}/{escritos}")
+        print(f"   Serial:            {t_serial:.2f}s")
+        print(f"   Paralelo ({workers} proc): {t_paralelo:.2f}s ({t_serial / t_paralelo:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_rangos_paginas()
+    test_paralelo_igual_a_serial()
+    test_umbral_mantiene_serial()
+    benchmark_extraccion_paralela()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test de la API de extracción en streaming (iter_movimientos / to_frames)
+"""
+
+import sys
+import os
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.extractor import PDFExtractor
+from test_extraccion_paralela import generar_pdf_sintetico
+import pandas as pd
+
+
+def test_iter_movimientos_igual_a_extract_from_pdf():
+    print("🧪 TESTING iter_movimientos == extract_from_pdf")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extracto.pdf")
+        generar_pdf_sintetico(path, paginas=8, lineas_por_pagina=12)
+
+        extractor = PDFExtractor(max_workers=1)
+        generados = list(extractor.iter_movimientos(path))
+        assert not hasattr(extractor, "movimientos")
+
+        df = extractor.extract_from_pdf(path)
+        assert df.to_dict("records") == pd.DataFrame(generados).to_dict("records")
+        assert [m["pagina"] for m in generados] == sorted(m["pagina"] for m in generados)
+
+        # La instancia es reutilizable: una segunda extracción no acumula
+        df_otra = extractor.extract_from_pdf(path)
+        assert len(df_otra) == len(df)
+
+
+def test_to_frames_por_lotes():
+    print("\n🧪 TESTING to_frames(chunk_size)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extracto.pdf")
+        generar_pdf_sintetico(path, paginas=5, lineas_por_pagina=10)
+
+        extractor = PDFExtractor(max_workers=1)
+        total = len(list(extractor.iter_movimientos(path)))
+        frames = list(extractor.to_frames(path, chunk_size=7))
+
+        assert sum(len(f) for f in frames) == total
+        assert all(len(f) == 7 for f in frames[:-1])
+        assert 0 < len(frames[-1]) <= 7
+
+
+def test_instancia_compartida_entre_threads():
+    print("\n🧪 TESTING MISMA INSTANCIA EN 8 THREADS")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(4):
+            path = os.path.join(tmp, f"extracto_{i}.pdf")
+            generar_pdf_sintetico(path, paginas=3, lineas_por_pagina=5 + i, seed=i)
+            paths.append(path)
+
+        extractor = PDFExtractor(max_workers=1)
+        esperado = {path: list(extractor.iter_movimientos(path)) for path in paths}
+        resultados = {}
+
+        def extraer(indice: int):
+            path = paths[indice % len(paths)]
+            resultados[indice] = (path, list(extractor.iter_movimientos(path)))
+
+        threads = [threading.Thread(target=extraer, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(resultados) == 8
+        for path, movimientos in resultados.values():
+            assert movimientos == esperado[path]
+
+
+if __name__ == "__main__":
+    test_iter_movimientos_igual_a_extract_from_pdf()
+    test_to_frames_por_lotes()
+    test_instancia_compartida_entre_threads()
+
+    print("\n✅ Test completado!")
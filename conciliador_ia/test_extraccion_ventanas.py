@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test de la extracción con IA por ventanas de páginas (sin llamar a la IA:
+el extractor de cada ventana es un parser de líneas que imita su respuesta)
+"""
+
+import sys
+import os
+import re
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.extractor_inteligente import (
+    ExtractorInteligente, dividir_en_ventanas, unir_movimientos_ventanas, clave_movimiento
+)
+
+# Los métodos usados no tocan el cliente OpenAI; se evita __init__
+_extractor = ExtractorInteligente.__new__(ExtractorInteligente)
+
+PATRON_LINEA = re.compile(r'^(\d{4}-\d{2}-\d{2}) (.+) (-?\d+\.\d{2})$')
+
+
+def generar_paginas(paginas: int = 30, por_pagina: int = 40):
+    texto_paginas = []
+    for p in range(paginas):
+        lineas = [f"Banco Ejemplo - Página {p + 1}"]
+        for i in range(por_pagina):
+            dia = (p * por_pagina + i) % 28 + 1
+            lineas.append(f"2024-03-{dia:02d} Transferencia {p}-{i} {p * 1000 + i}.50")
+        texto_paginas.append("\n".join(lineas))
+    texto_paginas[0] = f"Movimientos ({paginas * por_pagina})\n" + texto_paginas[0]
+    return texto_paginas
+
+
+def extractor_de_lineas(texto: str, banco: str, demora: float = 0.0):
+    """Hace de IA: devuelve los movimientos de las líneas completas del texto"""
+    if demora:
+        time.sleep(demora)
+    movimientos = []
+    for linea in texto.split("\n"):
+        m = PATRON_LINEA.match(linea)
+        if m:
+            movimientos.append({"fecha": m.group(1), "descripcion": m.group(2), "importe": float(m.group(3))})
+    cantidad = re.search(r'Movimientos \((\d+)\)', texto)
+    return {
+        "banco": banco,
+        "metodo": "ia_mejorada",
+        "movimientos": movimientos,
+        "total_movimientos": len(movimientos),
+        "precision_estimada": 0.95,
+        "resumen_detectado": {"cantidad_movimientos_indicada": int(cantidad.group(1))} if cantidad else {},
+    }
+
+
+def test_ventanas_respetan_presupuesto():
+    print("🧪 TESTING VENTANAS DENTRO DEL PRESUPUESTO")
+    paginas = generar_paginas()
+    ventanas = dividir_en_ventanas(paginas, 4000, 300)
+    assert len(ventanas) > 1
+    assert all(len(v) <= 4000 for v in ventanas)
+    # Ninguna línea se pierde
+    texto_ventanas = "".join(ventanas)
+    for pagina in paginas:
+        for linea in pagina.split("\n"):
+            assert linea in texto_ventanas
+
+
+def test_pagina_mas_grande_que_el_presupuesto():
+    print("\n🧪 TESTING PÁGINA MÁS GRANDE QUE EL PRESUPUESTO")
+    pagina = generar_paginas(paginas=1, por_pagina=200)[0]
+    ventanas = dividir_en_ventanas([pagina], 1500, 100)
+    assert all(len(v) <= 1500 for v in ventanas)
+    assert sum(len(extractor_de_lineas(v, "X")["movimientos"]) for v in ventanas) >= 200
+
+
+def test_union_sin_repetidos_del_solapamiento():
+    print("\n🧪 TESTING UNIÓN SIN REPETIDOS DEL SOLAPAMIENTO")
+    a = {"fecha": "2024-03-01", "descripcion": "Comisión", "importe": 10.0}
+    b = {"fecha": "2024-03-02", "descripcion": "Transferencia", "importe": 500.0}
+    c = {"fecha": "2024-03-03", "descripcion": "Pago", "importe": -20.0}
+    # Dos comisiones iguales en la misma ventana se conservan; b se repite en el solapamiento
+    unidos = unir_movimientos_ventanas([[a, a, b], [dict(b, descripcion="  transferencia "), c]])
+    assert unidos == [a, a, b, c]
+    assert clave_movimiento(b) == clave_movimiento({"fecha": "2024-03-02", "descripcion": "TRANSFERENCIA", "importe": "500"})
+
+
+def test_extraccion_por_ventanas_completa():
+    print("\n🧪 TESTING EXTRACCIÓN POR VENTANAS == TODOS LOS MOVIMIENTOS")
+    paginas = generar_paginas()
+    resultado = _extractor._extraer_por_ventanas(paginas, "Banco Ejemplo", extractor_de_lineas, 4000)
+    assert resultado["debug_info"]["ventanas"] > 1
+    assert resultado["debug_info"]["repetidos_en_solapamiento"] > 0
+    assert resultado["total_movimientos"] == 30 * 40
+    assert len({clave_movimiento(m) for m in resultado["movimientos"]}) == 30 * 40
+    assert resultado["resumen_detectado"]["cantidad_movimientos_indicada"] == 30 * 40
+    assert _extractor._validar_resultado_con_totales(resultado)
+
+    # Con el recorte anterior (una sola ventana) no alcanza el total indicado
+    truncado = extractor_de_lineas("".join(p + "\n" for p in paginas)[:12000], "Banco Ejemplo")
+    assert not _extractor._validar_resultado_con_totales(truncado)
+
+
+def test_ventana_fallida_se_reintenta():
+    print("\n🧪 TESTING VENTANA FALLIDA SE REINTENTA")
+    paginas = generar_paginas(paginas=6)
+    llamadas = []
+
+    def extractor_con_falla(texto, banco):
+        llamadas.append(texto)
+        return None if len(llamadas) == 2 else extractor_de_lineas(texto, banco)
+
+    resultado = _extractor._extraer_por_ventanas(paginas, "Banco Ejemplo", extractor_con_falla, 2500)
+    assert resultado["debug_info"]["ventanas_reintentadas"] == 1
+    assert resultado["debug_info"]["ventanas_fallidas"] == 0
+    assert resultado["total_movimientos"] == 6 * 40
+
+
+def test_ventana_que_sigue_fallando_es_error():
+    print("\n🧪 TESTING VENTANA QUE SIGUE FALLANDO NO DA UN RESULTADO INCOMPLETO")
+    paginas = generar_paginas(paginas=6)
+    ventanas = dividir_en_ventanas(paginas, 2500)
+
+    def extractor_con_falla(texto, banco):
+        return None if texto == ventanas[1] else extractor_de_lineas(texto, banco)
+
+    resultado = _extractor._extraer_por_ventanas(paginas, "Banco Ejemplo", extractor_con_falla, 2500)
+    assert "error" in resultado
+    assert resultado["debug_info"]["ventanas_fallidas"] == 1
+    assert not _extractor._validar_resultado_con_totales(resultado)
+    assert not _extractor._validar_resultado(resultado)
+
+
+def test_maximo_de_ventanas():
+    print("\n🧪 TESTING MÁXIMO DE VENTANAS POR DOCUMENTO")
+    paginas = generar_paginas(paginas=6)
+    llamadas = []
+
+    def extractor_contado(texto, banco):
+        llamadas.append(texto)
+        return extractor_de_lineas(texto, banco)
+
+    resultado = _extractor._extraer_por_ventanas(paginas, "Banco Ejemplo", extractor_contado, 2500, max_ventanas=3)
+    assert len(llamadas) == 3
+    assert resultado["debug_info"]["ventanas"] == 3
+    assert resultado["debug_info"]["ventanas_descartadas"] == len(dividir_en_ventanas(paginas, 2500)) - 3
+    assert 0 < resultado["precision_estimada"] < 0.95
+
+
+def benchmark_ventanas(demora: float = 0.2):
+    print(f"\n⏱️ BENCHMARK VENTANAS (IA simulada, {demora}s por llamada)")
+    paginas = generar_paginas(paginas=60)
+    ventanas = dividir_en_ventanas(paginas, 12000)
+
+    inicio = time.perf_counter()
+    for ventana in ventanas:
+        extractor_de_lineas(ventana, "X", demora)
+    t_serie = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    _extractor._extraer_por_ventanas(paginas, "X", lambda t, b: extractor_de_lineas(t, b, demora), 12000)
+    t_paralelo = time.perf_counter() - inicio
+
+    print(f"   {len(ventanas)} ventanas")
+    print(f"   En serie:    {t_serie:.2f}s")
+    print(f"   Concurrente: {t_paralelo:.2f}s ({t_serie / t_paralelo:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_ventanas_respetan_presupuesto()
+    test_pagina_mas_grande_que_el_presupuesto()
+    test_union_sin_repetidos_del_solapamiento()
+    test_extraccion_por_ventanas_completa()
+    test_ventana_fallida_se_reintenta()
+    test_ventana_que_sigue_fallando_es_error()
+    test_maximo_de_ventanas()
+    benchmark_ventanas()
+
+    print("\n✅ Test completado!")
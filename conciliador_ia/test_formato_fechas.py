@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark de la inferencia de formato de fecha por documento
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.extractor import PDFExtractor, FormatoFechas
+import pandas as pd
+
+
+def test_inferencia_dia_primero():
+    print("🧪 TESTING INFERENCIA DÍA/MES")
+    fechas = FormatoFechas.inferir(["03/04/2024", "25/12/2024", "01/02/2024"])
+    assert fechas.formato == "%d/%m/%Y"
+    assert fechas.parse("03/04/2024").month == 4
+
+
+def test_inferencia_mes_primero():
+    print("\n🧪 TESTING INFERENCIA MES/DÍA (desambiguación)")
+    fechas = FormatoFechas.inferir(["03/04/2024", "12/25/2024", "01/13/2024"])
+    assert fechas.formato == "%m/%d/%Y"
+    # La cascada lo leería como 3 de abril; el documento es mes/día
+    assert fechas.parse("03/04/2024").month == 3
+    assert PDFExtractor()._parse_date("03/04/2024").month == 4
+
+
+def test_fallback_a_cascada():
+    print("\n🧪 TESTING FALLBACK A CASCADA")
+    fechas = FormatoFechas.inferir(["05/03/2024", "06/03/2024"])
+    assert fechas.parse("2024-03-07").day == 7
+    assert fechas.parse("basura") is None
+    assert fechas.aciertos == 0 and fechas.cascada == 2
+
+    sin_formato = FormatoFechas.inferir(["05/03", "06/03"])
+    assert sin_formato.formato is None
+    assert sin_formato.parse("05/03/24") == PDFExtractor()._parse_date("05/03/24")
+
+
+def test_parse_serie_igual_a_cascada():
+    print("\n🧪 TESTING parse_serie == cascada")
+    tokens = pd.Series(["05/03/2024", "31/12/2023", "2024-01-15", "7.8.24", "nada"])
+    fechas = FormatoFechas.inferir(tokens.tolist())
+    esperado = [PDFExtractor()._parse_date(t) for t in tokens]
+    obtenido = fechas.parse_serie(tokens)
+    for fecha, referencia in zip(obtenido, esperado):
+        assert (pd.isna(fecha) and referencia is None) or fecha == referencia
+
+
+def benchmark_formato_fechas(n: int = 50_000):
+    print(f"\n⏱️ BENCHMARK FECHAS ({n} tokens)")
+    random.seed(42)
+    # Formato que la cascada encuentra recién en el 5º intento
+    tokens = [f"{random.randint(1, 28):02d}.{random.randint(1, 12):02d}.{random.randint(2020, 2025)}" for _ in range(n)]
+    extractor = PDFExtractor()
+
+    inicio = time.perf_counter()
+    cascada = [extractor._parse_date(t) for t in tokens]
+    t_cascada = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    fechas = FormatoFechas.inferir(tokens[:30])
+    inferido = [fechas.parse(t) for t in tokens]
+    t_inferido = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    en_bloque = fechas.parse_serie(pd.Series(tokens))
+    t_bloque = time.perf_counter() - inicio
+
+    assert cascada == inferido
+    assert en_bloque.tolist() == [pd.Timestamp(f) for f in cascada]
+    print(f"   Formato inferido: {fechas.formato}")
+    print(f"   Cascada strptime:   {t_cascada:.3f}s")
+    print(f"   Formato único:      {t_inferido:.3f}s ({t_cascada / t_inferido:.1f}x)")
+    print(f"   pd.to_datetime:     {t_bloque:.3f}s ({t_cascada / t_bloque:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_inferencia_dia_primero()
+    test_inferencia_mes_primero()
+    test_fallback_a_cascada()
+    test_parse_serie_igual_a_cascada()
+    benchmark_formato_fechas()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test del logging muestreado y benchmark del costo de loguear por fila
+"""
+
+import sys
+import os
+import io
+import time
+import logging
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.log_sampling import LoggerMuestreado, ResumenEtapa
+
+
+def _logger_en_memoria(nombre: str, nivel: int = logging.DEBUG):
+    logger = logging.getLogger(nombre)
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(nivel)
+    buffer = io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    return logger, buffer
+
+
+def test_muestreo_primeros_y_cada():
+    print("🧪 TESTING MUESTREO PRIMEROS + 1 DE CADA N")
+    logger, buffer = _logger_en_memoria("test_log_muestreado.muestreo")
+    muestreado = LoggerMuestreado(logger, primeros=3, cada=10)
+
+    for i in range(1, 31):
+        muestreado.info("fila %d", i)
+
+    lineas = buffer.getvalue().splitlines()
+    assert lineas == ["INFO fila 1", "INFO fila 2", "INFO fila 3", "INFO fila 13", "INFO fila 23"]
+    assert muestreado.vistos == 30
+    assert muestreado.emitidos == 5
+    assert muestreado.descartados == 25
+
+
+def test_nivel_deshabilitado_no_formatea():
+    print("\n🧪 TESTING NIVEL DESHABILITADO NO FORMATEA NI CUENTA")
+
+    class Explota:
+        def __str__(self):
+            raise AssertionError("no debería formatearse")
+
+    logger, buffer = _logger_en_memoria("test_log_muestreado.nivel", nivel=logging.WARNING)
+    muestreado = LoggerMuestreado(logger, primeros=5, cada=1)
+
+    for _ in range(100):
+        muestreado.info("valor %s", Explota())
+
+    assert buffer.getvalue() == ""
+    assert muestreado.vistos == 0
+
+
+def test_limite_por_segundo():
+    print("\n🧪 TESTING LÍMITE POR SEGUNDO")
+    logger, buffer = _logger_en_memoria("test_log_muestreado.rate")
+    muestreado = LoggerMuestreado(logger, primeros=1000, cada=1, max_por_segundo=4)
+
+    for i in range(50):
+        muestreado.warning("evento %d", i)
+
+    assert len(buffer.getvalue().splitlines()) == 4
+    assert muestreado.descartados == 46
+
+
+def test_resumen_etapa():
+    print("\n🧪 TESTING RESUMEN DE ETAPA")
+    logger, buffer = _logger_en_memoria("test_log_muestreado.resumen")
+
+    with ResumenEtapa(logger, "detectar", max_ejemplos=2) as resumen:
+        for i in range(10):
+            resumen.contar("nuevo" if i % 2 else "existente", ejemplo=f"cliente {i}")
+        resumen.contar("sin_documento", cantidad=7)
+
+    datos = resumen.como_dict()
+    assert datos["conteos"] == {"existente": 5, "nuevo": 5, "sin_documento": 7}
+    assert datos["ejemplos"] == {"existente": ["cliente 0", "cliente 2"], "nuevo": ["cliente 1", "cliente 3"]}
+
+    lineas = buffer.getvalue().splitlines()
+    assert len(lineas) == 1
+    assert "Resumen detectar" in lineas[0]
+    assert "'sin_documento': 7" in lineas[0]
+
+
+def benchmark_logging_detectar_nuevos_clientes(n: int = 60_000):
+    """Compara detectar_nuevos_clientes con logging a INFO vs WARNING sobre n filas sintéticas"""
+    print(f"\n⏱️ BENCHMARK LOGGING detectar_nuevos_clientes ({n} filas)")
+    try:
+        import pandas as pd
+        from services.cliente_processor import ClienteProcessor
+    except ImportError as e:
+        print(f"   ⚠️ Benchmark omitido: {e}")
+        return
+
+    df_portal = pd.DataFrame({
+        "Tipo Doc. Comprador": ["80"] * n,
+        "Numero de Documento": [f"20{i:08d}1" for i in range(n)],
+        "denominación comprador": [f"Cliente Sintético {i}" for i in range(n)],
+        "provincia": ["Buenos Aires"] * n,
+    })
+    df_xubio = pd.DataFrame({"CUIT": ["20000000001"], "Nombre": ["Cliente Sintético 0"]})
+
+    logger_servicio = logging.getLogger("services.cliente_processor")
+    handler = logging.StreamHandler(io.StringIO())
+    logger_servicio.addHandler(handler)
+    nivel_original = logger_servicio.level
+
+    try:
+        for nivel in (logging.INFO, logging.WARNING):
+            logger_servicio.setLevel(nivel)
+            inicio = time.perf_counter()
+            nuevos, _ = ClienteProcessor().detectar_nuevos_clientes(df_portal, df_xubio)
+            duracion = time.perf_counter() - inicio
+            print(f"   {logging.getLevelName(nivel):<8} {duracion:.3f}s - {len(nuevos)} nuevos")
+    finally:
+        logger_servicio.setLevel(nivel_original)
+        logger_servicio.removeHandler(handler)
+
+
+if __name__ == "__main__":
+    test_muestreo_primeros_y_cada()
+    test_nivel_deshabilitado_no_formatea()
+    test_limite_por_segundo()
+    test_resumen_etapa()
+    benchmark_logging_detectar_nuevos_clientes()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark del render de la franja superior para detección de logos,
+contra el render de página completa, sobre el extracto de ejemplo
+"""
+
+import sys
+import os
+import time
+import base64
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import extractor_inteligente
+from services.extractor_inteligente import ExtractorInteligente
+
+PDF_EJEMPLO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Galicia 04.pdf")
+
+# Los métodos de render no usan estado de la instancia; se evita __init__ (cliente OpenAI)
+_extractor = ExtractorInteligente.__new__(ExtractorInteligente)
+
+
+def test_franja_es_jpeg():
+    print("🧪 TESTING FRANJA SUPERIOR EN JPEG")
+    extractor_inteligente._cache_logos.clear()
+    imagen = _extractor._franja_superior_a_imagen(PDF_EJEMPLO)
+    assert imagen
+    jpeg = base64.b64decode(imagen)
+    assert jpeg[:2] == b"\xff\xd8"
+
+
+def test_cache_por_contenido():
+    print("\n🧪 TESTING CACHE POR HASH DE CONTENIDO")
+    extractor_inteligente._cache_logos.clear()
+    primera = _extractor._franja_superior_a_imagen(PDF_EJEMPLO, calidad=70)
+    assert len(extractor_inteligente._cache_logos) == 1
+
+    segunda = _extractor._franja_superior_a_imagen(PDF_EJEMPLO, calidad=70)
+    assert segunda is primera
+    assert len(extractor_inteligente._cache_logos) == 1
+
+    # Otra calidad es otra entrada
+    otra = _extractor._franja_superior_a_imagen(PDF_EJEMPLO, calidad=40)
+    assert len(extractor_inteligente._cache_logos) == 2
+    assert len(otra) < len(primera)
+
+
+def test_archivo_inexistente():
+    print("\n🧪 TESTING ARCHIVO INEXISTENTE")
+    assert _extractor._franja_superior_a_imagen("/no/existe.pdf") is None
+
+
+def benchmark_logo(repeticiones: int = 10):
+    print(f"\n⏱️ BENCHMARK RENDER DE LOGO ({repeticiones} repeticiones)")
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        completa = _extractor._pdf_pagina_a_imagen(PDF_EJEMPLO)
+    t_completa = (time.perf_counter() - inicio) / repeticiones
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        extractor_inteligente._cache_logos.clear()
+        franja = _extractor._franja_superior_a_imagen(PDF_EJEMPLO)
+    t_franja = (time.perf_counter() - inicio) / repeticiones
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        _extractor._franja_superior_a_imagen(PDF_EJEMPLO)
+    t_cache = (time.perf_counter() - inicio) / repeticiones
+
+    print(f"   Página completa 2x + PNG: {t_completa * 1000:.1f} ms, {len(completa)} bytes base64")
+    print(f"   Franja superior JPEG:     {t_franja * 1000:.1f} ms, {len(franja)} bytes base64")
+    print(f"   Franja (cache):           {t_cache * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    test_franja_es_jpeg()
+    test_cache_por_contenido()
+    test_archivo_inexistente()
+    benchmark_logo()
+
+    print("\n✅ Test completado!")
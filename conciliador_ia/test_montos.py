@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests (estilo propiedades, con generación aleatoria) y benchmark del parser
+vectorizado de montos contra los parsers escalares existentes
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.montos import parsear_montos, detectar_separador_decimal
+from services.extractor import PDFExtractor
+from services.extractor_inteligente import ExtractorInteligente
+import pandas as pd
+
+# _parsear_monto no usa estado de la instancia; se evita __init__ (cliente OpenAI)
+_extractor_ia = ExtractorInteligente.__new__(ExtractorInteligente)
+_extractor_pdf = PDFExtractor()
+
+CASOS = 2_000
+
+
+def _agrupar(entero: int, separador: str) -> str:
+    return f"{entero:,}".replace(",", separador)
+
+
+def _con_signo_y_moneda(monto: str, negativo: bool) -> str:
+    moneda = random.choice(["", "$", "$ ", "ARS ", "U$S "])
+    if not negativo:
+        return f"{moneda}{monto}"
+    return random.choice([f"-{moneda}{monto}", f"{moneda}-{monto}", f"-{moneda} {monto}", f"{moneda}{monto}-"])
+
+
+def generar_monto_argentino() -> str:
+    entero = random.randint(0, 9_999_999)
+    centavos = random.randint(0, 99)
+    estilo = random.choice(["miles_decimal", "decimal", "miles_entero", "entero", "un_decimal"])
+    if estilo == "miles_decimal":
+        monto = f"{_agrupar(entero, '.')},{centavos:02d}"
+    elif estilo == "decimal":
+        monto = f"{entero},{centavos:02d}"
+    elif estilo == "miles_entero":
+        monto = _agrupar(entero, ".")
+    elif estilo == "un_decimal":
+        monto = f"{entero},{centavos % 10}"
+    else:
+        monto = str(entero)
+    return _con_signo_y_moneda(monto, random.random() < 0.3)
+
+
+def generar_monto_us() -> str:
+    entero = random.randint(0, 9_999_999)
+    centavos = random.randint(0, 99)
+    estilo = random.choice(["miles_decimal", "decimal", "miles_entero"])
+    if estilo == "miles_decimal":
+        monto = f"{_agrupar(entero, ',')}.{centavos:02d}"
+    elif estilo == "decimal":
+        monto = f"{entero}.{centavos:02d}"
+    else:
+        monto = _agrupar(entero, ",")
+    # _parse_amount solo acepta el "-" adelante
+    negativo = random.random() < 0.3
+    return f"-{monto}" if negativo else random.choice(["", "$"]) + monto
+
+
+def _iguales(vectorizado, escalar) -> bool:
+    if escalar is None:
+        return pd.isna(vectorizado)
+    return abs(vectorizado - escalar) < 1e-6
+
+
+def test_propiedad_formato_argentino():
+    print("🧪 TESTING PROPIEDAD: formato argentino == _parsear_monto")
+    random.seed(1)
+    montos = [generar_monto_argentino() for _ in range(CASOS)]
+    serie = pd.Series(montos)
+    assert detectar_separador_decimal(serie) == ","
+
+    resultado = parsear_montos(serie)
+    for monto, valor in zip(montos, resultado):
+        esperado = _extractor_ia._parsear_monto(monto)
+        assert _iguales(valor, esperado), (monto, valor, esperado)
+
+
+def test_propiedad_formato_us():
+    print("\n🧪 TESTING PROPIEDAD: formato con punto decimal == _parse_amount")
+    random.seed(2)
+    montos = [generar_monto_us() for _ in range(CASOS)]
+    serie = pd.Series(montos)
+    assert detectar_separador_decimal(serie) == "."
+
+    resultado = parsear_montos(serie)
+    for monto, valor in zip(montos, resultado):
+        esperado = _extractor_pdf._parse_amount(monto)
+        assert _iguales(valor, esperado), (monto, valor, esperado)
+
+
+def test_propiedad_parentesis_negativos():
+    print("\n🧪 TESTING PROPIEDAD: (monto) == -monto")
+    random.seed(3)
+    montos = [generar_monto_argentino().replace("-", "") for _ in range(500)]
+    positivos = parsear_montos(pd.Series(montos))
+    negativos = parsear_montos(pd.Series([f"({m})" for m in montos]))
+    assert (negativos == -positivos).all()
+
+
+def test_ambiguos_por_mayoria():
+    print("\n🧪 TESTING AMBIGUOS RESUELTOS POR MAYORÍA DE COLUMNA")
+    argentina = parsear_montos(pd.Series(["1.234", "10,50", "2.000,00"]))
+    assert argentina.tolist() == [1234.0, 10.5, 2000.0]
+
+    us = parsear_montos(pd.Series(["1,234", "10.50", "2,000.00"]))
+    assert us.tolist() == [1234.0, 10.5, 2000.0]
+
+    # Sin evidencia gana la coma decimal; se puede forzar
+    assert parsear_montos(pd.Series(["1.234"])).tolist() == [1234.0]
+    assert parsear_montos(pd.Series(["1.234"]), decimal=".").tolist() == [1.234]
+
+
+def test_valores_especiales():
+    print("\n🧪 TESTING VALORES ESPECIALES")
+    serie = pd.Series(["", None, "sin monto", 1500.5, 12, "-$ 12,50", "$ -1.234.567,89"], dtype=object)
+    resultado = parsear_montos(serie)
+    assert pd.isna(resultado[0]) and pd.isna(resultado[1]) and pd.isna(resultado[2])
+    assert resultado[3] == 1500.5
+    assert resultado[4] == 12
+    assert resultado[5] == -12.5
+    assert resultado[6] == -1234567.89
+
+    numerica = pd.Series([1.5, 2.0])
+    assert parsear_montos(numerica).tolist() == [1.5, 2.0]
+
+
+def benchmark_montos(n: int = 200_000):
+    print(f"\n⏱️ BENCHMARK MONTOS ({n} valores)")
+    random.seed(42)
+    montos = [generar_monto_argentino() for _ in range(n)]
+    serie = pd.Series(montos)
+
+    inicio = time.perf_counter()
+    escalar = [_extractor_ia._parsear_monto(m) for m in montos]
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    vectorizado = parsear_montos(serie)
+    t_vectorizado = time.perf_counter() - inicio
+
+    assert all(_iguales(v, e) for v, e in zip(vectorizado, escalar))
+    print(f"   Escalar (_parsear_monto): {t_escalar:.3f}s")
+    print(f"   parsear_montos:           {t_vectorizado:.3f}s ({t_escalar / t_vectorizado:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_propiedad_formato_argentino()
+    test_propiedad_formato_us()
+    test_propiedad_parentesis_negativos()
+    test_ambiguos_por_mayoria()
+    test_valores_especiales()
+    benchmark_montos()
+
+    print("\n✅ Test completado!")
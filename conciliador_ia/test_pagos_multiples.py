@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark de la conciliación de un pago contra varias facturas
+(subset-sum meet-in-the-middle con topes de candidatos y de tiempo)
+"""
+
+import sys
+import os
+import time
+import random
+import itertools
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.pagos_multiples import buscar_combinacion, conciliar_pagos_multiples
+
+
+def _minima_por_fuerza_bruta(importe, montos, tolerancia, max_facturas):
+    """Menor cantidad de facturas (2..max) que suman el importe, o None"""
+    for cantidad in range(2, max_facturas + 1):
+        for combinacion in itertools.combinations(range(len(montos)), cantidad):
+            if abs(round(sum(montos[i] * 100 for i in combinacion)) - round(importe * 100)) <= round(tolerancia * 100):
+                return cantidad
+    return None
+
+
+def test_contra_fuerza_bruta():
+    print("🧪 TESTING SUBSET-SUM CONTRA FUERZA BRUTA")
+    rng = random.Random(4)
+    for _ in range(300):
+        montos = [round(rng.uniform(10, 500), 2) for _ in range(rng.randint(2, 10))]
+        if rng.random() < 0.7:
+            importe = round(sum(rng.sample(montos, rng.randint(2, len(montos)))), 2)
+        else:
+            importe = round(rng.uniform(20, 2000), 2)
+        esperado = _minima_por_fuerza_bruta(importe, montos, 0.01, 8)
+        combinacion = buscar_combinacion(importe, montos, tolerancia=0.01, max_facturas=8, tiempo_maximo_s=5)
+        if esperado is None:
+            assert combinacion is None
+        else:
+            assert len(combinacion.indices) == esperado
+            assert abs(combinacion.diferencia) <= 0.01
+            assert abs(sum(montos[i] for i in combinacion.indices) - importe) <= 0.011
+
+
+def test_prefiere_menos_facturas_y_tolerancia():
+    print("\n🧪 TESTING MENOS FACTURAS Y TOLERANCIA")
+    combinacion = buscar_combinacion(300.0, [100.0, 100.0, 100.0, 150.0, 150.0])
+    assert combinacion.indices == (3, 4)
+    assert buscar_combinacion(300.40, [100.0, 200.0], tolerancia=0.5).diferencia == -0.4
+    assert buscar_combinacion(300.40, [100.0, 200.0], tolerancia=0.1) is None
+    # Un solo monto igual al pago no es un pago múltiple
+    assert buscar_combinacion(100.0, [100.0]) is None
+
+
+def test_montos_sin_dato():
+    print("\n🧪 TESTING MONTOS VACÍOS O NaN")
+    nan = float("nan")
+    assert buscar_combinacion(300.0, [nan, 100.0, float("inf"), 200.0]).indices == (1, 3)
+    assert buscar_combinacion(nan, [100.0, 200.0]) is None
+    facturas = [{"importe": v, "fecha": None, "contraparte": "p"} for v in (100.0, nan, None, 200.0)]
+    pagos = [{"importe": nan, "fecha": None, "contraparte": "p"}, {"importe": 300.0, "fecha": None, "contraparte": "p"}]
+    assert {k: c.indices for k, c in conciliar_pagos_multiples(pagos, facturas).items()} == {1: (0, 3)}
+
+
+def test_misma_contraparte_y_ventana():
+    print("\n🧪 TESTING CONTRAPARTE, VENTANA DE FECHAS Y FACTURAS USADAS UNA VEZ")
+    hoy = datetime(2024, 3, 15)
+    facturas = [
+        {"importe": 1000.0, "fecha": hoy - timedelta(days=10), "contraparte": "30111111118"},
+        {"importe": 500.0, "fecha": hoy - timedelta(days=5), "contraparte": "30111111118"},
+        {"importe": 500.0, "fecha": hoy - timedelta(days=5), "contraparte": "30222222229"},
+        {"importe": 500.0, "fecha": hoy - timedelta(days=200), "contraparte": "30111111118"},
+        {"importe": 250.0, "fecha": hoy, "contraparte": "30111111118"},
+        {"importe": 250.0, "fecha": hoy, "contraparte": "30111111118"},
+    ]
+    pagos = [
+        {"importe": 1500.0, "fecha": hoy, "contraparte": "30111111118"},
+        {"importe": 500.0, "fecha": hoy, "contraparte": "30111111118"},
+        {"importe": 1500.0, "fecha": hoy, "contraparte": None},
+    ]
+    resultado = conciliar_pagos_multiples(pagos, facturas, ventana_dias=45)
+    assert resultado[0].indices == (0, 1)
+    # La factura de otro CUIT y la que está fuera de la ventana no cuentan
+    assert resultado[1].indices == (4, 5)
+    assert 2 not in resultado
+
+
+def test_conciliar_compras_pago_de_varias_facturas():
+    print("\n🧪 TESTING conciliar_compras CON UN PAGO DE VARIAS FACTURAS")
+    from routers.compras import conciliar_compras
+
+    extracto = [{"fecha": "15/03/2024", "monto": 1750.0, "proveedor": "Insumos SA", "concepto": "TRANSFERENCIA", "cuit": "30-11111111-8"}]
+    libro = [
+        {"fecha": "01/03/2024", "monto": 1000.0, "proveedor": "Insumos SA", "numero_factura": "A-1", "cuit": "30-11111111-8"},
+        {"fecha": "05/03/2024", "monto": 750.0, "proveedor": "Insumos SA", "numero_factura": "A-2", "cuit": "30-11111111-8"},
+    ]
+    resultado = conciliar_compras(extracto, libro)
+    assert resultado["conciliadas"] == 1
+    assert resultado["items"][0]["numero_factura"] == "A-1, A-2"
+
+
+def test_contraparte_por_proveedor_normalizado():
+    print("\n🧪 TESTING CONTRAPARTE SIN CUIT: PROVEEDOR NORMALIZADO, SIN PLACEHOLDER")
+    from routers.compras import conciliar_compras, _pago_para_combinar, PROVEEDOR_PLACEHOLDER
+
+    assert _pago_para_combinar({"proveedor": "Insumos S.R.L."})["contraparte"] == "insumos"
+    assert _pago_para_combinar({"proveedor": " INSUMOS srl"})["contraparte"] == "insumos"
+    assert _pago_para_combinar({"proveedor": PROVEEDOR_PLACEHOLDER, "cuit": ""})["contraparte"] == ""
+
+    libro = [
+        {"fecha": "01/03/2024", "monto": 1000.0, "proveedor": "Insumos S.R.L.", "numero_factura": "A-1", "cuit": ""},
+        {"fecha": "05/03/2024", "monto": 750.0, "proveedor": "Insumos S.R.L.", "numero_factura": "A-2", "cuit": ""},
+    ]
+    extracto = [{"fecha": "15/03/2024", "monto": 1750.0, "proveedor": "INSUMOS SRL", "concepto": "TRANSFERENCIA", "cuit": ""}]
+    assert conciliar_compras(extracto, libro)["items"][0]["numero_factura"] == "A-1, A-2"
+    # Dos compras del extracto con el placeholder no son "el mismo proveedor"
+    placeholder = [dict(extracto[0], proveedor=PROVEEDOR_PLACEHOLDER)]
+    libro_placeholder = [dict(f, proveedor=PROVEEDOR_PLACEHOLDER) for f in libro]
+    assert conciliar_compras(placeholder, libro_placeholder)["conciliadas"] == 0
+
+
+def benchmark_peor_caso():
+    print("\n⏱️ BENCHMARK LATENCIA DE PEOR CASO")
+    rng = random.Random(2)
+
+    # Sin solución y con muchas sumas cerca del objetivo: se recorren todas las combinaciones
+    casos = {
+        "24 montos iguales, sin solución": (1_000_000.01, [1000.0] * 24),
+        "24 montos al azar, sin solución": (10.0**9 + 0.01, [round(rng.uniform(1, 10**5), 2) for _ in range(24)]),
+        "60 montos (se recortan a 24)": (12_345.67, [round(rng.uniform(1, 2000), 2) for _ in range(60)]),
+    }
+    for nombre, (importe, montos) in casos.items():
+        peor = 0.0
+        for _ in range(20):
+            inicio = time.perf_counter()
+            buscar_combinacion(importe, montos, max_facturas=24)
+            peor = max(peor, time.perf_counter() - inicio)
+        print(f"   {nombre:<34} peor {peor * 1000:6.1f} ms")
+
+    # 2.000 pagos contra 20.000 facturas de 200 proveedores
+    facturas = [{"importe": round(rng.uniform(100, 5000), 2), "fecha": None, "contraparte": f"p{rng.randint(0, 199)}"}
+                for _ in range(20_000)]
+    pagos = [{"importe": round(rng.uniform(500, 20_000), 2), "fecha": None, "contraparte": f"p{rng.randint(0, 199)}"}
+             for _ in range(2_000)]
+    inicio = time.perf_counter()
+    resultado = conciliar_pagos_multiples(pagos, facturas)
+    print(f"   2.000 pagos x 20.000 facturas: {time.perf_counter() - inicio:.2f}s (tope total 2s), {len(resultado)} combinaciones")
+
+
+if __name__ == "__main__":
+    test_contra_fuerza_bruta()
+    test_prefiere_menos_facturas_y_tolerancia()
+    test_montos_sin_dato()
+    test_misma_contraparte_y_ventana()
+    test_conciliar_compras_pago_de_varias_facturas()
+    test_contraparte_por_proveedor_normalizado()
+    benchmark_peor_caso()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test de paridad de los parsers inteligentes por Series (regex compiladas,
+str.extract) contra los parsers por valor, y benchmark con 200k valores
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.cliente_processor_inteligente import ClienteProcessorInteligente
+import pandas as pd
+
+VALORES_EJEMPLO = {
+    'numero_factura': [
+        "F-0001-00001234", "A-1-371", "B-00003-00000371-X", "0001-00001234", "3-371", " 0001-00001234 ",
+        "00001234", "1234567", "123456789012", "-", "--", "A--", "Factura 1", "", "   ", "١٢٣٤٥٦٧٨",
+        None, float("nan"), 12345678, 12345678.0,
+    ],
+    'numero_comprobante': [
+        "0001-00001234", "3-371", "F-0001-00001234", "00001234", "1234567", " 00001234 ", "-", "abc",
+        "", None, float("nan"), 123456789, 0.5,
+    ],
+    'cuit_documento': [
+        "20-12345678-6", "30123456789", "27.123.456-7", "12.345.678", "12345678", "99345678", "60123456",
+        "1234567", "2012345678", "", "sin documento", None, float("nan"), 20123456786, 12345678.0, "١٢٣٤٥٦٧٨",
+    ],
+    'iva_alicuotas': [
+        "21", "10.5", " 27 ", "210.00", "1,234.56", "1,234", "12,34", "1.2.3", "-21", "", "abc",
+        None, float("nan"), 21, 10.5,
+    ],
+}
+
+
+def _valores_al_azar(tipo: str, cantidad: int, rng: random.Random):
+    generadores = {
+        'numero_factura': lambda: rng.choice([
+            f"{rng.choice('ABC')}-{rng.randint(1, 9999)}-{rng.randint(1, 99999999)}",
+            f"{rng.randint(1, 9999):04d}-{rng.randint(1, 99999999):08d}",
+            f"{rng.randint(1, 99999999):08d}",
+            str(rng.randint(1, 999)),
+        ]),
+        'numero_comprobante': lambda: rng.choice([
+            f"{rng.randint(1, 9999)}-{rng.randint(1, 99999999)}",
+            f"{rng.randint(10_000_000, 99_999_999)}",
+            f"F-{rng.randint(1, 9)}-{rng.randint(1, 9)}",
+        ]),
+        'cuit_documento': lambda: rng.choice([
+            f"{rng.choice(['20', '23', '27', '30', '33'])}-{rng.randint(10_000_000, 99_999_999)}-{rng.randint(0, 9)}",
+            f"{rng.randint(1_000_000, 99_999_999)}",
+            "",
+        ]),
+        'iva_alicuotas': lambda: rng.choice([
+            rng.choice(["21", "10.5", "27", "0"]),
+            f"{rng.randint(1, 999)},{rng.randint(0, 999):03d}.{rng.randint(0, 99):02d}",
+            "exento",
+        ]),
+    }
+    return [generadores[tipo]() for _ in range(cantidad)]
+
+
+def test_paridad_ejemplos():
+    print("🧪 TESTING PARIDAD PARSERS POR SERIES (ejemplos)")
+    processor = ClienteProcessorInteligente()
+    for tipo, valores in VALORES_EJEMPLO.items():
+        serie = pd.Series(valores, dtype=object, index=range(100, 100 + len(valores)))
+        esperado = serie.apply(processor.parsers_inteligentes[tipo])
+        obtenido = processor.parsear_columna(serie, tipo)
+        assert obtenido.index.equals(serie.index), tipo
+        for valor, e, o in zip(valores, esperado, obtenido):
+            assert e == o, (tipo, valor, e, o)
+
+    # Una columna numérica (sin objetos) y una vacía
+    numeros = pd.Series([12345678, 20123456786, 1])
+    assert processor.parsear_columna(numeros, 'cuit_documento').tolist() == \
+        numeros.apply(processor._parse_cuit_documento).tolist()
+    assert processor.parsear_columna(pd.Series([], dtype=object), 'numero_factura').empty
+
+
+def test_paridad_al_azar():
+    print("\n🧪 TESTING PARIDAD PARSERS POR SERIES (al azar)")
+    processor = ClienteProcessorInteligente()
+    rng = random.Random(4)
+    for tipo in VALORES_EJEMPLO:
+        serie = pd.Series(_valores_al_azar(tipo, 5_000, rng))
+        assert processor.parsear_columna(serie, tipo).tolist() == serie.apply(processor.parsers_inteligentes[tipo]).tolist()
+
+
+def test_campos_complejos_por_muestra():
+    print("\n🧪 TESTING CAMPOS COMPLEJOS CON MUESTRA ACOTADA")
+    from services import cliente_processor_inteligente as modulo
+
+    processor = ClienteProcessorInteligente()
+    filas = modulo.FILAS_MUESTRA_CAMPOS * 5
+    df = pd.DataFrame({
+        # "numero" y "documento": decide el contenido
+        "Numero de Documento": ["20-12345678-6"] * filas,
+        "Número de Comprobante": ["0001-00001234"] * filas,
+        "Documento Comprobante": ["A-0001-00000001"] * filas,
+        "CUIT": [None] * modulo.FILAS_MUESTRA_CAMPOS + ["20123456786"] * (filas - modulo.FILAS_MUESTRA_CAMPOS),
+        "Nombre": ["Cliente"] * filas,
+    })
+    campos = processor._analizar_campos_complejos(df)
+    assert campos["Numero de Documento"]["tipo"] == "cuit_documento"
+    assert campos["Número de Comprobante"]["tipo"] == "numero_factura"
+    assert campos["Documento Comprobante"]["tipo"] == "numero_factura"
+    assert campos["Número de Comprobante"]["muestra_valores"] == ["0001-00001234"] * 3
+    # Solo se miran las primeras filas
+    assert campos["CUIT"]["tipo"] == "cuit_documento" and campos["CUIT"]["muestra_valores"] == []
+    assert "Nombre" not in campos
+
+
+def benchmark_parsers(n: int = 200_000):
+    print(f"\n⏱️ BENCHMARK PARSERS INTELIGENTES ({n:,} valores)")
+    processor = ClienteProcessorInteligente()
+    rng = random.Random(5)
+    for tipo in VALORES_EJEMPLO:
+        serie = pd.Series(_valores_al_azar(tipo, n, rng))
+
+        inicio = time.perf_counter()
+        por_valor = serie.apply(processor.parsers_inteligentes[tipo])
+        t_valor = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        por_serie = processor.parsear_columna(serie, tipo)
+        t_serie = time.perf_counter() - inicio
+
+        assert por_valor.tolist() == por_serie.tolist()
+        print(f"   {tipo}: por valor {t_valor:.2f}s, por Series {t_serie:.2f}s ({t_valor / t_serie:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_paridad_ejemplos()
+    test_paridad_al_azar()
+    test_campos_complejos_por_muestra()
+    benchmark_parsers()
+
+    print("\n✅ Test completado!")
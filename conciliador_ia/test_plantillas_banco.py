@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test y benchmark de las plantillas compiladas por banco (patrones de PatronManager)
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.plantillas_banco import compilar_plantilla, obtener_plantilla
+from services.patron_manager import PatronManager
+from services.extractor import PDFExtractor
+
+BANCO_COLUMNAS = {
+    "nombre": "Banco Columnas",
+    "patrones": {
+        "columnas": {"fecha": [30, 90], "descripcion": [95, 300], "debito": [310, 400], "credito": [410, 500], "saldo": [510, 590]},
+        "excluir": ["saldo anterior", "total"]
+    },
+    "configuracion": {"formato_fecha": "%d/%m/%Y", "separador_decimal": ","}
+}
+
+BANCO_LINEAS = {
+    "nombre": "Banco Lineas",
+    "patrones": {
+        "lineas": [r"^(?P<fecha>\d{2}-\d{2}-\d{4}) (?P<descripcion>.+?) (?P<importe>-?[\d.,]+)$"]
+    },
+    "configuracion": {"formato_fecha": "%d-%m-%Y", "separador_decimal": "."}
+}
+
+
+def _palabra(texto: str, x0: float, top: float):
+    return {"text": texto, "x0": x0, "x1": x0 + 6 * len(texto), "top": top, "bottom": top + 8}
+
+
+def _fila(top: float, fecha: str, descripcion: str, debito: str = "", credito: str = "", saldo: str = "1.000,00"):
+    palabras = [_palabra(fecha, 35, top)]
+    x = 100
+    for parte in descripcion.split():
+        palabras.append(_palabra(parte, x, top + 0.5))
+        x += 6 * len(parte) + 4
+    if debito:
+        palabras.append(_palabra(debito, 320, top))
+    if credito:
+        palabras.append(_palabra(credito, 420, top))
+    palabras.append(_palabra(saldo, 515, top))
+    return palabras
+
+
+def test_plantilla_por_columnas():
+    print("🧪 TESTING PLANTILLA POR COLUMNAS")
+    plantilla = compilar_plantilla("banco_columnas", BANCO_COLUMNAS)
+    palabras = (
+        [_palabra("SALDO", 100, 10), _palabra("ANTERIOR", 140, 10), _palabra("5.000,00", 515, 10)]
+        + _fila(30, "01/03/2024", "TRANSFERENCIA RECIBIDA", credito="1.234,56")
+        + _fila(50, "02/03/2024", "PAGO PROVEEDOR", debito="250,00")
+        + _fila(70, "fecha", "Encabezado repetido")
+    )
+    random.shuffle(palabras)
+    movimientos = plantilla.parsear_palabras(palabras)
+    assert movimientos == [
+        {"fecha": "2024-03-01", "descripcion": "TRANSFERENCIA RECIBIDA", "importe": 1234.56, "tipo": "ingreso"},
+        {"fecha": "2024-03-02", "descripcion": "PAGO PROVEEDOR", "importe": -250.0, "tipo": "egreso"},
+    ]
+
+
+def test_plantilla_por_lineas():
+    print("\n🧪 TESTING PLANTILLA POR REGEX DE LÍNEA")
+    plantilla = compilar_plantilla("banco_lineas", BANCO_LINEAS)
+    palabras = [_palabra(t, 30 + 60 * i, 20) for i, t in enumerate(["05-03-2024", "Debito", "automatico", "-1,500.75"])]
+    palabras += [_palabra(t, 30 + 60 * i, 40) for i, t in enumerate(["Total", "del", "mes", "99.00"])]
+    movimientos = plantilla.parsear_palabras(palabras)
+    assert len(movimientos) == 1
+    assert movimientos[0]["importe"] == -1500.75 and movimientos[0]["fecha"] == "2024-03-05"
+
+
+def test_plantillas_invalidas_o_vacias():
+    print("\n🧪 TESTING PLANTILLAS INVÁLIDAS O VACÍAS")
+    assert compilar_plantilla("vacio", {"patrones": {}, "configuracion": {}}) is None
+    assert compilar_plantilla("regex", {"patrones": {"lineas": ["(sin cerrar"]}}) is None
+    assert compilar_plantilla("rango", {"patrones": {"columnas": {"fecha": [1]}}}) is None
+
+
+def test_cache_por_version_de_patrones():
+    print("\n🧪 TESTING CACHE POR VERSIÓN DE PATRONES")
+    primera = obtener_plantilla("banco_columnas", BANCO_COLUMNAS)
+    assert obtener_plantilla("banco_columnas", dict(BANCO_COLUMNAS)) is primera
+    cambiado = dict(BANCO_COLUMNAS, configuracion={"formato_fecha": "%Y-%m-%d"})
+    assert obtener_plantilla("banco_columnas", cambiado) is not primera
+
+
+def test_actualizar_precision_conserva_estadisticas():
+    print("\n🧪 TESTING actualizar_precision CONSERVA ESTADÍSTICAS Y PATRONES")
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            manager = PatronManager()
+            manager.guardar_banco("banco_columnas", dict(BANCO_COLUMNAS, precision=0.9, total_entrenamientos=9, casos_exitosos=9))
+            manager.actualizar_precision("banco_columnas", 0.95, True)
+            manager.actualizar_precision("banco_columnas", 0.0, False)
+
+            banco = manager.obtener_banco("banco_columnas")
+            assert banco["estadisticas"]["total_entrenamientos"] == 11
+            assert banco["estadisticas"]["casos_exitosos"] == 10
+            assert banco["estadisticas"]["precision"] == round(10 / 11, 3)
+            assert banco["patrones"] == BANCO_COLUMNAS["patrones"]
+        finally:
+            os.chdir(directorio_original)
+
+
+def generar_pdf_columnas(path: str, paginas: int = 50, filas: int = 40, seed: int = 7) -> int:
+    """Extracto sintético con columnas fijas (fecha, descripción, débito, crédito, saldo)"""
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    movimientos = 0
+    for _ in range(paginas):
+        page = doc.new_page()
+        y = 60
+        page.insert_text((35, y), "Fecha", fontsize=8)
+        page.insert_text((100, y), "Concepto", fontsize=8)
+        for _ in range(filas):
+            y += 18
+            importe = f"{rng.randint(1, 999)}.{rng.randint(100, 999)},{rng.randint(10, 99)}"
+            page.insert_text((35, y), f"{rng.randint(1, 28):02d}/03/2024", fontsize=8)
+            page.insert_text((100, y), rng.choice(["TRANSFERENCIA RECIBIDA", "PAGO PROVEEDOR", "COMISION"]), fontsize=8)
+            page.insert_text((320 if rng.random() < 0.5 else 420, y), importe, fontsize=8)
+            page.insert_text((515, y), "1.000,00", fontsize=8)
+            movimientos += 1
+    doc.save(path)
+    doc.close()
+    return movimientos
+
+
+def test_plantilla_sobre_pdf():
+    print("\n🧪 TESTING PLANTILLA SOBRE PDF")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        esperados = generar_pdf_columnas(tmp.name, paginas=3)
+        movimientos = compilar_plantilla("banco_columnas", BANCO_COLUMNAS).parsear_pdf(tmp.name)
+        assert len(movimientos) == esperados
+
+
+def benchmark_plantilla(paginas: int = 100):
+    print(f"\n⏱️ BENCHMARK PLANTILLA vs CASCADA GENÉRICA ({paginas} páginas)")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_columnas(tmp.name, paginas=paginas)
+
+        inicio = time.perf_counter()
+        generico = PDFExtractor().extract_from_pdf(tmp.name)
+        t_generico = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        movimientos = compilar_plantilla("banco_columnas", BANCO_COLUMNAS).parsear_pdf(tmp.name)
+        t_plantilla = time.perf_counter() - inicio
+
+    print(f"   Cascada genérica: {t_generico:.2f}s, {len(generico)} movimientos")
+    print(f"   Plantilla:        {t_plantilla:.2f}s, {len(movimientos)} movimientos")
+
+
+if __name__ == "__main__":
+    test_plantilla_por_columnas()
+    test_plantilla_por_lineas()
+    test_plantillas_invalidas_o_vacias()
+    test_cache_por_version_de_patrones()
+    test_actualizar_precision_conserva_estadisticas()
+    test_plantilla_sobre_pdf()
+    benchmark_plantilla()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test del índice de trigramas de proveedores (similitud de todos los pares
+como producto de matrices ralas) y benchmark de 5k pagos x 50k facturas
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import proveedores
+from utils.proveedores import IndiceProveedores, normalizar_proveedor, similitud_nombres
+
+RUBROS = ["insumos", "metalurgica", "distribuidora", "transportes", "servicios", "papelera",
+          "ferreteria", "agropecuaria", "logistica", "constructora", "textil", "quimica"]
+SILABAS = ["ba", "ca", "da", "fe", "go", "la", "me", "no", "pe", "ri", "sa", "to", "va", "zu", "mar", "ten", "ros", "quin"]
+SUFIJOS = ["S.A.", "SRL", "S.R.L.", "SA", "S.A.S.", "", "Hnos. S.A."]
+
+
+def _proveedores(cantidad: int, rng: random.Random):
+    """Marcas inventadas, algunas con el rubro adelante: nombres distintos que a veces comparten palabras"""
+    nombres = []
+    for _ in range(cantidad):
+        marca = " ".join(
+            "".join(rng.choice(SILABAS) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 2))
+        ).title()
+        nombres.append(f"{rng.choice(RUBROS).title()} {marca}" if rng.random() < 0.3 else marca)
+    return nombres
+
+
+def _variante(nombre: str, rng: random.Random) -> str:
+    """Cómo aparece el proveedor en otro lado: otra forma societaria, mayúsculas, a veces una tilde"""
+    variante = f"{nombre} {rng.choice(SUFIJOS)}".strip()
+    if rng.random() < 0.5:
+        variante = variante.upper()
+    return variante.replace("e", "é", 1) if rng.random() < 0.2 else variante
+
+
+def test_normalizacion():
+    print("🧪 TESTING NORMALIZACIÓN DE PROVEEDORES")
+    assert normalizar_proveedor("Insumos S.R.L.") == "insumos"
+    assert normalizar_proveedor("INSUMOS SRL") == "insumos"
+    assert normalizar_proveedor("Pérez Hnos. S.A.") == "perez"
+    assert normalizar_proveedor("Metalúrgica del Sur, Sociedad Anónima") == "metalurgica del sur"
+    # Un nombre que es solo la forma societaria no queda vacío
+    assert normalizar_proveedor("S.A.") == "sa"
+    assert similitud_nombres("Insumos S.A.", "INSUMOS SRL") == 1.0
+    assert similitud_nombres("", "Insumos") == 0.0
+    assert 0.5 < similitud_nombres("Transportes Gomez", "Transporte Gómez Hnos") < 1.0
+    assert similitud_nombres("Transportes Gomez", "Papelera Lopez") < 0.5
+
+
+def test_indice_igual_a_pares_uno_por_uno():
+    print("\n🧪 TESTING ÍNDICE (PRODUCTO RALO) == SIMILITUD PAR A PAR")
+    rng = random.Random(7)
+    base = _proveedores(40, rng)
+    libro = [_variante(rng.choice(base), rng) for _ in range(200)] + ["", "S.A."]
+    consultas = [_variante(rng.choice(base), rng) for _ in range(60)] + [""]
+    esperado = {}
+    for i, consulta in enumerate(consultas):
+        for j, nombre in enumerate(libro):
+            similitud = similitud_nombres(consulta, nombre)
+            if similitud >= 0.5:
+                esperado[(i, j)] = similitud
+    obtenido = IndiceProveedores(libro).similitudes(consultas, minimo=0.5)
+    assert set(obtenido) == set(esperado)
+    assert all(abs(obtenido[par] - esperado[par]) < 1e-9 for par in esperado)
+
+
+def test_indice_sin_scipy():
+    print("\n🧪 TESTING ÍNDICE INVERTIDO SIN SCIPY")
+    rng = random.Random(8)
+    base = _proveedores(30, rng)
+    libro = [_variante(rng.choice(base), rng) for _ in range(100)]
+    consultas = [_variante(rng.choice(base), rng) for _ in range(30)]
+    con_scipy = IndiceProveedores(libro).similitudes(consultas)
+    disponible = proveedores.SCIPY_AVAILABLE
+    proveedores.SCIPY_AVAILABLE = False
+    try:
+        sin_scipy = IndiceProveedores(libro).similitudes(consultas)
+    finally:
+        proveedores.SCIPY_AVAILABLE = disponible
+    assert set(con_scipy) == set(sin_scipy)
+    assert all(abs(con_scipy[par] - sin_scipy[par]) < 1e-9 for par in con_scipy)
+
+
+def _compras(cantidad: int, base, rng: random.Random, prefijo: str):
+    return [
+        {"fecha": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+         "monto": round(rng.uniform(1_000, 500_000), 2),
+         "proveedor": _variante(rng.choice(base), rng),
+         "numero_factura": f"{prefijo}-{i}"}
+        for i in range(cantidad)
+    ]
+
+
+def test_conciliar_compras_igual_a_todos_los_pares():
+    print("\n🧪 TESTING conciliar_compras CON PARES CANDIDATOS == TODOS LOS PARES")
+    from routers import compras
+
+    rng = random.Random(3)
+    base = _proveedores(25, rng)
+    libro = _compras(300, base, rng, "A")
+    # Pagos que son facturas del libro (con el proveedor escrito distinto) y pagos sueltos
+    extracto = [dict(c, proveedor=_variante(normalizar_proveedor(c["proveedor"]), rng)) for c in rng.sample(libro, 60)]
+    extracto += _compras(40, base, rng, "X")
+
+    esperado = {
+        (i, j) for i, pago in enumerate(extracto) for j, factura in enumerate(libro)
+        if compras.calcular_score_coincidencia(pago, factura) >= 0.5
+    }
+    pares = compras._pares_candidatos(extracto, libro)
+    assert esperado <= set(pares)
+    assert all(compras.calcular_score_coincidencia(extracto[i], libro[j], pares[(i, j)])
+               == compras.calcular_score_coincidencia(extracto[i], libro[j]) for i, j in esperado)
+
+    # Mismo resultado que puntuando los N x M pares
+    resultado = compras.conciliar_compras(extracto, libro)
+    original = compras._pares_candidatos
+    compras._pares_candidatos = lambda e, l: {(i, j): None for i in range(len(e)) for j in range(len(l))}
+    try:
+        assert compras.conciliar_compras(extracto, libro) == resultado
+    finally:
+        compras._pares_candidatos = original
+    assert resultado["conciliadas"] >= 55
+
+
+def benchmark_5k_x_50k():
+    print(f"\n⏱️ BENCHMARK 5.000 PAGOS x 50.000 FACTURAS (scipy: {proveedores.SCIPY_AVAILABLE})")
+    rng = random.Random(1)
+    base = _proveedores(3_000, rng)
+    libro = [_variante(rng.choice(base), rng) for _ in range(50_000)]
+    consultas = [_variante(rng.choice(base), rng) for _ in range(5_000)]
+
+    inicio = time.perf_counter()
+    indice = IndiceProveedores(libro)
+    armado = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    pares = indice.similitudes(consultas)
+    consulta = time.perf_counter() - inicio
+    print(f"   índice de {len(indice.nombres):,} proveedores distintos: {armado:.2f}s")
+    print(f"   similitudes de 250M pares: {consulta:.2f}s, {len(pares):,} pares >= {proveedores.SIMILITUD_MINIMA_PROVEEDOR}")
+
+    inicio = time.perf_counter()
+    for _ in range(20_000):
+        similitud_nombres(rng.choice(consultas), rng.choice(libro))
+    por_par = (time.perf_counter() - inicio) / 20_000
+    print(f"   par a par: {por_par * 1e6:.1f} µs/par -> {por_par * 250e6 / 60:,.0f} min para los 250M")
+
+
+def benchmark_conciliar_compras_5k_x_50k():
+    print("\n⏱️ BENCHMARK conciliar_compras 5.000 x 50.000")
+    from routers.compras import conciliar_compras
+
+    rng = random.Random(2)
+    base = _proveedores(3_000, rng)
+    libro = _compras(50_000, base, rng, "A")
+    extracto = _compras(5_000, base, rng, "X")
+    inicio = time.perf_counter()
+    resultado = conciliar_compras(extracto, libro)
+    print(f"   {time.perf_counter() - inicio:.2f}s: {resultado['conciliadas']:,} conciliadas, "
+          f"{resultado['parciales']:,} parciales")
+
+
+if __name__ == "__main__":
+    test_normalizacion()
+    test_indice_igual_a_pares_uno_por_uno()
+    test_indice_sin_scipy()
+    test_conciliar_compras_igual_a_todos_los_pares()
+    benchmark_5k_x_50k()
+    benchmark_conciliar_compras_5k_x_50k()
+
+    print("\n✅ Test completado!")
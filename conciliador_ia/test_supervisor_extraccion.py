@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Test del supervisor de extracción con PDFs adversariales generados localmente
+(dibujos vectoriales enormes, miles de objetos de texto diminutos)
+"""
+
+import sys
+import os
+import time
+import random
+import atexit
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.supervisor_extraccion import PaginaSupervisada, SupervisorExtraccion, texto_de_pagina
+
+
+def generar_pdf_adversarial(path: str, trazos: int = 4_000, objetos_texto: int = 4_000, seed: int = 3):
+    """
+    PDF de 4 páginas: 1 y 4 normales, 2 con un dibujo vectorial de `trazos`
+    líneas y 3 con `objetos_texto` caracteres sueltos de 1pt (cada una en un
+    solo content stream)
+    """
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+
+    def normal(n):
+        page = doc.new_page()
+        page.insert_text((50, 60), f"Pagina normal {n}", fontsize=10)
+        page.insert_text((50, 80), "01/03/2024 TRANSFERENCIA RECIBIDA 1.500,00", fontsize=10)
+
+    normal(1)
+
+    page = doc.new_page()
+    shape = page.new_shape()
+    for _ in range(trazos):
+        shape.draw_line((rng.uniform(0, 595), rng.uniform(0, 842)), (rng.uniform(0, 595), rng.uniform(0, 842)))
+    shape.finish(width=0.1)
+    shape.commit()
+
+    page = doc.new_page()
+    escritor = fitz.TextWriter(page.rect)
+    for _ in range(objetos_texto):
+        escritor.append((rng.uniform(0, 590), rng.uniform(5, 840)), rng.choice("abcdefghij0123456789"), fontsize=1)
+    escritor.write_text(page)
+
+    normal(4)
+    doc.save(path)
+    doc.close()
+
+
+_PDF_ADVERSARIAL = None
+
+
+def pdf_adversarial() -> str:
+    """El PDF adversarial, generado una sola vez por corrida"""
+    global _PDF_ADVERSARIAL
+    if _PDF_ADVERSARIAL is None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            _PDF_ADVERSARIAL = tmp.name
+        atexit.register(os.unlink, _PDF_ADVERSARIAL)
+        generar_pdf_adversarial(_PDF_ADVERSARIAL)
+    return _PDF_ADVERSARIAL
+
+
+def generar_pdf_simple(path: str, paginas: int = 5):
+    import fitz
+
+    doc = fitz.open()
+    for n in range(1, paginas + 1):
+        doc.new_page().insert_text((50, 60), f"Pagina {n}", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def _texto_lento_en_pagina_2(page, page_num: int) -> str:
+    if page_num == 2:
+        time.sleep(30)
+    return texto_de_pagina(page, page_num)
+
+
+def _texto_que_falla_en_pagina_3(page, page_num: int) -> str:
+    if page_num == 3:
+        raise RuntimeError("página corrupta")
+    return texto_de_pagina(page, page_num)
+
+
+def _memoria_en_pagina_1(page, page_num: int) -> str:
+    if page_num == 1:
+        bloque = b"\x01" * (400 * 1024 * 1024)
+        time.sleep(5)
+        return str(len(bloque))
+    return texto_de_pagina(page, page_num)
+
+
+def test_pagina_lenta_se_omite_y_se_sigue():
+    print("🧪 TESTING PÁGINA LENTA SE OMITE Y SE SIGUE")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_simple(tmp.name, paginas=4)
+        supervisor = SupervisorExtraccion(presupuesto_pagina_s=0.5, presupuesto_documento_s=20)
+        inicio = time.monotonic()
+        paginas = list(supervisor.iter_paginas(tmp.name, _texto_lento_en_pagina_2))
+    assert time.monotonic() - inicio < 10
+    assert [p.numero for p in paginas] == [1, 2, 3, 4]
+    assert paginas[1].omitida["motivo"] == "presupuesto_pagina"
+    assert all("Pagina" in p.resultado for p in paginas if p.numero != 2)
+
+
+def test_error_de_pagina_no_corta_el_documento():
+    print("\n🧪 TESTING ERROR DE PÁGINA NO CORTA EL DOCUMENTO")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_simple(tmp.name, paginas=4)
+        paginas = list(SupervisorExtraccion().iter_paginas(tmp.name, _texto_que_falla_en_pagina_3))
+    assert paginas[2].omitida["motivo"] == "error"
+    assert [p.numero for p in paginas if not p.omitida] == [1, 2, 4]
+
+
+def test_techo_de_memoria():
+    print("\n🧪 TESTING TECHO DE MEMORIA (RSS)")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_simple(tmp.name, paginas=2)
+        supervisor = SupervisorExtraccion(presupuesto_pagina_s=20, rss_maximo_mb=300)
+        paginas = list(supervisor.iter_paginas(tmp.name, _memoria_en_pagina_1))
+    assert paginas[0].omitida["motivo"] == "memoria"
+    assert paginas[1].resultado and "Pagina 2" in paginas[1].resultado
+
+
+def test_presupuesto_de_documento():
+    print("\n🧪 TESTING PRESUPUESTO DE DOCUMENTO")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_simple(tmp.name, paginas=4)
+        supervisor = SupervisorExtraccion(presupuesto_pagina_s=60, presupuesto_documento_s=1)
+        paginas = list(supervisor.iter_paginas(tmp.name, _texto_lento_en_pagina_2))
+    assert paginas[0].resultado
+    assert [p.omitida["motivo"] for p in paginas[1:]] == ["presupuesto_documento"] * 3
+
+
+def test_consumidor_lento_no_gasta_el_presupuesto():
+    print("\n🧪 TESTING EL PRESUPUESTO ES DEL HIJO, NO DEL CONSUMIDOR")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_simple(tmp.name, paginas=4)
+        supervisor = SupervisorExtraccion(presupuesto_pagina_s=0.5, presupuesto_documento_s=1.5)
+        assert supervisor._contexto.get_start_method() != "fork"
+        paginas = []
+        for pagina in supervisor.iter_paginas(tmp.name):
+            paginas.append(pagina)
+            time.sleep(0.8)
+    assert not [p.omitida for p in paginas if p.omitida]
+    assert [p.numero for p in paginas] == [1, 2, 3, 4]
+
+
+class _SupervisorContado(SupervisorExtraccion):
+    """Cuenta las pasadas (procesos hijo sin contar relanzamientos) por documento"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pasadas = 0
+
+    def iter_paginas(self, *args, **kwargs):
+        self.pasadas += 1
+        return super().iter_paginas(*args, **kwargs)
+
+
+def test_un_hijo_por_documento():
+    print("\n🧪 TESTING HEADER, MUESTRA DE FECHAS Y PÁGINAS EN UNA SOLA PASADA")
+    import fitz
+    from services.extractor import ContextoExtraccion, PDFExtractor
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        doc = fitz.open()
+        for n in range(1, 6):
+            page = doc.new_page()
+            page.insert_text((50, 60), f"BANCO GALICIA Pagina {n}", fontsize=10)
+            # Mes/día: solo el formato inferido lee bien 03/04/2024
+            page.insert_text((50, 80), f"12/2{n}/2024 TRANSFERENCIA RECIBIDA 1,500.00", fontsize=10)
+            page.insert_text((50, 100), "03/04/2024 PAGO PROVEEDOR 200.00", fontsize=10)
+        doc.save(tmp.name)
+        doc.close()
+
+        supervisor = _SupervisorContado()
+        contexto = ContextoExtraccion(pdf_path=tmp.name)
+        df = PDFExtractor(max_workers=1, supervisor=supervisor).extract_from_pdf(tmp.name, contexto)
+        esperado = PDFExtractor(max_workers=1, supervisor=False).extract_from_pdf(tmp.name)
+    assert supervisor.pasadas == 1
+    assert "BANCO GALICIA Pagina 1" in contexto.header_info
+    assert df.to_dict("records") == esperado.to_dict("records")
+    assert (df["fecha"].dt.month == 3).sum() == 5
+
+
+def _generar_pdf_galicia(path: str, paginas: int = 5):
+    import fitz
+
+    doc = fitz.open()
+    for n in range(1, paginas + 1):
+        page = doc.new_page()
+        page.insert_text((50, 60), f"BANCO GALICIA Pagina {n}", fontsize=10)
+        page.insert_text((50, 80), f"12/2{n}/2024 TRANSFERENCIA RECIBIDA 1,500.00", fontsize=10)
+        page.insert_text((50, 100), "03/04/2024 PAGO PROVEEDOR 200.00", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def test_paralelo_supervisado():
+    print("\n🧪 TESTING MODO PARALELO BAJO EL SUPERVISOR")
+    from services.extractor import ContextoExtraccion, PDFExtractor
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        _generar_pdf_galicia(tmp.name)
+        supervisor = _SupervisorContado()
+        contexto = ContextoExtraccion(pdf_path=tmp.name)
+        extractor = PDFExtractor(max_workers=2, paginas_minimas_paralelo=2, supervisor=supervisor)
+        df = extractor.extract_from_pdf(tmp.name, contexto)
+        esperado = PDFExtractor(max_workers=1, supervisor=False).extract_from_pdf(tmp.name)
+    # Un hijo por rango de páginas, con las páginas en orden
+    assert supervisor.pasadas == 2
+    assert "BANCO GALICIA Pagina 1" in contexto.header_info
+    assert df.to_dict("records") == esperado.to_dict("records")
+    assert contexto.paginas_omitidas == []
+
+
+class _SupervisorQueOmitePagina2(SupervisorExtraccion):
+    """Marca la página 2 como omitida por presupuesto, sin depender de los tiempos de la máquina"""
+
+    def iter_paginas(self, *args, **kwargs):
+        for pagina in super().iter_paginas(*args, **kwargs):
+            if pagina.numero == 2:
+                pagina = PaginaSupervisada(numero=2, omitida={"motivo": "presupuesto_pagina"})
+            yield pagina
+
+
+def test_paginas_omitidas_en_el_resumen():
+    print("\n🧪 TESTING PÁGINAS OMITIDAS EN EL CONTEXTO Y EL RESUMEN")
+    from services.extractor import ContextoExtraccion, PDFExtractor
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        _generar_pdf_galicia(tmp.name, paginas=4)
+        for max_workers in (1, 2):
+            contexto = ContextoExtraccion(pdf_path=tmp.name)
+            extractor = PDFExtractor(max_workers=max_workers, paginas_minimas_paralelo=2,
+                                     supervisor=_SupervisorQueOmitePagina2())
+            df = extractor.extract_from_pdf(tmp.name, contexto)
+            assert sorted(df["pagina"].unique()) == [1, 3, 4]
+            assert contexto.paginas_omitidas == [{"pagina": 2, "motivo": "presupuesto_pagina"}]
+            resumen = extractor.get_extraction_summary(df, contexto.header_info, contexto.paginas_omitidas)
+            assert resumen["paginas_omitidas"] == contexto.paginas_omitidas
+
+
+def test_coordenadas_supervisado():
+    print("\n🧪 TESTING MOTOR POR COORDENADAS BAJO EL SUPERVISOR")
+    from services.extractor import ContextoExtraccion, PDFExtractor
+    from test_extraccion_coordenadas import generar_pdf_multicolumna
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        filas = generar_pdf_multicolumna(tmp.name, paginas=5, filas=10)
+        supervisor = _SupervisorContado()
+        contexto = ContextoExtraccion(pdf_path=tmp.name)
+        supervisados = list(PDFExtractor(motor="coordenadas", supervisor=supervisor).iter_movimientos(tmp.name, contexto))
+        esperados = list(PDFExtractor(motor="coordenadas", supervisor=False).iter_movimientos(tmp.name))
+    # Muestra y resto del documento: dos pasadas
+    assert supervisor.pasadas == 2
+    assert supervisados == esperados
+    assert len(supervisados) == len(filas)
+
+
+def test_pdf_adversarial():
+    print("\n🧪 TESTING PDF ADVERSARIAL (vectores y miles de objetos de texto)")
+    supervisor = SupervisorExtraccion(presupuesto_pagina_s=1, presupuesto_documento_s=30)
+    inicio = time.monotonic()
+    paginas = list(supervisor.iter_paginas(pdf_adversarial()))
+    duracion = time.monotonic() - inicio
+    print(f"   {duracion:.1f}s, omitidas: {[(p.numero, p.omitida['motivo']) for p in paginas if p.omitida]}")
+    assert [p.numero for p in paginas] == [1, 2, 3, 4]
+    assert "Pagina normal 1" in paginas[0].resultado
+    assert "Pagina normal 4" in paginas[3].resultado
+    # Las páginas adversariales terminan dentro del presupuesto o quedan omitidas, nunca cuelgan
+    assert duracion < 30
+
+
+def test_extract_from_pdf_supervisado():
+    print("\n🧪 TESTING PDFExtractor CON PÁGINA ADVERSARIAL")
+    from services.extractor import PDFExtractor
+
+    extractor = PDFExtractor(max_workers=1, supervisor=SupervisorExtraccion(presupuesto_pagina_s=1))
+    movimientos = list(extractor.iter_movimientos(pdf_adversarial()))
+    assert [m["pagina"] for m in movimientos] == [1, 4]
+
+
+def benchmark_supervisor(paginas: int = 200):
+    print(f"\n⏱️ BENCHMARK SUPERVISOR vs DIRECTO ({paginas} páginas)")
+    import pdfplumber
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        generar_pdf_simple(tmp.name, paginas=paginas)
+
+        inicio = time.perf_counter()
+        with pdfplumber.open(tmp.name) as pdf:
+            directo = [page.extract_text() for page in pdf.pages]
+        t_directo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        supervisadas = list(SupervisorExtraccion().iter_paginas(tmp.name))
+        t_supervisado = time.perf_counter() - inicio
+
+    assert [p.resultado for p in supervisadas] == directo
+    print(f"   Directo:     {t_directo:.2f}s")
+    print(f"   Supervisado: {t_supervisado:.2f}s")
+
+
+if __name__ == "__main__":
+    test_pagina_lenta_se_omite_y_se_sigue()
+    test_error_de_pagina_no_corta_el_documento()
+    test_techo_de_memoria()
+    test_presupuesto_de_documento()
+    test_consumidor_lento_no_gasta_el_presupuesto()
+    test_un_hijo_por_documento()
+    test_paralelo_supervisado()
+    test_paginas_omitidas_en_el_resumen()
+    test_coordenadas_supervisado()
+    test_pdf_adversarial()
+    test_extract_from_pdf_supervisado()
+    benchmark_supervisor()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test para los spans de medición por etapa (utils/tracing)
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.tracing import Tracer, span
+
+
+def test_arbol_de_spans():
+    print("🧪 TESTING ÁRBOL DE SPANS")
+    with Tracer("procesar_conciliacion", jsonl_path="", empresa_id="demo") as tracer:
+        with span("extraccion") as etapa:
+            etapa.rows = 10
+        with span("conciliacion_ia"):
+            with span("normalizacion") as etapa:
+                datos = [0] * 100_000
+                etapa.rows = len(datos)
+
+    arbol = tracer.to_dict()
+    print(f"   Etapas: {[hijo['name'] for hijo in arbol['children']]}")
+    assert arbol["name"] == "procesar_conciliacion"
+    assert arbol["attrs"] == {"empresa_id": "demo"}
+    assert [hijo["name"] for hijo in arbol["children"]] == ["extraccion", "conciliacion_ia"]
+    assert arbol["children"][0]["rows"] == 10
+    assert arbol["children"][1]["children"][0]["name"] == "normalizacion"
+    assert arbol["children"][1]["children"][0]["rows"] == 100_000
+    assert arbol["duration_ms"] >= arbol["children"][1]["duration_ms"]
+
+
+def test_span_sin_tracer_no_falla():
+    print("\n🧪 TESTING SPAN SIN TRACER ACTIVO")
+    with span("suelto") as etapa:
+        etapa.rows = 1
+    assert etapa.duration_ms >= 0
+
+
+def test_spans_a_jsonl():
+    print("\n🧪 TESTING EXPORTACIÓN JSONL")
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = os.path.join(tmp, "spans.jsonl")
+        try:
+            with Tracer("procesar_conciliacion", jsonl_path=destino):
+                with span("extraccion"):
+                    raise ValueError("PDF corrupto")
+        except ValueError:
+            pass
+
+        with open(destino) as f:
+            registros = [json.loads(linea) for linea in f]
+        print(f"   Registros: {len(registros)}")
+        assert [r["name"] for r in registros] == ["procesar_conciliacion", "extraccion"]
+        assert registros[1]["parent"] == "procesar_conciliacion"
+        assert registros[1]["depth"] == 1
+        assert "PDF corrupto" in registros[0]["attrs"]["error"]
+
+
+if __name__ == "__main__":
+    test_arbol_de_spans()
+    test_span_sin_tracer_no_falla()
+    test_spans_a_jsonl()
+
+    print("\n✅ Test completado!")
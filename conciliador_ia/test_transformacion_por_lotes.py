@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test del índice AFIP (mismo receptor que el recorrido fila por fila) y de la
+transformación IIBB por lotes (mismo resultado que de una vez); benchmark
+con 200k filas contra 50k comprobantes AFIP
+"""
+
+import sys
+import os
+import tempfile
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.transformador_archivos import IndiceAFIP, TransformadorArchivos, numero_para_afip
+import pandas as pd
+
+COLUMNAS_AFIP = ["Número Desde", "Tipo Doc. Receptor", "Nro. Doc. Receptor", "Denominación Receptor"]
+
+
+def buscar_recorriendo(numero_factura: str, filas_afip) -> dict:
+    """Implementación anterior (las tres estrategias fila por fila), usada como referencia"""
+    if not numero_factura:
+        return {}
+    numero_final = numero_para_afip(numero_factura)
+    for numero_afip, tipo_doc, numero_doc, denominacion in filas_afip:
+        receptor = {'tipo_doc_afip': tipo_doc, 'numero_doc_afip': numero_doc, 'denominacion_afip': denominacion}
+        if numero_afip == numero_final:
+            return receptor
+        try:
+            if (str(int(numero_afip)) if numero_afip.isdigit() else numero_afip) == numero_final:
+                return receptor
+        except ValueError:
+            continue
+        if len(numero_final) >= 3 and numero_afip.endswith(numero_final):
+            return receptor
+    return {'tipo_doc_afip': '80', 'numero_doc_afip': numero_final, 'denominacion_afip': 'Cliente sin denominación'}
+
+
+def _afip(cantidad: int, rng: random.Random) -> pd.DataFrame:
+    """Números con y sin ceros a la izquierda, repetidos y alguno no numérico"""
+    filas = []
+    for i in range(cantidad):
+        numero = rng.randint(1, cantidad * 3)
+        sorteo = rng.random()
+        texto = f"{numero:08d}" if sorteo < 0.3 else f"A{numero}" if sorteo < 0.35 else str(numero)
+        filas.append([texto, rng.choice(["80", "96"]), str(rng.randint(20_000_000_000, 30_999_999_999)), f"Receptor {i}"])
+    return pd.DataFrame(filas, columns=COLUMNAS_AFIP)
+
+
+def _iibb(cantidad: int, rng: random.Random, maximo: int) -> pd.DataFrame:
+    formatos = [
+        lambda n: f"Factura de venta {rng.choice('AB')} 00003-{n:08d}",
+        lambda n: f"Nota de crédito 00004-{n:08d}",
+        lambda n: f"Venta 00003{n:08d}",
+        lambda n: f"Factura 00005-{n % 1000:03d}",
+        lambda n: "Percepción sin comprobante",
+    ]
+    return pd.DataFrame({
+        "Descripción": [rng.choice(formatos)(rng.randint(1, maximo)) for _ in range(cantidad)],
+        "Razón social": [f"Cliente {i % 97}" for i in range(cantidad)],
+        "Provincia": [rng.choice(["Buenos Aires", "Córdoba", "Santa Fe"]) for _ in range(cantidad)],
+    })
+
+
+def test_indice_igual_a_recorrido():
+    print("🧪 TESTING ÍNDICE AFIP == RECORRIDO FILA POR FILA")
+    rng = random.Random(5)
+    df_afip = _afip(500, rng)
+    filas_afip = [tuple(str(v).strip() for v in fila) for fila in df_afip.itertuples(index=False)]
+    indice = TransformadorArchivos().construir_indice_afip(df_afip)
+
+    consultas = ["", "B 00003-00000371", "00005-371", "00003-00000000", "A12", "12", "0000300000012"]
+    consultas += [f"B 00003-{rng.randint(1, 2_000):08d}" for _ in range(1_000)]
+    consultas += [f"00005-{rng.randint(1, 999):03d}" for _ in range(200)]
+    for numero in consultas:
+        assert indice.buscar(numero) == buscar_recorriendo(numero, filas_afip), numero
+
+    # Sin las columnas de AFIP no hay índice
+    assert TransformadorArchivos().construir_indice_afip(pd.DataFrame({"otra": [1]})) is None
+    assert IndiceAFIP().buscar("00003-00000371")["denominacion_afip"] == "Cliente sin denominación"
+
+
+def test_por_lotes_igual_a_de_una_vez():
+    print("\n🧪 TESTING TRANSFORMACIÓN POR LOTES == DE UNA VEZ")
+    rng = random.Random(6)
+    df_afip = _afip(300, rng)
+    df_gh = _iibb(1_234, rng, 900)
+    transformador = TransformadorArchivos()
+    esperado, _, estadisticas = transformador.transformar_archivo_iibb(df_gh, df_afip)
+    esperado = esperado.astype(str).reset_index(drop=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        origen = os.path.join(tmp, "iibb.csv")
+        df_gh.to_csv(origen, index=False)
+        for origen_lotes, destino in [(df_gh, "salida.csv"), (origen, "desde_csv.csv"), (df_gh, "salida.xlsx")]:
+            avances = []
+            destino = os.path.join(tmp, destino)
+            _, estadisticas_lotes = transformador.transformar_archivo_iibb_por_lotes(
+                origen_lotes, destino, df_afip, filas_por_lote=100, progreso=avances.append
+            )
+            leido = pd.read_csv(destino, dtype=str) if destino.endswith(".csv") else pd.read_excel(destino, dtype=str)
+            assert leido.fillna("").equals(esperado.replace("nan", "")), destino
+            assert estadisticas_lotes["lotes"] == 13
+            assert estadisticas_lotes["registros_finales"] == estadisticas["registros_finales"]
+            assert [a.lote for a in avances] == list(range(1, 14))
+            assert avances[-1].filas_leidas == len(df_gh)
+
+
+def benchmark_200k(n: int = 200_000, comprobantes_afip: int = 50_000):
+    print(f"\n⏱️ BENCHMARK {n:,} FILAS IIBB CONTRA {comprobantes_afip:,} COMPROBANTES AFIP")
+    rng = random.Random(7)
+    df_afip = _afip(comprobantes_afip, rng)
+    df_gh = _iibb(n, rng, comprobantes_afip * 3)
+    transformador = TransformadorArchivos()
+
+    inicio = time.perf_counter()
+    indice = transformador.construir_indice_afip(df_afip)
+    print(f"   índice AFIP: {time.perf_counter() - inicio:.2f}s")
+
+    filas_afip = [tuple(str(v).strip() for v in fila) for fila in df_afip.itertuples(index=False)]
+    muestra = transformador._parsear_descripcion_iibb(df_gh.head(50))['numero_factura_extraido'].tolist()
+    inicio = time.perf_counter()
+    for numero in muestra:
+        buscar_recorriendo(numero, filas_afip)
+    por_fila = (time.perf_counter() - inicio) / len(muestra)
+    print(f"   recorrido fila por fila: {por_fila * 1000:.1f} ms/fila -> {por_fila * n / 60:,.0f} min para {n:,}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inicio = time.perf_counter()
+        _, estadisticas = transformador.transformar_archivo_iibb_por_lotes(df_gh, os.path.join(tmp, "salida.csv"), df_afip)
+        print(f"   por lotes de a {estadisticas['registros_parseados'] // estadisticas['lotes']:,}: "
+              f"{time.perf_counter() - inicio:.2f}s, {estadisticas['registros_finales']:,} registros")
+
+
+if __name__ == "__main__":
+    test_indice_igual_a_recorrido()
+    test_por_lotes_igual_a_de_una_vez()
+    benchmark_200k()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test para la copia por bloques de archivos subidos (utils/upload_sink)
+"""
+
+import sys
+import os
+import asyncio
+import hashlib
+import resource
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.upload_sink import guardar_upload_en_disco, UploadTooLargeError, CHUNK_SIZE
+
+MB = 1024 * 1024
+
+
+class UploadSintetico:
+    """Imita un UploadFile generando el contenido a demanda, sin tenerlo entero en memoria"""
+
+    def __init__(self, total_bytes: int, filename: str = "sintetico.bin"):
+        self.filename = filename
+        self.total_bytes = total_bytes
+        self.enviados = 0
+        self.sha256 = hashlib.sha256()
+
+    async def read(self, size: int = -1) -> bytes:
+        restante = self.total_bytes - self.enviados
+        if restante <= 0:
+            return b""
+        if size < 0:
+            size = restante
+        n = min(size, restante)
+        chunk = bytes([self.enviados // MB % 256]) * n
+        self.enviados += n
+        self.sha256.update(chunk)
+        return chunk
+
+
+def _peak_rss_mb() -> float:
+    # En Linux ru_maxrss se expresa en KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def test_upload_200mb_rss_plano():
+    print("🧪 TESTING UPLOAD DE 200MB POR BLOQUES")
+    upload = UploadSintetico(200 * MB)
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = os.path.join(tmp, "grande.bin")
+        rss_antes = _peak_rss_mb()
+        resultado = asyncio.run(guardar_upload_en_disco(upload, destino))
+        rss_despues = _peak_rss_mb()
+
+        print(f"   Tamaño: {resultado.size} bytes")
+        print(f"   Pico RSS: {rss_antes:.1f}MB -> {rss_despues:.1f}MB")
+        assert resultado.size == 200 * MB
+        assert os.path.getsize(destino) == 200 * MB
+        assert resultado.sha256 == upload.sha256.hexdigest()
+        # El pico no debe crecer más que unos pocos bloques
+        assert rss_despues - rss_antes < 16 * CHUNK_SIZE / MB
+
+
+def test_upload_aborta_al_superar_limite():
+    print("\n🧪 TESTING LÍMITE DE TAMAÑO")
+    upload = UploadSintetico(200 * MB)
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = os.path.join(tmp, "grande.bin")
+        try:
+            asyncio.run(guardar_upload_en_disco(upload, destino, max_bytes=5 * MB))
+            assert False, "Se esperaba UploadTooLargeError"
+        except UploadTooLargeError:
+            pass
+        print(f"   Bytes leídos antes de abortar: {upload.enviados}")
+        # Se aborta en el primer bloque que excede el límite, sin leer el resto
+        assert upload.enviados <= 5 * MB + CHUNK_SIZE
+        assert not os.path.exists(destino)
+
+
+if __name__ == "__main__":
+    test_upload_200mb_rss_plano()
+    test_upload_aborta_al_superar_limite()
+
+    print("\n✅ Test completado!")
@@ -0,0 +1,188 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple, Union
+
+try:
+    import numpy as np
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Componentes de hasta estas celdas (filas x columnas) se resuelven con la matriz densa;
+# las más grandes con el algoritmo para matrices ralas
+MAX_CELDAS_DENSO = 2_000_000
+# Sin scipy: hasta este tamaño se usa el húngaro en Python puro, más grande cae a goloso
+MAX_CELDAS_SIN_SCIPY = 40_000
+
+Candidatos = Iterable[Tuple[int, int, float]]
+
+
+def asignacion_optima(candidatos: Union[Candidatos, "csr_matrix"], score_minimo: float = 0.0) -> List[Tuple[int, int, float]]:
+    """
+    Emparejamiento uno a uno que maximiza la suma de scores.
+
+    `candidatos` es la matriz rala de scores fila x columna (movimiento x
+    comprobante): una matriz de scipy.sparse o un iterable de
+    `(fila, columna, score)`. Los pares que no son candidatos no se pueden
+    asignar, y una fila o columna puede quedar sin pareja. Solo cuentan los
+    scores mayores que `score_minimo`; si un par se repite gana el mayor.
+
+    El grafo de candidatos se parte en componentes conexas y cada una se
+    resuelve por separado con `linear_sum_assignment`: un extracto de 20k
+    movimientos con pocos candidatos por movimiento se vuelve miles de
+    problemas densos chicos en lugar de una matriz de 20k x 20k.
+
+    Devuelve `(fila, columna, score)` ordenado por fila.
+    """
+    mejores = _mejores_scores(candidatos, score_minimo)
+    asignados: List[Tuple[int, int, float]] = []
+    for aristas in _componentes(mejores):
+        if len(aristas) == 1:
+            (fila, columna), score = next(iter(aristas.items()))
+            asignados.append((fila, columna, score))
+        else:
+            asignados.extend(_resolver_componente(aristas))
+    asignados.sort()
+    return asignados
+
+
+def _mejores_scores(candidatos, score_minimo: float) -> Dict[Tuple[int, int], float]:
+    if hasattr(candidatos, "tocoo"):
+        coo = candidatos.tocoo()
+        candidatos = zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist())
+    mejores: Dict[Tuple[int, int], float] = {}
+    for fila, columna, score in candidatos:
+        score = float(score)
+        if score > score_minimo and score > mejores.get((fila, columna), score_minimo):
+            mejores[(int(fila), int(columna))] = score
+    return mejores
+
+
+def _componentes(aristas: Dict[Tuple[int, int], float]) -> List[Dict[Tuple[int, int], float]]:
+    """Componentes conexas del grafo bipartito (union-find; las columnas van como nodos negativos)"""
+    padre: Dict[int, int] = {}
+
+    def raiz(nodo: int) -> int:
+        padre.setdefault(nodo, nodo)
+        while padre[nodo] != nodo:
+            padre[nodo] = padre[padre[nodo]]
+            nodo = padre[nodo]
+        return nodo
+
+    for fila, columna in aristas:
+        a, b = raiz(fila), raiz(-columna - 1)
+        if a != b:
+            padre[a] = b
+
+    componentes: Dict[int, Dict[Tuple[int, int], float]] = defaultdict(dict)
+    for par, score in aristas.items():
+        componentes[raiz(par[0])][par] = score
+    return list(componentes.values())
+
+
+def _resolver_componente(aristas: Dict[Tuple[int, int], float]) -> List[Tuple[int, int, float]]:
+    filas = sorted({f for f, _ in aristas})
+    columnas = sorted({c for _, c in aristas})
+    indice_fila = {f: i for i, f in enumerate(filas)}
+    indice_columna = {c: j for j, c in enumerate(columnas)}
+    celdas = len(filas) * len(columnas)
+
+    if SCIPY_AVAILABLE and celdas <= MAX_CELDAS_DENSO:
+        scores = np.zeros((len(filas), len(columnas)))
+        for (f, c), score in aristas.items():
+            scores[indice_fila[f], indice_columna[c]] = score
+        pares = zip(*linear_sum_assignment(scores, maximize=True))
+    elif SCIPY_AVAILABLE:
+        pares = _asignacion_rala(aristas, indice_fila, indice_columna)
+    elif celdas <= MAX_CELDAS_SIN_SCIPY:
+        scores = [[0.0] * len(columnas) for _ in filas]
+        for (f, c), score in aristas.items():
+            scores[indice_fila[f]][indice_columna[c]] = score
+        pares = _hungaro_max(scores)
+    else:
+        logger.warning(f"⚠️ scipy no disponible: componente de {len(filas)}x{len(columnas)} asignada en forma golosa")
+        return _asignacion_golosa(aristas)
+
+    asignados = []
+    for i, j in pares:
+        par = (filas[i], columnas[j])
+        # Los ceros de la matriz densa son pares que no eran candidatos
+        if par in aristas:
+            asignados.append((par[0], par[1], aristas[par]))
+    return asignados
+
+
+def _asignacion_rala(aristas, indice_fila, indice_columna) -> List[Tuple[int, int]]:
+    """
+    Componente grande: emparejamiento completo de mínimo costo sobre la matriz
+    rala. Cada fila tiene además una columna ficticia propia (quedar sin
+    pareja), así siempre existe un emparejamiento completo. Los costos son
+    `tope - score` (todos positivos: un cero sería una celda vacía).
+    """
+    n, m = len(indice_fila), len(indice_columna)
+    tope = max(aristas.values()) + 1.0
+    filas = [indice_fila[f] for f, _ in aristas] + list(range(n))
+    columnas = [indice_columna[c] for _, c in aristas] + [m + i for i in range(n)]
+    costos = [tope - s for s in aristas.values()] + [tope] * n
+    matriz = csr_matrix((costos, (filas, columnas)), shape=(n, m + n))
+    fila_ind, columna_ind = min_weight_full_bipartite_matching(matriz)
+    return [(i, j) for i, j in zip(fila_ind.tolist(), columna_ind.tolist()) if j < m]
+
+
+def _hungaro_max(scores: List[List[float]]) -> List[Tuple[int, int]]:
+    """Húngaro O(n²m) en Python puro (maximiza); reemplazo de linear_sum_assignment sin scipy"""
+    transpuesta = len(scores) > len(scores[0])
+    if transpuesta:
+        scores = [list(columna) for columna in zip(*scores)]
+    n, m = len(scores), len(scores[0])
+    infinito = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    pareja = [0] * (m + 1)
+    camino = [0] * (m + 1)
+    for i in range(1, n + 1):
+        pareja[0] = i
+        j0 = 0
+        minimos = [infinito] * (m + 1)
+        usado = [False] * (m + 1)
+        while True:
+            usado[j0] = True
+            i0, delta, j1 = pareja[j0], infinito, 0
+            fila = scores[i0 - 1]
+            for j in range(1, m + 1):
+                if not usado[j]:
+                    actual = -fila[j - 1] - u[i0] - v[j]
+                    if actual < minimos[j]:
+                        minimos[j], camino[j] = actual, j0
+                    if minimos[j] < delta:
+                        delta, j1 = minimos[j], j
+            for j in range(m + 1):
+                if usado[j]:
+                    u[pareja[j]] += delta
+                    v[j] -= delta
+                else:
+                    minimos[j] -= delta
+            j0 = j1
+            if pareja[j0] == 0:
+                break
+        while j0:
+            j1 = camino[j0]
+            pareja[j0] = pareja[j1]
+            j0 = j1
+    pares = [(pareja[j] - 1, j - 1) for j in range(1, m + 1) if pareja[j]]
+    return [(j, i) for i, j in pares] if transpuesta else pares
+
+
+def _asignacion_golosa(aristas: Dict[Tuple[int, int], float]) -> List[Tuple[int, int, float]]:
+    filas_usadas, columnas_usadas, asignados = set(), set(), []
+    for (f, c), score in sorted(aristas.items(), key=lambda a: -a[1]):
+        if f not in filas_usadas and c not in columnas_usadas:
+            filas_usadas.add(f)
+            columnas_usadas.add(c)
+            asignados.append((f, c, score))
+    return asignados
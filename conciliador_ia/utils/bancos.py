@@ -0,0 +1,171 @@
+import unicodedata
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bancos argentinos conocidos y las palabras clave que los identifican
+BANCOS_CONOCIDOS: Dict[str, List[str]] = {
+    'BBVA': ['bbva', 'banco bilbao vizcaya', 'banco bbva argentina'],
+    'Santander': ['santander', 'banco santander argentina'],
+    'Macro': ['macro', 'banco macro'],
+    'Nación': ['nacion', 'banco nacion', 'banco de la nacion argentina'],
+    'Galicia': ['galicia', 'banco galicia'],
+    'HSBC': ['hsbc', 'banco hsbc argentina'],
+    'Itaú': ['itau', 'banco itau argentina'],
+    'Banco Ciudad': ['ciudad', 'banco ciudad'],
+    'Banco Provincia': ['provincia', 'banco provincia'],
+    'Banco Comafi': ['comafi', 'banco comafi'],
+    'Banco Industrial': ['industrial', 'banco industrial'],
+    'Banco Supervielle': ['supervielle', 'banco supervielle'],
+    'Banco Credicoop': ['credicoop', 'banco credicoop'],
+    'Banco Patagonia': ['patagonia', 'banco patagonia'],
+    'Banco Piano': ['piano', 'banco piano'],
+    'Banco de Córdoba': ['cordoba', 'banco de cordoba'],
+    'Banco de Santa Fe': ['santa fe', 'banco de santa fe'],
+    'Banco de Tucumán': ['tucuman', 'banco de tucuman'],
+    'MercadoPago': ['mercadopago', 'mercadopago argentina'],
+    'Ualá': ['uala', 'uala argentina'],
+    'Naranja X': ['naranja x', 'naranja'],
+    'Personal Pay': ['personal pay', 'personal'],
+    'MODO': ['modo', 'modo argentina'],
+}
+
+# Menciones del ganador a partir de las cuales la confianza deja de penalizarse
+MENCIONES_CONFIANZA_PLENA = 2
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas y sin tildes ("Nación" -> "nacion")"""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    # Solo se reemplazan los caracteres no ASCII que aparecen (pocos), no todo el texto
+    for caracter in set(texto):
+        if not caracter.isascii():
+            base = _sin_tildes(caracter)
+            if base != caracter:
+                texto = texto.replace(caracter, base)
+    return texto
+
+
+@lru_cache(maxsize=1024)
+def _sin_tildes(caracter: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", caracter)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+@dataclass
+class DeteccionBanco:
+    """Resultado de una pasada del autómata: ganador, confianza y menciones por banco"""
+    banco: Optional[str]
+    confianza: float
+    menciones: Dict[str, int] = field(default_factory=dict)
+
+
+class AutomataPalabrasClave:
+    """
+    Autómata Aho–Corasick sobre las palabras clave de varias etiquetas (bancos).
+
+    Se construye una vez y recorre el texto en una sola pasada lineal,
+    contando cuántas palabras clave de cada etiqueta aparecen, en lugar de
+    buscar cada palabra clave por separado con `in`. Con `palabras_completas`
+    solo cuentan las coincidencias que no están pegadas a otras letras o
+    dígitos ("macro" no cuenta dentro de "macroeconomía").
+    """
+
+    def __init__(self, palabras_por_etiqueta: Dict[str, Iterable[str]], palabras_completas: bool = True):
+        self.etiquetas = list(palabras_por_etiqueta)
+        self.palabras_completas = palabras_completas
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Por estado: (largo de la palabra, etiqueta) de cada palabra que termina ahí
+        self._salidas: List[List[Tuple[int, str]]] = [[]]
+
+        for etiqueta, palabras in palabras_por_etiqueta.items():
+            for palabra in palabras:
+                self._agregar(normalizar_texto(palabra), etiqueta)
+        self._construir_fallos()
+
+    def _agregar(self, palabra: str, etiqueta: str) -> None:
+        estado = 0
+        for caracter in palabra:
+            siguiente = self._goto[estado].get(caracter)
+            if siguiente is None:
+                siguiente = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._salidas.append([])
+                self._goto[estado][caracter] = siguiente
+            estado = siguiente
+        self._salidas[estado].append((len(palabra), etiqueta))
+
+    def _construir_fallos(self) -> None:
+        """Enlaces de fallo (BFS) y plegado de las transiciones: cada estado queda
+        con su tabla completa, así el recorrido no vuelve a seguir fallos."""
+        cola = deque(self._goto[0].values())
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self._goto[estado].items():
+                cola.append(siguiente)
+                fallo = self._fail[estado]
+                while fallo and caracter not in self._goto[fallo]:
+                    fallo = self._fail[fallo]
+                destino = self._goto[fallo].get(caracter, 0)
+                self._fail[siguiente] = destino if destino != siguiente else 0
+                self._salidas[siguiente] = self._salidas[siguiente] + self._salidas[self._fail[siguiente]]
+
+        # Transiciones plegadas (autómata determinista), en orden BFS para que
+        # la tabla del estado de fallo ya esté completa
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [{} for _ in self._goto[1:]]
+        cola = deque(self._goto[0].values())
+        while cola:
+            estado = cola.popleft()
+            self._delta[estado] = {**self._delta[self._fail[estado]], **self._goto[estado]}
+            cola.extend(self._goto[estado].values())
+
+    def contar(self, texto: str) -> Counter:
+        """Menciones por etiqueta en el texto (una pasada)"""
+        texto = normalizar_texto(texto)
+        menciones: Counter = Counter()
+        delta, salidas = self._delta, self._salidas
+        completas = self.palabras_completas
+        estado = 0
+        for posicion, caracter in enumerate(texto):
+            estado = delta[estado].get(caracter, 0)
+            if salidas[estado]:
+                for largo, etiqueta in salidas[estado]:
+                    if completas and not _es_palabra_completa(texto, posicion - largo + 1, posicion + 1):
+                        continue
+                    menciones[etiqueta] += 1
+        return menciones
+
+    def primera(self, texto: str) -> Optional[str]:
+        """La primera etiqueta declarada que aparece en el texto, sin importar cuántas veces"""
+        menciones = self.contar(texto)
+        return next((etiqueta for etiqueta in self.etiquetas if menciones[etiqueta]), None)
+
+    def detectar(self, texto: str) -> DeteccionBanco:
+        """
+        Etiqueta con más menciones y su confianza en [0, 1]: la proporción de
+        menciones que se lleva, penalizada si aparece menos de
+        MENCIONES_CONFIANZA_PLENA veces. A igualdad gana la primera declarada.
+        """
+        menciones = self.contar(texto)
+        if not menciones:
+            return DeteccionBanco(banco=None, confianza=0.0, menciones={})
+        orden = {etiqueta: i for i, etiqueta in enumerate(self.etiquetas)}
+        banco, hits = max(menciones.items(), key=lambda item: (item[1], -orden[item[0]]))
+        total = sum(menciones.values())
+        confianza = (hits / total) * min(1.0, hits / MENCIONES_CONFIANZA_PLENA)
+        return DeteccionBanco(banco=banco, confianza=round(confianza, 3), menciones=dict(menciones))
+
+
+def _es_palabra_completa(texto: str, inicio: int, fin: int) -> bool:
+    antes = texto[inicio - 1] if inicio > 0 else " "
+    despues = texto[fin] if fin < len(texto) else " "
+    return not antes.isalnum() and not despues.isalnum()
+
+
+# Autómata de los bancos conocidos, construido una sola vez al importar
+AUTOMATA_BANCOS = AutomataPalabrasClave(BANCOS_CONOCIDOS)
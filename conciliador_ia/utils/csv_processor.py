@@ -8,6 +8,7 @@ import pandas as pd
 import logging
 from typing import Dict, List, Any, Optional
 from .validators import ContabilidadValidator
+from .cuit import limpiar_cuit, validar_cuits
 
 logger = logging.getLogger(__name__)
 
@@ -128,11 +129,13 @@ class ARCAProcessor:
                 lambda x: self.validator.validar_monto(x)
             )
         
-        # Validar CUIT
+        # Validar CUIT: el dígito verificador de toda la columna de una vez,
+        # y solo los inválidos pasan por la reparación valor a valor
         if 'cuit' in df_validado.columns:
-            df_validado['cuit'] = df_validado['cuit'].apply(
-                lambda x: self.validator.validar_cuit(x)
-            )
+            limpios = df_validado['cuit'].map(limpiar_cuit)
+            invalidos = ~pd.Series(validar_cuits(limpios.tolist()), index=df_validado.index, dtype=bool)
+            limpios[invalidos] = df_validado.loc[invalidos, 'cuit'].map(self.validator.validar_cuit)
+            df_validado['cuit'] = limpios
         
         # Validar tipos de comprobante
         if 'tipo' in df_validado.columns:
@@ -0,0 +1,172 @@
+"""
+CUIT/CUIL: dígito verificador (módulo 11), sugerencias de reparación y
+CUITs de relleno deterministas.
+
+El dígito verificador es 11 - (Σ dígito_i x peso_i mod 11) con los pesos
+5,4,3,2,7,6,5,4,3,2 sobre los 10 primeros dígitos; 11 pasa a 0 y 10 no
+existe (AFIP le asigna otro prefijo a ese número).
+"""
+
+import hashlib
+import re
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+PESOS = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+# Personas humanas (20, 23, 24, 27; 25 y 26 los de reasignación) y jurídicas (30, 33, 34)
+PREFIJOS_VALIDOS = ("20", "23", "24", "25", "26", "27", "30", "33", "34")
+# Prefijos a probar cuando llega un DNI: primero los más comunes
+PREFIJOS_PERSONA = ("20", "27", "23", "24")
+
+_PATRON_NO_DIGITO = re.compile(r"\D")
+_PREFIJOS_INT = tuple(int(p) for p in PREFIJOS_VALIDOS)
+
+
+def limpiar_cuit(cuit: Any) -> str:
+    """Solo los dígitos ("20-12345678-6" -> "20123456786"); None o NaN quedan vacíos"""
+    try:
+        if cuit is None or cuit != cuit:
+            return ""
+    except TypeError:
+        # pd.NA no se puede comparar
+        return ""
+    texto = str(cuit)
+    # 20123456786.0 de una columna numérica de Excel
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    return _PATRON_NO_DIGITO.sub("", texto)
+
+
+def digito_verificador(base: str) -> int:
+    """Dígito verificador de los 10 primeros dígitos; 10 si no hay ninguno válido"""
+    resto = sum(int(d) * p for d, p in zip(base, PESOS)) % 11
+    return (11 - resto) % 11
+
+
+def es_cuit_valido(cuit: Any) -> bool:
+    """11 dígitos, prefijo conocido y dígito verificador correcto"""
+    digitos = limpiar_cuit(cuit)
+    if len(digitos) != 11 or digitos[:2] not in PREFIJOS_VALIDOS:
+        return False
+    return digito_verificador(digitos) == int(digitos[10])
+
+
+def formatear_cuit(cuit: Any) -> str:
+    """XX-XXXXXXXX-X (si no son 11 dígitos se devuelve limpio)"""
+    digitos = limpiar_cuit(cuit)
+    if len(digitos) != 11:
+        return digitos
+    return f"{digitos[:2]}-{digitos[2:10]}-{digitos[10:]}"
+
+
+def cuits_a_digitos(cuits: Iterable[Any]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Matriz N x 11 de dígitos (uint8) y máscara de los que tienen 11 dígitos.
+
+    La limpieza es por valor; el resto (bytes -> dígitos) es una sola
+    conversión de numpy sobre el bloque entero.
+    """
+    limpios = [limpiar_cuit(c) for c in cuits]
+    largos = np.fromiter((len(c) for c in limpios), dtype=np.int64, count=len(limpios))
+    bloque = np.array(limpios, dtype="S11") if limpios else np.zeros(0, dtype="S11")
+    digitos = bloque.view(np.uint8).reshape(-1, 11) - ord("0")
+    return digitos, largos == 11
+
+
+def validar_cuits(cuits: Union[Sequence[Any], "np.ndarray"]) -> Union[List[bool], "np.ndarray"]:
+    """
+    Validez de muchos CUITs a la vez.
+
+    `cuits` puede ser una matriz N x 11 de dígitos (lo más rápido: un
+    producto por los pesos y un módulo para todo el bloque) o una secuencia
+    de CUITs en cualquier formato. Con numpy devuelve un array de bool; sin
+    numpy, una lista.
+    """
+    if not NUMPY_AVAILABLE:
+        return [es_cuit_valido(c) for c in cuits]
+    if isinstance(cuits, np.ndarray) and cuits.ndim == 2:
+        digitos, largo_ok = cuits, np.ones(len(cuits), dtype=bool)
+    else:
+        digitos, largo_ok = cuits_a_digitos(cuits)
+    if not len(digitos):
+        return np.zeros(0, dtype=bool)
+    digitos = digitos.astype(np.int64, copy=False)
+    esperado = (11 - (digitos[:, :10] @ np.array(PESOS, dtype=np.int64)) % 11) % 11
+    prefijo = digitos[:, 0] * 10 + digitos[:, 1]
+    return largo_ok & (esperado == digitos[:, 10]) & np.isin(prefijo, _PREFIJOS_INT)
+
+
+def _con_verificador(base: str) -> Optional[str]:
+    dv = digito_verificador(base)
+    return None if dv == 10 else base + str(dv)
+
+
+def sugerir_reparaciones(cuit: Any) -> List[str]:
+    """
+    CUITs válidos cercanos a `cuit`, en orden fijo de probabilidad:
+
+    - 11 dígitos: dos dígitos contiguos transpuestos (de izquierda a
+      derecha), luego el dígito verificador recalculado;
+    - 10 dígitos con prefijo: falta el dígito verificador;
+    - 7 u 8 dígitos (un DNI): falta el prefijo, se prueban 20, 27, 23, 24.
+
+    Un CUIT ya válido devuelve [él mismo]; si no hay nada razonable, [].
+    Son solo sugerencias para confirmar: un dígito mal en cualquier otra
+    posición suele dar también un CUIT válido, pero de otra persona.
+    """
+    digitos = limpiar_cuit(cuit)
+    if es_cuit_valido(digitos):
+        return [digitos]
+
+    sugerencias: List[str] = []
+    if len(digitos) == 11:
+        sugerencias.extend(_transposiciones(digitos))
+        if digitos[:2] in PREFIJOS_VALIDOS:
+            sugerencias.append(_con_verificador(digitos[:10]))
+    elif len(digitos) == 10 and digitos[:2] in PREFIJOS_VALIDOS:
+        sugerencias.append(_con_verificador(digitos))
+    elif len(digitos) in (7, 8):
+        dni = digitos.zfill(8)
+        sugerencias.extend(_con_verificador(prefijo + dni) for prefijo in PREFIJOS_PERSONA)
+
+    vistas = set()
+    return [s for s in sugerencias if s and not (s in vistas or vistas.add(s))]
+
+
+def _transposiciones(digitos: str) -> List[str]:
+    """CUITs válidos que salen de transponer dos dígitos contiguos de `digitos` (11 dígitos)"""
+    candidatos = []
+    for i in range(10):
+        if digitos[i] != digitos[i + 1]:
+            candidato = digitos[:i] + digitos[i + 1] + digitos[i] + digitos[i + 2:]
+            if es_cuit_valido(candidato):
+                candidatos.append(candidato)
+    return candidatos
+
+
+def cuit_de_dni(dni: Any, prefijo: str = "20") -> str:
+    """
+    CUIT de un DNI (los últimos 8 dígitos). Si con `prefijo` el verificador
+    daría 10, se pasa a 23 como hace AFIP.
+    """
+    base = limpiar_cuit(dni)[-8:].zfill(8)
+    return _con_verificador(prefijo + base) or _con_verificador("23" + base)
+
+
+def cuit_placeholder(semilla: Any, prefijo: str = "20") -> str:
+    """
+    CUIT de relleno con dígito verificador válido, siempre el mismo para la
+    misma `semilla` (número de factura, nombre del cliente, fila...): dos
+    corridas sobre el mismo archivo generan los mismos documentos.
+    """
+    numero = int.from_bytes(hashlib.sha256(str(semilla).encode("utf-8")).digest()[:8], "big") % 10**8
+    while True:
+        cuit = _con_verificador(f"{prefijo}{numero:08d}")
+        if cuit:
+            return cuit
+        numero = (numero + 1) % 10**8
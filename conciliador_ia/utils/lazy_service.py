@@ -0,0 +1,51 @@
+import logging
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ServicioPerezoso(Generic[T]):
+    """
+    Singleton de servicio que se construye recién en el primer uso.
+
+    Los routers lo declaran a nivel de módulo igual que antes
+    (`processor = ServicioPerezoso(ClienteProcessor)`) y lo usan como si fuera
+    la instancia: el primer acceso a un atributo llama a la fábrica una sola
+    vez (thread-safe) y los siguientes delegan directo en la instancia creada.
+    Así importar el router no abre clientes de OpenAI ni crea directorios.
+    """
+
+    def __init__(self, fabrica: Callable[..., T], *args: Any, **kwargs: Any):
+        self._fabrica = fabrica
+        self._args = args
+        self._kwargs = kwargs
+        self._instancia: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def construido(self) -> bool:
+        return self._instancia is not None
+
+    def obtener(self) -> T:
+        instancia = self._instancia
+        if instancia is None:
+            with self._lock:
+                if self._instancia is None:
+                    nombre = getattr(self._fabrica, "__name__", repr(self._fabrica))
+                    logger.info(f"⚙️ Inicializando {nombre} (primer uso)")
+                    self._instancia = self._fabrica(*self._args, **self._kwargs)
+                instancia = self._instancia
+        return instancia
+
+    def __getattr__(self, nombre: str) -> Any:
+        # Solo se llama para atributos que no están en el proxy
+        if nombre.startswith("__"):
+            raise AttributeError(nombre)
+        return getattr(self.obtener(), nombre)
+
+    def __repr__(self) -> str:
+        estado = "construido" if self.construido else "pendiente"
+        return f"<ServicioPerezoso {getattr(self._fabrica, '__name__', self._fabrica)} ({estado})>"
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+class LoggerMuestreado:
+    """
+    Envoltorio de logger para loops calientes (una línea por fila o por movimiento).
+
+    Deja pasar los primeros `primeros` mensajes, luego uno de cada `cada` y, si se
+    indica, nunca más de `max_por_segundo`. El chequeo de nivel se hace antes de
+    formatear, así que los mensajes descartados cuestan un contador y nada más;
+    por eso conviene pasar los argumentos estilo %-format en lugar de f-strings.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        primeros: int = 10,
+        cada: int = 1000,
+        max_por_segundo: Optional[float] = None,
+    ):
+        self.logger = logger
+        self.primeros = primeros
+        self.cada = max(1, cada)
+        self.max_por_segundo = max_por_segundo
+        self.vistos = 0
+        self.emitidos = 0
+        self.descartados = 0
+        self._ventana_inicio = 0.0
+        self._ventana_emitidos = 0
+        self._lock = threading.Lock()
+
+    def _dejar_pasar(self) -> bool:
+        with self._lock:
+            self.vistos += 1
+            pasa = self.vistos <= self.primeros or (self.vistos - self.primeros) % self.cada == 0
+            if pasa and self.max_por_segundo is not None:
+                ahora = time.monotonic()
+                if ahora - self._ventana_inicio >= 1.0:
+                    self._ventana_inicio = ahora
+                    self._ventana_emitidos = 0
+                if self._ventana_emitidos >= self.max_por_segundo:
+                    pasa = False
+                else:
+                    self._ventana_emitidos += 1
+            if pasa:
+                self.emitidos += 1
+            else:
+                self.descartados += 1
+            return pasa
+
+    def log(self, nivel: int, msg: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(nivel) and self._dejar_pasar():
+            self.logger.log(nivel, msg, *args, stacklevel=3)
+
+    def debug(self, msg: str, *args: Any) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args: Any) -> None:
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg: str, *args: Any) -> None:
+        self.log(logging.WARNING, msg, *args)
+
+
+class ResumenEtapa:
+    """
+    Acumula conteos por evento y los primeros ejemplos de cada uno durante una
+    etapa, y al cerrarla emite un único registro con el resumen.
+
+        with ResumenEtapa(logger, "detectar_nuevos_clientes") as resumen:
+            for fila in filas:
+                resumen.contar("nuevo", ejemplo=fila["nombre"])
+    """
+
+    def __init__(self, logger: logging.Logger, etapa: str, max_ejemplos: int = 3, nivel: int = logging.INFO):
+        self.logger = logger
+        self.etapa = etapa
+        self.max_ejemplos = max_ejemplos
+        self.nivel = nivel
+        self.conteos: Counter = Counter()
+        self.ejemplos: Dict[str, List[Any]] = {}
+        self._inicio = time.perf_counter()
+
+    def contar(self, evento: str, ejemplo: Any = None, cantidad: int = 1) -> None:
+        self.conteos[evento] += cantidad
+        if ejemplo is not None:
+            ejemplos = self.ejemplos.setdefault(evento, [])
+            if len(ejemplos) < self.max_ejemplos:
+                ejemplos.append(ejemplo)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "etapa": self.etapa,
+            "duracion_s": round(time.perf_counter() - self._inicio, 3),
+            "conteos": dict(self.conteos),
+            "ejemplos": self.ejemplos,
+        }
+
+    def emitir(self) -> None:
+        if self.logger.isEnabledFor(self.nivel):
+            resumen = self.como_dict()
+            self.logger.log(
+                self.nivel,
+                "📊 Resumen %s (%.3fs): %s | ejemplos: %s",
+                resumen["etapa"], resumen["duracion_s"], resumen["conteos"], resumen["ejemplos"],
+                stacklevel=2,
+            )
+
+    def __enter__(self) -> "ResumenEtapa":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.emitir()
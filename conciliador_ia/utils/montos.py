@@ -0,0 +1,94 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Todo lo que no es dígito ni separador (moneda, signos, espacios, letras de "ARS", "U$S", ...)
+_PATRON_NO_NUMERICO = r'[^\d,.]'
+
+
+def detectar_separador_decimal(montos: pd.Series) -> str:
+    """
+    Decide el separador decimal de una columna de montos por mayoría.
+
+    Votan solo los valores que no son ambiguos: los que traen ambos
+    separadores (el último es el decimal), los que repiten uno solo
+    ("1.234.567": el repetido es de miles) y los que tienen un único
+    separador seguido de una cantidad de dígitos distinta de 3 ("12,50").
+    Sin votos, o con empate, gana el formato argentino (coma decimal).
+    """
+    return _votar(_decimal_por_valor(_limpiar(montos.astype("string"))))
+
+
+def parsear_montos(montos: pd.Series, decimal: Optional[str] = None) -> pd.Series:
+    """
+    Convierte una columna de montos en texto ("1.234.567,89", "-$ 12,50",
+    "(1.000,00)", "USD 1,234.56") a float en una sola pasada vectorizada.
+
+    - El separador decimal se detecta por columna (ver `detectar_separador_decimal`)
+      salvo que se indique; los valores que traen evidencia propia (ambos
+      separadores, separador repetido, decimales que no son 3 dígitos) usan la suya.
+    - Negativos: "-" en cualquier posición o el monto entre paréntesis.
+    - Los valores que ya son numéricos se devuelven tal cual.
+    - Lo que no se puede convertir queda como NaN.
+    """
+    if pd.api.types.is_numeric_dtype(montos) and not pd.api.types.is_bool_dtype(montos):
+        return montos.astype(float)
+
+    texto = montos.astype("string")
+    limpio = _limpiar(texto)
+    decimal_valor = _decimal_por_valor(limpio)
+    if decimal is None:
+        decimal = _votar(decimal_valor)
+
+    usar_coma = decimal_valor.where(decimal_valor != "", decimal) == ","
+    con_coma = limpio.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    con_punto = limpio.str.replace(",", "", regex=False)
+    normalizado = con_coma.where(usar_coma, con_punto).replace("", pd.NA)
+
+    valores = pd.to_numeric(normalizado, errors="coerce").astype(float)
+
+    negativo = (
+        texto.str.contains("-", regex=False) | texto.str.contains(r"\(.*\d.*\)", regex=True)
+    ).fillna(False).astype(bool)
+    valores = valores.where(~negativo, -valores)
+
+    # Valores que ya venían como número (columnas object mixtas)
+    es_numero = montos.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool))
+    if es_numero.any():
+        valores = valores.where(~es_numero, pd.to_numeric(montos.where(es_numero), errors="coerce"))
+    return valores
+
+
+def _limpiar(texto: pd.Series) -> pd.Series:
+    return texto.str.replace(_PATRON_NO_NUMERICO, "", regex=True)
+
+
+def _decimal_por_valor(limpio: pd.Series) -> pd.Series:
+    """Separador decimal que se deduce de cada valor limpio, o "" si es ambiguo o no tiene"""
+    comas = limpio.str.count(",").fillna(0).astype(int)
+    puntos = limpio.str.count(r"\.").fillna(0).astype(int)
+    ultima_coma = limpio.str.rfind(",").fillna(-1).astype(int)
+    ultimo_punto = limpio.str.rfind(".").fillna(-1).astype(int)
+    digitos_finales = limpio.str.len().fillna(0).astype(int) - 1 - np.maximum(ultima_coma, ultimo_punto)
+
+    ambos = (comas > 0) & (puntos > 0)
+    solo_comas = (comas > 0) & (puntos == 0)
+    solo_puntos = (puntos > 0) & (comas == 0)
+
+    condiciones = [
+        ambos & (ultima_coma > ultimo_punto),    # "1.234,56"
+        ambos & (ultimo_punto > ultima_coma),    # "1,234.56"
+        solo_comas & (comas > 1),                # "1,234,567": coma de miles
+        solo_puntos & (puntos > 1),              # "1.234.567": punto de miles
+        solo_comas & (digitos_finales != 3),     # "12,50"
+        solo_puntos & (digitos_finales != 3),    # "1234.5"
+    ]
+    opciones = [",", ".", ".", ",", ",", "."]
+    return pd.Series(np.select(condiciones, opciones, default=""), index=limpio.index)
+
+
+def _votar(decimal_valor: pd.Series) -> str:
+    votos_punto = int((decimal_valor == ".").sum())
+    votos_coma = int((decimal_valor == ",").sum())
+    return "." if votos_punto > votos_coma else ","
@@ -0,0 +1,170 @@
+import bisect
+import math
+import numbers
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Diferencia aceptada entre el pago y la suma de las facturas (en pesos)
+TOLERANCIA = float(os.getenv("PAGO_MULTIPLE_TOLERANCIA", "0.01"))
+# Días entre la fecha del pago y la de cada factura
+VENTANA_DIAS = int(os.getenv("PAGO_MULTIPLE_VENTANA_DIAS", "45"))
+# Topes duros: facturas candidatas por pago (2^(n/2) sumas por mitad), facturas por combinación y tiempo
+MAX_CANDIDATOS = int(os.getenv("PAGO_MULTIPLE_MAX_CANDIDATOS", "24"))
+MAX_FACTURAS = int(os.getenv("PAGO_MULTIPLE_MAX_FACTURAS", "8"))
+TIEMPO_MAXIMO_PAGO_S = float(os.getenv("PAGO_MULTIPLE_TIEMPO_MAXIMO_PAGO_S", "0.05"))
+TIEMPO_MAXIMO_TOTAL_S = float(os.getenv("PAGO_MULTIPLE_TIEMPO_MAXIMO_TOTAL_S", "2"))
+
+# Cada cuántas sumas se mira el reloj
+_PASOS_ENTRE_CONTROLES = 1024
+
+
+@dataclass
+class CombinacionPago:
+    """Facturas (índices) que suman el importe de un pago"""
+    indices: Tuple[int, ...]
+    total: float
+    diferencia: float
+
+
+def buscar_combinacion(importe: float, montos: Sequence[float], tolerancia: float = TOLERANCIA,
+                       max_facturas: int = MAX_FACTURAS, max_candidatos: int = MAX_CANDIDATOS,
+                       tiempo_maximo_s: float = TIEMPO_MAXIMO_PAGO_S) -> Optional[CombinacionPago]:
+    """
+    Subconjunto de 2 a `max_facturas` montos que suma `importe` ± `tolerancia`.
+
+    Meet-in-the-middle sobre centavos enteros: los candidatos se parten en dos
+    mitades, se enumeran las sumas de cada una (con poda de las que ya se
+    pasan del importe) y para cada suma de la izquierda se busca por bisección
+    el complemento en la derecha. Con `max_candidatos` = 24 son a lo sumo
+    2 x 4096 sumas; además se corta a los `tiempo_maximo_s` y se devuelve lo
+    mejor encontrado hasta ahí. Solo se miran los primeros `max_candidatos`
+    montos: el que llama los ordena por relevancia.
+
+    Entre varias combinaciones gana la de menos facturas y, a igualdad, la de
+    menor diferencia. Devuelve None si no hay ninguna.
+    """
+    if not _es_finito(importe):
+        return None
+    limite = time.monotonic() + tiempo_maximo_s
+    objetivo = round(importe * 100)
+    tolerancia_c = round(tolerancia * 100)
+    techo = objetivo + tolerancia_c
+
+    # Montos vacíos o NaN (celdas sin dato) no entran en ninguna combinación
+    candidatos = [(i, round(m * 100)) for i, m in enumerate(montos[:max_candidatos]) if _es_finito(m)]
+    candidatos = [(i, c) for i, c in candidatos if 0 < c <= techo]
+    if len(candidatos) < 2:
+        return None
+
+    mitad = len(candidatos) // 2
+    izquierda = _sumas(candidatos[:mitad], techo, max_facturas, limite)
+    derecha = sorted(_sumas(candidatos[mitad:], techo, max_facturas, limite))
+    sumas_derecha = [s for s, _, _ in derecha]
+
+    mejor: Optional[Tuple[int, int, Tuple[int, ...]]] = None
+    pasos = 0
+    for suma, cantidad, indices in izquierda:
+        desde = bisect.bisect_left(sumas_derecha, objetivo - tolerancia_c - suma)
+        hasta = bisect.bisect_right(sumas_derecha, techo - suma)
+        for k in range(desde, hasta):
+            suma_d, cantidad_d, indices_d = derecha[k]
+            total = cantidad + cantidad_d
+            if 2 <= total <= max_facturas:
+                clave = (total, abs(suma + suma_d - objetivo), indices + indices_d)
+                if mejor is None or clave < mejor:
+                    mejor = clave
+        pasos += 1 + hasta - desde
+        if pasos >= _PASOS_ENTRE_CONTROLES:
+            pasos = 0
+            if time.monotonic() > limite:
+                break
+
+    if mejor is None:
+        return None
+    indices = tuple(sorted(mejor[2]))
+    total = sum(round(montos[i] * 100) for i in indices) / 100
+    return CombinacionPago(indices=indices, total=total, diferencia=round(total - importe, 2))
+
+
+def _sumas(candidatos: List[Tuple[int, int]], techo: int, max_facturas: int,
+           limite: float) -> List[Tuple[int, int, Tuple[int, ...]]]:
+    """Sumas de los subconjuntos (suma, cantidad, índices) que no pasan `techo`; se corta en `limite`"""
+    sumas = [(0, 0, ())]
+    for indice, centavos in candidatos:
+        if time.monotonic() > limite:
+            break
+        sumas += [
+            (s + centavos, k + 1, idx + (indice,))
+            for s, k, idx in sumas if s + centavos <= techo and k < max_facturas
+        ]
+    return sumas
+
+
+def conciliar_pagos_multiples(pagos: List[Dict[str, Any]], facturas: List[Dict[str, Any]],
+                              ventana_dias: int = VENTANA_DIAS, tolerancia: float = TOLERANCIA,
+                              tiempo_maximo_total_s: float = TIEMPO_MAXIMO_TOTAL_S,
+                              **topes) -> Dict[int, CombinacionPago]:
+    """
+    Pagos que cancelan varias facturas a la vez.
+
+    `pagos` y `facturas` son dicts con `importe`, `fecha` (datetime o None) y
+    `contraparte` (proveedor o cliente ya normalizado). Para cada pago se
+    buscan combinaciones entre las facturas libres de la misma contraparte
+    dentro de `ventana_dias`, las más cercanas en fecha primero. Cada factura
+    se usa una sola vez; los pagos grandes eligen primero. Pasado
+    `tiempo_maximo_total_s` no se buscan más pagos.
+
+    Devuelve {índice de pago: CombinacionPago} con índices de `facturas`.
+    """
+    limite = time.monotonic() + tiempo_maximo_total_s
+    por_contraparte: Dict[str, List[int]] = defaultdict(list)
+    for j, factura in enumerate(facturas):
+        if factura.get("contraparte"):
+            por_contraparte[factura["contraparte"]].append(j)
+
+    usadas = set()
+    resultado: Dict[int, CombinacionPago] = {}
+    orden = sorted(range(len(pagos)), key=lambda i: -_importe(pagos[i]))
+    for i in orden:
+        if time.monotonic() > limite:
+            break
+        pago = pagos[i]
+        importe = _importe(pago)
+        if not importe or not pago.get("contraparte"):
+            continue
+        candidatas = [
+            j for j in por_contraparte.get(pago["contraparte"], [])
+            if j not in usadas and _dentro_de_ventana(pago.get("fecha"), facturas[j].get("fecha"), ventana_dias)
+        ]
+        candidatas.sort(key=lambda j: _distancia_dias(pago.get("fecha"), facturas[j].get("fecha")))
+        combinacion = buscar_combinacion(importe, [_importe(facturas[j]) for j in candidatas],
+                                         tolerancia=tolerancia, **topes)
+        if combinacion:
+            indices = tuple(sorted(candidatas[k] for k in combinacion.indices))
+            usadas.update(indices)
+            resultado[i] = CombinacionPago(indices=indices, total=combinacion.total, diferencia=combinacion.diferencia)
+    return resultado
+
+
+def _es_finito(valor: Any) -> bool:
+    return isinstance(valor, numbers.Real) and math.isfinite(valor)
+
+
+def _importe(registro: Dict[str, Any]) -> float:
+    """Importe absoluto de un pago o factura; 0 si falta o no es un número finito"""
+    importe = registro.get("importe")
+    return abs(importe) if _es_finito(importe) else 0.0
+
+
+def _distancia_dias(a: Optional[datetime], b: Optional[datetime]) -> int:
+    if a is None or b is None:
+        return 0
+    return abs((a - b).days)
+
+
+def _dentro_de_ventana(a: Optional[datetime], b: Optional[datetime], ventana_dias: int) -> bool:
+    return _distancia_dias(a, b) <= ventana_dias
@@ -0,0 +1,173 @@
+import os
+import re
+from collections import defaultdict
+from math import sqrt
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+try:
+    from .bancos import normalizar_texto
+except ImportError:
+    from utils.bancos import normalizar_texto
+
+# Similitud coseno de trigramas por debajo de la cual dos proveedores no se parecen
+SIMILITUD_MINIMA_PROVEEDOR = float(os.getenv("SIMILITUD_MINIMA_PROVEEDOR", "0.5"))
+
+# Formas societarias que no distinguen a un proveedor ("Insumos S.R.L." == "Insumos")
+SUFIJOS_SOCIETARIOS = {
+    "sa", "srl", "sas", "sau", "saic", "saci", "sca", "scs", "sh", "se", "coop", "ltda", "cia",
+    "sociedad", "anonima", "responsabilidad", "limitada", "de", "y", "e", "hnos",
+}
+_PATRON_PUNTUACION = re.compile(r"[^\w\s]")
+_PATRON_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_proveedor(nombre: str) -> str:
+    """
+    Nombre de proveedor comparable: minúsculas, sin tildes ni puntuación y
+    sin la forma societaria del final ("Pérez Hnos. S.R.L." -> "perez").
+    """
+    texto = normalizar_texto(str(nombre or ""))
+    # "s.r.l." -> "srl" antes de sacar el resto de la puntuación
+    texto = _PATRON_PUNTUACION.sub(lambda m: "" if m.group() == "." else " ", texto)
+    palabras = _PATRON_ESPACIOS.sub(" ", texto).strip().split(" ")
+    while len(palabras) > 1 and palabras[-1] in SUFIJOS_SOCIETARIOS:
+        palabras.pop()
+    return " ".join(p for p in palabras if p)
+
+
+def trigramas(nombre_normalizado: str) -> frozenset:
+    """Trigramas de caracteres, con bordes marcados para que cuenten el principio y el fin"""
+    if not nombre_normalizado:
+        return frozenset()
+    texto = f"  {nombre_normalizado} "
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+def similitud_nombres(a: str, b: str) -> float:
+    """Similitud coseno de trigramas entre dos nombres de proveedor (1.0 = mismo nombre normalizado)"""
+    norm_a, norm_b = normalizar_proveedor(a), normalizar_proveedor(b)
+    if not norm_a or not norm_b:
+        return 0.0
+    if norm_a == norm_b:
+        return 1.0
+    tri_a, tri_b = trigramas(norm_a), trigramas(norm_b)
+    return len(tri_a & tri_b) / sqrt(len(tri_a) * len(tri_b))
+
+
+class IndiceProveedores:
+    """
+    Índice de trigramas de los proveedores de un lado de la conciliación (el
+    libro de compras), armado una vez por `conciliar_compras`.
+
+    Los nombres se normalizan y se deduplican: 50k facturas suelen ser unos
+    pocos miles de proveedores distintos. `similitudes` calcula la similitud
+    coseno contra todos los nombres de consulta a la vez, como producto de
+    matrices ralas (consulta x trigramas) · (trigramas x proveedores): solo
+    aparecen los pares que comparten algún trigrama, nunca los N x M.
+    """
+
+    def __init__(self, nombres: Sequence[str]):
+        self.nombres: List[str] = []
+        self.filas_por_nombre: List[List[int]] = []
+        posicion: Dict[str, int] = {}
+        for fila, nombre in enumerate(nombres):
+            normalizado = normalizar_proveedor(nombre)
+            if not normalizado:
+                continue
+            if normalizado not in posicion:
+                posicion[normalizado] = len(self.nombres)
+                self.nombres.append(normalizado)
+                self.filas_por_nombre.append([])
+            self.filas_por_nombre[posicion[normalizado]].append(fila)
+
+        self.vocabulario: Dict[str, int] = {}
+        self._trigramas = [self._ids(trigramas(n), agregar=True) for n in self.nombres]
+        if SCIPY_AVAILABLE:
+            self._matriz = self._matriz_normalizada(self._trigramas, len(self.vocabulario)).T.tocsr()
+        else:
+            # Sin scipy, el mismo producto con un índice invertido trigrama -> nombres
+            self._invertido: Dict[int, List[int]] = defaultdict(list)
+            for k, ids in enumerate(self._trigramas):
+                for t in ids:
+                    self._invertido[t].append(k)
+
+    def _ids(self, tris: Iterable[str], agregar: bool = False) -> List[int]:
+        if agregar:
+            return [self.vocabulario.setdefault(t, len(self.vocabulario)) for t in tris]
+        return [self.vocabulario[t] for t in tris if t in self.vocabulario]
+
+    @staticmethod
+    def _matriz_normalizada(filas: List[List[int]], columnas: int, largos: List[int] = None) -> "csr_matrix":
+        """Una fila por nombre con 1/sqrt(#trigramas) en sus trigramas: el producto da el coseno"""
+        largos = largos or [len(ids) for ids in filas]
+        indptr = np.zeros(len(filas) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(ids) for ids in filas])
+        indices = np.fromiter((t for ids in filas for t in ids), dtype=np.int64, count=int(indptr[-1]))
+        datos = np.repeat([1 / sqrt(l) if l else 0.0 for l in largos], [len(ids) for ids in filas])
+        return csr_matrix((datos, indices, indptr), shape=(len(filas), columnas))
+
+    def similitudes(self, consultas: Sequence[str],
+                    minimo: float = SIMILITUD_MINIMA_PROVEEDOR) -> Dict[Tuple[int, int], float]:
+        """
+        Similitud de cada nombre de `consultas` (por posición) contra cada
+        fila indexada, solo los pares con similitud >= `minimo`:
+        {(posición en consultas, fila indexada): similitud}.
+        """
+        posicion: Dict[str, int] = {}
+        filas_consulta: List[List[int]] = []
+        normalizados: List[str] = []
+        for fila, nombre in enumerate(consultas):
+            normalizado = normalizar_proveedor(nombre)
+            if not normalizado:
+                continue
+            if normalizado not in posicion:
+                posicion[normalizado] = len(normalizados)
+                normalizados.append(normalizado)
+                filas_consulta.append([])
+            filas_consulta[posicion[normalizado]].append(fila)
+        if not normalizados or not self.nombres:
+            return {}
+
+        # Los trigramas que el índice no tiene igual cuentan en el largo de la consulta
+        tris = [trigramas(n) for n in normalizados]
+        ids = [self._ids(t) for t in tris]
+        pares = self._pares_similares(normalizados, tris, ids, minimo)
+
+        resultado: Dict[Tuple[int, int], float] = {}
+        for q, k, similitud in pares:
+            for fila_q in filas_consulta[q]:
+                for fila_k in self.filas_por_nombre[k]:
+                    resultado[(fila_q, fila_k)] = similitud
+        return resultado
+
+    def _pares_similares(self, normalizados: List[str], tris: List[frozenset], ids: List[List[int]],
+                         minimo: float) -> List[Tuple[int, int, float]]:
+        """(nombre de consulta, nombre indexado, coseno) entre nombres distintos deduplicados"""
+        if SCIPY_AVAILABLE:
+            consulta = self._matriz_normalizada(ids, len(self.vocabulario), [len(t) for t in tris])
+            producto = (consulta @ self._matriz).tocoo()
+            mascara = producto.data >= minimo - 1e-9
+            pares = zip(producto.row[mascara].tolist(), producto.col[mascara].tolist(),
+                        producto.data[mascara].tolist())
+        else:
+            pares = []
+            for q, ids_q in enumerate(ids):
+                comunes: Dict[int, int] = defaultdict(int)
+                for t in ids_q:
+                    for k in self._invertido[t]:
+                        comunes[k] += 1
+                largo_q = len(tris[q])
+                for k, cantidad in comunes.items():
+                    similitud = cantidad / sqrt(largo_q * len(self._trigramas[k]))
+                    if similitud >= minimo - 1e-9:
+                        pares.append((q, k, similitud))
+        # Mismo nombre normalizado: 1.0 exacto (sin el error de redondeo del producto)
+        return [(q, k, 1.0 if normalizados[q] == self.nombres[k] else min(similitud, 1.0))
+                for q, k, similitud in pares]
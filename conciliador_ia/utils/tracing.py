@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Variable de entorno con la ruta del archivo JSONL donde volcar los spans (opcional)
+SPANS_JSONL_ENV = "CONCILIADOR_SPANS_JSONL"
+
+_tracer_actual: ContextVar[Optional["Tracer"]] = ContextVar("tracer_actual", default=None)
+
+
+def debug_activo() -> bool:
+    """Indica si el modo debug está habilitado (variable DEBUG)"""
+    return os.getenv("DEBUG", "False").strip().lower() in ("1", "true", "yes", "si")
+
+
+def _rss_bytes() -> int:
+    """RSS actual del proceso; 0 si la plataforma no lo expone"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+@dataclass
+class Span:
+    """Una etapa medida: nombre, inicio, duración, filas procesadas y delta de memoria"""
+    name: str
+    start: float
+    duration_ms: float = 0.0
+    rows: Optional[int] = None
+    memory_delta_bytes: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    children: List["Span"] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "rows": self.rows,
+            "memory_delta_bytes": self.memory_delta_bytes,
+            "attrs": self.attrs,
+            "children": [hijo.to_dict() for hijo in self.children],
+        }
+
+
+class Tracer:
+    """
+    Árbol de spans de una ejecución. Mientras está activo (`with tracer:`) los
+    llamados a `span()` de este módulo se cuelgan del span abierto más reciente.
+    """
+
+    def __init__(self, name: str, jsonl_path: Optional[Union[str, Path]] = None, **attrs: Any):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.root = Span(name=name, start=time.time(), attrs=dict(attrs))
+        self.jsonl_path = jsonl_path if jsonl_path is not None else os.getenv(SPANS_JSONL_ENV)
+        self._stack: List[Span] = []
+        self._token = None
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        actual = Span(name=name, start=time.time(), attrs=dict(attrs))
+        padre = self._stack[-1] if self._stack else self.root
+        padre.children.append(actual)
+        self._stack.append(actual)
+        with _medir(actual):
+            try:
+                yield actual
+            finally:
+                self._stack.pop()
+
+    def __enter__(self) -> "Tracer":
+        self._token = _tracer_actual.set(self)
+        self._medicion = _medir(self.root)
+        self._medicion.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._medicion.__exit__(exc_type, exc, tb)
+        _tracer_actual.reset(self._token)
+        if exc_type is not None:
+            self.root.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        if self.jsonl_path:
+            try:
+                self.write_jsonl(self.jsonl_path)
+            except OSError as e:
+                logger.warning(f"No se pudieron guardar los spans en {self.jsonl_path}: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, **self.root.to_dict()}
+
+    def write_jsonl(self, path: Union[str, Path]) -> None:
+        """Agrega un registro por span (aplanado, con su padre y profundidad) al archivo JSONL"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for registro in self._aplanar(self.root, parent=None, depth=0):
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+    def _aplanar(self, nodo: Span, parent: Optional[str], depth: int) -> Iterator[Dict[str, Any]]:
+        registro = nodo.to_dict()
+        registro.pop("children")
+        registro.update({"trace_id": self.trace_id, "parent": parent, "depth": depth})
+        yield registro
+        for hijo in nodo.children:
+            yield from self._aplanar(hijo, parent=nodo.name, depth=depth + 1)
+
+
+@contextmanager
+def _medir(span: Span) -> Iterator[None]:
+    inicio = time.perf_counter()
+    memoria_inicio = _rss_bytes()
+    try:
+        yield
+    finally:
+        span.duration_ms = (time.perf_counter() - inicio) * 1000
+        span.memory_delta_bytes = _rss_bytes() - memoria_inicio
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """
+    Mide una etapa dentro del Tracer activo. Sin Tracer activo igual mide,
+    pero el span no queda registrado en ningún árbol.
+    """
+    tracer = _tracer_actual.get()
+    if tracer is None:
+        suelto = Span(name=name, start=time.time(), attrs=dict(attrs))
+        with _medir(suelto):
+            yield suelto
+        return
+    with tracer.span(name, **attrs) as actual:
+        yield actual
@@ -0,0 +1,67 @@
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class UploadTooLargeError(Exception):
+    """El archivo subido supera el tamaño máximo permitido"""
+
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        super().__init__(f"El archivo {filename} supera el máximo de {max_bytes} bytes")
+
+
+@dataclass
+class UploadResult:
+    """Resultado de guardar un archivo subido en disco"""
+    path: str
+    size: int
+    sha256: str
+
+
+async def guardar_upload_en_disco(
+    upload,
+    destino: Union[str, Path],
+    max_bytes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> UploadResult:
+    """
+    Copia un UploadFile a disco en bloques de `chunk_size` sin cargarlo entero en memoria.
+
+    Calcula el SHA-256 a medida que escribe y aborta apenas se supera `max_bytes`,
+    eliminando el archivo parcial y levantando UploadTooLargeError.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    nombre = getattr(upload, "filename", None) or destino.name
+
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(destino, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(nombre, max_bytes)
+                sha256.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        try:
+            os.unlink(destino)
+        except OSError:
+            pass
+        raise
+
+    logger.info(f"Archivo guardado: {destino} ({size} bytes)")
+    return UploadResult(path=str(destino), size=size, sha256=sha256.hexdigest())
@@ -8,6 +8,8 @@ import re
 import logging
 from typing import Optional, Dict, Any
 
+from .cuit import cuit_placeholder, es_cuit_valido, limpiar_cuit, sugerir_reparaciones
+
 logger = logging.getLogger(__name__)
 
 class ContabilidadValidator:
@@ -32,13 +34,19 @@ class ContabilidadValidator:
         """
         try:
             # Limpiar CUIT
-            cuit_limpio = re.sub(r'[^\d]', '', str(cuit))
+            cuit_limpio = limpiar_cuit(cuit)
             
-            # Validar formato estándar (11 dígitos)
-            if len(cuit_limpio) == 11:
+            # Validar formato estándar (11 dígitos y dígito verificador)
+            if es_cuit_valido(cuit_limpio):
                 logger.info(f"CUIT válido: {cuit_limpio}")
                 return cuit_limpio
             
+            # Las reparaciones no se aplican nunca: quedan como sugerencia en el log
+            if len(cuit_limpio) == 11:
+                logger.warning(f"CUIT con dígito verificador incorrecto: {cuit_limpio} "
+                               f"(sugerencias: {sugerir_reparaciones(cuit_limpio)})")
+                return cuit_limpio
+            
             # Si no es válido, generar CUIT dummy de 8 dígitos
             elif len(cuit_limpio) < 11:
                 cuit_dummy = self.generar_cuit_dummy(cuit_limpio)
@@ -56,16 +64,18 @@ class ContabilidadValidator:
             return self.generar_cuit_dummy("00000000")
     
     def generar_cuit_dummy(self, base: str = "00000000") -> str:
-        """Genera CUIT dummy de 8 dígitos para clientes sin identificación válida"""
+        """
+        Genera CUIT dummy de 8 dígitos para clientes sin identificación válida.
+        Es determinista: la misma base da siempre el mismo dummy.
+        """
         # Usar base si existe, sino generar 8 dígitos
         if base and len(base) > 0:
             base_limpia = re.sub(r'[^\d]', '', base)
             if len(base_limpia) >= 8:
                 return base_limpia[:8]
         
-        # Generar 8 dígitos aleatorios
-        import random
-        cuit_dummy = ''.join([str(random.randint(0, 9)) for _ in range(8)])
+        # Los 8 dígitos del medio de un CUIT de relleno derivado de la base
+        cuit_dummy = cuit_placeholder(base)[2:10]
         logger.info(f"Generado CUIT dummy: {cuit_dummy}")
         return cuit_dummy
     
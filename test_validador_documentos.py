@@ -41,14 +41,15 @@ def test_validadores():
     # CUIT Tests
     print("\n   CUIT Tests:")
     cuit_tests = [
-        "20123456789",      # CUIT válido
-        "20-12345678-9",    # CUIT con guiones
+        "20123456786",      # CUIT válido
+        "20123456789",      # CUIT con dígito verificador incorrecto
+        "20-12345678-6",    # CUIT con guiones
         "20.123.456.789",   # CUIT con puntos
         "2012345678",       # CUIT corto
         "201234567890",     # CUIT largo
         "abc12345678",      # CUIT con letras
         "",                 # CUIT vacío
-        "20123456789.0"     # CUIT con .0 de Excel
+        "20123456786.0"     # CUIT con .0 de Excel
     ]
     
     for cuit in cuit_tests: